@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Dense vs. sparse (BM25) vs. hybrid (RRF) retrieval benchmark on the repo's docs.
+
+Chunks the markdown under ``--docs`` with the ingestion chunker, embeds it with
+a real Ollama model and writes it through ``QdrantBulkWriter`` with BM25 sparse
+vectors (Qdrant in-memory mode by default, or ``--qdrant-url``).
+
+Queries are generated from the corpus: identifiers that occur in only a few
+chunks (env vars such as ``LLAMAINDEX_CHUNK_SIZE``, snake_case function names,
+dotted config keys) are wrapped in a natural question, and every chunk that
+contains the identifier counts as relevant. For each mode it reports hit rate
+and MRR at ``--top-k`` plus retrieval latency (query embedding excluded).
+
+    python benchmarks/bench_hybrid_search.py --docs ../../docs --queries 100
+    python benchmarks/bench_hybrid_search.py --output hybrid.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Sequence, Set, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+for path in (ROOT, ROOT / "shared"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+REPO_ROOT = ROOT.parents[1]
+COLLECTION = "bench_hybrid"
+MODES = ("dense", "sparse", "hybrid")
+
+IDENTIFIER_RE = re.compile(
+    r"\b(?:[A-Z][A-Z0-9]+(?:_[A-Z0-9]+)+"  # ENV_VAR_NAMES
+    r"|[a-z][a-z0-9]+(?:_[a-z0-9]+){2,}"  # snake_case_functions
+    r"|[a-z][a-z0-9]+(?:\.[a-z][a-z0-9_]+){2,})\b"  # dotted.config.keys
+)
+QUESTION_TEMPLATES = (
+    "What is {} used for?",
+    "How do I configure {}?",
+    "Where is {} documented?",
+)
+
+
+def load_chunks(docs: Path, max_files: int, chunk_size: int, chunk_overlap: int):
+    from ingestion_service.chunking import _documents_to_nodes, load_file_documents
+
+    files = sorted(p for p in docs.rglob("*") if p.suffix in {".md", ".mdx"} and "node_modules" not in p.parts)
+    documents = [doc for path in files[:max_files] for doc in load_file_documents(str(path))]
+    return _documents_to_nodes(documents, chunk_size, chunk_overlap)
+
+
+def build_queries(nodes, count: int, max_hits: int, seed: int) -> List[Tuple[str, Set[str]]]:
+    """Questions about identifiers that appear in 1..max_hits chunks."""
+    occurrences: Dict[str, Set[str]] = defaultdict(set)
+    for node in nodes:
+        for identifier in set(IDENTIFIER_RE.findall(node.get_content())):
+            occurrences[identifier].add(node.node_id)
+    candidates = sorted(ident for ident, ids in occurrences.items() if len(ids) <= max_hits)
+    rng = random.Random(seed)
+    chosen = rng.sample(candidates, min(count, len(candidates)))
+    return [(rng.choice(QUESTION_TEMPLATES).format(ident), occurrences[ident]) for ident in chosen]
+
+
+def _percentile(values: Sequence[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(args: argparse.Namespace) -> dict:
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models as rest
+
+    from ingestion_service.ollama_embedding import BatchedOllamaEmbedding
+    from ingestion_service.qdrant_writer import QdrantBulkWriter
+    from query_service.hybrid import reciprocal_rank_fusion
+    from sparse_vectors import BM25SparseEncoder, SPARSE_VECTOR_NAME
+
+    nodes = load_chunks(Path(args.docs), args.max_files, args.chunk_size, args.chunk_overlap)
+    queries = build_queries(nodes, args.queries, args.max_hits, args.seed)
+    if not queries:
+        raise SystemExit(f"No identifier queries could be built from {args.docs}")
+
+    model = BatchedOllamaEmbedding(model_name=args.embed_model, base_url=args.ollama_url, context_length=8192)
+    started = time.perf_counter()
+    vectors = asyncio.run(model.aget_text_embedding_batch([node.get_content() for node in nodes]))
+    embed_seconds = time.perf_counter() - started
+    for node, vector in zip(nodes, vectors):
+        node.embedding = vector
+
+    client = QdrantClient(url=args.qdrant_url) if args.qdrant_url else QdrantClient(":memory:")
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    encoder = BM25SparseEncoder()
+    writer = QdrantBulkWriter(client, COLLECTION, sparse_encoder=encoder, sparse_vector_name=SPARSE_VECTOR_NAME)
+    writer.add(nodes)
+    writer.flush()
+    writer.close()
+
+    candidates = max(args.top_k, args.candidates)
+
+    def dense_ids(vector) -> List[str]:
+        points = client.query_points(COLLECTION, query=vector, limit=candidates).points
+        return [str(point.id) for point in points]
+
+    def sparse_ids(text: str) -> List[str]:
+        indices, values = encoder.encode_query(text)
+        if not indices:
+            return []
+        points = client.query_points(
+            COLLECTION,
+            query=rest.SparseVector(indices=indices, values=values),
+            using=SPARSE_VECTOR_NAME,
+            limit=candidates,
+        ).points
+        return [str(point.id) for point in points]
+
+    search = {
+        "dense": lambda text, vector: dense_ids(vector),
+        "sparse": lambda text, vector: sparse_ids(text),
+        "hybrid": lambda text, vector: [
+            item for item, _ in reciprocal_rank_fusion([dense_ids(vector), sparse_ids(text)], key=lambda item: item)
+        ],
+    }
+
+    query_vectors = asyncio.run(model.aget_text_embedding_batch([text for text, _ in queries]))
+    results: Dict[str, dict] = {}
+    for mode in MODES:
+        hits, reciprocal_ranks, latencies = 0, [], []
+        for (text, relevant), vector in zip(queries, query_vectors):
+            started = time.perf_counter()
+            ranked = search[mode](text, vector)[: args.top_k]
+            latencies.append((time.perf_counter() - started) * 1000)
+            rank = next((pos for pos, point_id in enumerate(ranked, start=1) if point_id in relevant), None)
+            hits += rank is not None
+            reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        results[mode] = {
+            f"hit_rate@{args.top_k}": round(hits / len(queries), 4),
+            f"mrr@{args.top_k}": round(statistics.mean(reciprocal_ranks), 4),
+            "latency_ms_p50": round(_percentile(latencies, 50), 3),
+            "latency_ms_p95": round(_percentile(latencies, 95), 3),
+        }
+
+    client.delete_collection(COLLECTION)
+    return {
+        "docs": str(args.docs),
+        "chunks": len(nodes),
+        "queries": len(queries),
+        "embed_model": args.embed_model,
+        "corpus_embed_seconds": round(embed_seconds, 2),
+        "top_k": args.top_k,
+        "candidates": candidates,
+        "results": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", default=str(REPO_ROOT / "docs"), help="Directory of markdown docs to index")
+    parser.add_argument("--max-files", type=int, default=400)
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--chunk-overlap", type=int, default=96)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--max-hits", type=int, default=3, help="Only use identifiers found in at most N chunks")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--candidates", type=int, default=20, help="Results fetched per leg before fusion")
+    parser.add_argument("--ollama-url", default="http://localhost:11434")
+    parser.add_argument("--embed-model", default="nomic-embed-text")
+    parser.add_argument("--qdrant-url", default=None, help="Use a real Qdrant instead of in-memory mode")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+    print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
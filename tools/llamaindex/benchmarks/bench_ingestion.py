@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Ingestion throughput benchmark.
+
+Builds synthetic markdown, MDX and PDF corpora and runs the real ingestion
+code against a deterministic fake Ollama embedding server and Qdrant (local
+in-memory mode by default, or ``--qdrant-url``). For each corpus size it
+reports per-stage timings (scan, load, chunk, embed, upsert), the end-to-end
+streaming pipeline time, chunks/sec and peak RSS as JSON.
+
+    python benchmarks/bench_ingestion.py --sizes 50,500 --output bench.json
+    python benchmarks/bench_ingestion.py --sizes 50,500 --compare bench.json
+
+Every size runs in a fresh subprocess so peak RSS is not inflated by earlier
+runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import random
+import resource
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+WORDS = (
+    "order book latency strategy signal backtest risk position market data feed "
+    "websocket candle volume spread slippage execution broker account portfolio "
+    "ingestion vector embedding collection query cache gateway service workspace"
+).split()
+
+
+# ----------------------------------------------------------------------
+# Corpus generation
+# ----------------------------------------------------------------------
+def _paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 18))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def _markdown(rng: random.Random, idx: int, sections: int) -> str:
+    parts = [f"---\ntitle: Document {idx}\ntags: [benchmark, synthetic]\n---\n", f"# Document {idx}\n"]
+    for section in range(sections):
+        parts.append(f"\n## Section {section}\n\n{_paragraph(rng, rng.randint(3, 8))}\n")
+        if section % 3 == 0:
+            parts.append(f"\n```python\ndef handler_{section}(event):\n    return event\n```\n")
+    return "".join(parts)
+
+
+def _mdx(rng: random.Random, idx: int, sections: int) -> str:
+    body = _markdown(rng, idx, sections)
+    return body.replace(
+        "\n## Section 1\n",
+        '\nimport Tabs from "@theme/Tabs";\n\n<Tabs groupId="lang">\n  <TabItem value="py">Python</TabItem>\n</Tabs>\n\n## Section 1\n',
+    )
+
+
+def _pdf(rng: random.Random, idx: int, lines: int) -> bytes:
+    """Build a minimal single-page text PDF (no external dependencies)."""
+    text_lines = [f"Document {idx}"] + [
+        " ".join(rng.choice(WORDS) for _ in range(10)) for _ in range(lines)
+    ]
+    escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in text_lines]
+    stream = "BT /F1 10 Tf 40 800 Td 12 TL\n" + "".join(f"({line}) '\n" for line in escaped) + "ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+        "/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+def build_corpus(root: Path, files: int, seed: int = 42) -> Dict[str, int]:
+    """Write ``files`` documents (70% md, 20% mdx, 10% pdf) in nested folders."""
+    rng = random.Random(seed)
+    counts = {"md": 0, "mdx": 0, "pdf": 0}
+    total_bytes = 0
+    for idx in range(files):
+        folder = root / f"area-{idx % 7}" / f"topic-{idx % 13}"
+        folder.mkdir(parents=True, exist_ok=True)
+        roll = idx % 10
+        if roll < 7:
+            path, data = folder / f"doc-{idx}.md", _markdown(rng, idx, rng.randint(3, 15)).encode()
+            counts["md"] += 1
+        elif roll < 9:
+            path, data = folder / f"doc-{idx}.mdx", _mdx(rng, idx, rng.randint(3, 15)).encode()
+            counts["mdx"] += 1
+        else:
+            path, data = folder / f"doc-{idx}.pdf", _pdf(rng, idx, rng.randint(20, 60))
+            counts["pdf"] += 1
+        path.write_bytes(data)
+        total_bytes += len(data)
+    counts["bytes"] = total_bytes
+    return counts
+
+
+# ----------------------------------------------------------------------
+# Fake Ollama embedding server
+# ----------------------------------------------------------------------
+def fake_vector(text: str, dim: int) -> List[float]:
+    """Deterministic pseudo-random vector derived from the text hash."""
+    values: List[float] = []
+    counter = 0
+    while len(values) < dim:
+        digest = hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        values.extend(v / 4294967295.0 - 0.5 for v in struct.unpack("<8I", digest))
+        counter += 1
+    return values[:dim]
+
+
+def start_fake_ollama(dim: int, latency_ms: float, per_item_ms: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):  # noqa: D401 - silence request logging
+            return
+
+        def _reply(self, payload: dict) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._reply({"models": []})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/api/embed":
+                inputs = request.get("input") or []
+                if isinstance(inputs, str):
+                    inputs = [inputs]
+                time.sleep((latency_ms + per_item_ms * len(inputs)) / 1000.0)
+                self._reply({"model": request.get("model"), "embeddings": [fake_vector(t, dim) for t in inputs]})
+            elif self.path == "/api/embeddings":
+                time.sleep((latency_ms + per_item_ms) / 1000.0)
+                self._reply({"embedding": fake_vector(request.get("prompt", ""), dim)})
+            else:
+                self.send_error(404)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ----------------------------------------------------------------------
+# One benchmark run (executed in a subprocess)
+# ----------------------------------------------------------------------
+def _peak_rss_mb() -> float:
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(self_kb, children_kb) / 1024.0, 1)
+
+
+def run_one(args: argparse.Namespace) -> dict:
+    if args.parse_workers is not None:
+        os.environ["LLAMAINDEX_PARSE_WORKERS"] = str(args.parse_workers)
+
+    from qdrant_client import QdrantClient
+
+    from ingestion_service.chunking import _documents_to_nodes, load_file_documents
+    from ingestion_service.jobs import NullProgress
+    from ingestion_service.ollama_embedding import BatchedOllamaEmbedding
+    from ingestion_service.pipeline import PipelineConfig, run_ingestion_pipeline
+    from ingestion_service.qdrant_writer import QdrantBulkWriter
+    from ingestion_service.scanner import ScanFilters, scan_directory
+    from ingestion_service.workers import shutdown_parse_executor
+
+    server = start_fake_ollama(args.dim, args.embed_latency_ms, args.embed_per_item_ms)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    client = QdrantClient(url=args.qdrant_url) if args.qdrant_url else QdrantClient(":memory:")
+    stages: Dict[str, float] = {}
+    collections: List[str] = []
+
+    def embed_model() -> BatchedOllamaEmbedding:
+        return BatchedOllamaEmbedding(
+            model_name="bench-embed",
+            base_url=base_url,
+            context_length=8192,
+            max_in_flight=args.embed_in_flight,
+        )
+
+    with tempfile.TemporaryDirectory(prefix="llamaindex-bench-") as tmp:
+        corpus_root = Path(tmp) / "corpus"
+        corpus = build_corpus(corpus_root, args.files, seed=args.seed)
+
+        started = time.perf_counter()
+        scan = scan_directory(
+            str(corpus_root),
+            ScanFilters(
+                allowed_extensions={".md", ".mdx", ".pdf"},
+                excluded_dirs=set(),
+                excluded_names=set(),
+            ),
+            cache=None,
+        )
+        stages["scan"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        documents = [doc for path in scan.files for doc in load_file_documents(path)]
+        stages["load"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        nodes = _documents_to_nodes(documents, args.chunk_size, args.chunk_overlap)
+        stages["chunk"] = time.perf_counter() - started
+
+        model = embed_model()
+        texts = [node.get_content() for node in nodes]
+        started = time.perf_counter()
+        vectors = asyncio.run(model.aget_text_embedding_batch(texts))
+        stages["embed"] = time.perf_counter() - started
+        for node, vector in zip(nodes, vectors):
+            node.embedding = vector
+
+        collections.append("bench_stages")
+        writer = QdrantBulkWriter(client, "bench_stages")
+        started = time.perf_counter()
+        for start in range(0, len(nodes), 256):
+            writer.add(nodes[start:start + 256])
+        writer.flush()
+        stages["upsert"] = time.perf_counter() - started
+        writer.close()
+        del documents, nodes, texts, vectors
+
+        collections.append("bench_pipeline")
+        writer = QdrantBulkWriter(client, "bench_pipeline")
+        started = time.perf_counter()
+        stats = asyncio.run(
+            run_ingestion_pipeline(
+                scan.files,
+                {},
+                writer,
+                embed_model(),
+                PipelineConfig(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap),
+                NullProgress(),
+            )
+        )
+        pipeline_seconds = time.perf_counter() - started
+        writer.close()
+        shutdown_parse_executor()
+
+    for name in collections:
+        try:
+            client.delete_collection(name)
+        except Exception:
+            pass
+    server.shutdown()
+
+    return {
+        "files": args.files,
+        "corpus": corpus,
+        "chunks": stats.chunks_generated,
+        "stages_seconds": {name: round(value, 4) for name, value in stages.items()},
+        "stages_total_seconds": round(sum(stages.values()), 4),
+        "pipeline_seconds": round(pipeline_seconds, 4),
+        "chunks_per_second": round(stats.chunks_generated / pipeline_seconds, 1) if pipeline_seconds else None,
+        "errors": len(stats.errors),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+# ----------------------------------------------------------------------
+# Orchestration
+# ----------------------------------------------------------------------
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(previous: dict, current: dict) -> None:
+    """Print per-size deltas between two benchmark reports."""
+    old_by_size = {run["files"]: run for run in previous.get("results", [])}
+    for run in current["results"]:
+        old = old_by_size.get(run["files"])
+        if not old:
+            continue
+        print(f"files={run['files']} ({previous.get('commit')} -> {current.get('commit')})", file=sys.stderr)
+        pairs = [("pipeline_seconds", run["pipeline_seconds"], old["pipeline_seconds"])]
+        pairs += [
+            (f"stage.{name}", value, old["stages_seconds"].get(name))
+            for name, value in run["stages_seconds"].items()
+        ]
+        pairs += [
+            ("chunks_per_second", run["chunks_per_second"], old["chunks_per_second"]),
+            ("peak_rss_mb", run["peak_rss_mb"], old["peak_rss_mb"]),
+        ]
+        for label, new_value, old_value in pairs:
+            if not old_value or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value * 100
+            print(f"  {label:<20} {old_value:>10} -> {new_value:>10}  ({change:+.1f}%)", file=sys.stderr)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50,250", help="Comma-separated corpus sizes (files)")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--chunk-overlap", type=int, default=96)
+    parser.add_argument("--embed-latency-ms", type=float, default=5.0, help="Fixed latency per embed request")
+    parser.add_argument("--embed-per-item-ms", type=float, default=0.5, help="Extra latency per embedded chunk")
+    parser.add_argument("--embed-in-flight", type=int, default=2)
+    parser.add_argument("--parse-workers", type=int, default=None, help="Overrides LLAMAINDEX_PARSE_WORKERS")
+    parser.add_argument("--qdrant-url", default=None, help="Use a real Qdrant instead of in-memory mode")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="Previous JSON report to diff against")
+    parser.add_argument("--files", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(args)))
+        return 0
+
+    # Forward run parameters to the per-size subprocesses, minus orchestrator-only options.
+    orchestrator_only = ("--sizes", "--output", "--compare")
+    passthrough: List[str] = []
+    skip = False
+    for arg in sys.argv[1:]:
+        if skip:
+            skip = False
+        elif arg in orchestrator_only:
+            skip = True
+        elif not arg.startswith(tuple(f"{option}=" for option in orchestrator_only)):
+            passthrough.append(arg)
+
+    results = []
+
+    for size in [int(value) for value in args.sizes.split(",") if value.strip()]:
+        print(f"Running benchmark with {size} files...", file=sys.stderr)
+        completed = subprocess.run(
+            [sys.executable, __file__, "--run-one", "--files", str(size), *passthrough],
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            print(completed.stderr, file=sys.stderr)
+            return completed.returncode
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": {
+            "dim": args.dim,
+            "chunk_size": args.chunk_size,
+            "chunk_overlap": args.chunk_overlap,
+            "embed_latency_ms": args.embed_latency_ms,
+            "embed_per_item_ms": args.embed_per_item_ms,
+            "embed_in_flight": args.embed_in_flight,
+            "qdrant": args.qdrant_url or ":memory:",
+        },
+        "results": results,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n")
+    else:
+        print(payload)
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark Qdrant write throughput: LlamaIndex ``QdrantVectorStore.add`` vs the
+ingestion bulk writer.
+
+Requires a local Qdrant (REST on QDRANT_PORT, gRPC on QDRANT_GRPC_PORT):
+
+    docker run -p 6333:6333 -p 6334:6334 qdrant/qdrant
+    python benchmarks/bench_qdrant_upsert.py --points 20000 --dim 768
+
+Each variant writes into its own throw-away collection, which is dropped
+afterwards.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from llama_index.core.schema import TextNode  # noqa: E402
+from llama_index.vector_stores.qdrant import QdrantVectorStore  # noqa: E402
+from qdrant_client import QdrantClient  # noqa: E402
+
+from ingestion_service.qdrant_writer import QdrantBulkWriter, create_bulk_client  # noqa: E402
+
+
+def make_nodes(count: int, dim: int, seed: int = 7) -> List[TextNode]:
+    rng = random.Random(seed)
+    nodes = []
+    for idx in range(count):
+        nodes.append(
+            TextNode(
+                id_=str(uuid.UUID(int=rng.getrandbits(128))),
+                text=f"benchmark chunk {idx} " + "lorem ipsum " * 40,
+                metadata={"file_path": f"/bench/file-{idx // 20}.md", "chunk_index": idx % 20},
+                embedding=[rng.random() for _ in range(dim)],
+            )
+        )
+    return nodes
+
+
+def run_variant(name: str, nodes: List[TextNode], batch: int, write: Callable[[List[TextNode]], None], finish: Callable[[], None]) -> float:
+    started = time.perf_counter()
+    for start in range(0, len(nodes), batch):
+        write(nodes[start:start + batch])
+    finish()
+    elapsed = time.perf_counter() - started
+    rate = len(nodes) / elapsed if elapsed else float("inf")
+    print(f"{name:<28} {len(nodes):>8} points  {elapsed:8.2f}s  {rate:10.0f} points/s")
+    return rate
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=10_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--batch", type=int, default=256, help="Nodes handed to add() per call (pipeline upsert batch)")
+    parser.add_argument("--bulk-batch", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--pause-indexing", action="store_true", help="Also run the bulk writer with indexing paused")
+    args = parser.parse_args()
+
+    host = os.getenv("QDRANT_HOST", "localhost")
+    port = int(os.getenv("QDRANT_PORT", "6333"))
+    rest_client = QdrantClient(host=host, port=port)
+    nodes = make_nodes(args.points, args.dim)
+    print(f"Qdrant {host}:{port}  points={args.points} dim={args.dim} batch={args.batch}")
+
+    results = {}
+    collections = []
+    try:
+        name = f"bench_default_{uuid.uuid4().hex[:8]}"
+        collections.append(name)
+        store = QdrantVectorStore(client=rest_client, collection_name=name, prefer_grpc=False)
+        results["default"] = run_variant("QdrantVectorStore.add", nodes, args.batch, store.add, lambda: None)
+
+        bulk_client = create_bulk_client(host, port)
+        variants = [("bulk", False)] + ([("bulk+paused-index", True)] if args.pause_indexing else [])
+        for label, pause in variants:
+            name = f"bench_{label.replace('+', '_').replace('-', '_')}_{uuid.uuid4().hex[:8]}"
+            collections.append(name)
+            writer = QdrantBulkWriter(bulk_client, name, batch_size=args.bulk_batch, workers=args.workers)
+            # Create the collection up front so indexing can be paused on it.
+            writer._ensure_collection(args.dim)
+            try:
+                if pause:
+                    with writer.indexing_paused():
+                        results[label] = run_variant(f"QdrantBulkWriter ({label})", nodes, args.batch, writer.add, writer.flush)
+                else:
+                    results[label] = run_variant(f"QdrantBulkWriter ({label})", nodes, args.batch, writer.add, writer.flush)
+            finally:
+                writer.close()
+    finally:
+        for name in collections:
+            try:
+                rest_client.delete_collection(name)
+            except Exception:
+                pass
+
+    baseline = results.get("default")
+    if baseline:
+        for label, rate in results.items():
+            if label != "default":
+                print(f"{label}: {rate / baseline:.1f}x the default path")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark semantic cache lookups: the old per-key cosine loop vs the
+vectorized ``QueryVectorIndex`` (exact matrix-vector product, and HNSW when
+hnswlib is installed).
+
+    python benchmarks/bench_semantic_cache.py --sizes 1000,10000,100000 --dim 384
+
+The legacy numbers exclude Redis entirely (no KEYS / HGETALL round trips), so
+they are a lower bound for the old implementation.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import semantic_cache  # noqa: E402
+from semantic_cache import QueryVectorIndex  # noqa: E402
+
+
+def legacy_lookup(entries: List[np.ndarray], query: np.ndarray) -> int:
+    """The pre-index algorithm: one cosine per cached entry in a Python loop."""
+    best, best_score = -1, 0.0
+    for idx, cached in enumerate(entries):
+        score = float(np.dot(query, cached) / (np.linalg.norm(query) * np.linalg.norm(cached)))
+        if score > best_score:
+            best, best_score = idx, score
+    return best
+
+
+def time_queries(lookup: Callable[[np.ndarray], object], queries: np.ndarray) -> float:
+    """Return mean milliseconds per lookup."""
+    started = time.perf_counter()
+    for query in queries:
+        lookup(query)
+    return (time.perf_counter() - started) * 1000 / len(queries)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--dim", type=int, default=384, help="all-MiniLM-L6-v2 produces 384-d vectors")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--legacy-queries", type=int, default=5, help="The legacy loop is slow; use fewer queries")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"dim={args.dim} queries={args.queries} hnswlib={'yes' if semantic_cache.hnswlib else 'no'}")
+    print(f"{'entries':>8} {'legacy ms':>10} {'exact ms':>10} {'ann ms':>10} {'ann build s':>12} {'ann recall':>11}")
+
+    for size in [int(value) for value in args.sizes.split(",") if value.strip()]:
+        vectors = rng.standard_normal((size, args.dim), dtype=np.float32)
+        # Queries are perturbed copies of cached entries, like near-duplicate questions.
+        picks = rng.integers(0, size, args.queries)
+        queries = vectors[picks] + 0.05 * rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+        legacy_entries = list(vectors)
+        legacy_ms = time_queries(lambda q: legacy_lookup(legacy_entries, q), queries[:args.legacy_queries])
+
+        exact = QueryVectorIndex(ann_threshold=sys.maxsize)
+        for idx in range(size):
+            exact.add(f"semantic:{idx}", vectors[idx])
+        exact_ms = time_queries(exact.search, queries)
+
+        ann_ms = build_s = recall = None
+        if semantic_cache.hnswlib is not None:
+            ann = QueryVectorIndex(ann_threshold=0)
+            for idx in range(size):
+                ann.add(f"semantic:{idx}", vectors[idx])
+            started = time.perf_counter()
+            ann.search(queries[0])  # builds the HNSW graph
+            build_s = time.perf_counter() - started
+            ann_ms = time_queries(ann.search, queries)
+            recall = sum(ann.search(q)[0] == exact.search(q)[0] for q in queries) / len(queries)
+
+        def fmt(value, pattern):
+            return pattern.format(value) if value is not None else "-"
+
+        print(
+            f"{size:>8} {legacy_ms:>10.3f} {exact_ms:>10.3f} {fmt(ann_ms, '{:.3f}'):>10} "
+            f"{fmt(build_s, '{:.2f}'):>12} {fmt(recall, '{:.3f}'):>11}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
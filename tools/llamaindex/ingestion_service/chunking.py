@@ -0,0 +1,168 @@
+"""
+Chunking helpers shared by the ingestion pipeline stages.
+
+Kept free of service state (Qdrant clients, FastAPI app) so they can run inside
+worker processes.
+"""
+
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from llama_index.core import Document, SimpleDirectoryReader
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import BaseNode
+
+try:  # Local package import (tests, running as module)
+    from .manifest import FILE_PATH_KEY, FileFingerprint, attach_fingerprints
+except ImportError:  # pragma: no cover - fallback for production image layout
+    from manifest import FILE_PATH_KEY, FileFingerprint, attach_fingerprints  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Per-file and positional metadata kept out of the embedded text. With them in,
+# identical chunks from different files (or unchanged sections of an edited file
+# whose chunk indices shift) embed differently and miss the embedding cache.
+EMBED_EXCLUDED_METADATA_KEYS = [FILE_PATH_KEY, "source", "chunk_index", "chunk_total"]
+
+
+def _build_node_parser(chunk_size: int, chunk_overlap: int) -> SentenceSplitter:
+    """Build a sentence splitter configured with the provided parameters."""
+    return SentenceSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+
+
+@lru_cache(maxsize=8)
+def _cached_splitter(chunk_size: int, chunk_overlap: int) -> SentenceSplitter:
+    return _build_node_parser(chunk_size, chunk_overlap)
+
+
+def split_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """Split raw text with a per-process cached splitter (pool-friendly)."""
+    return _cached_splitter(chunk_size, chunk_overlap).split_text(text)
+
+
+def _chunk_documents(
+    documents: List[Document],
+    chunk_size: int,
+    chunk_overlap: int,
+) -> List[Document]:
+    """Split loaded documents into smaller chunks that fit embedding context."""
+    if not documents:
+        return documents
+
+    splitter = _build_node_parser(chunk_size, chunk_overlap)
+    chunked: List[Document] = []
+
+    for doc in documents:
+        text: Optional[str] = getattr(doc, "text", None)
+        if not text and hasattr(doc, "get_content"):
+            try:
+                text = doc.get_content()  # type: ignore[attr-defined]
+            except Exception as err:
+                logger.warning("Failed to read text content for %s: %s", getattr(doc, "id_", "unknown"), err)
+                text = None
+
+        if not text:
+            chunked.append(doc)
+            continue
+
+        pieces = splitter.split_text(text)
+        if len(pieces) == 1:
+            chunked.append(doc)
+            continue
+
+        metadata = dict(getattr(doc, "metadata", {}) or {})
+        source_hint = metadata.get("source") or metadata.get("file_path") or metadata.get("path")
+        doc_id = getattr(doc, "id_", None)
+
+        for idx, piece in enumerate(pieces):
+            chunk_metadata = dict(metadata)
+            chunk_metadata["chunk_index"] = idx
+            chunk_metadata["chunk_total"] = len(pieces)
+            if source_hint:
+                chunk_metadata.setdefault("source", source_hint)
+
+            doc_kwargs: Dict[str, object] = {
+                "text": piece,
+                "metadata": chunk_metadata,
+            }
+            excluded_embed = getattr(doc, "excluded_embed_metadata_keys", None)
+            excluded_llm = getattr(doc, "excluded_llm_metadata_keys", None)
+            if excluded_embed:
+                doc_kwargs["excluded_embed_metadata_keys"] = excluded_embed
+            if excluded_llm:
+                doc_kwargs["excluded_llm_metadata_keys"] = excluded_llm
+            if doc_id:
+                doc_kwargs["id_"] = f"{doc_id}::chunk-{idx}"
+
+            chunked.append(Document(**doc_kwargs))
+
+        logger.debug(
+            "Document %s split into %s chunks (source=%s)",
+            doc_id or source_hint or "unknown",
+            len(pieces),
+            source_hint,
+        )
+
+    return chunked
+
+
+def _documents_to_nodes(
+    documents: List[Document],
+    chunk_size: int,
+    chunk_overlap: int,
+) -> List[BaseNode]:
+    """Chunk documents and convert them into nodes ready for embedding."""
+    chunked = _chunk_documents(documents, chunk_size, chunk_overlap)
+    if not chunked:
+        return []
+    nodes = _build_node_parser(chunk_size, chunk_overlap).get_nodes_from_documents(chunked)
+    for node in nodes:
+        excluded = list(node.excluded_embed_metadata_keys or [])
+        excluded.extend(key for key in EMBED_EXCLUDED_METADATA_KEYS if key not in excluded)
+        node.excluded_embed_metadata_keys = excluded
+    return nodes
+
+
+def load_file_documents(path: str) -> List[Document]:
+    """Load a single file with the same reader the service has always used."""
+    return SimpleDirectoryReader(input_files=[path]).load_data()
+
+
+def parse_and_chunk_file(
+    path: str,
+    fingerprint: Optional[FileFingerprint],
+    chunk_size: int,
+    chunk_overlap: int,
+) -> Tuple[int, List[BaseNode]]:
+    """
+    Load, fingerprint and chunk one file.
+
+    Runs in a parse worker process; returns the number of loaded documents and
+    the resulting nodes.
+    """
+    document_count, variants = parse_and_chunk_variants(path, fingerprint, [(chunk_size, chunk_overlap)])
+    return document_count, variants[0]
+
+
+def parse_and_chunk_variants(
+    path: str,
+    fingerprint: Optional[FileFingerprint],
+    variants: Sequence[Tuple[int, int]],
+) -> Tuple[int, List[List[BaseNode]]]:
+    """
+    Load one file once and chunk it with each ``(chunk_size, chunk_overlap)`` pair.
+
+    Used by fan-out ingestion, where collections with different embedding
+    context windows share a source directory.
+    """
+    documents = load_file_documents(path)
+    if fingerprint is not None:
+        attach_fingerprints(documents, {path: fingerprint})
+    return len(documents), [
+        _documents_to_nodes(documents, chunk_size, chunk_overlap)
+        for chunk_size, chunk_overlap in variants
+    ]
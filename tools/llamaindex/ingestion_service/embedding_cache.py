@@ -0,0 +1,249 @@
+"""
+Persistent chunk embedding cache for the ingestion pipeline.
+
+Chunks are keyed by (embedding model, SHA-256 of whitespace-normalized text) so
+boilerplate and unchanged sections of edited files are embedded once and reused
+across runs. Vectors live in a local SQLite file as packed float32 blobs; the
+store is bounded by entry count and evicts least-recently-used rows.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import PrivateAttr
+
+try:  # Local package import (tests, running as module)
+    from .monitoring import EMBEDDING_CACHE_ENTRIES, record_embedding_cache_lookup
+    from .ollama_embedding import EmbeddingBatchError
+except ImportError:  # pragma: no cover - fallback for production image layout
+    from monitoring import EMBEDDING_CACHE_ENTRIES, record_embedding_cache_lookup  # type: ignore
+    from ollama_embedding import EmbeddingBatchError  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Evict down to this fraction of max_entries so eviction is not paid on every insert.
+_EVICTION_LOW_WATERMARK = 0.9
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Collapse whitespace so formatting-only edits still hit the cache."""
+    return _WHITESPACE_RE.sub(" ", text or "").strip()
+
+
+def embedding_cache_key(model_name: str, text: str) -> str:
+    """Return the cache key for a chunk embedded with ``model_name``."""
+    digest = hashlib.sha256(normalize_chunk_text(text).encode("utf-8")).hexdigest()
+    return f"{model_name}:{digest}"
+
+
+class EmbeddingStore:
+    """Size-bounded SQLite store of embedding vectors."""
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        EMBEDDING_CACHE_ENTRIES.set(self._count)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Fetch cached vectors for ``keys``, refreshing their LRU timestamp."""
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite caps bound parameters; query in slices.
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+        return found
+
+    def put_many(self, items: Dict[str, Sequence[float]]) -> None:
+        """Insert vectors and evict least-recently-used rows past ``max_entries``."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings(key, vector, last_used) VALUES (?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if self._count > self.max_entries:
+                target = int(self.max_entries * _EVICTION_LOW_WATERMARK)
+                excess = self._count - target
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    " SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (excess,),
+                )
+                logger.info("Embedding cache evicted %s entries (max=%s)", excess, self.max_entries)
+                self._count = target
+        EMBEDDING_CACHE_ENTRIES.set(self._count)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._count = 0
+        EMBEDDING_CACHE_ENTRIES.set(0)
+
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    Embedding model wrapper that only forwards cache misses to the inner model.
+
+    Query embeddings are passed straight through; only document chunks are cached.
+    """
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _store: EmbeddingStore = PrivateAttr()
+    _hits: int = PrivateAttr(default=0)
+    _misses: int = PrivateAttr(default=0)
+
+    def __init__(self, inner: BaseEmbedding, store: EmbeddingStore, **kwargs):
+        super().__init__(
+            model_name=inner.model_name,
+            embed_batch_size=inner.embed_batch_size,
+            **kwargs,
+        )
+        self._inner = inner
+        self._store = store
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def inner(self) -> BaseEmbedding:
+        return self._inner
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self._hits + self._misses
+        return self._hits / total if total else 0.0
+
+    def _lookup(self, texts: List[str]):
+        keys = [embedding_cache_key(self.model_name, text) for text in texts]
+        cached = self._store.get_many(keys)
+        missing = [idx for idx, key in enumerate(keys) if key not in cached]
+        return keys, cached, missing
+
+    def _merge(self, texts, keys, cached, missing, fresh) -> List[List[float]]:
+        new_items = {keys[idx]: vector for idx, vector in zip(missing, fresh) if vector is not None}
+        self._store.put_many(new_items)
+        cached.update(new_items)
+
+        hits = len(texts) - len(missing)
+        self._hits += hits
+        self._misses += len(missing)
+        record_embedding_cache_lookup(self.model_name, hits, len(missing), self.hit_ratio)
+        return [cached.get(key) for key in keys]
+
+    def _partial_failure(self, texts, keys, cached, missing, exc: EmbeddingBatchError) -> EmbeddingBatchError:
+        """Cache what the inner model did embed and report failures against ``texts``."""
+        if len(exc.embeddings) != len(missing):
+            return exc
+        embeddings = self._merge(texts, keys, cached, missing, exc.embeddings)
+        return EmbeddingBatchError({missing[idx]: err for idx, err in exc.failed.items()}, embeddings)
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._inner.get_query_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return await self._inner.aget_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = self._lookup(texts)
+        try:
+            fresh = (
+                self._inner.get_text_embedding_batch([texts[idx] for idx in missing])
+                if missing
+                else []
+            )
+        except EmbeddingBatchError as exc:
+            raise self._partial_failure(texts, keys, cached, missing, exc) from exc
+        return self._merge(texts, keys, cached, missing, fresh)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = self._lookup(texts)
+        try:
+            fresh = (
+                await self._inner.aget_text_embedding_batch([texts[idx] for idx in missing])
+                if missing
+                else []
+            )
+        except EmbeddingBatchError as exc:
+            raise self._partial_failure(texts, keys, cached, missing, exc) from exc
+        return self._merge(texts, keys, cached, missing, fresh)
+
+
+_embedding_store: Optional[EmbeddingStore] = None
+
+
+def get_embedding_store() -> EmbeddingStore:
+    """Return the process-wide embedding store, configured from the environment."""
+    global _embedding_store
+    if _embedding_store is None:
+        path = os.getenv("LLAMAINDEX_EMBED_CACHE_PATH", "/tmp/llamaindex-embed-cache/embeddings.sqlite3")
+        max_entries = int(os.getenv("LLAMAINDEX_EMBED_CACHE_MAX_ENTRIES", "200000"))
+        _embedding_store = EmbeddingStore(path, max_entries=max_entries)
+        logger.info(
+            "Embedding cache ready at %s (entries=%s, max=%s)",
+            path,
+            len(_embedding_store),
+            max_entries,
+        )
+    return _embedding_store
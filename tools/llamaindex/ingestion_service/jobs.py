@@ -0,0 +1,473 @@
+"""
+Background ingestion jobs.
+
+Ingestion requests are recorded as jobs and executed by a bounded pool of asyncio
+workers, so HTTP callers can return immediately and poll ``GET /jobs/{id}``.
+Jobs are persisted in a local SQLite store whose columns mirror the
+``rag.ingestion_jobs`` hypertable; queued or interrupted jobs are re-queued on
+startup. When ``LLAMAINDEX_JOBS_DSN`` is set (and psycopg2 is installed) every
+state change is also mirrored to TimescaleDB on a best-effort basis.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+try:  # Optional dependency: TimescaleDB mirror
+    import psycopg2  # type: ignore
+    from psycopg2.extras import Json  # type: ignore
+except ImportError:  # pragma: no cover - mirror disabled without driver
+    psycopg2 = None  # type: ignore
+    Json = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+FINAL_STATUSES = ("completed", "failed", "cancelled")
+# Minimum seconds between persisted progress updates for a running job.
+_PROGRESS_FLUSH_SECONDS = 2.0
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class IngestionJob:
+    """A single ingestion job (field names follow rag.ingestion_jobs)."""
+    id: str
+    collection: str
+    job_type: str
+    trigger_type: str = "api_request"
+    status: str = "queued"
+    started_at: datetime = field(default_factory=_utcnow)
+    completed_at: Optional[datetime] = None
+    triggered_by: Optional[str] = None
+    documents_total: int = 0
+    documents_processed: int = 0
+    documents_failed: int = 0
+    documents_skipped: int = 0
+    chunks_total: int = 0
+    chunks_generated: int = 0
+    vectors_generated: int = 0
+    bytes_processed: int = 0
+    error_message: Optional[str] = None
+    failed_documents: List[str] = field(default_factory=list)
+    config_snapshot: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    running_since: Optional[float] = None
+
+    @property
+    def duration_ms(self) -> Optional[int]:
+        if self.completed_at is None:
+            return None
+        return max(int((self.completed_at - self.started_at).total_seconds() * 1000), 0)
+
+    def eta_seconds(self) -> Optional[float]:
+        """Estimate remaining time from the observed chunk (or file) rate."""
+        if self.status != "running" or self.running_since is None:
+            return None
+        elapsed = time.monotonic() - self.running_since
+        if self.chunks_total and self.chunks_generated:
+            done, total = self.chunks_generated, self.chunks_total
+        elif self.documents_total and self.documents_processed:
+            done, total = self.documents_processed, self.documents_total
+        else:
+            return None
+        rate = done / elapsed if elapsed > 0 else 0.0
+        if rate <= 0:
+            return None
+        return max(total - done, 0) / rate
+
+    def to_dict(self) -> Dict[str, Any]:
+        payload = asdict(self)
+        payload.pop("running_since", None)
+        payload["started_at"] = self.started_at.isoformat()
+        payload["completed_at"] = self.completed_at.isoformat() if self.completed_at else None
+        payload["duration_ms"] = self.duration_ms
+        eta = self.eta_seconds()
+        payload["eta_seconds"] = round(eta, 1) if eta is not None else None
+        return payload
+
+
+class JobProgress:
+    """Progress hooks handed to job runners."""
+
+    def __init__(self, job: IngestionJob, on_change: Callable[[IngestionJob, bool], None]):
+        self.job = job
+        self._on_change = on_change
+
+    def set_totals(self, files: Optional[int] = None, chunks: Optional[int] = None) -> None:
+        if files is not None:
+            self.job.documents_total = max(files, 0)
+        if chunks is not None:
+            self.job.chunks_total = max(chunks, 0)
+        self._on_change(self.job, False)
+
+    def advance(self, files: int = 0, chunks: int = 0, skipped: int = 0, size_bytes: int = 0) -> None:
+        job = self.job
+        job.documents_processed += files
+        job.documents_skipped += skipped
+        job.chunks_generated += chunks
+        job.vectors_generated += chunks
+        job.bytes_processed += size_bytes
+        self._on_change(job, False)
+
+    def fail_file(self, path: str) -> None:
+        self.job.documents_failed += 1
+        self.job.failed_documents.append(path)
+        self._on_change(self.job, False)
+
+
+class NullProgress:
+    """No-op progress used when a runner executes outside the job manager."""
+
+    def set_totals(self, files: Optional[int] = None, chunks: Optional[int] = None) -> None:
+        return None
+
+    def advance(self, files: int = 0, chunks: int = 0, skipped: int = 0, size_bytes: int = 0) -> None:
+        return None
+
+    def fail_file(self, path: str) -> None:
+        return None
+
+
+class SqliteJobStore:
+    """Local job store; survives restarts and is the source for recovery."""
+
+    _COLUMNS = (
+        "id", "collection", "job_type", "trigger_type", "status", "started_at", "completed_at",
+        "triggered_by", "documents_total", "documents_processed", "documents_failed",
+        "documents_skipped", "chunks_total", "chunks_generated", "vectors_generated",
+        "bytes_processed", "error_message", "failed_documents", "config_snapshot", "result",
+    )
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingestion_jobs ("
+            " id TEXT PRIMARY KEY, collection TEXT NOT NULL, job_type TEXT NOT NULL,"
+            " trigger_type TEXT NOT NULL, status TEXT NOT NULL, started_at TEXT NOT NULL,"
+            " completed_at TEXT, triggered_by TEXT, documents_total INTEGER DEFAULT 0,"
+            " documents_processed INTEGER DEFAULT 0, documents_failed INTEGER DEFAULT 0,"
+            " documents_skipped INTEGER DEFAULT 0, chunks_total INTEGER DEFAULT 0,"
+            " chunks_generated INTEGER DEFAULT 0, vectors_generated INTEGER DEFAULT 0,"
+            " bytes_processed INTEGER DEFAULT 0, error_message TEXT,"
+            " failed_documents TEXT DEFAULT '[]', config_snapshot TEXT DEFAULT '{}', result TEXT)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status ON ingestion_jobs(status, started_at)"
+        )
+
+    def save(self, job: IngestionJob) -> None:
+        row = (
+            job.id, job.collection, job.job_type, job.trigger_type, job.status,
+            job.started_at.isoformat(), job.completed_at.isoformat() if job.completed_at else None,
+            job.triggered_by, job.documents_total, job.documents_processed, job.documents_failed,
+            job.documents_skipped, job.chunks_total, job.chunks_generated, job.vectors_generated,
+            job.bytes_processed, job.error_message, json.dumps(job.failed_documents),
+            json.dumps(job.config_snapshot, default=str),
+            json.dumps(job.result, default=str) if job.result is not None else None,
+        )
+        placeholders = ",".join("?" * len(self._COLUMNS))
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO ingestion_jobs ({','.join(self._COLUMNS)}) VALUES ({placeholders})",
+                row,
+            )
+
+    def _row_to_job(self, row) -> IngestionJob:
+        data = dict(zip(self._COLUMNS, row))
+        data["started_at"] = datetime.fromisoformat(data["started_at"])
+        data["completed_at"] = datetime.fromisoformat(data["completed_at"]) if data["completed_at"] else None
+        data["failed_documents"] = json.loads(data["failed_documents"] or "[]")
+        data["config_snapshot"] = json.loads(data["config_snapshot"] or "{}")
+        data["result"] = json.loads(data["result"]) if data["result"] else None
+        return IngestionJob(**data)
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {','.join(self._COLUMNS)} FROM ingestion_jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, statuses: Optional[tuple] = None, limit: int = 50) -> List[IngestionJob]:
+        query = f"SELECT {','.join(self._COLUMNS)} FROM ingestion_jobs"
+        params: List[Any] = []
+        if statuses:
+            query += f" WHERE status IN ({','.join('?' * len(statuses))})"
+            params.extend(statuses)
+        query += " ORDER BY started_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+
+class TimescaleJobMirror:
+    """Best-effort mirror of job state into the rag.ingestion_jobs hypertable."""
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._conn = None
+        self._collection_ids: Dict[str, Optional[str]] = {}
+
+    def _connection(self):
+        if self._conn is None or self._conn.closed:
+            self._conn = psycopg2.connect(self.dsn)
+            self._conn.autocommit = True
+        return self._conn
+
+    def _collection_id(self, cursor, collection: str) -> Optional[str]:
+        if collection not in self._collection_ids:
+            cursor.execute(
+                "SELECT id FROM rag.collections WHERE name = %s OR qdrant_collection_name = %s LIMIT 1",
+                (collection, collection),
+            )
+            row = cursor.fetchone()
+            self._collection_ids[collection] = str(row[0]) if row else None
+        return self._collection_ids[collection]
+
+    def save(self, job: IngestionJob) -> None:
+        try:
+            with self._connection().cursor() as cursor:
+                collection_id = self._collection_id(cursor, job.collection)
+                if collection_id is None:
+                    logger.debug("Collection %s not registered in rag.collections; skipping job mirror", job.collection)
+                    return
+                cursor.execute(
+                    """
+                    INSERT INTO rag.ingestion_jobs (
+                        id, collection_id, job_type, trigger_type, status, started_at, completed_at,
+                        duration_ms, triggered_by, documents_total, documents_processed,
+                        documents_failed, documents_skipped, chunks_generated, vectors_generated,
+                        bytes_processed, error_message, error_count, failed_documents,
+                        config_snapshot, metadata
+                    ) VALUES (
+                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+                    )
+                    ON CONFLICT (id, started_at) DO UPDATE SET
+                        status = EXCLUDED.status,
+                        completed_at = EXCLUDED.completed_at,
+                        duration_ms = EXCLUDED.duration_ms,
+                        documents_total = EXCLUDED.documents_total,
+                        documents_processed = EXCLUDED.documents_processed,
+                        documents_failed = EXCLUDED.documents_failed,
+                        documents_skipped = EXCLUDED.documents_skipped,
+                        chunks_generated = EXCLUDED.chunks_generated,
+                        vectors_generated = EXCLUDED.vectors_generated,
+                        bytes_processed = EXCLUDED.bytes_processed,
+                        error_message = EXCLUDED.error_message,
+                        error_count = EXCLUDED.error_count,
+                        failed_documents = EXCLUDED.failed_documents,
+                        metadata = EXCLUDED.metadata
+                    """,
+                    (
+                        job.id, collection_id, job.job_type, job.trigger_type, job.status,
+                        job.started_at, job.completed_at, job.duration_ms, job.triggered_by,
+                        job.documents_total, min(job.documents_processed, job.documents_total),
+                        job.documents_failed, job.documents_skipped, job.chunks_generated,
+                        job.vectors_generated, job.bytes_processed, job.error_message,
+                        job.documents_failed + (1 if job.error_message else 0),
+                        Json(job.failed_documents), Json(job.config_snapshot),
+                        Json({"collection": job.collection, "chunks_total": job.chunks_total, "result": job.result}),
+                    ),
+                )
+        except Exception as exc:  # pragma: no cover - mirror must never break ingestion
+            logger.warning("Failed to mirror ingestion job %s to TimescaleDB: %s", job.id, exc)
+            self._conn = None
+
+
+JobRunner = Callable[[Dict[str, Any], Any], Awaitable[Any]]
+
+
+class JobManager:
+    """Bounded asyncio worker pool executing persisted ingestion jobs."""
+
+    def __init__(
+        self,
+        store: SqliteJobStore,
+        workers: int = 2,
+        mirror: Optional[TimescaleJobMirror] = None,
+    ):
+        self.store = store
+        self.mirror = mirror
+        self.workers = max(1, workers)
+        self._runners: Dict[str, JobRunner] = {}
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._last_flush: Dict[str, float] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Single thread keeps mirror writes ordered and off the event loop.
+        self._mirror_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jobs-mirror") if mirror else None
+
+    def register(self, job_type: str, runner: JobRunner) -> None:
+        """Register the coroutine that executes jobs of ``job_type``."""
+        self._runners[job_type] = runner
+
+    async def start(self) -> None:
+        """Start workers and re-queue jobs left queued or running by a previous process."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        for index in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(index)))
+
+        recovered = await asyncio.to_thread(self.store.list, ACTIVE_STATUSES, 1000)
+        for job in reversed(recovered):
+            if job.job_type not in self._runners:
+                continue
+            job.status = "queued"
+            job.documents_processed = job.chunks_generated = job.vectors_generated = 0
+            self._jobs[job.id] = job
+            self._persist(job, force=True)
+            self._queue.put_nowait(job.id)
+        if recovered:
+            logger.info("Re-queued %s ingestion jobs interrupted by restart", len(recovered))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def submit(
+        self,
+        job_type: str,
+        collection: str,
+        payload: Dict[str, Any],
+        triggered_by: Optional[str] = None,
+        track_result: bool = False,
+    ) -> IngestionJob:
+        """
+        Persist a new job and enqueue it; returns immediately.
+
+        With ``track_result`` the caller may ``await wait(job.id)`` for the runner result.
+        """
+        if self._queue is None:
+            raise RuntimeError("JobManager not started")
+        job = IngestionJob(
+            id=str(uuid.uuid4()),
+            collection=collection,
+            job_type=job_type,
+            triggered_by=triggered_by,
+            config_snapshot=payload,
+        )
+        self._jobs[job.id] = job
+        if track_result:
+            self._futures[job.id] = asyncio.get_running_loop().create_future()
+        self._persist(job, force=True)
+        self._queue.put_nowait(job.id)
+        logger.info("Queued ingestion job %s (%s, collection=%s)", job.id, job_type, collection)
+        return job
+
+    async def wait(self, job_id: str) -> Any:
+        """Wait for a job submitted by this process and return its runner result."""
+        future = self._futures.get(job_id)
+        if future is None:
+            raise KeyError(job_id)
+        return await asyncio.shield(future)
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id) or self.store.get(job_id)
+
+    def list(self, limit: int = 50) -> List[IngestionJob]:
+        return self.store.list(limit=limit)
+
+    def _persist(self, job: IngestionJob, force: bool) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_flush.get(job.id, 0.0) < _PROGRESS_FLUSH_SECONDS:
+            return
+        self._last_flush[job.id] = now
+        try:
+            self.store.save(job)
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.warning("Failed to persist ingestion job %s: %s", job.id, exc)
+        if self.mirror is not None and self._mirror_executor is not None:
+            self._mirror_executor.submit(self.mirror.save, replace(job, failed_documents=list(job.failed_documents)))
+
+    async def _worker(self, index: int) -> None:
+        assert self._queue is not None
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as exc:  # pragma: no cover - _run records failures itself
+                logger.error("Ingestion worker %s crashed on job %s: %s", index, job_id, exc)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = self._jobs[job_id]
+        future = self._futures.get(job_id)
+        runner = self._runners[job.job_type]
+
+        job.status = "running"
+        job.running_since = time.monotonic()
+        self._persist(job, force=True)
+
+        progress = JobProgress(job, self._persist)
+        try:
+            result = await runner(job.config_snapshot, progress)
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            job.completed_at = _utcnow()
+            self._persist(job, force=True)
+            raise
+        except Exception as exc:
+            job.status = "failed"
+            job.completed_at = _utcnow()
+            job.error_message = getattr(exc, "detail", None) or str(exc) or type(exc).__name__
+            if not isinstance(job.error_message, str):
+                job.error_message = json.dumps(job.error_message, default=str)
+            self._persist(job, force=True)
+            logger.error("Ingestion job %s failed: %s", job_id, job.error_message)
+            if future is not None and not future.done():
+                future.set_exception(exc)
+        else:
+            job.status = "completed"
+            job.completed_at = _utcnow()
+            dump = getattr(result, "model_dump", None)
+            job.result = dump() if callable(dump) else result
+            self._persist(job, force=True)
+            logger.info("Ingestion job %s completed in %sms", job_id, job.duration_ms)
+            if future is not None and not future.done():
+                future.set_result(result)
+        finally:
+            self._last_flush.pop(job_id, None)
+            self._jobs.pop(job_id, None)
+            self._futures.pop(job_id, None)
+
+
+def create_job_manager() -> JobManager:
+    """Build the process-wide job manager from the environment."""
+    store_path = os.getenv("LLAMAINDEX_JOBS_DB", "/tmp/llamaindex-jobs/jobs.sqlite3")
+    workers = int(os.getenv("LLAMAINDEX_INGEST_WORKERS", "2"))
+    mirror: Optional[TimescaleJobMirror] = None
+    dsn = os.getenv("LLAMAINDEX_JOBS_DSN")
+    if dsn:
+        if psycopg2 is None:
+            logger.warning("LLAMAINDEX_JOBS_DSN set but psycopg2 is not installed; jobs stay local only")
+        else:
+            mirror = TimescaleJobMirror(dsn)
+    return JobManager(SqliteJobStore(store_path), workers=workers, mirror=mirror)
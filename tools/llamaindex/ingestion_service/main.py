@@ -3,23 +3,24 @@ LlamaIndex Ingestion Service
 Handles document ingestion, processing, and vector storage management.
 """
 
+import asyncio
 import logging
 import os
 import sys
+import time
+from contextlib import ExitStack, asynccontextmanager, nullcontext
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from fastapi import FastAPI, HTTPException, Response
+import httpx
+from fastapi import FastAPI, HTTPException, Query, Response
 from pydantic import BaseModel
 from qdrant_client import QdrantClient
 from llama_index.core import (
-    VectorStoreIndex,
     StorageContext,
     Settings,
-    Document,
 )
-from llama_index.core import SimpleDirectoryReader
-from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.base.embeddings.base import BaseEmbedding
 from llama_index.vector_stores.qdrant import QdrantVectorStore
 from llama_index.embeddings.ollama import OllamaEmbedding
 from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
@@ -187,9 +188,25 @@ MAX_FILE_SIZE_MB = _float_env("LLAMAINDEX_MAX_FILE_SIZE_MB", 8.0)
 MAX_FILE_SIZE_BYTES = int(MAX_FILE_SIZE_MB * 1024 * 1024) if MAX_FILE_SIZE_MB else None
 CHUNK_SIZE = _int_env("LLAMAINDEX_CHUNK_SIZE", 512)
 CHUNK_OVERLAP = _int_env("LLAMAINDEX_CHUNK_OVERLAP", 96)
+INCREMENTAL_INGEST = _bool_env("LLAMAINDEX_INCREMENTAL_INGEST", True)
+EMBED_CACHE_ENABLED = _bool_env("LLAMAINDEX_EMBED_CACHE", True)
+INGEST_BACKGROUND_DEFAULT = _bool_env("LLAMAINDEX_INGEST_BACKGROUND", False)
+# "batched" uses /api/embed batches; "ollama" keeps the one-request-per-chunk client.
+EMBED_BACKEND = os.getenv("LLAMAINDEX_EMBED_BACKEND", "batched").strip().lower()
+EMBED_MAX_IN_FLIGHT = _int_env("LLAMAINDEX_EMBED_MAX_IN_FLIGHT", 0)
+# The pipeline hands the model at most LLAMAINDEX_EMBED_BATCH_SIZE chunks per call.
+EMBED_MAX_BATCH_SIZE = min(
+    _int_env("LLAMAINDEX_EMBED_MAX_BATCH", 64),
+    _int_env("LLAMAINDEX_EMBED_BATCH_SIZE", 64),
+)
+EMBED_BATCH_TOKENS = _int_env("LLAMAINDEX_EMBED_BATCH_TOKENS", 32768)
+EMBED_TARGET_LATENCY_SECONDS = _float_env("LLAMAINDEX_EMBED_TARGET_LATENCY_SECONDS", 2.0) or 2.0
+BULK_UPSERT_ENABLED = _bool_env("LLAMAINDEX_BULK_UPSERT", True)
+# Pausing HNSW indexing affects searches on the whole collection; opt-in only.
+FULL_REINDEX_PAUSE_INDEXING = _bool_env("LLAMAINDEX_FULL_REINDEX_PAUSE_INDEXING", False)
 
 logger.info(
-    "Ingestion filters - allowed_exts=%s, excluded_dirs=%s, skip_hidden_dirs=%s, skip_hidden_files=%s, max_file_size_mb=%s, chunk_size=%s, chunk_overlap=%s",
+    "Ingestion filters - allowed_exts=%s, excluded_dirs=%s, skip_hidden_dirs=%s, skip_hidden_files=%s, max_file_size_mb=%s, chunk_size=%s, chunk_overlap=%s, incremental=%s",
     "ALL" if ALLOWED_EXTENSIONS is None else sorted(ALLOWED_EXTENSIONS),
     sorted(EXCLUDED_DIRECTORIES),
     SKIP_HIDDEN_DIRS,
@@ -197,6 +214,7 @@ logger.info(
     MAX_FILE_SIZE_MB,
     CHUNK_SIZE,
     CHUNK_OVERLAP,
+    INCREMENTAL_INGEST,
 )
 
 # Ensure shared helpers are importable when running as a script
@@ -221,8 +239,43 @@ from gpu import (  # type: ignore # pylint: disable=wrong-import-position
     GPU_COOLDOWN_SECONDS,
     GPU_FORCE_ENABLED,
     GPU_MAX_CONCURRENCY,
+    PRIORITY_BULK,
 )
 from qdrant_utils import ensure_payload_on_search  # type: ignore # pylint: disable=wrong-import-position
+from health_snapshot import HealthSnapshot  # type: ignore # pylint: disable=wrong-import-position
+from collection_generation import bump_generation  # type: ignore # pylint: disable=wrong-import-position
+from sparse_vectors import BM25SparseEncoder, SPARSE_VECTOR_NAME  # type: ignore # pylint: disable=wrong-import-position
+
+try:  # Local package import (tests, running as module)
+    from .manifest import (
+        delete_file_points,
+        load_collection_manifest,
+        plan_full,
+        plan_incremental,
+        refresh_file_mtimes,
+    )
+    from .embedding_cache import CachedEmbedding, get_embedding_store
+    from .jobs import NullProgress, create_job_manager
+    from .pipeline import FanoutTarget, PipelineConfig, run_fanout_pipeline, run_ingestion_pipeline
+    from .workers import parse_worker_count, shutdown_parse_executor
+    from .ollama_embedding import BatchedOllamaEmbedding
+    from .qdrant_writer import QdrantBulkWriter, create_bulk_client
+    from .scanner import DirectoryScan, ScanFilters, scan_directory
+except ImportError:  # pragma: no cover - fallback for production image layout
+    from manifest import (  # type: ignore
+        delete_file_points,
+        load_collection_manifest,
+        plan_full,
+        plan_incremental,
+        refresh_file_mtimes,
+    )
+    from embedding_cache import CachedEmbedding, get_embedding_store  # type: ignore
+    from jobs import NullProgress, create_job_manager  # type: ignore
+    from pipeline import FanoutTarget, PipelineConfig, run_fanout_pipeline, run_ingestion_pipeline  # type: ignore
+    from workers import parse_worker_count, shutdown_parse_executor  # type: ignore
+    from ollama_embedding import BatchedOllamaEmbedding  # type: ignore
+    from qdrant_writer import QdrantBulkWriter, create_bulk_client  # type: ignore
+    from scanner import DirectoryScan, ScanFilters, scan_directory  # type: ignore
 
 # Ensure NLTK resources available (stopwords, punkt)
 try:
@@ -394,6 +447,29 @@ def get_or_create_storage_context(collection_name: Optional[str]) -> StorageCont
     logger.info("Vector store initialized for collection: %s", name)
     return storage_context_local
 
+bulk_qdrant_client: Optional[QdrantClient] = None
+# BM25 sparse vectors stored by the bulk writer for hybrid retrieval in the query service.
+SPARSE_ENCODER = BM25SparseEncoder() if _bool_env("LLAMAINDEX_SPARSE_ENABLED", True) else None
+
+
+def _create_vector_writer(collection_name: str, storage_context: StorageContext):
+    """Return the bulk writer for large ingestions, or the LlamaIndex vector store."""
+    global bulk_qdrant_client  # pylint: disable=global-statement
+    if not BULK_UPSERT_ENABLED:
+        return storage_context.vector_store
+    try:
+        if bulk_qdrant_client is None:
+            bulk_qdrant_client = create_bulk_client(QDRANT_HOST, QDRANT_PORT)
+        return QdrantBulkWriter(
+            bulk_qdrant_client,
+            collection_name,
+            sparse_encoder=SPARSE_ENCODER,
+            sparse_vector_name=SPARSE_VECTOR_NAME,
+        )
+    except Exception as err:  # pragma: no cover - fall back to the default write path
+        logger.warning("Bulk Qdrant writer unavailable, using vector store upserts: %s", err)
+        return storage_context.vector_store
+
 # Configure embeddings with Ollama (local)
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 # Support both OLLAMA_EMBED_MODEL (service-local) and OLLAMA_EMBEDDING_MODEL (repo-wide)
@@ -512,89 +588,44 @@ def _normalize_chunk_params(
     return effective_size, effective_overlap, context_limit
 
 
-def _build_node_parser(chunk_size: int, chunk_overlap: int) -> SentenceSplitter:
-    """Build a sentence splitter configured with the provided parameters."""
-    return SentenceSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-    )
-
-
-def _chunk_documents(
-    documents: List[Document],
-    chunk_size: int,
-    chunk_overlap: int,
-) -> List[Document]:
-    """Split loaded documents into smaller chunks that fit embedding context."""
-    if not documents:
-        return documents
-
-    splitter = _build_node_parser(chunk_size, chunk_overlap)
-    chunked: List[Document] = []
-
-    for doc in documents:
-        text: Optional[str] = getattr(doc, "text", None)
-        if not text and hasattr(doc, "get_content"):
-            try:
-                text = doc.get_content()  # type: ignore[attr-defined]
-            except Exception as err:
-                logger.warning("Failed to read text content for %s: %s", getattr(doc, "id_", "unknown"), err)
-                text = None
-
-        if not text:
-            chunked.append(doc)
-            continue
-
-        pieces = splitter.split_text(text)
-        if len(pieces) == 1:
-            chunked.append(doc)
-            continue
-
-        metadata = dict(getattr(doc, "metadata", {}) or {})
-        source_hint = metadata.get("source") or metadata.get("file_path") or metadata.get("path")
-        doc_id = getattr(doc, "id_", None)
-
-        for idx, piece in enumerate(pieces):
-            chunk_metadata = dict(metadata)
-            chunk_metadata["chunk_index"] = idx
-            chunk_metadata["chunk_total"] = len(pieces)
-            if source_hint:
-                chunk_metadata.setdefault("source", source_hint)
-
-            doc_kwargs: Dict[str, object] = {
-                "text": piece,
-                "metadata": chunk_metadata,
-            }
-            excluded_embed = getattr(doc, "excluded_embed_metadata_keys", None)
-            excluded_llm = getattr(doc, "excluded_llm_metadata_keys", None)
-            if excluded_embed:
-                doc_kwargs["excluded_embed_metadata_keys"] = excluded_embed
-            if excluded_llm:
-                doc_kwargs["excluded_llm_metadata_keys"] = excluded_llm
-            if doc_id:
-                doc_kwargs["id_"] = f"{doc_id}::chunk-{idx}"
-
-            chunked.append(Document(**doc_kwargs))
-
-        logger.debug(
-            "Document %s split into %s chunks (source=%s)",
-            doc_id or source_hint or "unknown",
-            len(pieces),
-            source_hint,
-        )
-
-    return chunked
-
+def _create_embed_model(model_name: Optional[str], context_length: Optional[int] = None) -> BaseEmbedding:
+    """
+    Create an Ollama embedding model using the resolved model name or defaults.
 
-def _create_embed_model(model_name: Optional[str]) -> OllamaEmbedding:
-    """Create an Ollama embedding model using the resolved model name or defaults."""
+    The batched backend keeps up to ``GPU_MAX_CONCURRENCY`` requests in flight and
+    sizes batches from ``context_length``. When the chunk embedding cache is
+    enabled the model is wrapped so only cache misses reach Ollama.
+    """
     resolved = (model_name or OLLAMA_EMBED_MODEL or "").strip() or OLLAMA_EMBED_MODEL
-    return OllamaEmbedding(
-        model_name=resolved,
-        base_url=OLLAMA_BASE_URL,
-        ollama_additional_kwargs=get_ollama_gpu_options(),
-        request_timeout=float(os.getenv("OLLAMA_REQUEST_TIMEOUT", "120.0")),
-    )
+    request_timeout = float(os.getenv("OLLAMA_REQUEST_TIMEOUT", "120.0"))
+    ollama_model: BaseEmbedding
+    if EMBED_BACKEND == "ollama":
+        ollama_model = OllamaEmbedding(
+            model_name=resolved,
+            base_url=OLLAMA_BASE_URL,
+            ollama_additional_kwargs=get_ollama_gpu_options(),
+            request_timeout=request_timeout,
+        )
+    else:
+        in_flight = min(EMBED_MAX_IN_FLIGHT or GPU_MAX_CONCURRENCY, GPU_MAX_CONCURRENCY)
+        ollama_model = BatchedOllamaEmbedding(
+            model_name=resolved,
+            base_url=OLLAMA_BASE_URL,
+            ollama_additional_kwargs=get_ollama_gpu_options(),
+            request_timeout=request_timeout,
+            context_length=context_length,
+            max_in_flight=max(1, in_flight),
+            max_batch_size=EMBED_MAX_BATCH_SIZE,
+            max_batch_tokens=EMBED_BATCH_TOKENS,
+            target_latency_seconds=EMBED_TARGET_LATENCY_SECONDS,
+        )
+    if not EMBED_CACHE_ENABLED:
+        return ollama_model
+    try:
+        return CachedEmbedding(ollama_model, get_embedding_store())
+    except Exception as err:  # pragma: no cover - cache is an optimization only
+        logger.warning("Embedding cache unavailable, embedding without it: %s", err)
+        return ollama_model
 
 logger.info(
     "GPU policy: forced=%s, options=%s, max_concurrency=%s, cooldown=%s",
@@ -624,7 +655,12 @@ class ProcessingResult(BaseModel):
     chunk_size: Optional[int] = None
     chunk_overlap: Optional[int] = None
     largest_files: Optional[List[str]] = None
+    files_added: Optional[int] = None
+    files_updated: Optional[int] = None
+    files_unchanged: Optional[int] = None
+    files_deleted: Optional[int] = None
     errors: Optional[List[str]] = None
+    collections: Optional[Dict[str, dict]] = None  # Per-collection results of a fan-out run
     gpu: Optional[dict] = None
 
 class DirectoryIngestRequest(BaseModel):
@@ -636,6 +672,10 @@ class DirectoryIngestRequest(BaseModel):
     embedding_model: Optional[str] = None
     chunk_size: Optional[int] = None
     chunk_overlap: Optional[int] = None
+    incremental: Optional[bool] = None
+    background: Optional[bool] = None
+    # Also feed every enabled collection sharing this collection's `source`.
+    fanout: Optional[bool] = None
 
 class DocumentIngestRequest(BaseModel):
     file_path: str
@@ -644,12 +684,108 @@ class DocumentIngestRequest(BaseModel):
     embedding_model: Optional[str] = None
     chunk_size: Optional[int] = None
     chunk_overlap: Optional[int] = None
+    incremental: Optional[bool] = None
+    background: Optional[bool] = None
+
+
+class JobStatusResponse(BaseModel):
+    """Status and progress of an ingestion job."""
+    id: str
+    collection: str
+    job_type: str
+    trigger_type: str
+    status: str
+    started_at: str
+    completed_at: Optional[str] = None
+    duration_ms: Optional[int] = None
+    eta_seconds: Optional[float] = None
+    documents_total: int = 0
+    documents_processed: int = 0
+    documents_failed: int = 0
+    documents_skipped: int = 0
+    chunks_total: int = 0
+    chunks_generated: int = 0
+    vectors_generated: int = 0
+    bytes_processed: int = 0
+    error_message: Optional[str] = None
+    failed_documents: List[str] = []
+    result: Optional[dict] = None
+
+
+job_manager = create_job_manager()
+
+
+def _is_incremental(value: Optional[bool]) -> bool:
+    return INCREMENTAL_INGEST if value is None else value
+
+
+def _scan_directory(request: DirectoryIngestRequest) -> DirectoryScan:
+    """Scan the request directory applying extension, size and hidden-file filters."""
+    if request.max_file_size_mb is not None:
+        effective_max_size_bytes = int(request.max_file_size_mb * 1024 * 1024) if request.max_file_size_mb > 0 else None
+    else:
+        effective_max_size_bytes = MAX_FILE_SIZE_BYTES
+
+    filters = ScanFilters(
+        allowed_extensions=_normalize_allowed_extensions(request.allowed_extensions, ALLOWED_EXTENSIONS),
+        excluded_dirs=_normalize_excluded_dirs(request.exclude_dirs, EXCLUDED_DIRECTORIES),
+        excluded_names={
+            "_category_.json",
+            "_category_.yml",
+            "_category_.yaml",
+            "category.json",
+            "category.yml",
+            "category.yaml",
+        },
+        skip_hidden_dirs=SKIP_HIDDEN_DIRS,
+        skip_hidden_files=SKIP_HIDDEN_FILES,
+        max_size_bytes=effective_max_size_bytes,
+    )
+    started = time.perf_counter()
+    scan = scan_directory(request.directory_path, filters)
+    logger.info(
+        "Scanned %s in %.2fs: dirs=%s (cached listings=%s) files=%s selected=%s",
+        scan.root,
+        time.perf_counter() - started,
+        scan.directories_scanned,
+        scan.listings_cached,
+        scan.files_considered,
+        len(scan.files),
+    )
+    return scan
 
-@app.post("/ingest/directory", response_model=ProcessingResult)
-async def ingest_directory(request: DirectoryIngestRequest):
+
+def _bulk_gpu_gate(operation: str, usage: Dict[str, Any]):
+    """
+    Embed gate for the pipeline: every batch takes the generation slot at bulk
+    priority and releases it right after, so queued interactive requests get
+    the GPU between batches instead of after the whole run. ``usage`` sums the
+    waits and keeps the details of the last slot held.
+    """
+
+    @asynccontextmanager
+    async def gate():
+        async with acquire_gpu_slot(operation, priority=PRIORITY_BULK) as slot:
+            usage["wait_time_seconds"] = usage.get("wait_time_seconds", 0.0) + slot["wait_time_seconds"]
+            usage.update({key: slot.get(key) for key in ("operation", "lock_owner", "lock_priority")})
+            yield
+
+    return gate
+
+
+def _purge_file_points(collection_name: str, paths: List[str], purged: Optional[Set[str]]) -> None:
+    """Delete the points of ``paths`` and remember that ``collection_name`` changed."""
+    if delete_file_points(qdrant_client, collection_name, paths) and purged is not None:
+        purged.add(collection_name)
+
+
+async def _run_directory_ingestion(
+    request: DirectoryIngestRequest, progress=None, purged: Optional[Set[str]] = None
+) -> ProcessingResult:
     """
     Ingest all documents from a specified directory.
     """
+    progress = progress or NullProgress()
     collection_name = _normalize_collection_name(request.collection_name)
 
     if not ensure_qdrant_ready():
@@ -664,81 +800,16 @@ async def ingest_directory(request: DirectoryIngestRequest):
     try:
         storage_context = get_or_create_storage_context(collection_name)
 
-        effective_allowed_exts = _normalize_allowed_extensions(request.allowed_extensions, ALLOWED_EXTENSIONS)
-        effective_excluded_dirs = _normalize_excluded_dirs(request.exclude_dirs, EXCLUDED_DIRECTORIES)
-        if request.max_file_size_mb is not None:
-            effective_max_size_bytes = int(request.max_file_size_mb * 1024 * 1024) if request.max_file_size_mb > 0 else None
-        else:
-            effective_max_size_bytes = MAX_FILE_SIZE_BYTES
-
-        excluded_names = {
-            "_category_.json",
-            "_category_.yml",
-            "_category_.yaml",
-            "category.json",
-            "category.yml",
-            "category.yaml",
-        }
-
-        files_to_ingest: List[str] = []
-        files_considered = 0
-        skipped_extension = 0
-        skipped_size = 0
-        skipped_hidden = 0
-        skipped_size_files: List[str] = []
-        largest_files: List[Tuple[int, str]] = []
-
-        for root, dirs, files in os.walk(request.directory_path):
-            # Remove excluded/hidden directories in-place to avoid traversal
-            filtered_dirs = []
-            for directory in dirs:
-                directory_lower = directory.lower()
-                if SKIP_HIDDEN_DIRS and directory.startswith('.'):
-                    continue
-                if directory_lower in effective_excluded_dirs:
-                    continue
-                filtered_dirs.append(directory)
-            dirs[:] = filtered_dirs
-
-            for name in files:
-                files_considered += 1
-                if name in excluded_names:
-                    skipped_hidden += 1
-                    continue
-                if SKIP_HIDDEN_FILES and name.startswith('.'):
-                    skipped_hidden += 1
-                    continue
-
-                ext = os.path.splitext(name)[1].lower()
-                if effective_allowed_exts is not None and ext not in effective_allowed_exts:
-                    skipped_extension += 1
-                    continue
-
-                file_path = os.path.join(root, name)
-                try:
-                    size_bytes = os.path.getsize(file_path)
-                    largest_files.append((size_bytes, file_path))
-                    largest_files.sort(reverse=True)
-                    if len(largest_files) > 25:
-                        largest_files = largest_files[:25]
-
-                    if effective_max_size_bytes and size_bytes > effective_max_size_bytes:
-                        skipped_size += 1
-                        size_label = _format_size(size_bytes)
-                        skipped_size_files.append(f"{file_path} ({size_label})")
-                        logger.debug(
-                            "Skipping %s due to size limit (%s > %s MB)",
-                            file_path,
-                            size_label,
-                            request.max_file_size_mb or MAX_FILE_SIZE_MB,
-                        )
-                        continue
-                except OSError as size_err:
-                    logger.warning("Failed to stat %s: %s", file_path, size_err)
-                    skipped_hidden += 1
-                    continue
-
-                files_to_ingest.append(file_path)
+        scan = await asyncio.to_thread(_scan_directory, request)
+        directory_root = scan.root
+        files_to_ingest = scan.files
+        file_stats = scan.file_stats
+        files_considered = scan.files_considered
+        skipped_extension = scan.skipped_extension
+        skipped_size = scan.skipped_size
+        skipped_hidden = scan.skipped_hidden
+        skipped_size_files = [f"{path} ({_format_size(size)})" for size, path in scan.oversized_files]
+        largest_files = scan.largest_files
 
         if not files_to_ingest:
             raise HTTPException(
@@ -746,11 +817,56 @@ async def ingest_directory(request: DirectoryIngestRequest):
                 detail=f"No supported documents found in {request.directory_path}",
             )
 
-        raw_documents = SimpleDirectoryReader(input_files=files_to_ingest).load_data()
-        if not raw_documents:
-            raise HTTPException(
-                status_code=400,
-                detail=f"No supported documents found in {request.directory_path}",
+        files_skipped = max(files_considered - len(files_to_ingest), 0)
+        incremental = _is_incremental(request.incremental)
+        manifest = load_collection_manifest(qdrant_client, collection_name)
+        if incremental:
+            plan = plan_incremental(files_to_ingest, manifest, directory_root, file_stats)
+        else:
+            plan = plan_full(files_to_ingest, manifest)
+        refresh_file_mtimes(
+            qdrant_client,
+            collection_name,
+            [plan.fingerprints[path] for path in plan.touched],
+        )
+        # Purge stale points before embedding: if embedding fails, the files are
+        # simply missing from the manifest and get picked up by the next run.
+        _purge_file_points(collection_name, plan.to_purge, purged)
+
+        files_to_embed = plan.to_ingest
+        progress.set_totals(files=len(files_to_embed))
+        logger.info(
+            "Manifest plan for %s (incremental=%s): added=%s changed=%s unchanged=%s removed=%s",
+            collection_name,
+            incremental,
+            len(plan.added),
+            len(plan.changed),
+            len(plan.unchanged),
+            len(plan.removed),
+        )
+
+        if not files_to_embed:
+            return ProcessingResult(
+                success=True,
+                message=(
+                    f"No changes detected in {request.directory_path} for collection '{collection_name}' "
+                    f"({len(plan.unchanged)} unchanged, {len(plan.removed)} deleted)"
+                ),
+                documents_processed=0,
+                documents_loaded=0,
+                chunks_generated=0,
+                files_considered=files_considered,
+                files_ingested=0,
+                files_skipped=files_skipped,
+                skipped_by_extension=skipped_extension,
+                skipped_by_size=skipped_size,
+                skipped_files_size=skipped_size_files or None,
+                skipped_hidden=skipped_hidden,
+                collection=collection_name,
+                files_added=0,
+                files_updated=0,
+                files_unchanged=len(plan.unchanged),
+                files_deleted=len(plan.removed),
             )
 
         resolved_model_name = _resolve_embedding_model_name(collection_name, request.embedding_model)
@@ -760,14 +876,6 @@ async def ingest_directory(request: DirectoryIngestRequest):
             resolved_model_name,
         )
 
-        documents = _chunk_documents(
-            raw_documents,
-            effective_chunk_size,
-            effective_chunk_overlap,
-        )
-        documents_loaded = len(raw_documents)
-        chunks_generated = len(documents)
-
         if skipped_size_files:
             logger.info("Skipped %s oversized files: %s", len(skipped_size_files), skipped_size_files)
 
@@ -775,47 +883,74 @@ async def ingest_directory(request: DirectoryIngestRequest):
             top_display = [f"{path} ({_format_size(size)})" for size, path in largest_files[:10]]
             logger.info("Largest files considered (top 10): %s", top_display)
 
+        pipeline_config = PipelineConfig(
+            chunk_size=effective_chunk_size,
+            chunk_overlap=effective_chunk_overlap,
+        )
         logger.info(
-            "Ingestion configuration: collection=%s model=%s context_limit=%s chunk_size=%s overlap=%s",
+            "Ingestion configuration: collection=%s model=%s context_limit=%s chunk_size=%s overlap=%s "
+            "embed_batch=%s upsert_batch=%s in_flight=%s parse_workers=%s",
             collection_name,
             resolved_model_name,
             context_limit if context_limit is not None else "unknown",
             effective_chunk_size,
             effective_chunk_overlap,
+            pipeline_config.embed_batch_size,
+            pipeline_config.upsert_batch_size,
+            pipeline_config.max_in_flight,
+            parse_worker_count(),
         )
 
-        embedding_model = _create_embed_model(resolved_model_name)
-        previous_embed_model = Settings.embed_model
-        previous_node_parser = getattr(Settings, "node_parser", None)
+        embedding_model = _create_embed_model(resolved_model_name, context_limit)
+        vector_writer = _create_vector_writer(collection_name, storage_context)
+        pause_indexing = (
+            not incremental
+            and FULL_REINDEX_PAUSE_INDEXING
+            and isinstance(vector_writer, QdrantBulkWriter)
+        )
 
-        async with acquire_gpu_slot("ingest_directory") as gpu_usage:
-            try:
-                Settings.embed_model = embedding_model
-                try:
-                    if hasattr(Settings, "node_parser"):
-                        Settings.node_parser = _build_node_parser(
-                            effective_chunk_size,
-                            effective_chunk_overlap,
-                        )
-                except Exception as parser_err:
-                    logger.debug("Unable to set custom node parser: %s", parser_err)
-                VectorStoreIndex.from_documents(
-                    documents,
-                    storage_context=storage_context,
+        gpu_usage: Dict[str, Any] = {"wait_time_seconds": 0.0}
+        try:
+            with vector_writer.indexing_paused() if pause_indexing else nullcontext():
+                stats = await run_ingestion_pipeline(
+                    files_to_embed,
+                    plan.fingerprints,
+                    vector_writer,
+                    embedding_model,
+                    pipeline_config,
+                    progress,
+                    embed_gate=_bulk_gpu_gate("ingest_directory", gpu_usage),
                 )
-            finally:
-                Settings.embed_model = previous_embed_model
-                if hasattr(Settings, "node_parser"):
-                    Settings.node_parser = previous_node_parser
+        finally:
+            if isinstance(vector_writer, QdrantBulkWriter):
+                vector_writer.close()
+
+        if not stats.documents_loaded:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No supported documents found in {request.directory_path}",
+            )
+        # Drop partially stored files so the next incremental run retries them.
+        _purge_file_points(collection_name, stats.failed_files, purged)
+        documents_loaded = stats.documents_loaded
+        chunks_generated = stats.chunks_generated
 
         gpu_meta = build_gpu_metadata(
             gpu_usage["wait_time_seconds"],
             operation=gpu_usage.get("operation"),
             lock_owner=gpu_usage.get("lock_owner"),
+            lock_priority=gpu_usage.get("lock_priority"),
         )
 
-        files_ingested = len(files_to_ingest)
-        files_skipped = max(files_considered - files_ingested, 0)
+        files_ingested = len(files_to_embed) - len(stats.failed_files)
+        if not files_ingested:
+            raise HTTPException(
+                status_code=502,
+                detail=(
+                    f"All {len(files_to_embed)} files in {request.directory_path} failed to embed"
+                    + (f": {stats.errors[0]}" if stats.errors else "")
+                ),
+            )
 
         logger.info(
             "Ingestion completed: collection=%s, directory=%s, raw_documents=%s, chunks=%s, files_considered=%s, skipped_ext=%s, skipped_size=%s, skipped_hidden=%s",
@@ -850,6 +985,11 @@ async def ingest_directory(request: DirectoryIngestRequest):
             chunk_size=effective_chunk_size,
             chunk_overlap=effective_chunk_overlap,
             largest_files=[f"{path} ({_format_size(size)})" for size, path in largest_files[:10]] or None,
+            files_added=len(plan.added),
+            files_updated=len(plan.changed),
+            files_unchanged=len(plan.unchanged),
+            files_deleted=len(plan.removed),
+            errors=stats.errors or None,
             gpu=gpu_meta,
         )
 
@@ -862,11 +1002,238 @@ async def ingest_directory(request: DirectoryIngestRequest):
             detail=f"Error processing directory: {str(e)}",
         )
 
-@app.post("/ingest/document", response_model=ProcessingResult)
-async def ingest_document(request: DocumentIngestRequest):
+def _fanout_collections(collection_name: str) -> List[str]:
+    """Return the collection plus every enabled collection sharing its configured source."""
+    resolved = _resolve_collection_for_config(collection_name) or collection_name
+    if collection_config_manager is None:
+        return [resolved]
+    try:
+        info = collection_config_manager.get_collection(resolved)
+        if info is None:
+            return [resolved]
+        siblings = [
+            other.name
+            for other in collection_config_manager.get_all_collections(enabled_only=True)
+            if other.source == info.source
+        ]
+    except Exception as err:  # pragma: no cover - defensive logging
+        logger.debug("Failed to resolve fan-out collections for %s: %s", resolved, err)
+        return [resolved]
+    return [resolved] + [name for name in siblings if name != resolved]
+
+
+async def _loaded_ollama_models() -> List[str]:
+    """Models currently resident in Ollama (best effort, used to order fan-out passes)."""
+    try:
+        async with httpx.AsyncClient(base_url=OLLAMA_BASE_URL, timeout=2.0) as client:
+            response = await client.get("/api/ps")
+            response.raise_for_status()
+            return [model.get("name", "") for model in response.json().get("models", [])]
+    except Exception as err:
+        logger.debug("Could not list loaded Ollama models: %s", err)
+        return []
+
+
+async def _run_fanout_ingestion(
+    request: DirectoryIngestRequest, progress=None, purged: Optional[Set[str]] = None
+) -> ProcessingResult:
+    """
+    Ingest a directory into every enabled collection that shares its source.
+
+    Files are walked, read and chunked once; each collection then gets its own
+    embed/upsert pass, grouped by embedding model to avoid GPU model swaps.
+    """
+    progress = progress or NullProgress()
+    primary = _normalize_collection_name(request.collection_name)
+
+    if not ensure_qdrant_ready():
+        raise HTTPException(
+            status_code=503,
+            detail="Qdrant vector store is not available. Service is still initializing or Qdrant is unreachable.",
+        )
+
+    if not os.path.isdir(request.directory_path):
+        raise HTTPException(status_code=400, detail=f"Directory not found: {request.directory_path}")
+
+    try:
+        scan = await asyncio.to_thread(_scan_directory, request)
+        if not scan.files:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No supported documents found in {request.directory_path}",
+            )
+
+        incremental = _is_incremental(request.incremental)
+        collections = _fanout_collections(primary)
+        targets: List[FanoutTarget] = []
+        plans = {}
+        fingerprints = {}
+        for collection_name in collections:
+            storage_context = get_or_create_storage_context(collection_name)
+            manifest = load_collection_manifest(qdrant_client, collection_name)
+            if incremental:
+                plan = plan_incremental(scan.files, manifest, scan.root, scan.file_stats)
+            else:
+                plan = plan_full(scan.files, manifest)
+            refresh_file_mtimes(
+                qdrant_client,
+                collection_name,
+                [plan.fingerprints[path] for path in plan.touched],
+            )
+            _purge_file_points(collection_name, plan.to_purge, purged)
+            plans[collection_name] = plan
+            for path in plan.to_ingest:
+                fingerprints[path] = plan.fingerprints[path]
+
+            # An explicit embedding model only applies to the requested collection.
+            model_hint = request.embedding_model if collection_name == primary else None
+            model_name = _resolve_embedding_model_name(collection_name, model_hint)
+            chunk_size, chunk_overlap, context_limit = _normalize_chunk_params(
+                request.chunk_size,
+                request.chunk_overlap,
+                model_name,
+            )
+            targets.append(
+                FanoutTarget(
+                    collection=collection_name,
+                    model_name=model_name,
+                    chunk_size=chunk_size,
+                    chunk_overlap=chunk_overlap,
+                    files=set(plan.to_ingest),
+                    vector_store=_create_vector_writer(collection_name, storage_context),
+                    embed_model=_create_embed_model(model_name, context_limit),
+                )
+            )
+
+        # Read each needed file once, in scan order.
+        files_to_embed = [path for path in scan.files if path in fingerprints]
+        progress.set_totals(files=len(files_to_embed))
+        logger.info(
+            "Fan-out ingestion of %s into %s (incremental=%s): files=%s",
+            request.directory_path,
+            ", ".join(f"{target.collection}[{target.model_name}]" for target in targets),
+            incremental,
+            len(files_to_embed),
+        )
+
+        all_stats = {}
+        gpu_usage: Dict[str, Any] = {"wait_time_seconds": 0.0}
+        try:
+            if files_to_embed:
+                pause_indexing = not incremental and FULL_REINDEX_PAUSE_INDEXING
+                with ExitStack() as stack:
+                    for target in targets:
+                        if pause_indexing and isinstance(target.vector_store, QdrantBulkWriter):
+                            stack.enter_context(target.vector_store.indexing_paused())
+                    all_stats = await run_fanout_pipeline(
+                        files_to_embed,
+                        fingerprints,
+                        [target for target in targets if target.files],
+                        PipelineConfig(chunk_size=targets[0].chunk_size, chunk_overlap=targets[0].chunk_overlap),
+                        progress,
+                        loaded_models=await _loaded_ollama_models(),
+                        embed_gate=_bulk_gpu_gate("ingest_fanout", gpu_usage),
+                    )
+        finally:
+            for target in targets:
+                if isinstance(target.vector_store, QdrantBulkWriter):
+                    target.vector_store.close()
+
+        per_collection = {}
+        errors: List[str] = []
+        for target in targets:
+            plan = plans[target.collection]
+            stats = all_stats.get(target.collection)
+            failed = stats.failed_files if stats else []
+            _purge_file_points(target.collection, failed, purged)
+            errors.extend(f"[{target.collection}] {error}" for error in (stats.errors if stats else []))
+            per_collection[target.collection] = {
+                "embedding_model": target.model_name,
+                "chunk_size": target.chunk_size,
+                "chunk_overlap": target.chunk_overlap,
+                "documents_loaded": stats.documents_loaded if stats else 0,
+                "chunks_generated": stats.chunks_generated if stats else 0,
+                "files_ingested": len(target.files) - len(failed),
+                "files_added": len(plan.added),
+                "files_updated": len(plan.changed),
+                "files_unchanged": len(plan.unchanged),
+                "files_deleted": len(plan.removed),
+                "errors": stats.errors if stats and stats.errors else None,
+            }
+
+        if files_to_embed and not any(
+            entry["files_ingested"] for name, entry in per_collection.items() if plans[name].to_ingest
+        ):
+            raise HTTPException(
+                status_code=502,
+                detail=(
+                    f"All {len(files_to_embed)} files in {request.directory_path} failed to embed"
+                    + (f": {errors[0]}" if errors else "")
+                ),
+            )
+
+        primary_result = per_collection[collections[0]]
+        total_chunks = sum(entry["chunks_generated"] for entry in per_collection.values())
+        logger.info(
+            "Fan-out ingestion completed: directory=%s, files=%s, chunks=%s, collections=%s",
+            request.directory_path,
+            len(files_to_embed),
+            total_chunks,
+            len(targets),
+        )
+        return ProcessingResult(
+            success=True,
+            message=(
+                f"Processed {len(files_to_embed)} files from {request.directory_path} into "
+                f"{len(targets)} collections ({total_chunks} chunks)"
+                if files_to_embed
+                else f"No changes detected in {request.directory_path} for {len(targets)} collections"
+            ),
+            documents_processed=primary_result["chunks_generated"],
+            documents_loaded=primary_result["documents_loaded"],
+            chunks_generated=primary_result["chunks_generated"],
+            files_considered=scan.files_considered,
+            files_ingested=primary_result["files_ingested"],
+            files_skipped=max(scan.files_considered - len(scan.files), 0),
+            skipped_by_extension=scan.skipped_extension,
+            skipped_by_size=scan.skipped_size,
+            skipped_files_size=[f"{path} ({_format_size(size)})" for size, path in scan.oversized_files] or None,
+            skipped_hidden=scan.skipped_hidden,
+            collection=collections[0],
+            embedding_model=primary_result["embedding_model"],
+            chunk_size=primary_result["chunk_size"],
+            chunk_overlap=primary_result["chunk_overlap"],
+            files_added=primary_result["files_added"],
+            files_updated=primary_result["files_updated"],
+            files_unchanged=primary_result["files_unchanged"],
+            files_deleted=primary_result["files_deleted"],
+            errors=errors or None,
+            collections=per_collection,
+            gpu=build_gpu_metadata(
+                gpu_usage["wait_time_seconds"],
+                operation=gpu_usage.get("operation"),
+                lock_owner=gpu_usage.get("lock_owner"),
+                lock_priority=gpu_usage.get("lock_priority"),
+            ),
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:  # pragma: no cover - diagnostics for unexpected failures
+        logger.error("Error in fan-out ingestion of %s: %s", request.directory_path, e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing directory: {str(e)}",
+        )
+
+
+async def _run_document_ingestion(
+    request: DocumentIngestRequest, progress=None, purged: Optional[Set[str]] = None
+) -> ProcessingResult:
     """
     Ingest a single document.
     """
+    progress = progress or NullProgress()
     collection_name = _normalize_collection_name(request.collection_name)
 
     if not ensure_qdrant_ready():
@@ -912,9 +1279,38 @@ async def ingest_document(request: DocumentIngestRequest):
                 ),
             )
 
-        raw_documents = SimpleDirectoryReader(input_files=[request.file_path]).load_data()
-        if not raw_documents:
-            raise HTTPException(status_code=400, detail="No content found in document")
+        file_path = os.path.abspath(request.file_path)
+        incremental = _is_incremental(request.incremental)
+        progress.set_totals(files=1)
+        manifest = load_collection_manifest(qdrant_client, collection_name, paths=[file_path])
+        if incremental:
+            plan = plan_incremental([file_path], manifest, os.path.dirname(file_path))
+        else:
+            plan = plan_full([file_path], manifest)
+
+        if not plan.to_ingest:
+            refresh_file_mtimes(
+                qdrant_client,
+                collection_name,
+                [plan.fingerprints[path] for path in plan.touched],
+            )
+            return ProcessingResult(
+                success=True,
+                message=f"Document {request.file_path} unchanged in collection '{collection_name}'",
+                documents_processed=0,
+                documents_loaded=0,
+                chunks_generated=0,
+                files_considered=1,
+                files_ingested=0,
+                files_skipped=0,
+                collection=collection_name,
+                files_added=0,
+                files_updated=0,
+                files_unchanged=1,
+                files_deleted=0,
+            )
+
+        _purge_file_points(collection_name, plan.to_purge, purged)
 
         resolved_model_name = _resolve_embedding_model_name(collection_name, request.embedding_model)
         effective_chunk_size, effective_chunk_overlap, context_limit = _normalize_chunk_params(
@@ -923,14 +1319,6 @@ async def ingest_document(request: DocumentIngestRequest):
             resolved_model_name,
         )
 
-        documents = _chunk_documents(
-            raw_documents,
-            effective_chunk_size,
-            effective_chunk_overlap,
-        )
-        documents_loaded = len(raw_documents)
-        chunks_generated = len(documents)
-
         logger.info(
             "Document ingestion configuration: collection=%s model=%s context_limit=%s chunk_size=%s overlap=%s",
             collection_name,
@@ -940,34 +1328,38 @@ async def ingest_document(request: DocumentIngestRequest):
             effective_chunk_overlap,
         )
 
-        embedding_model = _create_embed_model(resolved_model_name)
-        previous_embed_model = Settings.embed_model
-        previous_node_parser = getattr(Settings, "node_parser", None)
+        embedding_model = _create_embed_model(resolved_model_name, context_limit)
+        vector_writer = _create_vector_writer(collection_name, storage_context)
 
-        async with acquire_gpu_slot("ingest_document") as gpu_usage:
-            try:
-                Settings.embed_model = embedding_model
-                try:
-                    if hasattr(Settings, "node_parser"):
-                        Settings.node_parser = _build_node_parser(
-                            effective_chunk_size,
-                            effective_chunk_overlap,
-                        )
-                except Exception as parser_err:
-                    logger.debug("Unable to set custom node parser: %s", parser_err)
-                VectorStoreIndex.from_documents(
-                    documents,
-                    storage_context=storage_context,
-                )
-            finally:
-                Settings.embed_model = previous_embed_model
-                if hasattr(Settings, "node_parser"):
-                    Settings.node_parser = previous_node_parser
+        gpu_usage: Dict[str, Any] = {"wait_time_seconds": 0.0}
+        try:
+            stats = await run_ingestion_pipeline(
+                [file_path],
+                plan.fingerprints,
+                vector_writer,
+                embedding_model,
+                PipelineConfig(chunk_size=effective_chunk_size, chunk_overlap=effective_chunk_overlap),
+                progress,
+                embed_gate=_bulk_gpu_gate("ingest_document", gpu_usage),
+            )
+        finally:
+            if isinstance(vector_writer, QdrantBulkWriter):
+                vector_writer.close()
+
+        if not stats.documents_loaded:
+            detail = stats.errors[0] if stats.errors else "No content found in document"
+            raise HTTPException(status_code=400, detail=detail)
+        if stats.failed_files:
+            _purge_file_points(collection_name, stats.failed_files, purged)
+            raise HTTPException(status_code=502, detail=stats.errors[0])
+        documents_loaded = stats.documents_loaded
+        chunks_generated = stats.chunks_generated
 
         gpu_meta = build_gpu_metadata(
             gpu_usage["wait_time_seconds"],
             operation=gpu_usage.get("operation"),
             lock_owner=gpu_usage.get("lock_owner"),
+            lock_priority=gpu_usage.get("lock_priority"),
         )
 
         logger.info(
@@ -988,8 +1380,13 @@ async def ingest_document(request: DocumentIngestRequest):
             files_skipped=0,
             collection=collection_name,
             embedding_model=embedding_model.model_name,
+            files_added=len(plan.added),
+            files_updated=len(plan.changed),
+            files_unchanged=0,
+            files_deleted=0,
             chunk_size=effective_chunk_size,
             chunk_overlap=effective_chunk_overlap,
+            errors=stats.errors or None,
             gpu=gpu_meta,
         )
 
@@ -1002,6 +1399,165 @@ async def ingest_document(request: DocumentIngestRequest):
             detail=f"Error processing file: {str(e)}",
         )
 
+def _changed_collections(result: ProcessingResult, purged: Set[str]) -> List[str]:
+    """
+    Collections whose points a run upserted or deleted.
+    """
+    changed = list(purged)
+    if result.success:
+        entries = result.collections or {result.collection: result.model_dump()}
+        changed.extend(
+            name
+            for name, entry in entries.items()
+            if name and (entry.get("files_ingested") or entry.get("files_updated") or entry.get("files_deleted"))
+        )
+    return list(dict.fromkeys(changed))
+
+
+async def _bump_generations(collections: List[str]) -> None:
+    """
+    Advance the generation of changed collections so query caches miss.
+    Failures are logged: the data is already written, and cached answers
+    still expire with their TTL.
+    """
+    for name in collections:
+        try:
+            await asyncio.to_thread(bump_generation, qdrant_client, name)
+        except Exception as exc:
+            logger.warning("Failed to bump generation of collection %s: %s", name, exc)
+
+
+async def _directory_job(payload: dict, progress) -> ProcessingResult:
+    request = DirectoryIngestRequest(**payload)
+    runner = _run_fanout_ingestion if request.fanout else _run_directory_ingestion
+    purged: Set[str] = set()
+    try:
+        result = await runner(request, progress, purged)
+    except Exception:
+        # Stale points are purged before embedding, so a failed run still changed the data.
+        await _bump_generations(list(purged))
+        raise
+    await _bump_generations(_changed_collections(result, purged))
+    return result
+
+
+async def _document_job(payload: dict, progress) -> ProcessingResult:
+    purged: Set[str] = set()
+    try:
+        result = await _run_document_ingestion(DocumentIngestRequest(**payload), progress, purged)
+    except Exception:
+        await _bump_generations(list(purged))
+        raise
+    await _bump_generations(_changed_collections(result, purged))
+    return result
+
+
+job_manager.register("incremental", _directory_job)
+job_manager.register("full_index", _directory_job)
+job_manager.register("single_document", _document_job)
+
+
+@app.on_event("startup")
+async def _start_job_manager() -> None:
+    await job_manager.start()
+
+
+@app.on_event("shutdown")
+async def _stop_job_manager() -> None:
+    await job_manager.stop()
+    shutdown_parse_executor()
+
+
+async def _submit_and_respond(
+    job_type: str,
+    collection_name: str,
+    request: BaseModel,
+    background: Optional[bool],
+    response: Response,
+) -> ProcessingResult:
+    """Queue an ingestion job; wait for it unless the caller asked for background mode."""
+    run_in_background = INGEST_BACKGROUND_DEFAULT if background is None else background
+    job = job_manager.submit(
+        job_type,
+        collection_name,
+        request.model_dump(),
+        track_result=not run_in_background,
+    )
+    if run_in_background:
+        response.status_code = 202
+        response.headers["Location"] = f"/jobs/{job.id}"
+        return ProcessingResult(
+            success=True,
+            message=f"Ingestion job {job.id} queued for collection '{collection_name}'",
+            job_id=job.id,
+            collection=collection_name,
+        )
+
+    result = await job_manager.wait(job.id)
+    result.job_id = job.id
+    return result
+
+
+@app.post("/ingest/directory", response_model=ProcessingResult)
+async def ingest_directory(request: DirectoryIngestRequest, response: Response):
+    """
+    Ingest all documents from a specified directory.
+
+    Runs as a job on the ingestion worker pool. With ``background=true`` the call
+    returns 202 with a ``job_id`` immediately; poll ``GET /jobs/{job_id}``.
+    With ``fanout=true`` every enabled collection sharing the collection's
+    ``source`` is updated from a single read of the directory.
+    """
+    collection_name = _normalize_collection_name(request.collection_name)
+
+    if not ensure_qdrant_ready():
+        raise HTTPException(
+            status_code=503,
+            detail="Qdrant vector store is not available. Service is still initializing or Qdrant is unreachable.",
+        )
+
+    if not os.path.isdir(request.directory_path):
+        raise HTTPException(status_code=400, detail=f"Directory not found: {request.directory_path}")
+
+    job_type = "incremental" if _is_incremental(request.incremental) else "full_index"
+    return await _submit_and_respond(job_type, collection_name, request, request.background, response)
+
+
+@app.post("/ingest/document", response_model=ProcessingResult)
+async def ingest_document(request: DocumentIngestRequest, response: Response):
+    """
+    Ingest a single document (optionally in the background, like /ingest/directory).
+    """
+    collection_name = _normalize_collection_name(request.collection_name)
+
+    if not ensure_qdrant_ready():
+        raise HTTPException(
+            status_code=503,
+            detail="Qdrant vector store is not available. Service is still initializing or Qdrant is unreachable.",
+        )
+
+    if not os.path.isfile(request.file_path):
+        raise HTTPException(status_code=400, detail=f"File not found: {request.file_path}")
+
+    return await _submit_and_respond("single_document", collection_name, request, request.background, response)
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """Report status, progress and ETA of an ingestion job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return JobStatusResponse(**job.to_dict())
+
+
+@app.get("/jobs", response_model=List[JobStatusResponse])
+async def list_jobs(limit: int = 50):
+    """List the most recent ingestion jobs."""
+    limit = max(1, min(limit, 500))
+    return [JobStatusResponse(**job.to_dict()) for job in job_manager.list(limit=limit)]
+
+
 @app.delete("/documents/{collection_name}")
 async def delete_collection(collection_name: str):
     """
@@ -1015,6 +1571,7 @@ async def delete_collection(collection_name: str):
     normalized = _normalize_collection_name(collection_name)
     try:
         qdrant_client.delete_collection(normalized)
+        await _bump_generations([normalized])
 
         vector_store_cache.pop(normalized, None)
         storage_context_cache.pop(normalized, None)
@@ -1037,31 +1594,49 @@ async def delete_collection(collection_name: str):
             detail=f"Error deleting collection: {str(e)}"
         )
 
+def _probe_health() -> dict:
+    """
+    Health probe: (re)initialise Qdrant if needed and check the connection.
+    """
+    if not ensure_qdrant_ready():
+        return {
+            "status": "degraded",
+            "message": "Qdrant client or default vector store not initialized",
+        }
+    qdrant_client.get_collections()
+    return {"status": "healthy"}
+
+
+health_snapshot = HealthSnapshot(_probe_health)
+
+
+@app.on_event("startup")
+async def _start_health_snapshot() -> None:
+    health_snapshot.start()
+
+
+@app.on_event("shutdown")
+async def _stop_health_snapshot() -> None:
+    await health_snapshot.stop()
+
+
 @app.get("/health")
-async def health_check():
+async def health_check(deep: bool = Query(False, description="Check Qdrant live instead of the cached snapshot")):
     """
     Health check endpoint.
+
+    Served from a snapshot refreshed in the background; ``deep=true`` probes
+    Qdrant on the request.
     """
     try:
-        if not ensure_qdrant_ready():
-            return {
-                "status": "degraded",
-                "message": "Qdrant client or default vector store not initialized",
-                "collection": QDRANT_COLLECTION,
-            }
-        # Check Qdrant connection
-        qdrant_client.get_collections()
-        return {
-            "status": "healthy",
-            "collection": QDRANT_COLLECTION,
-        }
+        if deep:
+            payload = await asyncio.to_thread(_probe_health)
+        else:
+            payload = await health_snapshot.get()
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
-        return {
-            "status": "degraded",
-            "error": str(e),
-            "collection": QDRANT_COLLECTION,
-        }
+        payload = {"status": "degraded", "error": str(e)}
+    return {**payload, "collection": QDRANT_COLLECTION}
 
 @app.get("/metrics")
 async def metrics_endpoint():
@@ -0,0 +1,279 @@
+"""
+Per-collection ingestion manifest.
+
+Directory runs fingerprint every candidate file (size, mtime, SHA-256) and
+compare against the fingerprints stored in the Qdrant payload of previously
+ingested points. Only added or changed files are re-embedded; points that
+belong to changed or removed files are deleted before the new ones land.
+
+Keeping the manifest in Qdrant (rather than a local sidecar file) means every
+ingestion replica sees the same state and nothing is lost on restart.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from qdrant_client.http import models as qmodels
+
+logger = logging.getLogger(__name__)
+
+# Payload keys stored on every ingested point (excluded from embedding/LLM text).
+FILE_PATH_KEY = "file_path"
+CONTENT_HASH_KEY = "content_sha256"
+MTIME_KEY = "file_mtime_ns"
+SIZE_KEY = "file_size"
+MANIFEST_METADATA_KEYS: List[str] = [CONTENT_HASH_KEY, MTIME_KEY, SIZE_KEY]
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+_SCROLL_PAGE_SIZE = 1024
+_DELETE_BATCH_SIZE = 256
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    """Content fingerprint of a single file."""
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: Optional[str] = None
+
+    def as_metadata(self) -> Dict[str, Any]:
+        return {
+            CONTENT_HASH_KEY: self.sha256,
+            MTIME_KEY: self.mtime_ns,
+            SIZE_KEY: self.size,
+        }
+
+
+@dataclass
+class ManifestPlan:
+    """Outcome of comparing a directory scan against the stored manifest."""
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    fingerprints: Dict[str, FileFingerprint] = field(default_factory=dict)
+    # Files whose content matched but whose stored mtime is stale.
+    touched: List[str] = field(default_factory=list)
+
+    @property
+    def to_ingest(self) -> List[str]:
+        return self.added + self.changed
+
+    @property
+    def to_purge(self) -> List[str]:
+        return self.changed + self.removed
+
+
+def hash_file(path: str) -> str:
+    """Return the SHA-256 hex digest of a file, streaming it in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint_file(path: str, stat_result: Optional[os.stat_result] = None) -> FileFingerprint:
+    """Stat and hash a file."""
+    stat_result = stat_result or os.stat(path)
+    return FileFingerprint(
+        path=path,
+        size=int(stat_result.st_size),
+        mtime_ns=int(stat_result.st_mtime_ns),
+        sha256=hash_file(path),
+    )
+
+
+def load_collection_manifest(
+    client: Any,
+    collection_name: str,
+    paths: Optional[Sequence[str]] = None,
+) -> Dict[str, FileFingerprint]:
+    """
+    Read the stored fingerprints of every file in a collection (or only ``paths``).
+
+    Only the manifest payload keys are fetched (no vectors). Points written before
+    fingerprints existed come back without a hash and are treated as changed.
+    """
+    manifest: Dict[str, FileFingerprint] = {}
+    if client is None:
+        return manifest
+    try:
+        if not client.collection_exists(collection_name):
+            return manifest
+    except Exception as exc:  # pragma: no cover - defensive logging
+        logger.warning("Unable to check collection %s for manifest: %s", collection_name, exc)
+        return manifest
+
+    selector = qmodels.PayloadSelectorInclude(include=[FILE_PATH_KEY, *MANIFEST_METADATA_KEYS])
+    scroll_filter = _file_filter(paths) if paths else None
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=scroll_filter,
+            limit=_SCROLL_PAGE_SIZE,
+            offset=offset,
+            with_payload=selector,
+            with_vectors=False,
+        )
+        for point in points:
+            payload = point.payload or {}
+            path = payload.get(FILE_PATH_KEY)
+            if not path or path in manifest:
+                continue
+            manifest[path] = FileFingerprint(
+                path=path,
+                size=int(payload.get(SIZE_KEY) or -1),
+                mtime_ns=int(payload.get(MTIME_KEY) or -1),
+                sha256=payload.get(CONTENT_HASH_KEY),
+            )
+        if offset is None:
+            break
+
+    logger.debug("Loaded manifest for %s: %s files", collection_name, len(manifest))
+    return manifest
+
+
+def _is_within(path: str, scope_dir: str) -> bool:
+    try:
+        return os.path.commonpath([os.path.abspath(path), scope_dir]) == scope_dir
+    except ValueError:
+        return False
+
+
+def plan_incremental(
+    candidates: Iterable[str],
+    manifest: Dict[str, FileFingerprint],
+    scope_dir: str,
+    stats: Optional[Dict[str, os.stat_result]] = None,
+) -> ManifestPlan:
+    """
+    Classify scanned files as added, changed or unchanged against the manifest.
+
+    Files whose size and mtime match the stored values are trusted without
+    re-hashing. Manifest entries under ``scope_dir`` that no longer exist on
+    disk are reported as removed; entries that merely fell outside the current
+    filters are left alone.
+    """
+    plan = ManifestPlan()
+    stats = stats or {}
+    seen = set()
+    scope = os.path.abspath(scope_dir)
+
+    for path in candidates:
+        seen.add(path)
+        stat_result = stats.get(path) or os.stat(path)
+        stored = manifest.get(path)
+        if (
+            stored is not None
+            and stored.sha256
+            and stored.size == stat_result.st_size
+            and stored.mtime_ns == stat_result.st_mtime_ns
+        ):
+            plan.fingerprints[path] = stored
+            plan.unchanged.append(path)
+            continue
+
+        fingerprint = fingerprint_file(path, stat_result)
+        plan.fingerprints[path] = fingerprint
+        if stored is None:
+            plan.added.append(path)
+        elif stored.sha256 and stored.sha256 == fingerprint.sha256:
+            plan.unchanged.append(path)
+            plan.touched.append(path)
+        else:
+            plan.changed.append(path)
+
+    for path in manifest:
+        if path in seen or not _is_within(path, scope):
+            continue
+        if not os.path.exists(path):
+            plan.removed.append(path)
+
+    return plan
+
+
+def plan_full(candidates: Iterable[str], manifest: Dict[str, FileFingerprint]) -> ManifestPlan:
+    """Treat every scanned file as new content, purging any previous points for it."""
+    plan = ManifestPlan()
+    for path in candidates:
+        plan.fingerprints[path] = fingerprint_file(path)
+        if path in manifest:
+            plan.changed.append(path)
+        else:
+            plan.added.append(path)
+    return plan
+
+
+def _file_filter(paths: Sequence[str]) -> qmodels.Filter:
+    return qmodels.Filter(
+        must=[
+            qmodels.FieldCondition(
+                key=FILE_PATH_KEY,
+                match=qmodels.MatchAny(any=list(paths)),
+            )
+        ]
+    )
+
+
+def delete_file_points(client: Any, collection_name: str, paths: Sequence[str]) -> int:
+    """Delete every point whose ``file_path`` payload matches one of ``paths``."""
+    if client is None or not paths:
+        return 0
+    for start in range(0, len(paths), _DELETE_BATCH_SIZE):
+        batch = paths[start:start + _DELETE_BATCH_SIZE]
+        client.delete(
+            collection_name=collection_name,
+            points_selector=qmodels.FilterSelector(filter=_file_filter(batch)),
+            wait=True,
+        )
+    logger.info("Deleted points for %s files from %s", len(paths), collection_name)
+    return len(paths)
+
+
+def refresh_file_mtimes(client: Any, collection_name: str, fingerprints: Sequence[FileFingerprint]) -> None:
+    """Update the stored mtime of files whose content is unchanged so they skip hashing next time."""
+    if client is None:
+        return
+    for fingerprint in fingerprints:
+        try:
+            client.set_payload(
+                collection_name=collection_name,
+                payload={MTIME_KEY: fingerprint.mtime_ns, SIZE_KEY: fingerprint.size},
+                points=_file_filter([fingerprint.path]),
+                wait=False,
+            )
+        except Exception as exc:  # pragma: no cover - best effort
+            logger.debug("Failed to refresh mtime for %s: %s", fingerprint.path, exc)
+
+
+def attach_fingerprints(documents: Sequence[Any], fingerprints: Dict[str, FileFingerprint]) -> None:
+    """
+    Copy file fingerprints into loaded documents' metadata.
+
+    The keys are excluded from embedding and LLM text so they only live in the payload.
+    """
+    for doc in documents:
+        metadata = getattr(doc, "metadata", None)
+        if metadata is None:
+            continue
+        fingerprint = fingerprints.get(metadata.get(FILE_PATH_KEY))
+        if fingerprint is None:
+            continue
+        metadata.update(fingerprint.as_metadata())
+        for attr in ("excluded_embed_metadata_keys", "excluded_llm_metadata_keys"):
+            excluded = list(getattr(doc, attr, None) or [])
+            for key in MANIFEST_METADATA_KEYS:
+                if key not in excluded:
+                    excluded.append(key)
+            try:
+                setattr(doc, attr, excluded)
+            except Exception:  # pragma: no cover - non-pydantic documents
+                pass
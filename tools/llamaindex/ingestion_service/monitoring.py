@@ -5,7 +5,7 @@ Implements metrics collection and OpenTelemetry tracing.
 
 import time
 from functools import wraps
-from prometheus_client import Counter, Histogram, start_http_server
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
 from opentelemetry import trace
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import ConsoleSpanExporter
@@ -45,6 +45,35 @@ STORAGE_OPERATIONS = Counter(
     ['operation_type', 'status']
 )
 
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    'embedding_cache_lookups_total',
+    'Chunk embedding cache lookups during ingestion',
+    ['model', 'result']
+)
+
+EMBEDDING_CACHE_HIT_RATIO = Gauge(
+    'embedding_cache_hit_ratio',
+    'Fraction of chunk embeddings served from the ingestion cache since startup',
+    ['model']
+)
+
+EMBEDDING_CACHE_ENTRIES = Gauge(
+    'embedding_cache_entries',
+    'Number of vectors held in the ingestion embedding cache'
+)
+
+EMBEDDING_BATCH_SIZE = Gauge(
+    'embedding_batch_size',
+    'Current adaptive batch size of the batched Ollama embedder',
+    ['model']
+)
+
+EMBEDDING_RETRIES = Counter(
+    'embedding_batch_retries_total',
+    'Embedding sub-batches retried after a failed request',
+    ['model']
+)
+
 def init_metrics(app, port=9090):
     """Initialize metrics server and FastAPI instrumentation."""
     start_http_server(port)
@@ -98,3 +127,11 @@ def record_document_ingested(doc_type, status="success"):
 def record_embedding_time(duration, model="ada-002"):
     """Record embedding generation time."""
     EMBEDDING_TIME.labels(model=model).observe(duration)
+
+def record_embedding_cache_lookup(model, hits, misses, hit_ratio):
+    """Record chunk embedding cache hits and misses for a batch."""
+    if hits:
+        EMBEDDING_CACHE_LOOKUPS.labels(model=model, result="hit").inc(hits)
+    if misses:
+        EMBEDDING_CACHE_LOOKUPS.labels(model=model, result="miss").inc(misses)
+    EMBEDDING_CACHE_HIT_RATIO.labels(model=model).set(hit_ratio)
@@ -0,0 +1,310 @@
+"""
+Batched Ollama embedding backend for ingestion.
+
+``OllamaEmbedding`` sends one HTTP request per chunk. This backend packs chunks
+into ``/api/embed`` batches, keeps several batches in flight and adapts the
+batch size to the observed request latency. Batches are also bounded by an
+estimated token budget derived from the model's context length, so long chunks
+on small-context models produce smaller batches.
+
+Failures are handled by kind:
+
+* transport errors, timeouts and 5xx responses (Ollama down or overloaded) retry
+  the whole batch up to ``max_retries`` times and then raise, without splitting;
+* errors caused by the input (4xx responses, context overflow, malformed
+  responses) split the batch in half until the offending chunks are isolated.
+  The rest of the batch is still embedded, and ``EmbeddingBatchError`` reports
+  which inputs failed.
+
+One HTTP client per model instance keeps connections alive across batches.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import httpx
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import Field, PrivateAttr
+
+try:  # Local package import (tests, running as module)
+    from .monitoring import EMBEDDING_BATCH_SIZE, EMBEDDING_RETRIES, record_embedding_time
+except ImportError:  # pragma: no cover - fallback for production image layout
+    from monitoring import EMBEDDING_BATCH_SIZE, EMBEDDING_RETRIES, record_embedding_time  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio used to estimate batch token budgets.
+_CHARS_PER_TOKEN = 4
+_RETRY_BACKOFF_SECONDS = 0.5
+
+
+class EmbeddingRequestError(RuntimeError):
+    """Raised when Ollama returns an unusable embedding response."""
+
+
+class EmbeddingBatchError(EmbeddingRequestError):
+    """
+    Some inputs of a batch could not be embedded.
+
+    ``failed`` maps input index to its error; ``embeddings`` holds the vectors
+    of the other inputs (``None`` at failed positions).
+    """
+
+    def __init__(self, failed: Dict[int, Exception], embeddings: List[Optional[List[float]]]):
+        first = next(iter(failed.values()))
+        super().__init__(f"{len(failed)} of {len(embeddings)} inputs could not be embedded: {first}")
+        self.failed = failed
+        self.embeddings = embeddings
+
+
+def _is_input_error(err: Exception) -> bool:
+    """True when ``err`` is caused by (some of) the inputs rather than by Ollama being unavailable."""
+    if isinstance(err, httpx.HTTPStatusError):
+        status = err.response.status_code
+        if 400 <= status < 500:
+            return status not in (408, 429)
+        # Ollama reports inputs over the context window as a 500.
+        return "context" in err.response.text.lower()
+    return isinstance(err, (EmbeddingRequestError, ValueError))
+
+
+class BatchedOllamaEmbedding(BaseEmbedding):
+    """Ollama embedding client that batches, pipelines and retries requests."""
+
+    base_url: str = Field(default="http://localhost:11434")
+    request_timeout: float = Field(default=120.0)
+    context_length: Optional[int] = Field(default=None)
+    max_in_flight: int = Field(default=1, gt=0)
+    min_batch_size: int = Field(default=1, gt=0)
+    max_batch_size: int = Field(default=64, gt=0)
+    max_batch_tokens: int = Field(default=32_768, gt=0)
+    target_latency_seconds: float = Field(default=2.0, gt=0)
+    max_retries: int = Field(default=2, ge=0)
+    ollama_additional_kwargs: Dict[str, Any] = Field(default_factory=dict)
+
+    _batch_size: int = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _semaphore: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
+    _client: Optional[httpx.Client] = PrivateAttr(default=None)
+    _aclient: Optional[httpx.AsyncClient] = PrivateAttr(default=None)
+    _aclient_loop: Optional[asyncio.AbstractEventLoop] = PrivateAttr(default=None)
+
+    def __init__(self, initial_batch_size: int = 16, **kwargs: Any):
+        # Batching happens here; keep the base class from pre-splitting input.
+        kwargs.setdefault("embed_batch_size", 2048)
+        super().__init__(**kwargs)
+        self._batch_size = max(self.min_batch_size, min(initial_batch_size, self.max_batch_size))
+        EMBEDDING_BATCH_SIZE.labels(model=self.model_name).set(self._batch_size)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "BatchedOllamaEmbedding"
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size
+
+    # ------------------------------------------------------------------
+    # Batch planning and adaptation
+    # ------------------------------------------------------------------
+    def _estimate_tokens(self, text: str) -> int:
+        tokens = max(1, len(text) // _CHARS_PER_TOKEN)
+        if self.context_length:
+            # Ollama truncates inputs to the context window.
+            tokens = min(tokens, self.context_length)
+        return tokens
+
+    def _plan_batches(self, texts: Sequence[str]) -> List[List[int]]:
+        """Group text indices into batches bounded by size and token budget."""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        limit = self._batch_size
+        for idx, text in enumerate(texts):
+            tokens = self._estimate_tokens(text)
+            if current and (len(current) >= limit or current_tokens + tokens > self.max_batch_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(idx)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _observe(self, batch_len: int, latency: float, failed: bool = False) -> None:
+        """Adjust the batch size: halve on slow or failed requests, grow slowly otherwise."""
+        record_embedding_time(latency, model=self.model_name)
+        with self._lock:
+            size = self._batch_size
+            if failed or latency > self.target_latency_seconds:
+                size = max(self.min_batch_size, size // 2)
+            elif latency < self.target_latency_seconds / 2 and batch_len >= size:
+                size = min(self.max_batch_size, size + max(1, size // 4))
+            if size != self._batch_size:
+                logger.debug(
+                    "Embedding batch size %s -> %s (latency=%.2fs, failed=%s)",
+                    self._batch_size,
+                    size,
+                    latency,
+                    failed,
+                )
+                self._batch_size = size
+                EMBEDDING_BATCH_SIZE.labels(model=self.model_name).set(size)
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    def _payload(self, texts: Sequence[str]) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"model": self.model_name, "input": list(texts), "truncate": True}
+        if self.ollama_additional_kwargs:
+            payload["options"] = self.ollama_additional_kwargs
+        return payload
+
+    @staticmethod
+    def _parse(texts: Sequence[str], response: httpx.Response) -> List[List[float]]:
+        response.raise_for_status()
+        embeddings = response.json().get("embeddings")
+        if not isinstance(embeddings, list) or len(embeddings) != len(texts):
+            raise EmbeddingRequestError(
+                f"Expected {len(texts)} embeddings, got {len(embeddings) if isinstance(embeddings, list) else 'none'}"
+            )
+        return embeddings
+
+    def _sync_client(self) -> httpx.Client:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.Client(base_url=self.base_url, timeout=self.request_timeout)
+        return self._client
+
+    def _async_client(self) -> httpx.AsyncClient:
+        # Clients and semaphores are bound to the event loop that created them.
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient.is_closed or self._aclient_loop is not loop:
+            self._aclient = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.request_timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_in_flight,
+                    max_keepalive_connections=self.max_in_flight,
+                ),
+            )
+            self._aclient_loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._aclient
+
+    async def _arequest(self, texts: Sequence[str], attempt: int = 0) -> List[List[float]]:
+        """One ``/api/embed`` call; transient failures retry the whole batch."""
+        client = self._async_client()
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/embed", json=self._payload(texts))
+                embeddings = self._parse(texts, response)
+            except Exception as err:
+                self._observe(len(texts), time.perf_counter() - started, failed=not _is_input_error(err))
+                if _is_input_error(err) or not isinstance(err, httpx.HTTPError) or attempt >= self.max_retries:
+                    raise
+                EMBEDDING_RETRIES.labels(model=self.model_name).inc()
+                logger.warning("Embedding request failed (%s); retrying batch of %s", err, len(texts))
+            else:
+                self._observe(len(texts), time.perf_counter() - started)
+                return embeddings
+        await asyncio.sleep(_RETRY_BACKOFF_SECONDS * (2 ** attempt))
+        return await self._arequest(texts, attempt + 1)
+
+    def _request(self, texts: Sequence[str], attempt: int = 0) -> List[List[float]]:
+        started = time.perf_counter()
+        try:
+            embeddings = self._parse(texts, self._sync_client().post("/api/embed", json=self._payload(texts)))
+        except Exception as err:
+            self._observe(len(texts), time.perf_counter() - started, failed=not _is_input_error(err))
+            if _is_input_error(err) or not isinstance(err, httpx.HTTPError) or attempt >= self.max_retries:
+                raise
+            EMBEDDING_RETRIES.labels(model=self.model_name).inc()
+            logger.warning("Embedding request failed (%s); retrying batch of %s", err, len(texts))
+            time.sleep(_RETRY_BACKOFF_SECONDS * (2 ** attempt))
+            return self._request(texts, attempt + 1)
+        self._observe(len(texts), time.perf_counter() - started)
+        return embeddings
+
+    async def _aembed_isolating(self, texts: Sequence[str]) -> List[Union[List[float], Exception]]:
+        """Embed ``texts``; inputs that cannot be embedded come back as their error."""
+        try:
+            return await self._arequest(texts)
+        except Exception as err:
+            if not _is_input_error(err):
+                raise
+            if len(texts) == 1:
+                return [err]
+            mid = len(texts) // 2
+            logger.warning("Embedding batch of %s rejected (%s); isolating the failing inputs", len(texts), err)
+            left, right = await asyncio.gather(
+                self._aembed_isolating(texts[:mid]),
+                self._aembed_isolating(texts[mid:]),
+            )
+            return left + right
+
+    def _embed_isolating(self, texts: Sequence[str]) -> List[Union[List[float], Exception]]:
+        try:
+            return self._request(texts)
+        except Exception as err:
+            if not _is_input_error(err):
+                raise
+            if len(texts) == 1:
+                return [err]
+            mid = len(texts) // 2
+            logger.warning("Embedding batch of %s rejected (%s); isolating the failing inputs", len(texts), err)
+            return self._embed_isolating(texts[:mid]) + self._embed_isolating(texts[mid:])
+
+    @staticmethod
+    def _collect(
+        size: int,
+        batches: List[List[int]],
+        outcomes: Sequence[List[Union[List[float], Exception]]],
+    ) -> List[List[float]]:
+        results: List[Optional[List[float]]] = [None] * size
+        failed: Dict[int, Exception] = {}
+        for batch, batch_outcomes in zip(batches, outcomes):
+            for idx, outcome in zip(batch, batch_outcomes):
+                if isinstance(outcome, Exception):
+                    failed[idx] = outcome
+                else:
+                    results[idx] = outcome
+        if failed:
+            raise EmbeddingBatchError(failed, results)
+        return results  # type: ignore[return-value]
+
+    # ------------------------------------------------------------------
+    # BaseEmbedding interface
+    # ------------------------------------------------------------------
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._get_text_embeddings([query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return (await self._aget_text_embeddings([query]))[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        batches = self._plan_batches(texts)
+        outcomes = [self._embed_isolating([texts[idx] for idx in batch]) for batch in batches]
+        return self._collect(len(texts), batches, outcomes)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        batches = self._plan_batches(texts)
+        outcomes = await asyncio.gather(
+            *(self._aembed_isolating([texts[idx] for idx in batch]) for batch in batches)
+        )
+        return self._collect(len(texts), batches, outcomes)
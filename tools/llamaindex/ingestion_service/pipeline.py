@@ -0,0 +1,486 @@
+"""
+Streaming ingestion pipeline.
+
+Files flow through three stages connected by bounded queues:
+
+    parse + chunk (worker processes) -> embed (batches) -> upsert (batches)
+
+At most ``max_in_flight`` files are being parsed and each queue holds at most
+``max_in_flight`` batches, so peak memory is bounded by the batch sizes and the
+in-flight window instead of the size of the corpus.
+
+An optional ``embed_gate`` wraps every embedding call. The ingestion service
+uses it to take the GPU slot once per batch instead of for the whole run, so
+interactive requests waiting on the slot are served between batches.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import pickle
+import tempfile
+from collections import defaultdict, deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncContextManager,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from llama_index.core.schema import BaseNode, MetadataMode
+
+try:  # Local package import (tests, running as module)
+    from .chunking import parse_and_chunk_file, parse_and_chunk_variants
+    from .manifest import FILE_PATH_KEY, FileFingerprint
+    from .ollama_embedding import EmbeddingBatchError
+    from .workers import run_cpu_bound
+except ImportError:  # pragma: no cover - fallback for production image layout
+    from chunking import parse_and_chunk_file, parse_and_chunk_variants  # type: ignore
+    from manifest import FILE_PATH_KEY, FileFingerprint  # type: ignore
+    from ollama_embedding import EmbeddingBatchError  # type: ignore
+    from workers import run_cpu_bound  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name, ""))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+@dataclass
+class PipelineConfig:
+    """Batch sizes and in-flight window for a pipeline run."""
+    chunk_size: int
+    chunk_overlap: int
+    embed_batch_size: int = field(default_factory=lambda: _int_env("LLAMAINDEX_EMBED_BATCH_SIZE", 64))
+    upsert_batch_size: int = field(default_factory=lambda: _int_env("LLAMAINDEX_UPSERT_BATCH_SIZE", 256))
+    max_in_flight: int = field(default_factory=lambda: _int_env("LLAMAINDEX_PIPELINE_MAX_IN_FLIGHT", 4))
+    # Embed batches handed to the model concurrently; the model bounds actual requests.
+    embed_concurrency: int = field(default_factory=lambda: _int_env("LLAMAINDEX_PIPELINE_EMBED_WORKERS", 2))
+
+
+@dataclass
+class PipelineStats:
+    """Counters collected while the pipeline runs."""
+    files_read: int = 0
+    documents_loaded: int = 0
+    chunks_generated: int = 0
+    vectors_upserted: int = 0
+    errors: List[str] = field(default_factory=list)
+    # Files with at least one chunk that could not be embedded. Some of their
+    # chunks may already be stored; callers should purge them.
+    failed_files: List[str] = field(default_factory=list)
+
+    def fail_file(self, path: str, reason: str, progress: Any = None) -> None:
+        if path in self.failed_files:
+            return
+        self.failed_files.append(path)
+        self.errors.append(f"{path}: {reason}")
+        if progress is not None:
+            progress.fail_file(path)
+
+
+class _FileTracker:
+    """Reports a file as done once all of its nodes have been upserted."""
+
+    def __init__(self, progress: Any, fingerprints: Dict[str, FileFingerprint], report_files: bool = True):
+        self.progress = progress
+        self.fingerprints = fingerprints
+        self.report_files = report_files
+        self.remaining: Dict[str, int] = {}
+
+    def _finish(self, path: str) -> None:
+        if not self.report_files:
+            return
+        fingerprint = self.fingerprints.get(path)
+        self.progress.advance(files=1, size_bytes=fingerprint.size if fingerprint else 0)
+
+    def expect(self, path: str, node_count: int) -> None:
+        if node_count == 0:
+            self._finish(path)
+        else:
+            self.remaining[path] = node_count
+
+    def stored(self, nodes: Sequence[BaseNode]) -> None:
+        per_file: Dict[str, int] = defaultdict(int)
+        for node in nodes:
+            per_file[node.metadata.get(FILE_PATH_KEY, "")] += 1
+        for path, count in per_file.items():
+            if path not in self.remaining:
+                continue
+            self.remaining[path] -= count
+            if self.remaining[path] <= 0:
+                del self.remaining[path]
+                self._finish(path)
+        self.progress.advance(chunks=len(nodes))
+
+
+async def _parse_in_order(files: Sequence[str], submit: Callable[[str], Any], window: int):
+    """
+    Run ``submit(path)`` on the worker pool for up to ``window`` files at a time.
+
+    Yields ``(path, result, error)`` in submission order so downstream stages see
+    files in the same order they were listed.
+    """
+    pending: Deque = deque()
+    paths = iter(files)
+
+    def submit_next() -> None:
+        path = next(paths, None)
+        if path is not None:
+            pending.append((path, submit(path)))
+
+    try:
+        for _ in range(max(1, window)):
+            submit_next()
+        while pending:
+            path, future = pending.popleft()
+            try:
+                result, error = await future, None
+            except Exception as exc:
+                logger.warning("Failed to load %s: %s", path, exc)
+                result, error = None, exc
+            submit_next()
+            yield path, result, error
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+async def _parse_stage(files, out_q, fingerprints, config: PipelineConfig, stats, tracker, progress) -> None:
+    """Parse and chunk files on the worker pool and emit embed-sized batches."""
+    batch: List[BaseNode] = []
+
+    def submit(path: str):
+        return run_cpu_bound(
+            parse_and_chunk_file,
+            path,
+            fingerprints.get(path),
+            config.chunk_size,
+            config.chunk_overlap,
+        )
+
+    async for path, result, error in _parse_in_order(files, submit, config.max_in_flight):
+        if error is not None:
+            stats.fail_file(path, str(error), progress)
+            continue
+        document_count, nodes = result
+        stats.files_read += 1
+        stats.documents_loaded += document_count
+        stats.chunks_generated += len(nodes)
+        # The chunk total is only known once every file is chunked; report it as it grows.
+        progress.set_totals(chunks=stats.chunks_generated)
+        tracker.expect(path, len(nodes))
+        for node in nodes:
+            batch.append(node)
+            if len(batch) >= config.embed_batch_size:
+                await out_q.put(batch)
+                batch = []
+    if batch:
+        await out_q.put(batch)
+    await out_q.put(_DONE)
+
+
+EmbedGate = Callable[[], AsyncContextManager[Any]]
+
+
+async def _embed_worker(in_q, out_q, embed_model, stats: PipelineStats, progress, gate: Optional[EmbedGate]) -> None:
+    while True:
+        batch = await in_q.get()
+        if batch is _DONE:
+            # Let sibling workers see the sentinel too.
+            await in_q.put(_DONE)
+            return
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in batch]
+        try:
+            async with gate() if gate is not None else nullcontext():
+                embeddings: List[Any] = await embed_model.aget_text_embedding_batch(texts)
+        except Exception as exc:
+            if isinstance(exc, EmbeddingBatchError) and len(exc.embeddings) == len(texts):
+                # The model already isolated the bad chunks; only their files fail.
+                embeddings = [exc.failed.get(idx, vector) for idx, vector in enumerate(exc.embeddings)]
+            else:
+                # Transport errors were already retried by the model; do not re-send chunk by chunk.
+                logger.warning("Embedding batch of %s chunks failed: %s", len(batch), exc)
+                embeddings = [exc] * len(batch)
+
+        embedded: List[BaseNode] = []
+        for node, embedding in zip(batch, embeddings):
+            if isinstance(embedding, Exception):
+                stats.fail_file(node.metadata.get(FILE_PATH_KEY, ""), f"embedding failed: {embedding}", progress)
+                continue
+            node.embedding = embedding
+            embedded.append(node)
+        if embedded:
+            await out_q.put(embedded)
+
+
+async def _embed_stage(
+    in_q, out_q, embed_model, config: PipelineConfig, stats, progress, gate: Optional[EmbedGate] = None
+) -> None:
+    workers = [
+        asyncio.create_task(_embed_worker(in_q, out_q, embed_model, stats, progress, gate))
+        for _ in range(max(1, config.embed_concurrency))
+    ]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for worker in workers:
+            worker.cancel()
+    await out_q.put(_DONE)
+
+
+async def _upsert_stage(in_q, vector_store, config: PipelineConfig, stats, tracker: _FileTracker) -> None:
+    pending: List[BaseNode] = []
+
+    async def flush() -> None:
+        nonlocal pending
+        if not pending:
+            return
+        nodes, pending = pending, []
+        await asyncio.to_thread(vector_store.add, nodes)
+        stats.vectors_upserted += len(nodes)
+        tracker.stored(nodes)
+
+    while True:
+        batch = await in_q.get()
+        if batch is _DONE:
+            break
+        pending.extend(
+            node for node in batch if node.metadata.get(FILE_PATH_KEY, "") not in stats.failed_files
+        )
+        if len(pending) >= config.upsert_batch_size:
+            await flush()
+    await flush()
+    # Bulk writers queue upserts asynchronously; wait for them to be applied.
+    barrier = getattr(vector_store, "flush", None)
+    if callable(barrier):
+        await asyncio.to_thread(barrier)
+
+
+async def _run_stages(stages) -> None:
+    """Run pipeline stages concurrently; a failure cancels the others and is re-raised."""
+    tasks = [asyncio.create_task(stage) for stage in stages]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def run_ingestion_pipeline(
+    files: Sequence[str],
+    fingerprints: Dict[str, FileFingerprint],
+    vector_store: Any,
+    embed_model: Any,
+    config: PipelineConfig,
+    progress: Any,
+    embed_gate: Optional[EmbedGate] = None,
+) -> PipelineStats:
+    """
+    Stream ``files`` through parse/chunk -> embed -> upsert.
+
+    A failure in any stage cancels the others and is re-raised. Files that fail
+    to load or embed are recorded in ``stats.errors``/``stats.failed_files`` and
+    the rest of the run continues.
+    """
+    stats = PipelineStats()
+    tracker = _FileTracker(progress, fingerprints)
+    window = max(1, config.max_in_flight)
+    chunks_q: asyncio.Queue = asyncio.Queue(maxsize=window)
+    vectors_q: asyncio.Queue = asyncio.Queue(maxsize=window)
+    await _run_stages([
+        _parse_stage(files, chunks_q, fingerprints, config, stats, tracker, progress),
+        _embed_stage(chunks_q, vectors_q, embed_model, config, stats, progress, embed_gate),
+        _upsert_stage(vectors_q, vector_store, config, stats, tracker),
+    ])
+
+    logger.debug(
+        "Pipeline finished: files=%s documents=%s chunks=%s upserted=%s errors=%s",
+        stats.files_read,
+        stats.documents_loaded,
+        stats.chunks_generated,
+        stats.vectors_upserted,
+        len(stats.errors),
+    )
+    return stats
+
+
+# ----------------------------------------------------------------------
+# Fan-out: one source directory, several collections/embedding models
+# ----------------------------------------------------------------------
+@dataclass
+class FanoutTarget:
+    """A collection fed from the shared parse pass."""
+    collection: str
+    model_name: str
+    chunk_size: int
+    chunk_overlap: int
+    files: Set[str]
+    vector_store: Any
+    embed_model: Any
+
+    @property
+    def variant(self) -> Tuple[int, int]:
+        return (self.chunk_size, self.chunk_overlap)
+
+
+def order_targets(targets: Sequence[FanoutTarget], loaded_models: Iterable[str] = ()) -> List[FanoutTarget]:
+    """
+    Order embedding passes so each model is loaded at most once.
+
+    Targets are grouped by model; models already resident in Ollama go first.
+    Within a group the original (priority) order is kept.
+    """
+    loaded = [name.split(":")[0] for name in loaded_models]
+    model_order: List[str] = []
+    for target in targets:
+        if target.model_name not in model_order:
+            model_order.append(target.model_name)
+
+    def rank(model_name: str) -> Tuple[int, int]:
+        base = model_name.split(":")[0]
+        resident = loaded.index(base) if base in loaded else len(loaded)
+        return (resident, model_order.index(model_name))
+
+    return sorted(targets, key=lambda target: rank(target.model_name))
+
+
+def _write_record(handle: BinaryIO, record: Tuple[str, int, List[BaseNode]]) -> None:
+    pickle.dump(record, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_record(handle: BinaryIO) -> Optional[Tuple[str, int, List[BaseNode]]]:
+    try:
+        return pickle.load(handle)
+    except EOFError:
+        return None
+
+
+async def _spool_stage(
+    files: Sequence[str],
+    fingerprints: Dict[str, FileFingerprint],
+    targets: Sequence[FanoutTarget],
+    variants: List[Tuple[int, int]],
+    handles: List[BinaryIO],
+    config: PipelineConfig,
+    stats: Dict[str, PipelineStats],
+    progress: Any,
+) -> None:
+    """Parse each file once, chunk it per variant and spool the nodes to disk."""
+    variant_index = {variant: idx for idx, variant in enumerate(variants)}
+    chunks_total = 0
+
+    def submit(path: str):
+        return run_cpu_bound(parse_and_chunk_variants, path, fingerprints.get(path), variants)
+
+    async for path, result, error in _parse_in_order(files, submit, config.max_in_flight):
+        wanted_by = [target for target in targets if path in target.files]
+        if error is not None:
+            progress.fail_file(path)
+            for target in wanted_by:
+                stats[target.collection].fail_file(path, str(error))
+            continue
+        document_count, variant_nodes = result
+        for handle, nodes in zip(handles, variant_nodes):
+            await asyncio.to_thread(_write_record, handle, (path, document_count, nodes))
+        chunks_total += sum(len(variant_nodes[variant_index[target.variant]]) for target in wanted_by)
+        progress.set_totals(chunks=chunks_total)
+        fingerprint = fingerprints.get(path)
+        progress.advance(files=1, size_bytes=fingerprint.size if fingerprint else 0)
+
+
+async def _spool_source_stage(spool_path: str, target: FanoutTarget, out_q, config: PipelineConfig, stats) -> None:
+    """Replay spooled nodes for the files ``target`` needs, in embed-sized batches."""
+    batch: List[BaseNode] = []
+    with open(spool_path, "rb") as handle:
+        while True:
+            record = await asyncio.to_thread(_read_record, handle)
+            if record is None:
+                break
+            path, document_count, nodes = record
+            if path not in target.files:
+                continue
+            stats.files_read += 1
+            stats.documents_loaded += document_count
+            stats.chunks_generated += len(nodes)
+            for node in nodes:
+                batch.append(node)
+                if len(batch) >= config.embed_batch_size:
+                    await out_q.put(batch)
+                    batch = []
+    if batch:
+        await out_q.put(batch)
+    await out_q.put(_DONE)
+
+
+async def run_fanout_pipeline(
+    files: Sequence[str],
+    fingerprints: Dict[str, FileFingerprint],
+    targets: Sequence[FanoutTarget],
+    config: PipelineConfig,
+    progress: Any,
+    loaded_models: Iterable[str] = (),
+    embed_gate: Optional[EmbedGate] = None,
+) -> Dict[str, PipelineStats]:
+    """
+    Read and chunk ``files`` once, then embed and upsert them into every target.
+
+    Chunks are spooled to a temporary directory (``LLAMAINDEX_SPOOL_DIR``) so
+    memory stays bounded while each embedding model gets a single pass. Targets
+    sharing a model run back to back; with the chunk embedding cache enabled,
+    the second one is served from the cache.
+    """
+    variants: List[Tuple[int, int]] = []
+    for target in targets:
+        if target.variant not in variants:
+            variants.append(target.variant)
+    stats = {target.collection: PipelineStats() for target in targets}
+    window = max(1, config.max_in_flight)
+
+    with tempfile.TemporaryDirectory(prefix="llamaindex-fanout-", dir=os.getenv("LLAMAINDEX_SPOOL_DIR") or None) as spool_dir:
+        spool_paths = [os.path.join(spool_dir, f"variant-{idx}.pkl") for idx in range(len(variants))]
+        handles = [open(path, "wb") for path in spool_paths]
+        try:
+            await _spool_stage(files, fingerprints, targets, variants, handles, config, stats, progress)
+        finally:
+            for handle in handles:
+                handle.close()
+
+        for target in order_targets(targets, loaded_models):
+            target_stats = stats[target.collection]
+            logger.info(
+                "Fan-out pass: collection=%s model=%s files=%s",
+                target.collection,
+                target.model_name,
+                len(target.files),
+            )
+            tracker = _FileTracker(progress, fingerprints, report_files=False)
+            chunks_q: asyncio.Queue = asyncio.Queue(maxsize=window)
+            vectors_q: asyncio.Queue = asyncio.Queue(maxsize=window)
+            await _run_stages([
+                _spool_source_stage(spool_paths[variants.index(target.variant)], target, chunks_q, config, target_stats),
+                _embed_stage(chunks_q, vectors_q, target.embed_model, config, target_stats, progress, embed_gate),
+                _upsert_stage(vectors_q, target.vector_store, config, target_stats, tracker),
+            ])
+    return stats
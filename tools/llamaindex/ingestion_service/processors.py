@@ -5,7 +5,7 @@ Handles markdown, PDF, and other document formats.
 
 import os
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 
 import magic
@@ -13,10 +13,32 @@ import frontmatter
 from pypdf import PdfReader
 from llama_index.core.node_parser import SentenceSplitter
 
+from .chunking import split_text
 from .monitoring import record_document_ingested, track_time, INGEST_TIME
+from .workers import run_cpu_bound
 
 logger = logging.getLogger(__name__)
 
+
+def _extract_pdf(file_path: str) -> Tuple[str, Dict]:
+    """Extract text and metadata from a PDF (runs in a parse worker)."""
+    reader = PdfReader(file_path)
+    content = ""
+
+    # Extract text from all pages
+    for page in reader.pages:
+        content += page.extract_text() + "\n"
+
+    # Get PDF metadata
+    metadata = {
+        'title': reader.metadata.get('/Title', ''),
+        'author': reader.metadata.get('/Author', ''),
+        'creation_date': reader.metadata.get('/CreationDate', ''),
+        'pages': len(reader.pages)
+    }
+    return content, metadata
+
+
 class DocumentProcessor:
     """Base class for document processors."""
 
@@ -33,6 +55,10 @@ class DocumentProcessor:
             chunk_overlap=self.chunk_overlap
         )
     
+    async def _split(self, content: str) -> List[str]:
+        """Split text on the parse worker pool instead of the event loop."""
+        return await run_cpu_bound(split_text, content, self.chunk_size, self.chunk_overlap)
+
     @track_time(INGEST_TIME)
     async def process_file(self, file_path: str) -> List[Dict]:
         """Process a single file and return chunks with metadata."""
@@ -71,7 +97,7 @@ class DocumentProcessor:
             metadata = dict(post.metadata)
             
             # Split content into chunks
-            chunks = self.text_splitter.split_text(content)
+            chunks = await self._split(content)
             
             # Create documents with metadata
             documents = []
@@ -96,23 +122,10 @@ class DocumentProcessor:
     async def process_pdf(self, file_path: str) -> List[Dict]:
         """Process a PDF file, extracting text and metadata."""
         try:
-            reader = PdfReader(file_path)
-            content = ""
-            
-            # Extract text from all pages
-            for page in reader.pages:
-                content += page.extract_text() + "\n"
-            
-            # Get PDF metadata
-            metadata = {
-                'title': reader.metadata.get('/Title', ''),
-                'author': reader.metadata.get('/Author', ''),
-                'creation_date': reader.metadata.get('/CreationDate', ''),
-                'pages': len(reader.pages)
-            }
+            content, metadata = await run_cpu_bound(_extract_pdf, file_path)
             
             # Split content into chunks
-            chunks = self.text_splitter.split_text(content)
+            chunks = await self._split(content)
             
             # Create documents with metadata
             documents = []
@@ -141,7 +154,7 @@ class DocumentProcessor:
                 content = f.read()
             
             # Split content into chunks
-            chunks = self.text_splitter.split_text(content)
+            chunks = await self._split(content)
             
             # Create documents with metadata
             documents = []
@@ -0,0 +1,225 @@
+"""
+Bulk Qdrant writer for ingestion.
+
+``QdrantVectorStore.add`` upserts synchronously over REST and waits for every
+batch to be applied. The bulk writer instead:
+
+* talks gRPC when available (``QDRANT_GRPC_PORT``),
+* splits nodes into large batches sent with ``wait=False`` from a small pool
+  of upload threads,
+* re-sends the last batch with ``wait=True`` in :meth:`flush` as a single
+  barrier, so callers only see the run as done once Qdrant has applied it,
+* can pause HNSW indexing (``indexing_threshold=0``) for a full reindex and
+  restore the previous threshold afterwards,
+* optionally stores a BM25 sparse vector next to the dense one (hybrid
+  retrieval). New collections get the sparse vector configured; existing
+  collections only receive it if they were created with one.
+
+Points are built with the same payload layout as ``QdrantVectorStore`` so the
+query service reads them unchanged.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Sequence
+
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as rest
+
+logger = logging.getLogger(__name__)
+
+# Qdrant's default optimizer indexing threshold (KB), used when the collection does not report one.
+_DEFAULT_INDEXING_THRESHOLD = 20_000
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name, ""))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def create_bulk_client(host: str, port: int) -> QdrantClient:
+    """
+    Return a Qdrant client for bulk writes, preferring gRPC.
+
+    Falls back to REST when the gRPC port is unreachable or
+    ``LLAMAINDEX_QDRANT_PREFER_GRPC`` is disabled.
+    """
+    prefer_grpc = os.getenv("LLAMAINDEX_QDRANT_PREFER_GRPC", "true").strip().lower() in {"1", "true", "yes", "on"}
+    timeout = _int_env("LLAMAINDEX_QDRANT_TIMEOUT", 60)
+    if prefer_grpc:
+        grpc_port = _int_env("QDRANT_GRPC_PORT", 6334)
+        try:
+            client = QdrantClient(host=host, port=port, grpc_port=grpc_port, prefer_grpc=True, timeout=timeout)
+            client.get_collections()
+            return client
+        except Exception as err:
+            logger.warning("Qdrant gRPC unavailable at %s:%s, using REST: %s", host, grpc_port, err)
+    return QdrantClient(host=host, port=port, timeout=timeout)
+
+
+class QdrantBulkWriter:
+    """
+    Drop-in replacement for ``QdrantVectorStore.add`` during ingestion.
+
+    ``add`` returns as soon as batches are queued; call :meth:`flush` before
+    treating the data as persisted.
+    """
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection_name: str,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        sparse_encoder: Any = None,
+        sparse_vector_name: str = "text-sparse",
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self.batch_size = batch_size or _int_env("LLAMAINDEX_BULK_UPSERT_BATCH", 512)
+        self.workers = workers or _int_env("LLAMAINDEX_BULK_UPSERT_WORKERS", 4)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="qdrant-upsert")
+        self._futures: List[Future] = []
+        self._last_batch: Optional[List[rest.PointStruct]] = None
+        self._vector_name: Optional[str] = None
+        self.sparse_encoder = sparse_encoder
+        self.sparse_vector_name = sparse_vector_name
+        self._sparse_name: Optional[str] = None
+        self._collection_ready = False
+        self._lock = threading.Lock()
+        self.points_written = 0
+
+    # ------------------------------------------------------------------
+    # Collection handling
+    # ------------------------------------------------------------------
+    def _ensure_collection(self, dimension: int) -> None:
+        if self._collection_ready:
+            return
+        if self.client.collection_exists(self.collection_name):
+            params = self.client.get_collection(self.collection_name).config.params
+            vectors = params.vectors
+            if isinstance(vectors, dict):
+                # Named vectors: LlamaIndex stores the dense vector under "text-dense".
+                self._vector_name = "text-dense" if "text-dense" in vectors else next(iter(vectors), None)
+            if self.sparse_encoder is not None:
+                if self.sparse_vector_name in (getattr(params, "sparse_vectors", None) or {}):
+                    self._sparse_name = self.sparse_vector_name
+                else:
+                    logger.warning(
+                        "Collection %s has no sparse vector '%s'; hybrid search needs it to be recreated.",
+                        self.collection_name,
+                        self.sparse_vector_name,
+                    )
+        else:
+            extra: dict = {}
+            if self.sparse_encoder is not None:
+                # IDF is applied by Qdrant at query time; documents store BM25 TF weights.
+                extra["sparse_vectors_config"] = {
+                    self.sparse_vector_name: rest.SparseVectorParams(modifier=rest.Modifier.IDF),
+                }
+                self._sparse_name = self.sparse_vector_name
+            self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=rest.VectorParams(size=dimension, distance=rest.Distance.COSINE),
+                **extra,
+            )
+            logger.info(
+                "Created collection %s (dim=%s, sparse=%s)", self.collection_name, dimension, self._sparse_name
+            )
+        self._collection_ready = True
+
+    @contextmanager
+    def indexing_paused(self) -> Iterator[None]:
+        """Disable HNSW indexing while bulk loading, then restore the previous threshold."""
+        previous = _DEFAULT_INDEXING_THRESHOLD
+        paused = False
+        try:
+            if self.client.collection_exists(self.collection_name):
+                info = self.client.get_collection(self.collection_name)
+                configured = getattr(info.config.optimizer_config, "indexing_threshold", None)
+                if configured:
+                    previous = configured
+                self.client.update_collection(
+                    collection_name=self.collection_name,
+                    optimizer_config=rest.OptimizersConfigDiff(indexing_threshold=0),
+                )
+                paused = True
+                logger.info("Paused indexing on %s (threshold was %s)", self.collection_name, previous)
+        except Exception as err:  # pragma: no cover - optimization only
+            logger.warning("Could not pause indexing on %s: %s", self.collection_name, err)
+        try:
+            yield
+        finally:
+            if paused:
+                self.client.update_collection(
+                    collection_name=self.collection_name,
+                    optimizer_config=rest.OptimizersConfigDiff(indexing_threshold=previous),
+                )
+                logger.info("Restored indexing on %s (threshold=%s)", self.collection_name, previous)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def _build_point(self, node: BaseNode) -> rest.PointStruct:
+        vector: Any = node.get_embedding()
+        if self._vector_name or self._sparse_name:
+            # "" is Qdrant's name for the default (unnamed) dense vector.
+            vector = {self._vector_name or "": vector}
+        if self._sparse_name:
+            indices, values = self.sparse_encoder.encode_document(node.get_content(metadata_mode=MetadataMode.EMBED))
+            vector[self._sparse_name] = rest.SparseVector(indices=indices, values=values)
+        return rest.PointStruct(
+            id=node.node_id,
+            vector=vector,
+            payload=node_to_metadata_dict(node, remove_text=False, flat_metadata=False),
+        )
+
+    def _upsert(self, points: List[rest.PointStruct], wait: bool) -> None:
+        self.client.upsert(collection_name=self.collection_name, points=points, wait=wait)
+
+    def _raise_failed(self) -> None:
+        with self._lock:
+            done = [future for future in self._futures if future.done()]
+            self._futures = [future for future in self._futures if not future.done()]
+        for future in done:
+            future.result()
+
+    def add(self, nodes: Sequence[BaseNode], **_: Any) -> List[str]:
+        """Queue ``nodes`` for upsert and return their ids."""
+        if not nodes:
+            return []
+        self._raise_failed()
+        self._ensure_collection(len(nodes[0].get_embedding()))
+        points = [self._build_point(node) for node in nodes]
+        for start in range(0, len(points), self.batch_size):
+            batch = points[start:start + self.batch_size]
+            future = self._executor.submit(self._upsert, batch, False)
+            with self._lock:
+                self._futures.append(future)
+                self._last_batch = batch
+        self.points_written += len(points)
+        return [node.node_id for node in nodes]
+
+    def flush(self) -> None:
+        """Wait for queued batches and apply a final ``wait=True`` barrier."""
+        with self._lock:
+            futures, self._futures = self._futures, []
+            last_batch, self._last_batch = self._last_batch, None
+        for future in futures:
+            future.result()
+        if last_batch:
+            # Updates are applied in order, so waiting on a re-sent batch waits on all of them.
+            self._upsert(last_batch, wait=True)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,239 @@
+"""
+Directory scanner for ingestion.
+
+Walks a tree with ``os.scandir`` and a thread pool (one task per directory),
+keeps the N largest files in a heap and caches directory listings keyed by the
+directory's mtime, so re-scanning an unchanged tree skips every ``readdir``.
+
+File stats are never served from the cache: a file edited in place does not
+change its directory's mtime, and the incremental manifest relies on fresh
+size/mtime values.
+
+Filtering matches the previous ``os.walk`` loop: hidden and excluded
+directories are pruned by (lower-cased) name, symlinked directories are listed
+but not descended into, and file counters are reported the same way.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (name, is_dir, is_symlink)
+_Entry = Tuple[str, bool, bool]
+
+# Listings of directories modified this recently are not cached: a change in the
+# same mtime tick would otherwise go unnoticed.
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name, ""))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+@dataclass
+class DirectoryScan:
+    """Files selected for ingestion plus the counters reported back to callers."""
+    root: str
+    files: List[str] = field(default_factory=list)
+    file_stats: Dict[str, os.stat_result] = field(default_factory=dict)
+    files_considered: int = 0
+    skipped_extension: int = 0
+    skipped_size: int = 0
+    skipped_hidden: int = 0
+    oversized_files: List[Tuple[int, str]] = field(default_factory=list)
+    largest_files: List[Tuple[int, str]] = field(default_factory=list)
+    directories_scanned: int = 0
+    listings_cached: int = 0
+
+
+@dataclass
+class ScanFilters:
+    allowed_extensions: Optional[Set[str]]
+    excluded_dirs: Set[str]
+    excluded_names: Set[str]
+    skip_hidden_dirs: bool = True
+    skip_hidden_files: bool = True
+    max_size_bytes: Optional[int] = None
+    largest_limit: int = 25
+
+
+@dataclass
+class _DirResult:
+    files: List[Tuple[str, os.stat_result]] = field(default_factory=list)
+    subdirs: List[str] = field(default_factory=list)
+    considered: int = 0
+    skipped_extension: int = 0
+    skipped_size: int = 0
+    skipped_hidden: int = 0
+    oversized: List[Tuple[int, str]] = field(default_factory=list)
+    sizes: List[Tuple[int, str]] = field(default_factory=list)
+    cached: bool = False
+
+
+class ListingCache:
+    """Directory listings keyed by path and validated against the directory mtime."""
+
+    def __init__(self, max_dirs: int = 50_000):
+        self.max_dirs = max_dirs
+        self._entries: Dict[str, Tuple[int, List[_Entry]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: str, mtime_ns: int) -> Optional[List[_Entry]]:
+        with self._lock:
+            cached = self._entries.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        return None
+
+    def put(self, path: str, mtime_ns: int, entries: List[_Entry]) -> None:
+        if time.time_ns() - mtime_ns < _RACY_WINDOW_NS:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_dirs and path not in self._entries:
+                # Simple bound: start over rather than track recency per directory.
+                self._entries.clear()
+            self._entries[path] = (mtime_ns, entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_listing_cache = ListingCache(_int_env("LLAMAINDEX_SCAN_CACHE_MAX_DIRS", 50_000))
+
+
+def _list_directory(path: str, cache: Optional[ListingCache]) -> Tuple[List[_Entry], bool]:
+    if cache is not None:
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = cache.get(path, mtime_ns)
+        if cached is not None:
+            return cached, True
+    entries: List[_Entry] = []
+    with os.scandir(path) as iterator:
+        for entry in iterator:
+            try:
+                # Same classification as os.walk: symlinks to directories count as directories.
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            entries.append((entry.name, is_dir, entry.is_symlink()))
+    if cache is not None:
+        cache.put(path, mtime_ns, entries)
+    return entries, False
+
+
+def _scan_one(path: str, filters: ScanFilters, cache: Optional[ListingCache]) -> _DirResult:
+    result = _DirResult()
+    try:
+        entries, result.cached = _list_directory(path, cache)
+    except OSError as err:
+        logger.warning("Failed to list %s: %s", path, err)
+        return result
+
+    for name, is_dir, is_symlink in entries:
+        if is_dir:
+            if filters.skip_hidden_dirs and name.startswith('.'):
+                continue
+            if name.lower() in filters.excluded_dirs:
+                continue
+            if not is_symlink:
+                result.subdirs.append(os.path.join(path, name))
+            continue
+
+        result.considered += 1
+        if name in filters.excluded_names:
+            result.skipped_hidden += 1
+            continue
+        if filters.skip_hidden_files and name.startswith('.'):
+            result.skipped_hidden += 1
+            continue
+        ext = os.path.splitext(name)[1].lower()
+        if filters.allowed_extensions is not None and ext not in filters.allowed_extensions:
+            result.skipped_extension += 1
+            continue
+
+        file_path = os.path.join(path, name)
+        try:
+            stat_result = os.stat(file_path)
+        except OSError as err:
+            logger.warning("Failed to stat %s: %s", file_path, err)
+            result.skipped_hidden += 1
+            continue
+        size_bytes = stat_result.st_size
+        result.sizes.append((size_bytes, file_path))
+        if filters.max_size_bytes and size_bytes > filters.max_size_bytes:
+            result.skipped_size += 1
+            result.oversized.append((size_bytes, file_path))
+            continue
+        result.files.append((file_path, stat_result))
+    return result
+
+
+def scan_directory(
+    root: str,
+    filters: ScanFilters,
+    workers: Optional[int] = None,
+    cache: Optional[ListingCache] = _listing_cache,
+) -> DirectoryScan:
+    """
+    Scan ``root`` and return the files to ingest.
+
+    Directories are listed in parallel, but results are assembled in
+    ``os.walk`` (top-down, pre-order) order so runs are deterministic.
+    """
+    root = os.path.abspath(root)
+    workers = workers or _int_env("LLAMAINDEX_SCAN_WORKERS", 8)
+    results: Dict[str, _DirResult] = {}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest-scan") as executor:
+        pending: Dict[Future, str] = {executor.submit(_scan_one, root, filters, cache): root}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                result = future.result()
+                results[path] = result
+                for subdir in result.subdirs:
+                    pending[executor.submit(_scan_one, subdir, filters, cache)] = subdir
+
+    scan = DirectoryScan(root=root)
+    largest: List[Tuple[int, str]] = []
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        result = results[path]
+        scan.directories_scanned += 1
+        scan.listings_cached += int(result.cached)
+        scan.files_considered += result.considered
+        scan.skipped_extension += result.skipped_extension
+        scan.skipped_size += result.skipped_size
+        scan.skipped_hidden += result.skipped_hidden
+        scan.oversized_files.extend(result.oversized)
+        for file_path, stat_result in result.files:
+            scan.files.append(file_path)
+            scan.file_stats[file_path] = stat_result
+        for item in result.sizes:
+            if len(largest) < filters.largest_limit:
+                heapq.heappush(largest, item)
+            elif item > largest[0]:
+                heapq.heapreplace(largest, item)
+        stack.extend(reversed(result.subdirs))
+
+    scan.largest_files = sorted(largest, reverse=True)
+    return scan
@@ -0,0 +1,66 @@
+"""
+Process pool for CPU-bound ingestion work (file parsing, PDF extraction, chunking).
+
+The pool is created lazily and shared by the whole service. Set
+``LLAMAINDEX_PARSE_WORKERS=0`` to run the same work on a thread instead, which
+keeps the event loop responsive but does not use extra cores.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def parse_worker_count() -> int:
+    """Number of parse/chunk worker processes (``LLAMAINDEX_PARSE_WORKERS``)."""
+    default = min(4, os.cpu_count() or 1)
+    try:
+        return max(0, int(os.getenv("LLAMAINDEX_PARSE_WORKERS", str(default))))
+    except ValueError:
+        return default
+
+
+def get_parse_executor() -> Optional[Executor]:
+    """Return the shared process pool, or ``None`` when parsing runs on threads."""
+    global _executor
+    workers = parse_worker_count()
+    if workers <= 0:
+        return None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn: the service process runs threads (uvicorn, GPU lock
+                # heartbeats), which makes fork-without-exec unsafe.
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info("Started parse worker pool with %s processes", workers)
+    return _executor
+
+
+def run_cpu_bound(func: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+    """Schedule ``func(*args)`` on the parse pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    executor = get_parse_executor()
+    if executor is None:
+        return asyncio.ensure_future(asyncio.to_thread(func, *args))
+    return loop.run_in_executor(executor, func, *args)
+
+
+def shutdown_parse_executor() -> None:
+    """Stop the worker pool; called on service shutdown."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,149 @@
+"""
+Batched vector search.
+
+``/search/batch`` embeds every sub-query in one call and then sends one Qdrant
+batch request per collection (``query_batch_points``, or ``search_batch`` on
+older clients) instead of one round trip per query. Hybrid sub-queries add a
+sparse request to the same batch and are fused with RRF.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from llama_index.core.schema import NodeWithScore
+from qdrant_client.http import models as rest
+
+try:  # Local package import (tests, running as module)
+    from .hybrid import HYBRID_CANDIDATES, RETRIEVAL_MODE_HYBRID, reciprocal_rank_fusion
+except ImportError:  # pragma: no cover - fallback for production image layout
+    from hybrid import HYBRID_CANDIDATES, RETRIEVAL_MODE_HYBRID, reciprocal_rank_fusion  # type: ignore
+
+
+@dataclass
+class SubQuery:
+    """One query of a batch, with everything needed to search it."""
+
+    query: str
+    collection: str
+    max_results: int
+    mode: str
+    vector: List[float]
+    dense_vector_name: Optional[str] = None
+    sparse_vector_name: Optional[str] = None
+    sparse_vector: Optional[Tuple[List[int], List[float]]] = None
+
+    @property
+    def hybrid(self) -> bool:
+        return (
+            self.mode == RETRIEVAL_MODE_HYBRID
+            and self.sparse_vector_name is not None
+            and bool(self.sparse_vector and self.sparse_vector[0])
+        )
+
+    @property
+    def limit(self) -> int:
+        return max(self.max_results, HYBRID_CANDIDATES) if self.hybrid else self.max_results
+
+
+def _query_requests(sub_query: SubQuery) -> List[Any]:
+    requests = [
+        rest.QueryRequest(
+            query=sub_query.vector,
+            using=sub_query.dense_vector_name,
+            limit=sub_query.limit,
+            with_payload=True,
+        )
+    ]
+    if sub_query.hybrid:
+        indices, values = sub_query.sparse_vector  # type: ignore[misc]
+        requests.append(
+            rest.QueryRequest(
+                query=rest.SparseVector(indices=indices, values=values),
+                using=sub_query.sparse_vector_name,
+                limit=sub_query.limit,
+                with_payload=True,
+            )
+        )
+    return requests
+
+
+def _search_requests(sub_query: SubQuery) -> List[Any]:
+    dense: Any = sub_query.vector
+    if sub_query.dense_vector_name:
+        dense = rest.NamedVector(name=sub_query.dense_vector_name, vector=sub_query.vector)
+    requests = [rest.SearchRequest(vector=dense, limit=sub_query.limit, with_payload=True)]
+    if sub_query.hybrid:
+        indices, values = sub_query.sparse_vector  # type: ignore[misc]
+        requests.append(
+            rest.SearchRequest(
+                vector=rest.NamedSparseVector(
+                    name=sub_query.sparse_vector_name,
+                    vector=rest.SparseVector(indices=indices, values=values),
+                ),
+                limit=sub_query.limit,
+                with_payload=True,
+            )
+        )
+    return requests
+
+
+async def _run_collection_batch(aclient: Any, collection: str, sub_queries: List[SubQuery]) -> List[List[Any]]:
+    """Send one batch request for ``sub_queries``; returns the points of every request in order."""
+    if hasattr(aclient, "query_batch_points"):
+        requests = [request for sub_query in sub_queries for request in _query_requests(sub_query)]
+        responses = await aclient.query_batch_points(collection_name=collection, requests=requests)
+        return [response.points for response in responses]
+    requests = [request for sub_query in sub_queries for request in _search_requests(sub_query)]
+    return await aclient.search_batch(collection_name=collection, requests=requests)
+
+
+def _to_nodes(vector_store: Any, points: List[Any]) -> List[NodeWithScore]:
+    if not points:
+        return []
+    parsed = vector_store.parse_to_query_result(points)
+    return [NodeWithScore(node=node, score=score) for node, score in zip(parsed.nodes, parsed.similarities)]
+
+
+async def search_batch(
+    aclient: Any,
+    sub_queries: List[SubQuery],
+    vector_store_for: Callable[[str], Any],
+) -> List[List[NodeWithScore]]:
+    """
+    Run ``sub_queries`` with one Qdrant batch request per collection.
+
+    Returns the retrieved nodes for each sub-query, in input order.
+    ``vector_store_for(collection)`` supplies the vector store used to turn
+    Qdrant points into LlamaIndex nodes.
+    """
+    by_collection: Dict[str, List[int]] = {}
+    for position, sub_query in enumerate(sub_queries):
+        by_collection.setdefault(sub_query.collection, []).append(position)
+
+    collections = list(by_collection)
+    batches = await asyncio.gather(
+        *(
+            _run_collection_batch(aclient, collection, [sub_queries[pos] for pos in by_collection[collection]])
+            for collection in collections
+        )
+    )
+
+    results: List[List[NodeWithScore]] = [[] for _ in sub_queries]
+    for collection, points_per_request in zip(collections, batches):
+        vector_store = vector_store_for(collection)
+        cursor = iter(points_per_request)
+        for position in by_collection[collection]:
+            sub_query = sub_queries[position]
+            dense = _to_nodes(vector_store, next(cursor))
+            if not sub_query.hybrid:
+                results[position] = dense[: sub_query.max_results]
+                continue
+            sparse = _to_nodes(vector_store, next(cursor))
+            fused = reciprocal_rank_fusion([dense, sparse], key=lambda item: item.node.node_id)
+            results[position] = [
+                NodeWithScore(node=item.node, score=score) for item, score in fused[: sub_query.max_results]
+            ]
+    return results
@@ -1,43 +1,131 @@
 """
 Caching module for the query service.
+
+``get_cache_client()`` returns one process-wide client. With
+``CACHE_TYPE=memory`` that is an in-process TTL cache; with
+``CACHE_TYPE=redis`` a small local L1 sits in front of a pooled Redis
+connection so hot keys skip the network round trip. Every lookup is recorded
+in the ``cache_operations_total`` counter (hit/miss/eviction/error).
 """
 
-import os
-from typing import Optional, Any
+import hashlib
 import json
-from datetime import datetime
+import logging
+import os
+from typing import Any, Optional
 
 from cachetools import TTLCache
 from redis import asyncio as aioredis
 
+try:
+    from .monitoring import track_cache_operation
+except ImportError:  # pragma: no cover - fallback for production image layout
+    from monitoring import track_cache_operation  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name, ""))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+CACHE_TTL = _int_env("CACHE_TTL", 3600)
+
+
+def build_cache_key(
+    kind: str,
+    collection: str,
+    query: str,
+    *,
+    max_results: Optional[int] = None,
+    filters: Optional[dict] = None,
+    embedding_model: Optional[str] = None,
+    **extra: Any,
+) -> str:
+    """
+    Build a response cache key.
+
+    Everything that changes the response is part of the key; it is hashed so
+    long queries and filter payloads keep keys short. The collection stays in
+    clear text so keys can be inspected or purged per collection.
+    """
+    material = {
+        "query": query.strip(),
+        "max_results": max_results,
+        "filters": filters or None,
+        "embedding_model": embedding_model,
+        **extra,
+    }
+    digest = hashlib.sha256(
+        json.dumps(material, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:32]
+    return f"{kind}:{collection}:{digest}"
+
+
 class BaseCache:
     """Base cache interface."""
-    
+
+    # True when other replicas see the same entries (and locks).
+    shared = False
+
     async def get(self, key: str) -> Optional[Any]:
         raise NotImplementedError
-    
+
     async def set(self, key: str, value: Any, expire: int = 3600) -> bool:
         raise NotImplementedError
-    
+
     async def delete(self, key: str) -> bool:
         raise NotImplementedError
 
+    async def acquire_lock(self, key: str, ttl: float) -> bool:
+        """
+        Claim ``key`` for computing across processes (single-flight).
+
+        Process-local backends have nothing to coordinate with, so the
+        default always succeeds.
+        """
+        return True
+
+    async def release_lock(self, key: str) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+
+class _InstrumentedTTLCache(TTLCache):
+    """TTLCache that records capacity evictions."""
+
+    def popitem(self):
+        item = super().popitem()
+        track_cache_operation("evict", "evicted")
+        return item
+
+
 class MemoryCache(BaseCache):
     """In-memory cache implementation using TTLCache."""
-    
-    def __init__(self, ttl: int = 3600, maxsize: int = 1000):
-        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
-    
+
+    def __init__(self, ttl: int = 3600, maxsize: int = 1000, record_metrics: bool = True):
+        self.cache = _InstrumentedTTLCache(maxsize=maxsize, ttl=ttl)
+        self.record_metrics = record_metrics
+
     async def get(self, key: str) -> Optional[Any]:
-        return self.cache.get(key)
-    
+        value = self.cache.get(key)
+        if self.record_metrics:
+            track_cache_operation("get", "miss" if value is None else "hit")
+        return value
+
     async def set(self, key: str, value: Any, expire: int = 3600) -> bool:
         try:
             self.cache[key] = value
             return True
         except Exception:
             return False
-    
+
     async def delete(self, key: str) -> bool:
         try:
             del self.cache[key]
@@ -45,42 +133,163 @@ class MemoryCache(BaseCache):
         except KeyError:
             return False
 
+
 class RedisCache(BaseCache):
-    """Redis cache implementation."""
-    
-    def __init__(self, redis_url: str):
-        self.redis = aioredis.from_url(redis_url)
-    
+    """Redis cache implementation backed by a shared connection pool."""
+
+    shared = True
+
+    def __init__(self, redis_url: str, max_connections: int = 50, record_metrics: bool = True):
+        self.pool = aioredis.ConnectionPool.from_url(redis_url, max_connections=max_connections)
+        self.redis = aioredis.Redis(connection_pool=self.pool)
+        self.record_metrics = record_metrics
+
     async def get(self, key: str) -> Optional[Any]:
-        value = await self.redis.get(key)
+        try:
+            value = await self.redis.get(key)
+        except Exception as exc:
+            # An unavailable cache must not fail the request; treat it as a miss.
+            logger.warning("Redis get failed for %s: %s", key, exc)
+            track_cache_operation("get", "error")
+            return None
+        if self.record_metrics:
+            track_cache_operation("get", "hit" if value else "miss")
         if value:
             return json.loads(value)
         return None
-    
+
     async def set(self, key: str, value: Any, expire: int = 3600) -> bool:
         try:
             value_str = json.dumps(value, default=str)
             await self.redis.setex(key, expire, value_str)
             return True
-        except Exception:
+        except Exception as exc:
+            logger.warning("Redis set failed for %s: %s", key, exc)
+            track_cache_operation("set", "error")
             return False
-    
+
     async def delete(self, key: str) -> bool:
-        deleted = await self.redis.delete(key)
+        try:
+            deleted = await self.redis.delete(key)
+        except Exception as exc:
+            logger.warning("Redis delete failed for %s: %s", key, exc)
+            track_cache_operation("delete", "error")
+            return False
         return bool(deleted)
 
-# Cache factory
-def get_cache_client() -> BaseCache:
+    async def acquire_lock(self, key: str, ttl: float) -> bool:
+        try:
+            return bool(await self.redis.set(f"lock:{key}", "1", nx=True, px=max(1, int(ttl * 1000))))
+        except Exception as exc:
+            # Without Redis there is nothing to coordinate; compute locally.
+            logger.warning("Redis lock failed for %s: %s", key, exc)
+            track_cache_operation("lock", "error")
+            return True
+
+    async def release_lock(self, key: str) -> None:
+        try:
+            await self.redis.delete(f"lock:{key}")
+        except Exception as exc:
+            logger.warning("Redis unlock failed for %s: %s", key, exc)
+
+    async def close(self) -> None:
+        await self.redis.close()
+        await self.pool.disconnect()
+
+
+class TieredCache(BaseCache):
     """
-    Get the appropriate cache client based on configuration.
+    Local L1 in front of a shared L2 (Redis).
+
+    L1 entries live for a short TTL only, which bounds how long one replica can
+    serve a value another replica already replaced or deleted in Redis.
     """
+
+    def __init__(self, l1: MemoryCache, l2: BaseCache):
+        self.l1 = l1
+        self.l2 = l2
+        self.shared = l2.shared
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.l1.get(key)
+        if value is not None:
+            track_cache_operation("get", "hit")
+            track_cache_operation("get_l1", "hit")
+            return value
+        track_cache_operation("get_l1", "miss")
+        value = await self.l2.get(key)
+        track_cache_operation("get", "miss" if value is None else "hit")
+        if value is not None:
+            await self.l1.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any, expire: int = 3600) -> bool:
+        await self.l1.set(key, value, expire)
+        return await self.l2.set(key, value, expire)
+
+    async def delete(self, key: str) -> bool:
+        local = await self.l1.delete(key)
+        remote = await self.l2.delete(key)
+        return local or remote
+
+    async def acquire_lock(self, key: str, ttl: float) -> bool:
+        return await self.l2.acquire_lock(key, ttl)
+
+    async def release_lock(self, key: str) -> None:
+        await self.l2.release_lock(key)
+
+    async def close(self) -> None:
+        await self.l2.close()
+
+
+def redis_url() -> str:
+    """Redis URL from REDIS_HOST / REDIS_PORT (shared with the rate limiter)."""
+    return f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', 6379)}"
+
+
+def _create_cache_client() -> BaseCache:
     cache_type = os.getenv("CACHE_TYPE", "memory")
-    
+
     if cache_type == "redis":
-        redis_host = os.getenv("REDIS_HOST", "localhost")
-        redis_port = os.getenv("REDIS_PORT", 6379)
-        redis_url = f"redis://{redis_host}:{redis_port}"
-        return RedisCache(redis_url)
-    
+        l2 = RedisCache(
+            redis_url(),
+            max_connections=_int_env("REDIS_MAX_CONNECTIONS", 50),
+            record_metrics=False,
+        )
+        if os.getenv("CACHE_L1_ENABLED", "true").lower() in {"0", "false", "no"}:
+            l2.record_metrics = True
+            return l2
+        l1 = MemoryCache(
+            ttl=_int_env("CACHE_L1_TTL_SECONDS", 30),
+            maxsize=_int_env("CACHE_L1_MAX_ENTRIES", 1000),
+            record_metrics=False,
+        )
+        return TieredCache(l1, l2)
+
     # Default to memory cache
-    return MemoryCache()
\ No newline at end of file
+    return MemoryCache(
+        ttl=CACHE_TTL,
+        maxsize=_int_env("CACHE_MAX_ENTRIES", 1000),
+    )
+
+
+_cache_client: Optional[BaseCache] = None
+
+
+# Cache factory
+def get_cache_client() -> BaseCache:
+    """
+    Get the process-wide cache client, creating it on first use.
+    """
+    global _cache_client
+    if _cache_client is None:
+        _cache_client = _create_cache_client()
+    return _cache_client
+
+
+async def close_cache_client() -> None:
+    """Close the shared client (Redis pool) and forget it."""
+    global _cache_client
+    client, _cache_client = _cache_client, None
+    if client is not None:
+        await client.close()
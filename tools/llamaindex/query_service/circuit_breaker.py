@@ -4,7 +4,7 @@ Protects against cascading failures when calling Ollama and Qdrant
 """
 
 import logging
-from typing import Callable, Any
+from typing import Awaitable, Callable, Any
 from circuitbreaker import circuit, CircuitBreakerError
 
 logger = logging.getLogger(__name__)
@@ -22,6 +22,8 @@ class CircuitBreakerMonitor:
             'ollama_embedding': 'closed',
             'ollama_generation': 'closed',
             'qdrant_search': 'closed',
+            'qdrant_retrieval': 'closed',
+            'ollama_synthesis': 'closed',
         }
     
     def on_state_change(self, name: str, old_state: str, new_state: str):
@@ -133,6 +135,93 @@ async def search_vectors_with_protection(
         raise
 
 
+@circuit(
+    failure_threshold=FAILURE_THRESHOLD,
+    recovery_timeout=RECOVERY_TIMEOUT,
+    expected_exception=EXPECTED_EXCEPTION,
+    name='qdrant_retrieval'
+)
+async def retrieve_nodes_with_protection(query_engine, query_bundle) -> Any:
+    """
+    Retrieve the nodes for a query (no LLM call) with circuit breaker protection.
+
+    Args:
+        query_engine: LlamaIndex query engine
+        query_bundle: Query bundle carrying the query embedding
+
+    Returns:
+        Retrieved nodes with scores
+
+    Raises:
+        CircuitBreakerError: When circuit is open (Qdrant unavailable)
+    """
+    try:
+        nodes = await query_engine.aretrieve(query_bundle)
+        logger.debug("Retrieval successful via circuit breaker")
+        return nodes
+    except Exception as e:
+        logger.error("Retrieval failed: %s", str(e))
+        raise
+
+
+@circuit(
+    failure_threshold=FAILURE_THRESHOLD,
+    recovery_timeout=RECOVERY_TIMEOUT,
+    expected_exception=EXPECTED_EXCEPTION,
+    name='ollama_synthesis'
+)
+async def synthesize_answer_with_protection(query_engine, query_bundle, nodes) -> Any:
+    """
+    Generate the answer from already retrieved nodes with circuit breaker protection.
+
+    Args:
+        query_engine: LlamaIndex query engine
+        query_bundle: Query bundle
+        nodes: Nodes returned by ``retrieve_nodes_with_protection``
+
+    Returns:
+        LlamaIndex response (streaming when the engine was built with ``streaming=True``)
+
+    Raises:
+        CircuitBreakerError: When circuit is open (Ollama LLM unavailable)
+    """
+    try:
+        result = await query_engine.asynthesize(query_bundle, nodes)
+        logger.debug("Answer synthesis successful via circuit breaker")
+        return result
+    except Exception as e:
+        logger.error("Answer synthesis failed: %s", str(e))
+        raise
+
+
+@circuit(
+    failure_threshold=FAILURE_THRESHOLD,
+    recovery_timeout=RECOVERY_TIMEOUT,
+    expected_exception=EXPECTED_EXCEPTION,
+    name='qdrant_search_batch'
+)
+async def search_batch_with_protection(run_batch: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run a batched Qdrant search with circuit breaker protection.
+
+    Args:
+        run_batch: Zero-argument coroutine function performing the batch
+
+    Returns:
+        Whatever ``run_batch`` returns
+
+    Raises:
+        CircuitBreakerError: When circuit is open (Qdrant unavailable)
+    """
+    try:
+        result = await run_batch()
+        logger.debug("Batch vector search successful via circuit breaker")
+        return result
+    except Exception as e:
+        logger.error("Batch vector search failed: %s", str(e))
+        raise
+
+
 def get_circuit_breaker_states() -> dict:
     """
     Get current state of all circuit breakers.
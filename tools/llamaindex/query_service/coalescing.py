@@ -0,0 +1,84 @@
+"""
+Single-flight coalescing of identical in-flight requests.
+
+Concurrent requests with the same cache key share one computation instead of
+each running its own retrieval and generation:
+
+* within a process they await the same task (the task is shielded, so a
+  client disconnect does not cancel it for the others);
+* across replicas the leader holds a short lock in the cache backend
+  (``BaseCache.acquire_lock``; Redis ``SET NX``) and the other replicas poll
+  the cache until the leader's result lands, or take over when the lock is
+  released without one.
+
+Only the computation (the leader) writes the cache.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+try:
+    from .cache import BaseCache
+    from .monitoring import track_coalesced_request
+except ImportError:  # pragma: no cover - fallback for production image layout
+    from cache import BaseCache  # type: ignore
+    from monitoring import track_coalesced_request  # type: ignore
+
+# Generation can take tens of seconds; the lock only needs to outlive it.
+COALESCE_LOCK_SECONDS = float(os.getenv("QUERY_COALESCE_LOCK_SECONDS", "60"))
+_POLL_MIN_SECONDS = 0.05
+_POLL_MAX_SECONDS = 0.5
+
+
+class SingleFlight:
+    """Share one in-flight computation per key."""
+
+    def __init__(self, endpoint: str, lock_seconds: float = COALESCE_LOCK_SECONDS):
+        self.endpoint = endpoint
+        self.lock_seconds = lock_seconds
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved: followers may all have gone away
+
+    async def _lead(self, key: str, compute: Callable[[], Awaitable[Any]], cache: BaseCache) -> Tuple[Any, bool]:
+        delay = _POLL_MIN_SECONDS
+        while True:
+            if await cache.acquire_lock(key, self.lock_seconds):
+                try:
+                    # Another replica may have finished between our miss and the lock.
+                    cached = await cache.get(key) if cache.shared else None
+                    if cached is not None:
+                        track_coalesced_request(self.endpoint, "remote")
+                        return cached, True
+                    return await compute(), False
+                finally:
+                    await cache.release_lock(key)
+            cached = await cache.get(key)
+            if cached is not None:
+                track_coalesced_request(self.endpoint, "remote")
+                return cached, True
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, _POLL_MAX_SECONDS)
+
+    async def run(self, key: str, compute: Callable[[], Awaitable[Any]], cache: BaseCache) -> Tuple[Any, bool]:
+        """
+        Return ``(value, shared)``: the result of ``compute()`` (which is
+        expected to write the cache), run once per key across concurrent
+        callers. ``shared`` is True when this caller did not run it.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            track_coalesced_request(self.endpoint, "local")
+            value, _ = await asyncio.shield(task)
+            return value, True
+        task = asyncio.ensure_future(self._lead(key, compute, cache))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
@@ -3,106 +3,136 @@ Embedding Cache for LlamaIndex Query Service
 Caches Ollama embeddings to avoid regeneration (50-100ms → 0ms)
 """
 
+import asyncio
 import hashlib
+import os
+import sys
+import threading
 import time
-from typing import List, Optional, Dict, Any
+from array import array
+from typing import AsyncContextManager, Awaitable, Callable, List, Optional, Dict, Any, Tuple
 from collections import OrderedDict
 
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+try:
+    from .monitoring import track_cache_operation
+except ImportError:  # pragma: no cover - fallback for production image layout
+    from monitoring import track_cache_operation  # type: ignore
+
 
 class EmbeddingCache:
-    """LRU cache for embeddings"""
-    
+    """LRU cache for embeddings, stored as float32 arrays"""
+
     def __init__(self, max_size: int = 10000, ttl: int = 3600):
         """
         Initialize embedding cache
-        
+
         Args:
             max_size: Maximum number of cached embeddings
             ttl: Time-to-live in seconds (default: 1 hour)
         """
-        self.cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        # key -> (timestamp, float32 vector)
+        self.cache: "OrderedDict[str, Tuple[float, array]]" = OrderedDict()
         self.max_size = max_size
         self.ttl = ttl
-        
+        self._lock = threading.Lock()
+        self._bytes = 0
+
         # Statistics
         self.hits = 0
         self.misses = 0
         self.evictions = 0
-    
-    def _generate_key(self, text: str) -> str:
-        """Generate cache key from text"""
-        normalized = text.lower().strip()
-        return hashlib.sha256(normalized.encode()).hexdigest()[:16]
-    
-    def get(self, text: str) -> Optional[List[float]]:
+
+    def _generate_key(self, text: str, model_name: str = "") -> str:
+        """Generate cache key from model name and text (stripped; case matters to the model)"""
+        normalized = text.strip()
+        return hashlib.sha256(f"{model_name}\x00{normalized}".encode()).hexdigest()[:32]
+
+    @staticmethod
+    def _entry_size(key: str, entry: Tuple[float, array]) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(entry) + sys.getsizeof(entry[0]) + sys.getsizeof(entry[1])
+
+    def _remove(self, key: str) -> None:
+        entry = self.cache.pop(key)
+        self._bytes -= self._entry_size(key, entry)
+
+    def get(self, text: str, model_name: str = "") -> Optional[List[float]]:
         """
         Get cached embedding
-        
+
         Args:
             text: Query text
-            
+            model_name: Embedding model the vector was produced by
+
         Returns:
             Embedding vector or None if cache miss
         """
-        key = self._generate_key(text)
-        
-        if key in self.cache:
-            cached = self.cache[key]
-            
-            # Check if expired
-            if time.time() - cached['timestamp'] < self.ttl:
-                self.hits += 1
-                
-                # Move to end (LRU)
-                self.cache.move_to_end(key)
-                
-                return cached['embedding']
-            else:
+        key = self._generate_key(text, model_name)
+
+        with self._lock:
+            cached = self.cache.get(key)
+            if cached is not None:
+                # Check if expired
+                if time.time() - cached[0] < self.ttl:
+                    self.hits += 1
+
+                    # Move to end (LRU)
+                    self.cache.move_to_end(key)
+
+                    return cached[1].tolist()
                 # Expired, remove
-                del self.cache[key]
-        
-        self.misses += 1
-        return None
-    
-    def set(self, text: str, embedding: List[float]) -> None:
+                self._remove(key)
+
+            self.misses += 1
+            return None
+
+    def set(self, text: str, embedding: List[float], model_name: str = "") -> None:
         """
         Set embedding in cache
-        
+
         Args:
             text: Query text
             embedding: Embedding vector
+            model_name: Embedding model the vector was produced by
         """
-        key = self._generate_key(text)
-        
-        # LRU eviction if full
-        if len(self.cache) >= self.max_size:
-            # Remove oldest (first item)
-            self.cache.popitem(last=False)
-            self.evictions += 1
-        
-        self.cache[key] = {
-            'embedding': embedding,
-            'timestamp': time.time(),
-            'text_preview': text[:100],  # For debugging
-        }
-    
-    def invalidate(self, text: str) -> None:
+        key = self._generate_key(text, model_name)
+        entry = (time.time(), array('f', embedding))
+
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
+
+            # LRU eviction if full
+            while len(self.cache) >= self.max_size:
+                # Remove oldest (first item)
+                self._remove(next(iter(self.cache)))
+                self.evictions += 1
+
+            self.cache[key] = entry
+            self._bytes += self._entry_size(key, entry)
+
+    def invalidate(self, text: str, model_name: str = "") -> None:
         """Invalidate specific cache entry"""
-        key = self._generate_key(text)
-        if key in self.cache:
-            del self.cache[key]
-    
+        key = self._generate_key(text, model_name)
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
+
     def clear(self) -> None:
         """Clear entire cache"""
-        self.cache.clear()
-        self.hits = 0
-        self.misses = 0
-        self.evictions = 0
-    
+        with self._lock:
+            self.cache.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         total = self.hits + self.misses
-        
+
         return {
             'hits': self.hits,
             'misses': self.misses,
@@ -112,34 +142,141 @@ class EmbeddingCache:
             'max_size': self.max_size,
             'utilization': f"{(len(self.cache) / self.max_size * 100):.2f}%",
         }
-    
+
     def get_size_estimate(self) -> Dict[str, Any]:
-        """Estimate cache memory usage"""
-        # Each embedding: 384 floats * 4 bytes = 1536 bytes
-        # Plus metadata: ~200 bytes
-        # Total: ~1.7KB per entry
-        
-        bytes_per_entry = 1736
-        total_bytes = len(self.cache) * bytes_per_entry
-        total_mb = total_bytes / 1024 / 1024
-        
+        """Report cache memory usage, measured from the stored entries"""
+        entries = len(self.cache)
+        total_bytes = self._bytes
+        bytes_per_entry = total_bytes / entries if entries else 0
+
         return {
-            'entries': len(self.cache),
-            'estimated_mb': f"{total_mb:.2f}",
+            'entries': entries,
+            'bytes': total_bytes,
+            'bytes_per_entry': int(bytes_per_entry),
+            'estimated_mb': f"{total_bytes / 1024 / 1024:.2f}",
             'max_estimated_mb': f"{(self.max_size * bytes_per_entry / 1024 / 1024):.2f}",
         }
 
 
+class CachedQueryEmbedding(BaseEmbedding):
+    """
+    Embedding model wrapper that consults the EmbeddingCache before the inner model.
+
+    Entries are keyed by model name, and query and text embeddings are cached
+    separately because models may prefix them with different instructions.
+    ``gate``, when given, wraps every async call that reaches the inner model
+    (cache hits skip it); the model pool uses it to order calls per model.
+    """
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+    _gate: Optional[Callable[[], AsyncContextManager]] = PrivateAttr(default=None)
+
+    def __init__(
+        self,
+        inner: BaseEmbedding,
+        cache: EmbeddingCache,
+        gate: Optional[Callable[[], AsyncContextManager]] = None,
+        **kwargs,
+    ):
+        super().__init__(
+            model_name=inner.model_name,
+            embed_batch_size=inner.embed_batch_size,
+            **kwargs,
+        )
+        self._inner = inner
+        self._cache = cache
+        self._gate = gate
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedQueryEmbedding"
+
+    @property
+    def inner(self) -> BaseEmbedding:
+        return self._inner
+
+    def _lookup(self, text: str, kind: str) -> Optional[List[float]]:
+        vector = self._cache.get(text, f"{self.model_name}:{kind}")
+        track_cache_operation("embedding", "miss" if vector is None else "hit")
+        return vector
+
+    def _store(self, text: str, kind: str, vector: List[float]) -> List[float]:
+        self._cache.set(text, vector, f"{self.model_name}:{kind}")
+        return vector
+
+    async def _call_inner(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        if self._gate is None:
+            return await call()
+        async with self._gate():
+            return await call()
+
+    async def _aembed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed queries (already stripped, like their cache keys) with the inner
+        model's own query formatting, under a single gate acquisition. Every
+        path that caches a "query" vector goes through here or its sync twin.
+        """
+        async def embed() -> List[List[float]]:
+            return list(await asyncio.gather(*(self._inner.aget_query_embedding(query) for query in queries)))
+
+        return await self._call_inner(embed)
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        cached = self._lookup(query, "query")
+        if cached is not None:
+            return cached
+        return self._store(query, "query", self._inner.get_query_embedding(query.strip()))
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        cached = self._lookup(query, "query")
+        if cached is not None:
+            return cached
+        return self._store(query, "query", (await self._aembed_queries([query.strip()]))[0])
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        cached = self._lookup(text, "text")
+        if cached is not None:
+            return cached
+        return self._store(text, "text", self._inner.get_text_embedding(text))
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        cached = self._lookup(text, "text")
+        if cached is not None:
+            return cached
+        return self._store(text, "text", await self._call_inner(lambda: self._inner.aget_text_embedding(text)))
+
+    async def aget_query_embedding_batch(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed many queries; all cache misses go to the model together, under
+        one gate acquisition, and are embedded exactly as single queries are,
+        so ``/search`` and ``/search/batch`` cache the same vector per key.
+        """
+        vectors: List[Optional[List[float]]] = [self._lookup(query, "query") for query in queries]
+        missing = sorted({query.strip() for query, vector in zip(queries, vectors) if vector is None})
+        if missing:
+            embedded = dict(zip(missing, await self._aembed_queries(missing)))
+            for query in missing:
+                self._store(query, "query", embedded[query])
+            vectors = [
+                vector if vector is not None else embedded[query.strip()]
+                for query, vector in zip(queries, vectors)
+            ]
+        return vectors  # type: ignore[return-value]
+
+
 # Global singleton instance
 _embedding_cache = None
 
 
-def get_embedding_cache(max_size: int = 10000, ttl: int = 3600) -> EmbeddingCache:
+def get_embedding_cache(max_size: Optional[int] = None, ttl: Optional[int] = None) -> EmbeddingCache:
     """Get global embedding cache instance"""
     global _embedding_cache
-    
+
     if _embedding_cache is None:
-        _embedding_cache = EmbeddingCache(max_size=max_size, ttl=ttl)
-    
-    return _embedding_cache
+        _embedding_cache = EmbeddingCache(
+            max_size=max_size or int(os.getenv("EMBEDDING_CACHE_MAX_SIZE", "10000")),
+            ttl=ttl or int(os.getenv("EMBEDDING_CACHE_TTL", "3600")),
+        )
 
+    return _embedding_cache
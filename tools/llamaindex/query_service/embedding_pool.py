@@ -0,0 +1,228 @@
+"""
+Per-model embedding clients shared across collections.
+
+Every collection is embedded with the model declared for it in
+``collection-config.json``. ``EmbeddingModelPool`` keeps one cached client per
+model, so collections on the same model share a client and its cache entries.
+
+Ollama only keeps a few models loaded (``OLLAMA_MAX_LOADED_MODELS``/VRAM), so
+traffic that alternates between collections on different models can force a
+model swap on almost every request. ``ModelScheduler`` tracks which models are
+resident and orders the embedding calls that reach Ollama (cache hits skip it):
+
+* calls for a resident model run right away;
+* a call for another model waits until a resident model is idle and takes its
+  place;
+* once such a call has waited ``switch_after`` seconds, new calls for resident
+  models queue behind it, so the resident model drains and the swap happens.
+
+Requests for the same model are therefore grouped, and a swap costs at most
+one model load per ``switch_after`` window instead of one per request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from llama_index.core.base.embeddings.base import BaseEmbedding
+
+try:  # Local package import (tests, running as module)
+    from .embedding_cache import CachedQueryEmbedding, EmbeddingCache
+except ImportError:  # pragma: no cover - fallback for production image layout
+    from embedding_cache import CachedQueryEmbedding, EmbeddingCache  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        value = float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+MAX_RESIDENT_MODELS = int(_env_number("LLAMAINDEX_EMBED_MAX_RESIDENT_MODELS", 2))
+SWITCH_AFTER_SECONDS = _env_number("LLAMAINDEX_EMBED_SWITCH_AFTER_SECONDS", 0.5)
+RESIDENCY_REFRESH_SECONDS = _env_number("LLAMAINDEX_EMBED_RESIDENCY_REFRESH_SECONDS", 30.0)
+
+
+def _base_model_name(name: str) -> str:
+    """Ollama reports ``nomic-embed-text:latest`` for ``nomic-embed-text``."""
+    return name[: -len(":latest")] if name.endswith(":latest") else name
+
+
+class ModelScheduler:
+    """Orders embedding calls so that alternating models do not thrash Ollama."""
+
+    def __init__(self, max_resident: int = MAX_RESIDENT_MODELS, switch_after: float = SWITCH_AFTER_SECONDS):
+        self.max_resident = max(1, max_resident)
+        self.switch_after = switch_after
+        # Resident models in LRU order (oldest first) -> last use.
+        self._resident: "OrderedDict[str, float]" = OrderedDict()
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._waiters: Deque[Tuple[str, float, asyncio.Future]] = deque()
+        self.loads = 0
+        self.swaps = 0
+
+    def resident(self) -> List[str]:
+        return list(self._resident)
+
+    def _starving(self, now: float) -> bool:
+        return bool(self._waiters) and now - self._waiters[0][1] >= self.switch_after
+
+    def _try_admit(self, model: str) -> bool:
+        if model not in self._resident:
+            if len(self._resident) >= self.max_resident:
+                idle = next((name for name in self._resident if not self._in_flight[name]), None)
+                if idle is None:
+                    return False
+                del self._resident[idle]
+                self.swaps += 1
+                logger.info("Embedding model %s replaces idle resident model %s", model, idle)
+            self.loads += 1
+        self._resident[model] = time.monotonic()
+        self._resident.move_to_end(model)
+        self._in_flight[model] += 1
+        return True
+
+    def _dispatch(self) -> None:
+        while self._waiters:
+            model, _, future = self._waiters[0]
+            if future.done():  # cancelled while waiting
+                self._waiters.popleft()
+                continue
+            if not self._try_admit(model):
+                break
+            self._waiters.popleft()
+            future.set_result(None)
+
+    def _release(self, model: str) -> None:
+        self._in_flight[model] -= 1
+        if model in self._resident:
+            self._resident[model] = time.monotonic()
+        self._dispatch()
+
+    @asynccontextmanager
+    async def turn(self, model: str) -> AsyncIterator[None]:
+        """Wait until ``model`` may be called; hold the turn for the duration of the call."""
+        now = time.monotonic()
+        jump_queue = model in self._resident and not self._starving(now)
+        if not ((not self._waiters or jump_queue) and self._try_admit(model)):
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append((model, now, future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._release(model)
+                raise
+        try:
+            yield
+        finally:
+            self._release(model)
+
+    def sync(self, loaded: Iterable[str]) -> None:
+        """
+        Reconcile residency with the models Ollama reports as loaded.
+
+        Idle models Ollama has unloaded (``keep_alive`` expired, evicted by an
+        LLM) are dropped; models loaded by someone else count as resident while
+        there is room.
+        """
+        loaded_names = [_base_model_name(name) for name in loaded]
+        for name in list(self._resident):
+            if name not in loaded_names and not self._in_flight[name]:
+                del self._resident[name]
+        for name in loaded_names:
+            if name not in self._resident and len(self._resident) < self.max_resident:
+                self._resident[name] = time.monotonic()
+                self._resident.move_to_end(name, last=False)
+        self._dispatch()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "maxResident": self.max_resident,
+            "switchAfterSeconds": self.switch_after,
+            "resident": self.resident(),
+            "inFlight": {name: count for name, count in self._in_flight.items() if count},
+            "waiting": sum(1 for _, _, future in self._waiters if not future.done()),
+            "loads": self.loads,
+            "swaps": self.swaps,
+        }
+
+
+class EmbeddingModelPool:
+    """
+    One cached, scheduled embedding client per model name.
+
+    ``factory(model_name)`` builds the raw client (e.g. ``OllamaEmbedding``);
+    the pool wraps it in ``CachedQueryEmbedding`` with the shared cache and a
+    scheduler gate, and hands out the same instance for every collection that
+    uses the model.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], BaseEmbedding],
+        cache: EmbeddingCache,
+        scheduler: ModelScheduler,
+    ):
+        self._factory = factory
+        self._cache = cache
+        self.scheduler = scheduler
+        self._models: Dict[str, CachedQueryEmbedding] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, model_name: str) -> CachedQueryEmbedding:
+        model = self._models.get(model_name)
+        if model is None:
+            model = CachedQueryEmbedding(
+                self._factory(model_name),
+                self._cache,
+                gate=lambda: self.scheduler.turn(model_name),
+            )
+            self._models[model_name] = model
+        return model
+
+    def models(self) -> List[str]:
+        return list(self._models)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"models": self.models(), **self.scheduler.describe()}
+
+    async def refresh_residency(self, base_url: str, timeout: float = 5.0) -> None:
+        """Sync the scheduler with Ollama's ``/api/ps``."""
+        async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+            response = await client.get("/api/ps")
+            response.raise_for_status()
+        self.scheduler.sync(entry.get("name", "") for entry in response.json().get("models", []))
+
+    async def _run(self, base_url: str, interval: float) -> None:
+        while True:
+            try:
+                await self.refresh_residency(base_url)
+            except Exception as exc:  # pragma: no cover - Ollama unreachable
+                logger.debug("Could not refresh embedding model residency: %s", exc)
+            await asyncio.sleep(interval)
+
+    def start(self, base_url: str, interval: float = RESIDENCY_REFRESH_SECONDS) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(base_url, interval))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,155 @@
+"""
+Hybrid retrieval: dense vectors plus BM25 sparse vectors, fused with
+reciprocal rank fusion (RRF).
+
+Dense search is good at paraphrases but weak on exact identifiers (ticker
+symbols, env var names, function names); BM25 is the opposite. Each leg
+fetches ``candidates`` results and RRF merges the two rankings:
+
+    score(doc) = sum(1 / (k + rank_in_leg(doc)))
+
+RRF only uses ranks, so the unrelated cosine and BM25 score scales never
+need to be normalized against each other.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+from qdrant_client.http import models as rest
+
+RETRIEVAL_MODE_DENSE = "dense"
+RETRIEVAL_MODE_HYBRID = "hybrid"
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name, ""))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+RRF_K = _int_env("LLAMAINDEX_RRF_K", 60)
+HYBRID_CANDIDATES = _int_env("LLAMAINDEX_HYBRID_CANDIDATES", 20)
+
+T = TypeVar("T")
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[T]],
+    key: Callable[[T], Hashable],
+    k: int = RRF_K,
+) -> List[Tuple[T, float]]:
+    """
+    Merge ranked lists by reciprocal rank.
+
+    Returns ``(item, score)`` pairs, best first. Items are identified by
+    ``key``; the first occurrence is kept. Ties keep the order of ``rankings``.
+    """
+    scores: Dict[Hashable, float] = {}
+    items: Dict[Hashable, T] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            item_key = key(item)
+            scores[item_key] = scores.get(item_key, 0.0) + 1.0 / (k + rank)
+            items.setdefault(item_key, item)
+    ordered = sorted(scores, key=scores.__getitem__, reverse=True)
+    return [(items[item_key], scores[item_key]) for item_key in ordered]
+
+
+def payload_filter(filters: Any) -> Optional[rest.Filter]:
+    """Translate a flat ``{"key": value}`` filter dict into a Qdrant payload filter."""
+    if not isinstance(filters, dict) or not filters:
+        return None
+    conditions = [
+        rest.FieldCondition(key=key, match=rest.MatchValue(value=value))
+        for key, value in filters.items()
+        if isinstance(value, (str, int, bool))
+    ]
+    return rest.Filter(must=conditions) if conditions else None
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense retriever + Qdrant sparse search, fused with RRF."""
+
+    def __init__(
+        self,
+        dense_retriever: BaseRetriever,
+        vector_store: Any,
+        encoder: Any,
+        sparse_vector_name: str,
+        similarity_top_k: int = 5,
+        candidates: int = HYBRID_CANDIDATES,
+        filters: Any = None,
+        rrf_k: int = RRF_K,
+    ):
+        super().__init__()
+        self.dense_retriever = dense_retriever
+        self.vector_store = vector_store
+        self.encoder = encoder
+        self.sparse_vector_name = sparse_vector_name
+        self.similarity_top_k = similarity_top_k
+        self.candidates = max(candidates, similarity_top_k)
+        self.query_filter = payload_filter(filters)
+        self.rrf_k = rrf_k
+
+    def _sparse_vector(self, query_str: str) -> Optional[rest.SparseVector]:
+        indices, values = self.encoder.encode_query(query_str)
+        return rest.SparseVector(indices=indices, values=values) if indices else None
+
+    def _search_kwargs(self) -> Dict[str, Any]:
+        return {
+            "collection_name": self.vector_store.collection_name,
+            "limit": self.candidates,
+            "query_filter": self.query_filter,
+            "with_payload": True,
+        }
+
+    def _sparse_points(self, vector: Optional[rest.SparseVector]) -> List[Any]:
+        if vector is None:
+            return []
+        client = self.vector_store._client  # pylint: disable=protected-access
+        if hasattr(client, "query_points"):
+            return client.query_points(query=vector, using=self.sparse_vector_name, **self._search_kwargs()).points
+        return client.search(
+            query_vector=rest.NamedSparseVector(name=self.sparse_vector_name, vector=vector),
+            **self._search_kwargs(),
+        )
+
+    async def _asparse_points(self, vector: Optional[rest.SparseVector]) -> List[Any]:
+        if vector is None:
+            return []
+        client = self.vector_store._aclient  # pylint: disable=protected-access
+        if client is None:
+            return await asyncio.to_thread(self._sparse_points, vector)
+        if hasattr(client, "query_points"):
+            response = await client.query_points(query=vector, using=self.sparse_vector_name, **self._search_kwargs())
+            return response.points
+        return await client.search(
+            query_vector=rest.NamedSparseVector(name=self.sparse_vector_name, vector=vector),
+            **self._search_kwargs(),
+        )
+
+    def _fuse(self, dense: List[NodeWithScore], points: List[Any]) -> List[NodeWithScore]:
+        sparse: List[NodeWithScore] = []
+        if points:
+            parsed = self.vector_store.parse_to_query_result(points)
+            sparse = [NodeWithScore(node=node, score=score) for node, score in zip(parsed.nodes, parsed.similarities)]
+        fused = reciprocal_rank_fusion([dense, sparse], key=lambda item: item.node.node_id, k=self.rrf_k)
+        return [NodeWithScore(node=item.node, score=score) for item, score in fused[: self.similarity_top_k]]
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        dense = self.dense_retriever.retrieve(query_bundle)
+        return self._fuse(dense, self._sparse_points(self._sparse_vector(query_bundle.query_str)))
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        dense, points = await asyncio.gather(
+            self.dense_retriever.aretrieve(query_bundle),
+            self._asparse_points(self._sparse_vector(query_bundle.query_str)),
+        )
+        return self._fuse(dense, points)
@@ -3,19 +3,24 @@ LlamaIndex Query Service
 Handles semantic search and question answering over the document collection.
 """
 
+import asyncio
 import os
 import logging
 import sys
+import time
+from contextlib import AsyncExitStack
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Literal, Optional, Tuple
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from qdrant_client import QdrantClient, AsyncQdrantClient
 
-from llama_index.core import VectorStoreIndex, Settings, PromptTemplate
+from llama_index.core import QueryBundle, VectorStoreIndex, Settings, PromptTemplate
+from llama_index.core.query_engine import RetrieverQueryEngine
 from llama_index.vector_stores.qdrant import QdrantVectorStore
 from llama_index.embeddings.ollama import OllamaEmbedding
 from llama_index.llms.ollama import Ollama
@@ -26,30 +31,52 @@ QUERY_TYPE_SIMILARITY = "similarity"
 
 try:  # Local package import (tests, running as module)
     from .auth import get_current_user
-    from .cache import get_cache_client
+    from .cache import CACHE_TTL, build_cache_key, close_cache_client, get_cache_client
     from .rate_limit import rate_limiter
     from .monitoring import init_metrics, track_query_metrics
     from .circuit_breaker import (
         search_vectors_with_protection,
+        search_batch_with_protection,
+        retrieve_nodes_with_protection,
+        synthesize_answer_with_protection,
         generate_answer_with_protection,
         get_circuit_breaker_states,
         format_circuit_breaker_error,
         CircuitBreakerError,
     )
-    from .embedding_cache import get_embedding_cache  # 🚀 QUICK WIN: Embedding cache
+    from .embedding_cache import CachedQueryEmbedding, get_embedding_cache
+    from .streaming import SSE_HEADERS, stream_cached_response, stream_rag_response
+    from .hybrid import HYBRID_CANDIDATES, RETRIEVAL_MODE_DENSE, RETRIEVAL_MODE_HYBRID, HybridRetriever
+    from .batch_search import SubQuery, search_batch
+    from .warmup import WarmupState, preload_ollama_model, warm_up
+    from .embedding_pool import EmbeddingModelPool, ModelScheduler
+    from .coalescing import SingleFlight
+    from .query_log import PopularQuery, QueryLog, QueryLogEntry
+    from .precompute import PRECOMPUTE_TOP_N, PRECOMPUTE_WINDOW_HOURS, PopularQueryPrecomputer
 except ImportError:  # pragma: no cover - fallback for production image layout
     from auth import get_current_user  # type: ignore
-    from cache import get_cache_client  # type: ignore
+    from cache import CACHE_TTL, build_cache_key, close_cache_client, get_cache_client  # type: ignore
     from rate_limit import rate_limiter  # type: ignore
     from monitoring import init_metrics, track_query_metrics  # type: ignore
     from circuit_breaker import (  # type: ignore
         search_vectors_with_protection,
+        search_batch_with_protection,
+        retrieve_nodes_with_protection,
+        synthesize_answer_with_protection,
         generate_answer_with_protection,
         get_circuit_breaker_states,
         format_circuit_breaker_error,
         CircuitBreakerError,
     )
-    from embedding_cache import get_embedding_cache  # type: ignore # 🚀 QUICK WIN
+    from embedding_cache import CachedQueryEmbedding, get_embedding_cache  # type: ignore
+    from streaming import SSE_HEADERS, stream_cached_response, stream_rag_response  # type: ignore
+    from hybrid import HYBRID_CANDIDATES, RETRIEVAL_MODE_DENSE, RETRIEVAL_MODE_HYBRID, HybridRetriever  # type: ignore
+    from batch_search import SubQuery, search_batch  # type: ignore
+    from warmup import WarmupState, preload_ollama_model, warm_up  # type: ignore
+    from embedding_pool import EmbeddingModelPool, ModelScheduler  # type: ignore
+    from coalescing import SingleFlight  # type: ignore
+    from query_log import PopularQuery, QueryLog, QueryLogEntry  # type: ignore
+    from precompute import PRECOMPUTE_TOP_N, PRECOMPUTE_WINDOW_HOURS, PopularQueryPrecomputer  # type: ignore
 
 # Ensure shared helpers are importable when running as a module or script
 CURRENT_DIR = Path(__file__).resolve().parent
@@ -59,14 +86,31 @@ if SHARED_DIR.exists() and str(SHARED_DIR) not in sys.path:
 
 from gpu import (  # type: ignore # pylint: disable=wrong-import-position
     acquire_gpu_slot,
+    acquire_slot,
     build_gpu_metadata,
     describe_gpu_policy,
     get_ollama_gpu_options,
     GPU_COOLDOWN_SECONDS,
     GPU_FORCE_ENABLED,
     GPU_MAX_CONCURRENCY,
+    EMBEDDING_POOL,
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    SEARCH_POOL,
 )
 from qdrant_utils import ensure_payload_on_search  # type: ignore # pylint: disable=wrong-import-position
+from sparse_vectors import BM25SparseEncoder, SPARSE_VECTOR_NAME, collection_sparse_vector  # type: ignore # pylint: disable=wrong-import-position
+from health_snapshot import HealthSnapshot  # type: ignore # pylint: disable=wrong-import-position
+from collection_generation import GenerationTracker  # type: ignore # pylint: disable=wrong-import-position
+
+try:
+    from collection_config import CollectionConfigManager  # type: ignore
+except Exception as config_err:  # pragma: no cover - defensive fallback
+    CollectionConfigManager = None  # type: ignore
+    collection_config_manager = None
+    logging.getLogger(__name__).warning("Collection configuration unavailable: %s", config_err)
+else:
+    collection_config_manager = CollectionConfigManager()
 
 # Configure logging
 logging.basicConfig(
@@ -108,6 +152,9 @@ except Exception as e:
     logger.warning("Service will start but queries will fail until Qdrant is available.")
     qdrant_client = None
     async_qdrant_client = None
+
+# Data generation per collection, bumped by ingestion; part of the cache keys.
+generation_tracker = GenerationTracker(qdrant_client)
  
 LEGACY_COLLECTION_PREFERENCE = ["documentation", "documentation__nomic", "docs_index"]
 
@@ -134,6 +181,19 @@ def _get_collection_info(name: str) -> Tuple[bool, int]:
     return True, int(count_value)
 
 
+def _collection_exists(name: str) -> bool:
+    """
+    Cheap existence check used on the request path (no point count).
+    """
+    if qdrant_client is None:
+        return False
+    try:
+        return bool(qdrant_client.collection_exists(name))
+    except Exception as exc:  # pragma: no cover - diagnostics only
+        logger.debug("Collection %s not available: %s", name, exc)
+        return False
+
+
 def _select_active_collection(configured: str) -> Tuple[str, Tuple[bool, int]]:
     """
     Pick the best collection to query. If the configured collection is missing or empty,
@@ -223,12 +283,43 @@ index_cache: Dict[str, VectorStoreIndex] = {}
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 # Support both OLLAMA_EMBED_MODEL (service-local) and OLLAMA_EMBEDDING_MODEL (repo-wide)
 OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL") or os.getenv("OLLAMA_EMBEDDING_MODEL") or "mxbai-embed-large"
-Settings.embed_model = OllamaEmbedding(
-    model_name=OLLAMA_EMBED_MODEL,
-    base_url=OLLAMA_BASE_URL,
-    ollama_additional_kwargs=get_ollama_gpu_options(),
-    request_timeout=float(os.getenv("OLLAMA_REQUEST_TIMEOUT", "120.0")),  # 2 minutes timeout
-)
+
+
+def _build_ollama_embedding(model_name: str) -> OllamaEmbedding:
+    return OllamaEmbedding(
+        model_name=model_name,
+        base_url=OLLAMA_BASE_URL,
+        ollama_additional_kwargs=get_ollama_gpu_options(),
+        request_timeout=float(os.getenv("OLLAMA_REQUEST_TIMEOUT", "120.0")),  # 2 minutes timeout
+    )
+
+
+# One client per embedding model, shared by every collection that uses it.
+# Repeated queries skip Ollama: embeddings are served from the in-process cache first
+EMBED_MODEL_POOL = EmbeddingModelPool(_build_ollama_embedding, get_embedding_cache(), ModelScheduler())
+Settings.embed_model = EMBED_MODEL_POOL.get(OLLAMA_EMBED_MODEL)
+
+
+def embed_model_name_for(collection: str) -> str:
+    """
+    Embedding model declared for ``collection`` in collection-config.json
+    (the one ingestion used), falling back to OLLAMA_EMBED_MODEL.
+    """
+    if collection_config_manager is not None:
+        try:
+            model = collection_config_manager.get_model_for_collection(
+                collection_config_manager.resolve_collection_name(collection)
+            )
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.debug("Failed to resolve embedding model for %s: %s", collection, exc)
+        else:
+            if model:
+                return model
+    return OLLAMA_EMBED_MODEL
+
+
+def embed_model_for(collection: str) -> CachedQueryEmbedding:
+    return EMBED_MODEL_POOL.get(embed_model_name_for(collection))
 
 # Optionally configure LLM with Ollama (local) when model is provided
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL")
@@ -266,9 +357,10 @@ CUSTOM_QA_PROMPT = PromptTemplate(
 
 # Build index from existing vector store
 if vector_store is not None:
-    index = VectorStoreIndex.from_vector_store(vector_store)
+    index = VectorStoreIndex.from_vector_store(vector_store, embed_model=embed_model_for(ACTIVE_QDRANT_COLLECTION))
     vector_store_cache[ACTIVE_QDRANT_COLLECTION] = vector_store
     index_cache[ACTIVE_QDRANT_COLLECTION] = index
+    generation_tracker.track(ACTIVE_QDRANT_COLLECTION)
 else:
     logger.warning("Index not initialized - vector_store is None. Queries will fail until Qdrant is available.")
     index = None
@@ -307,8 +399,7 @@ def get_index_for_collection(collection_hint: Optional[str]) -> Tuple[VectorStor
     if target_collection in index_cache:
         return index_cache[target_collection], target_collection
 
-    exists, _ = _get_collection_info(target_collection)
-    if not exists:
+    if not _collection_exists(target_collection):
         raise HTTPException(
             status_code=404,
             detail=f"Collection '{target_collection}' not found in Qdrant."
@@ -321,7 +412,9 @@ def get_index_for_collection(collection_hint: Optional[str]) -> Tuple[VectorStor
             collection_name=target_collection,
         )
         ensure_payload_on_search(vector_store_local)
-        index_local = VectorStoreIndex.from_vector_store(vector_store_local)
+        index_local = VectorStoreIndex.from_vector_store(
+            vector_store_local, embed_model=embed_model_for(target_collection)
+        )
     except Exception as exc:  # pragma: no cover - defensive sanity clause
         logger.error("Failed to initialize vector store for collection %s: %s", target_collection, exc)
         raise HTTPException(
@@ -329,16 +422,102 @@ def get_index_for_collection(collection_hint: Optional[str]) -> Tuple[VectorStor
             detail=f"Failed to initialize vector store for collection '{target_collection}': {exc}"
         ) from exc
 
+    generation_tracker.track(target_collection)
     vector_store_cache[target_collection] = vector_store_local
     index_cache[target_collection] = index_local
     return index_local, target_collection
 
+RetrievalMode = Literal["dense", "hybrid"]
+DEFAULT_RETRIEVAL_MODE = (
+    RETRIEVAL_MODE_HYBRID
+    if os.getenv("LLAMAINDEX_DEFAULT_RETRIEVAL_MODE", RETRIEVAL_MODE_DENSE).strip().lower() == RETRIEVAL_MODE_HYBRID
+    else RETRIEVAL_MODE_DENSE
+)
+SPARSE_ENCODER = BM25SparseEncoder()
+# Seconds before re-checking a collection that had no sparse vector (it may get reindexed).
+SPARSE_SUPPORT_RECHECK_SECONDS = 60.0
+_collection_vectors: Dict[str, Tuple[Optional[str], Optional[str], float]] = {}
+
+
+def get_collection_vectors(collection: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Return ``(dense_vector_name, sparse_vector_name)`` for ``collection``.
+
+    The dense name is None for the default unnamed vector; the sparse name is
+    None unless the collection was indexed for hybrid search.
+    """
+    cached = _collection_vectors.get(collection)
+    if cached is not None and (cached[1] or time.monotonic() - cached[2] < SPARSE_SUPPORT_RECHECK_SECONDS):
+        return cached[0], cached[1]
+    dense_name, sparse_name = None, None
+    if qdrant_client is not None:
+        try:
+            info = qdrant_client.get_collection(collection)
+            vectors = info.config.params.vectors
+            if isinstance(vectors, dict):
+                # Named vectors: LlamaIndex stores the dense vector under "text-dense".
+                dense_name = "text-dense" if "text-dense" in vectors else next(iter(vectors), None)
+            sparse_name = collection_sparse_vector(info, SPARSE_VECTOR_NAME)
+        except Exception as exc:  # pragma: no cover - diagnostics only
+            logger.debug("Could not inspect vectors of %s: %s", collection, exc)
+    _collection_vectors[collection] = (dense_name, sparse_name, time.monotonic())
+    return dense_name, sparse_name
+
+
+def get_sparse_vector_name(collection: str) -> Optional[str]:
+    """
+    Return the sparse vector name if ``collection`` was indexed for hybrid search.
+    """
+    return get_collection_vectors(collection)[1]
+
+
+def build_query_engine(
+    index_for_request: VectorStoreIndex,
+    collection: str,
+    mode: str,
+    similarity_top_k: int,
+    filters=None,
+    **engine_kwargs,
+) -> Tuple[RetrieverQueryEngine, str]:
+    """
+    Build a query engine for the requested retrieval mode.
+
+    Hybrid falls back to dense retrieval when the collection has no sparse
+    vectors (it was indexed before hybrid support); the mode actually used is
+    returned alongside the engine.
+    """
+    sparse_name = get_sparse_vector_name(collection) if mode == RETRIEVAL_MODE_HYBRID else None
+    if sparse_name is None:
+        if mode == RETRIEVAL_MODE_HYBRID:
+            logger.info("Collection %s has no sparse vectors; using dense retrieval.", collection)
+        engine = index_for_request.as_query_engine(
+            similarity_top_k=similarity_top_k,
+            filters=filters,
+            **engine_kwargs,
+        )
+        return engine, RETRIEVAL_MODE_DENSE
+
+    retriever = HybridRetriever(
+        index_for_request.as_retriever(
+            similarity_top_k=max(similarity_top_k, HYBRID_CANDIDATES),
+            filters=filters,
+        ),
+        vector_store_cache[collection],
+        SPARSE_ENCODER,
+        sparse_name,
+        similarity_top_k=similarity_top_k,
+        filters=filters,
+    )
+    return RetrieverQueryEngine.from_args(retriever, **engine_kwargs), RETRIEVAL_MODE_HYBRID
+
+
 class QueryRequest(BaseModel):
     """Query request model."""
     query: str
     max_results: Optional[int] = 5
     filters: Optional[dict] = None
     collection: Optional[str] = None
+    mode: Optional[RetrievalMode] = None
 
 class SearchResult(BaseModel):
     """Search result model."""
@@ -354,6 +533,35 @@ class QueryResponse(BaseModel):
     metadata: dict
 
 
+class BatchSearchQuery(BaseModel):
+    """One query of a batch search."""
+    query: str
+    max_results: int = 5
+    collection: Optional[str] = None
+    mode: Optional[RetrievalMode] = None
+
+
+class BatchSearchRequest(BaseModel):
+    """Batch search request; ``mode`` is the default for queries that set none."""
+    queries: List[BatchSearchQuery]
+    mode: Optional[RetrievalMode] = None
+
+
+class BatchSearchItem(BaseModel):
+    """Results of one batch query, in request order."""
+    query: str
+    collection: str
+    retrievalMode: Optional[str] = None
+    cached: bool = False
+    results: List[SearchResult] = []
+    error: Optional[str] = None
+
+
+class BatchSearchResponse(BaseModel):
+    """Batch search response model."""
+    results: List[BatchSearchItem]
+
+
 class GpuPolicyResponseModel(BaseModel):
     """GPU policy response model."""
     policy: dict
@@ -361,12 +569,253 @@ class GpuPolicyResponseModel(BaseModel):
     maxConcurrency: int
     cooldownSeconds: float
 
+
+def format_source_nodes(source_nodes, collection: str) -> List[SearchResult]:
+    """
+    Convert retrieved LlamaIndex nodes into SearchResult models.
+    """
+    results = []
+    for node in source_nodes or []:
+        # Support both NodeWithScore.node.text and NodeWithScore.text
+        text = getattr(node, "text", None) or getattr(getattr(node, "node", None), "text", "")
+        meta = getattr(node, "metadata", None) or getattr(getattr(node, "node", None), "metadata", {})
+        prepared_meta = {}
+        if isinstance(meta, dict):
+            prepared_meta.update(meta)
+        elif meta:
+            prepared_meta["raw"] = meta
+        prepared_meta.setdefault("collection", collection)
+        results.append(
+            SearchResult(
+                content=text,
+                relevance=float(getattr(node, "score", 0.0) or 0.0),
+                metadata=prepared_meta,
+            )
+        )
+    return results
+
+
+def _query_cache_key(payload: "QueryRequest", collection: str, mode: str) -> str:
+    return build_cache_key(
+        "query",
+        collection,
+        payload.query,
+        max_results=payload.max_results,
+        filters=payload.filters,
+        embedding_model=embed_model_name_for(collection),
+        llm_model=OLLAMA_MODEL,
+        mode=mode,
+        generation=generation_tracker.get(collection),
+    )
+
+
+def _search_cache_key(query: str, collection: str, max_results: int, mode: str) -> str:
+    return build_cache_key(
+        "search",
+        collection,
+        query,
+        max_results=max_results,
+        embedding_model=embed_model_name_for(collection),
+        mode=mode,
+        generation=generation_tracker.get(collection),
+    )
+
+
+# Identical concurrent requests share one retrieval/generation (see coalescing.py).
+query_single_flight = SingleFlight("query")
+search_single_flight = SingleFlight("search")
+
+
+async def embed_query(
+    query: str, collection: str, priority: int = PRIORITY_INTERACTIVE
+) -> Tuple[QueryBundle, float]:
+    """
+    Embed the query with ``collection``'s model in the embedding pool and
+    return it as a QueryBundle.
+
+    Retrieval then reuses the vector, so vector search and generation never
+    hold an embedding slot (and vice versa). Also returns the slot wait time.
+    """
+    async with acquire_slot(EMBEDDING_POOL, "query_embedding", priority) as usage:
+        embedding = await embed_model_for(collection).aget_query_embedding(query)
+    return QueryBundle(query_str=query, embedding=embedding), usage["wait_time_seconds"]
+
+
+# Served queries are buffered and batch-written to rag.query_logs (see query_log.py).
+query_log = QueryLog()
+
+
+def _log_query(
+    request: Request,
+    current_user: Optional[dict],
+    query_type: str,
+    query: str,
+    collection: str,
+    mode: str,
+    started: float,
+    result,
+    *,
+    cache_hit: bool = False,
+    max_results: Optional[int] = None,
+    filters: Optional[dict] = None,
+) -> None:
+    """
+    Buffer a query log entry for a served request; ``result`` is the /query
+    payload or the /search result list.
+    """
+    sources = (result.get("sources") or []) if isinstance(result, dict) else (result or [])
+    scores = [item["relevance"] for item in sources if isinstance(item.get("relevance"), (int, float))]
+    query_log.record(QueryLogEntry(
+        query_text=query,
+        query_type=query_type,
+        collection=collection,
+        mode=mode,
+        duration_ms=int((time.perf_counter() - started) * 1000),
+        max_results=max_results,
+        filters=filters,
+        results_count=len(sources),
+        cache_hit=cache_hit,
+        top_relevance_score=max(scores) if scores else None,
+        user_id=(current_user or {}).get("username"),
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    ))
+
+
+async def _generate_answer(
+    payload: QueryRequest,
+    index: VectorStoreIndex,
+    collection: str,
+    retrieval_mode: str,
+    username: str,
+    priority: int = PRIORITY_INTERACTIVE,
+) -> Tuple[dict, Dict[str, str]]:
+    """
+    Retrieve and generate the answer to ``payload``; returns the response
+    payload (as cached) and the response headers describing the run.
+    """
+    query_bundle, embed_wait = await embed_query(payload.query, collection, priority)
+    query_engine, used_mode = build_query_engine(
+        index,
+        collection,
+        retrieval_mode,
+        payload.max_results,
+        filters=payload.filters,
+        text_qa_template=CUSTOM_QA_PROMPT,
+    )
+
+    with track_query_metrics():
+        # Retrieval is Qdrant-only: it never waits on (or holds) a GPU slot
+        async with acquire_slot(SEARCH_POOL, "query_retrieval") as search_usage:
+            try:
+                nodes = await retrieve_nodes_with_protection(query_engine, query_bundle)
+            except CircuitBreakerError as cb_error:
+                logger.error("Circuit breaker open for query retrieval: %s", str(cb_error))
+                raise HTTPException(
+                    status_code=503,
+                    detail=format_circuit_breaker_error(cb_error, "Qdrant")
+                )
+
+        async with acquire_gpu_slot("query", priority=priority) as gpu_usage:
+            try:
+                li_response = await synthesize_answer_with_protection(query_engine, query_bundle, nodes)
+            except CircuitBreakerError as cb_error:
+                logger.error("Circuit breaker open for answer generation: %s", str(cb_error))
+                raise HTTPException(
+                    status_code=503,
+                    detail=format_circuit_breaker_error(cb_error, "Ollama")
+                )
+
+    # Format response
+    sources = format_source_nodes(li_response.source_nodes, collection)
+
+    query_response = QueryResponse(
+        answer=str(li_response),
+        confidence=float(li_response.confidence) if hasattr(li_response, 'confidence') else 1.0,
+        sources=sources,
+        metadata={
+            "timestamp": datetime.utcnow().isoformat(),
+            "user": username,
+            "query_type": "semantic",
+            "collection": collection,
+            "retrievalMode": used_mode,
+            "gpu": build_gpu_metadata(
+                gpu_usage["wait_time_seconds"],
+                operation=gpu_usage.get("operation"),
+                lock_owner=gpu_usage.get("lock_owner"),
+                lock_priority=gpu_usage.get("lock_priority"),
+            ),
+            "embeddingWaitSeconds": round(embed_wait, 6),
+        }
+    )
+
+    headers = {
+        "X-GPU-Wait-Seconds": f"{gpu_usage['wait_time_seconds']:.4f}",
+        "X-Embedding-Wait-Seconds": f"{embed_wait:.4f}",
+        "X-Search-Wait-Seconds": f"{search_usage['wait_time_seconds']:.4f}",
+        "X-GPU-Max-Concurrency": str(GPU_MAX_CONCURRENCY),
+        "X-Qdrant-Collection": collection,
+        "X-Retrieval-Mode": used_mode,
+    }
+    return query_response.model_dump(), headers
+
+
+async def _run_search(
+    query: str,
+    index: VectorStoreIndex,
+    collection: str,
+    retrieval_mode: str,
+    max_results: int,
+    priority: int = PRIORITY_INTERACTIVE,
+) -> Tuple[list, Dict[str, str]]:
+    """
+    Embed and search ``query``; returns the results (as cached) and the
+    response headers describing the run.
+    """
+    query_bundle, embed_wait = await embed_query(query, collection, priority)
+
+    # Qdrant-only from here on: never waits on a GPU slot
+    async with acquire_slot(SEARCH_POOL, "search") as search_usage:
+        query_engine, used_mode = build_query_engine(
+            index,
+            collection,
+            retrieval_mode,
+            max_results,
+            response_mode="no_text",
+        )
+
+        with track_query_metrics(query_type="similarity"):
+            # Protected with circuit breaker
+            try:
+                li_response = await search_vectors_with_protection(query_engine, query_bundle)
+            except CircuitBreakerError as cb_error:
+                logger.error("Circuit breaker open for search endpoint: %s", str(cb_error))
+                raise HTTPException(
+                    status_code=503,
+                    detail=format_circuit_breaker_error(cb_error, "Qdrant")
+                )
+
+    # Format results
+    results = format_source_nodes(li_response.source_nodes, collection)
+
+    headers = {
+        "X-GPU-Wait-Seconds": "0",
+        "X-Embedding-Wait-Seconds": f"{embed_wait:.4f}",
+        "X-GPU-Max-Concurrency": str(GPU_MAX_CONCURRENCY),
+        "X-Search-Wait-Seconds": f"{search_usage['wait_time_seconds']:.4f}",
+        "X-Qdrant-Collection": collection,
+        "X-Retrieval-Mode": used_mode,
+    }
+    return [item.model_dump() for item in results], headers
+
+
 @app.post("/query", response_model=QueryResponse)
 @rate_limiter
 async def query_documents(
     payload: QueryRequest,
     request: Request,
     response: Response,
+    mode: Optional[RetrievalMode] = Query(None, description="Retrieval mode: dense or hybrid (dense + BM25)"),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -377,94 +826,168 @@ async def query_documents(
             status_code=503,
             detail="LLM não configurado. Defina OLLAMA_MODEL para habilitar respostas geradas."
         )
+    started = time.perf_counter()
     try:
         index_for_request, resolved_collection = get_index_for_collection(payload.collection)
 
+        retrieval_mode = mode or payload.mode or DEFAULT_RETRIEVAL_MODE
+
         # Check cache
-        cache_key = f"query:{resolved_collection}:{payload.query}"
+        cache_key = _query_cache_key(payload, resolved_collection, retrieval_mode)
         cache_client = get_cache_client()
         cached_response = await cache_client.get(cache_key)
-        if cached_response:
+        if cached_response is not None:
             response.headers["X-GPU-Wait-Seconds"] = "0"
             response.headers["X-GPU-Max-Concurrency"] = str(GPU_MAX_CONCURRENCY)
             response.headers["X-Qdrant-Collection"] = resolved_collection
+            _log_query(
+                request, current_user, "query", payload.query, resolved_collection, retrieval_mode, started,
+                cached_response, cache_hit=True, max_results=payload.max_results, filters=payload.filters,
+            )
             return cached_response
 
-        async with acquire_gpu_slot("query") as gpu_usage:
-            query_engine = index_for_request.as_query_engine(
-                similarity_top_k=payload.max_results,
-                filters=payload.filters,
-                text_qa_template=CUSTOM_QA_PROMPT,
+        async def answer() -> dict:
+            # Runs once per cache key while identical requests are in flight.
+            response_payload, headers = await _generate_answer(
+                payload, index_for_request, resolved_collection, retrieval_mode, current_user["username"]
             )
+            response.headers.update(headers)
+            await cache_client.set(cache_key, response_payload, expire=CACHE_TTL)
+            return response_payload
 
-            with track_query_metrics():
-                # Protected with circuit breaker
-                try:
-                    li_response = await search_vectors_with_protection(query_engine, payload.query)
-                except CircuitBreakerError as cb_error:
-                    logger.error("Circuit breaker open for query endpoint: %s", str(cb_error))
-                    raise HTTPException(
-                        status_code=503,
-                        detail=format_circuit_breaker_error(cb_error, "Qdrant/Ollama")
-                    )
+        response_payload, coalesced = await query_single_flight.run(cache_key, answer, cache_client)
+        if coalesced:
+            response.headers["X-GPU-Wait-Seconds"] = "0"
+            response.headers["X-GPU-Max-Concurrency"] = str(GPU_MAX_CONCURRENCY)
+            response.headers["X-Qdrant-Collection"] = resolved_collection
+            response.headers["X-Coalesced"] = "true"
+        _log_query(
+            request, current_user, "query", payload.query, resolved_collection, retrieval_mode, started,
+            response_payload, max_results=payload.max_results, filters=payload.filters,
+        )
+        return response_payload
 
-        # Format response
-        sources = []
-        for node in li_response.source_nodes:
-            # Support both NodeWithScore.node.text and NodeWithScore.text
-            text = getattr(node, "text", None) or getattr(getattr(node, "node", None), "text", "")
-            meta = getattr(node, "metadata", None) or getattr(getattr(node, "node", None), "metadata", {})
-            prepared_meta = {}
-            if isinstance(meta, dict):
-                prepared_meta.update(meta)
-            elif meta:
-                prepared_meta["raw"] = meta
-            prepared_meta.setdefault("collection", resolved_collection)
-            sources.append(
-                SearchResult(
-                    content=text,
-                    relevance=float(getattr(node, "score", 0.0) or 0.0),
-                    metadata=prepared_meta,
-                )
-            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_msg = str(e) if str(e) else f"{type(e).__name__}: (no message)"
+        logger.error(f"Error processing query: {error_msg}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing query: {error_msg}"
+        )
+
+
+@app.post("/query/stream")
+@rate_limiter
+async def query_documents_stream(
+    payload: QueryRequest,
+    request: Request,
+    mode: Optional[RetrievalMode] = Query(None, description="Retrieval mode: dense or hybrid (dense + BM25)"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Execute a query and stream the answer as Server-Sent Events.
+
+    Events: ``start``, ``status``, ``sources`` (as soon as retrieval is done),
+    one ``chunk`` per generated token, then ``done`` (or ``error``). The
+    complete answer is stored in the same response cache as ``/query``.
+    """
+    if not LLM_ENABLED:
+        raise HTTPException(
+            status_code=503,
+            detail="LLM não configurado. Defina OLLAMA_MODEL para habilitar respostas geradas."
+        )
+    started = time.perf_counter()
+    index_for_request, resolved_collection = get_index_for_collection(payload.collection)
+    headers = {**SSE_HEADERS, "X-Qdrant-Collection": resolved_collection}
+    retrieval_mode = mode or payload.mode or DEFAULT_RETRIEVAL_MODE
+
+    cache_key = _query_cache_key(payload, resolved_collection, retrieval_mode)
+    cache_client = get_cache_client()
+    cached_response = await cache_client.get(cache_key)
+    if cached_response is not None:
+        _log_query(
+            request, current_user, "query", payload.query, resolved_collection, retrieval_mode, started,
+            cached_response, cache_hit=True, max_results=payload.max_results, filters=payload.filters,
+        )
+        return StreamingResponse(
+            stream_cached_response(cached_response["answer"], cached_response["sources"]),
+            media_type="text/event-stream",
+            headers=headers,
+        )
+
+    query_engine, used_mode = build_query_engine(
+        index_for_request,
+        resolved_collection,
+        retrieval_mode,
+        payload.max_results,
+        filters=payload.filters,
+        text_qa_template=CUSTOM_QA_PROMPT,
+        streaming=True,
+    )
+    headers["X-Retrieval-Mode"] = used_mode
+    gpu_usage: dict = {}
 
+    async def cache_answer(answer: str, li_response) -> None:
         query_response = QueryResponse(
-            answer=str(li_response),
-            confidence=float(li_response.confidence) if hasattr(li_response, 'confidence') else 1.0,
-            sources=sources,
+            answer=answer,
+            confidence=1.0,
+            sources=format_source_nodes(getattr(li_response, "source_nodes", None), resolved_collection),
             metadata={
                 "timestamp": datetime.utcnow().isoformat(),
                 "user": current_user["username"],
                 "query_type": "semantic",
                 "collection": resolved_collection,
+                "retrievalMode": used_mode,
                 "gpu": build_gpu_metadata(
-                    gpu_usage["wait_time_seconds"],
+                    gpu_usage.get("wait_time_seconds", 0.0),
                     operation=gpu_usage.get("operation"),
                     lock_owner=gpu_usage.get("lock_owner"),
+                    lock_priority=gpu_usage.get("lock_priority"),
                 ),
-            }
+            },
         )
-
-        response.headers["X-GPU-Wait-Seconds"] = f"{gpu_usage['wait_time_seconds']:.4f}"
-        response.headers["X-GPU-Max-Concurrency"] = str(GPU_MAX_CONCURRENCY)
-        response.headers["X-Qdrant-Collection"] = resolved_collection
-
-        # Cache response
         response_payload = query_response.model_dump()
-        await cache_client.set(cache_key, response_payload, expire=3600)
-
-        return response_payload
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        error_msg = str(e) if str(e) else f"{type(e).__name__}: (no message)"
-        logger.error(f"Error processing query: {error_msg}", exc_info=True)
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error processing query: {error_msg}"
+        await cache_client.set(cache_key, response_payload, expire=CACHE_TTL)
+        _log_query(
+            request, current_user, "query", payload.query, resolved_collection, retrieval_mode, started,
+            response_payload, max_results=payload.max_results, filters=payload.filters,
         )
 
+    async def events():
+        async with AsyncExitStack() as stack:
+            query_bundle = None
+
+            async def retrieve(query: str):
+                nonlocal query_bundle
+                query_bundle, _ = await embed_query(query, resolved_collection)
+                # Qdrant-only: sources are streamed before any GPU slot is requested.
+                async with acquire_slot(SEARCH_POOL, "query_retrieval"):
+                    return await retrieve_nodes_with_protection(query_engine, query_bundle)
+
+            async def synthesize(nodes):
+                # The generation slot is held until the stream ends (or the client disconnects).
+                gpu_usage.update(await stack.enter_async_context(
+                    acquire_gpu_slot("query_stream", priority=PRIORITY_INTERACTIVE)
+                ))
+                return await synthesize_answer_with_protection(query_engine, query_bundle, nodes)
+
+            with track_query_metrics(query_type="semantic_stream"):
+                async for event in stream_rag_response(
+                    payload.query,
+                    query_engine,
+                    retrieve=retrieve,
+                    synthesize=synthesize,
+                    format_sources=lambda nodes: [
+                        item.model_dump() for item in format_source_nodes(nodes, resolved_collection)
+                    ],
+                    on_complete=cache_answer,
+                ):
+                    yield event
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
 
 @app.get("/gpu/policy", response_model=GpuPolicyResponseModel)
 async def gpu_policy() -> GpuPolicyResponseModel:
@@ -484,84 +1007,409 @@ async def semantic_search(
     response: Response,
     max_results: int = 5,
     collection: Optional[str] = None,
+    mode: Optional[RetrievalMode] = Query(None, description="Retrieval mode: dense or hybrid (dense + BM25)"),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Perform semantic search over the document collection.
+
+    ``mode=hybrid`` fuses dense results with BM25 keyword matches, which helps
+    exact identifiers (ticker symbols, env var or function names).
     """
     # Allow search without LLM; requires only embeddings
+    started = time.perf_counter()
     try:
         index_for_request, resolved_collection = get_index_for_collection(collection)
+        retrieval_mode = mode or DEFAULT_RETRIEVAL_MODE
 
         # Check cache
-        cache_key = f"search:{resolved_collection}:{query}:{max_results}"
+        cache_key = _search_cache_key(query, resolved_collection, max_results, retrieval_mode)
         cache_client = get_cache_client()
         cached_response = await cache_client.get(cache_key)
-        if cached_response:
+        if cached_response is not None:
             response.headers["X-GPU-Wait-Seconds"] = "0"
             response.headers["X-GPU-Max-Concurrency"] = str(GPU_MAX_CONCURRENCY)
             response.headers["X-Qdrant-Collection"] = resolved_collection
+            _log_query(
+                request, current_user, "search", query, resolved_collection, retrieval_mode, started,
+                cached_response, cache_hit=True, max_results=max_results,
+            )
             return cached_response
 
-        async with acquire_gpu_slot("search") as gpu_usage:
-            query_engine = index_for_request.as_query_engine(
-                similarity_top_k=max_results,
-                response_mode="no_text",
+        async def search() -> list:
+            # Runs once per cache key while identical requests are in flight.
+            payload, headers = await _run_search(
+                query, index_for_request, resolved_collection, retrieval_mode, max_results
             )
+            response.headers.update(headers)
+            await cache_client.set(cache_key, payload, expire=CACHE_TTL)
+            return payload
 
-            with track_query_metrics(query_type="similarity"):
-                # Protected with circuit breaker
-                try:
-                    li_response = await search_vectors_with_protection(query_engine, query)
-                except CircuitBreakerError as cb_error:
-                    logger.error("Circuit breaker open for search endpoint: %s", str(cb_error))
-                    raise HTTPException(
-                        status_code=503,
-                        detail=format_circuit_breaker_error(cb_error, "Qdrant")
-                    )
+        payload, coalesced = await search_single_flight.run(cache_key, search, cache_client)
+        if coalesced:
+            response.headers["X-GPU-Wait-Seconds"] = "0"
+            response.headers["X-GPU-Max-Concurrency"] = str(GPU_MAX_CONCURRENCY)
+            response.headers["X-Qdrant-Collection"] = resolved_collection
+            response.headers["X-Coalesced"] = "true"
+        _log_query(
+            request, current_user, "search", query, resolved_collection, retrieval_mode, started,
+            payload, max_results=max_results,
+        )
+        return payload
 
-        # Format results
-        results = []
-        for node in li_response.source_nodes:
-            text = getattr(node, "text", None) or getattr(getattr(node, "node", None), "text", "")
-            meta = getattr(node, "metadata", None) or getattr(getattr(node, "node", None), "metadata", {})
-            prepared_meta = {}
-            if isinstance(meta, dict):
-                prepared_meta.update(meta)
-            elif meta:
-                prepared_meta["raw"] = meta
-            prepared_meta.setdefault("collection", resolved_collection)
-            results.append(
-                SearchResult(
-                    content=text,
-                    relevance=float(getattr(node, "score", 0.0) or 0.0),
-                    metadata=prepared_meta,
-                )
-            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error performing search: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error performing search: {str(e)}"
+        )
 
-        response.headers["X-GPU-Wait-Seconds"] = f"{gpu_usage['wait_time_seconds']:.4f}"
-        response.headers["X-GPU-Max-Concurrency"] = str(GPU_MAX_CONCURRENCY)
-        response.headers["X-Qdrant-Collection"] = resolved_collection
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "64"))
 
-        # Cache results
-        payload = [item.model_dump() for item in results]
-        await cache_client.set(cache_key, payload, expire=3600)
 
-        return payload
+@app.post("/search/batch", response_model=BatchSearchResponse)
+@rate_limiter
+async def semantic_search_batch(
+    payload: BatchSearchRequest,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Run many searches in one request.
+
+    Cached sub-queries are answered from the same cache as ``/search``; the
+    rest are embedded in one batched call and searched with one Qdrant batch
+    request per collection. Results come back in request order; a sub-query
+    that fails (e.g. unknown collection) carries an ``error`` instead.
+    """
+    if len(payload.queries) > SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many queries in batch ({len(payload.queries)} > {SEARCH_BATCH_MAX_QUERIES}).",
+        )
+    started = time.perf_counter()
+    try:
+        items: List[BatchSearchItem] = []
+        cache_keys: List[Optional[str]] = []
+        for item in payload.queries:
+            mode = item.mode or payload.mode or DEFAULT_RETRIEVAL_MODE
+            try:
+                _, collection = get_index_for_collection(item.collection)
+            except HTTPException as exc:
+                if exc.status_code != 404:
+                    raise
+                items.append(BatchSearchItem(
+                    query=item.query, collection=normalize_collection_name(item.collection), error=str(exc.detail)
+                ))
+                cache_keys.append(None)
+                continue
+            items.append(BatchSearchItem(query=item.query, collection=collection, retrievalMode=mode))
+            cache_keys.append(_search_cache_key(item.query, collection, item.max_results, mode))
+
+        cache_client = get_cache_client()
+        cached_results = await asyncio.gather(
+            *(cache_client.get(key) if key else asyncio.sleep(0) for key in cache_keys)
+        )
+        pending: List[int] = []
+        for position, cached in enumerate(cached_results):
+            if cached is not None:
+                items[position].cached = True
+                items[position].results = [SearchResult(**result) for result in cached]
+            elif cache_keys[position]:
+                pending.append(position)
+
+        embed_wait = search_wait = 0.0
+        if pending:
+            # One embedding call per model: collections may use different models.
+            by_model: Dict[str, List[int]] = {}
+            for position in pending:
+                by_model.setdefault(embed_model_name_for(items[position].collection), []).append(position)
+            async with acquire_slot(EMBEDDING_POOL, "query_embedding_batch", PRIORITY_INTERACTIVE) as usage:
+                embedded = await asyncio.gather(*(
+                    EMBED_MODEL_POOL.get(model).aget_query_embedding_batch(
+                        [items[position].query for position in positions]
+                    )
+                    for model, positions in by_model.items()
+                ))
+            embed_wait = usage["wait_time_seconds"]
+            vector_at = {
+                position: vector
+                for positions, model_vectors in zip(by_model.values(), embedded)
+                for position, vector in zip(positions, model_vectors)
+            }
+            vectors = [vector_at[position] for position in pending]
+
+            sub_queries = []
+            for position, vector in zip(pending, vectors):
+                item = items[position]
+                dense_name, sparse_name = get_collection_vectors(item.collection)
+                hybrid = item.retrievalMode == RETRIEVAL_MODE_HYBRID and sparse_name is not None
+                sub_queries.append(SubQuery(
+                    query=item.query,
+                    collection=item.collection,
+                    max_results=payload.queries[position].max_results,
+                    mode=item.retrievalMode,
+                    vector=vector,
+                    dense_vector_name=dense_name,
+                    sparse_vector_name=sparse_name,
+                    sparse_vector=SPARSE_ENCODER.encode_query(item.query) if hybrid else None,
+                ))
+
+            async with acquire_slot(SEARCH_POOL, "search_batch") as search_usage:
+                with track_query_metrics(query_type="similarity_batch"):
+                    try:
+                        nodes_per_query = await search_batch_with_protection(
+                            lambda: search_batch(async_qdrant_client, sub_queries, vector_store_cache.__getitem__)
+                        )
+                    except CircuitBreakerError as cb_error:
+                        logger.error("Circuit breaker open for batch search endpoint: %s", str(cb_error))
+                        raise HTTPException(
+                            status_code=503,
+                            detail=format_circuit_breaker_error(cb_error, "Qdrant")
+                        )
+            search_wait = search_usage["wait_time_seconds"]
+
+            for position, sub_query, nodes in zip(pending, sub_queries, nodes_per_query):
+                item = items[position]
+                item.retrievalMode = RETRIEVAL_MODE_HYBRID if sub_query.hybrid else RETRIEVAL_MODE_DENSE
+                item.results = format_source_nodes(nodes, item.collection)
+            await asyncio.gather(*(
+                cache_client.set(
+                    cache_keys[position],
+                    [result.model_dump() for result in items[position].results],
+                    expire=CACHE_TTL,
+                )
+                for position in pending
+            ))
+
+        # Log sub-queries like /search, with the requested mode that keys their cache entry.
+        for query, item in zip(payload.queries, items):
+            if item.error is None:
+                _log_query(
+                    request, current_user, "search", item.query, item.collection,
+                    query.mode or payload.mode or DEFAULT_RETRIEVAL_MODE, started,
+                    [result.model_dump() for result in item.results],
+                    cache_hit=item.cached, max_results=query.max_results,
+                )
+
+        response.headers["X-Embedding-Wait-Seconds"] = f"{embed_wait:.4f}"
+        response.headers["X-Search-Wait-Seconds"] = f"{search_wait:.4f}"
+        response.headers["X-Batch-Cache-Hits"] = str(sum(item.cached for item in items))
+        return BatchSearchResponse(results=items).model_dump()
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error performing search: {str(e)}")
+        logger.error(f"Error performing batch search: {str(e)}")
         raise HTTPException(
             status_code=500,
-            detail=f"Error performing search: {str(e)}"
+            detail=f"Error performing batch search: {str(e)}"
+        )
+
+
+# Startup warm-up: build every configured collection's index and load the
+# models before /ready reports the pod as routable.
+WARMUP_ENABLED = os.getenv("LLAMAINDEX_WARMUP_ENABLED", "false").strip().lower() in {"1", "true", "yes", "on"}
+WARMUP_LLM = os.getenv("LLAMAINDEX_WARMUP_LLM", "true").strip().lower() in {"1", "true", "yes", "on"}
+EMBED_KEEP_ALIVE = os.getenv(
+    "LLAMAINDEX_EMBED_KEEP_ALIVE",
+    os.getenv("OLLAMA_KEEP_ALIVE", os.getenv("LLAMAINDEX_KEEP_ALIVE", "5m")),
+)
+warmup_state = WarmupState(enabled=WARMUP_ENABLED)
+
+
+def _warmup_collections() -> List[str]:
+    """
+    Collections to warm: LLAMAINDEX_WARMUP_COLLECTIONS (comma separated) or the
+    enabled collections of collection-config.json, plus the active collection.
+    """
+    override = os.getenv("LLAMAINDEX_WARMUP_COLLECTIONS", "")
+    names = [name.strip() for name in override.split(",") if name.strip()]
+    if not names and collection_config_manager is not None:
+        try:
+            names = [info.name for info in collection_config_manager.get_all_collections(enabled_only=True)]
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.warning("Could not read collection configuration for warm-up: %s", exc)
+    if ACTIVE_QDRANT_COLLECTION not in names:
+        names.insert(0, ACTIVE_QDRANT_COLLECTION)
+    return names
+
+
+async def _preload_model(model: str) -> None:
+    timeout = float(os.getenv("OLLAMA_REQUEST_TIMEOUT", "120.0"))
+    if model == OLLAMA_MODEL and model not in EMBED_MODEL_POOL.models():
+        await preload_ollama_model(OLLAMA_BASE_URL, model, Settings.llm.keep_alive, timeout=timeout, generate=True)
+        return
+    # Through the scheduler, so the model is tracked as resident.
+    async with EMBED_MODEL_POOL.scheduler.turn(model):
+        await preload_ollama_model(OLLAMA_BASE_URL, model, EMBED_KEEP_ALIVE, timeout=timeout)
+
+
+@app.on_event("startup")
+async def _start_warmup() -> None:
+    if not WARMUP_ENABLED:
+        return
+    collections = _warmup_collections()
+    # Embedding models in collection order, only as many as may stay resident.
+    models = list(dict.fromkeys(embed_model_name_for(name) for name in collections))
+    models = models[: EMBED_MODEL_POOL.scheduler.max_resident]
+    for model in models:
+        EMBED_MODEL_POOL.get(model)
+    if LLM_ENABLED and WARMUP_LLM:
+        models.append(OLLAMA_MODEL)
+    app.state.warmup_task = asyncio.create_task(
+        warm_up(
+            warmup_state,
+            collections,
+            models,
+            build_index=get_index_for_collection,
+            preload_model=_preload_model,
+        )
+    )
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: 503 until the startup warm-up has finished.
+
+    Unlike /health this does not touch Qdrant, so it stays cheap enough to be
+    polled by the load balancer.
+    """
+    payload = warmup_state.describe()
+    if qdrant_client is None:
+        payload.update({"ready": False, "message": "Qdrant client not initialized"})
+    if not payload["ready"]:
+        return JSONResponse(status_code=503, content=payload)
+    return payload
+
+
+# Popular-query precomputation: after an ingestion bumps a collection's
+# generation, re-run its most frequent logged queries into the response cache.
+PRECOMPUTE_ENABLED = query_log.enabled and PRECOMPUTE_TOP_N > 0
+PRECOMPUTE_USER = "precompute"
+
+
+async def _precompute_popular_query(entry: PopularQuery) -> bool:
+    """
+    Compute and cache one popular query at bulk priority, unless it is cached
+    already. Live requests for the same key share the computation.
+    """
+    index, collection = get_index_for_collection(entry.collection)
+    cache_client = get_cache_client()
+    if entry.query_type == "query":
+        if not LLM_ENABLED:
+            return False
+        request = QueryRequest(
+            query=entry.query_text,
+            max_results=entry.max_results,
+            filters=entry.filters,
+            collection=collection,
+            mode=entry.mode,
         )
+        cache_key = _query_cache_key(request, collection, entry.mode)
+        flight = query_single_flight
+
+        async def compute():
+            result, _ = await _generate_answer(request, index, collection, entry.mode, PRECOMPUTE_USER, PRIORITY_BULK)
+            await cache_client.set(cache_key, result, expire=CACHE_TTL)
+            return result
+    else:
+        max_results = entry.max_results or 5
+        cache_key = _search_cache_key(entry.query_text, collection, max_results, entry.mode)
+        flight = search_single_flight
+
+        async def compute():
+            result, _ = await _run_search(entry.query_text, index, collection, entry.mode, max_results, PRIORITY_BULK)
+            await cache_client.set(cache_key, result, expire=CACHE_TTL)
+            return result
+
+    if await cache_client.get(cache_key) is not None:
+        return False
+    _, shared = await flight.run(cache_key, compute, cache_client)
+    return not shared
+
+
+precomputer = PopularQueryPrecomputer(
+    load_popular=lambda collection: query_log.popular_queries(collection, PRECOMPUTE_TOP_N, PRECOMPUTE_WINDOW_HOURS),
+    warm=_precompute_popular_query,
+    collections=lambda: list(generation_tracker.describe()),
+)
+
+
+@app.on_event("startup")
+async def _start_query_log() -> None:
+    query_log.start()
+    if PRECOMPUTE_ENABLED:
+        generation_tracker.subscribe(precomputer.schedule)
+        precomputer.start()
+
+
+@app.on_event("shutdown")
+async def _stop_query_log() -> None:
+    await precomputer.stop()
+    await query_log.stop()
+
+
+@app.on_event("shutdown")
+async def _close_cache() -> None:
+    await close_cache_client()
+
+
+def _approximate_count(name: str) -> int:
+    """
+    Point count from the collection metadata (no scan; may lag recent writes).
+    """
+    info = qdrant_client.get_collection(name)
+    return int(getattr(info, "points_count", None) or 0)
+
+
+def _probe_health() -> Dict[str, object]:
+    """
+    Background health probe: Qdrant reachability plus approximate counts of the
+    collections this instance serves.
+    """
+    if qdrant_client is None:
+        return {"status": "degraded", "message": "Qdrant client not initialized"}
+    existing = {collection.name for collection in qdrant_client.get_collections().collections}
+    tracked = {ACTIVE_QDRANT_COLLECTION, *list(index_cache)}
+    return {
+        "status": "healthy",
+        "existing": sorted(existing),
+        "vectors": {name: _approximate_count(name) for name in tracked if name in existing},
+    }
+
+
+health_snapshot = HealthSnapshot(_probe_health)
+
+
+@app.on_event("startup")
+async def _start_health_snapshot() -> None:
+    health_snapshot.start()
+    EMBED_MODEL_POOL.start(OLLAMA_BASE_URL)
+    generation_tracker.start()
+
+
+@app.on_event("shutdown")
+async def _stop_health_snapshot() -> None:
+    await health_snapshot.stop()
+    await EMBED_MODEL_POOL.stop()
+    await generation_tracker.stop()
+
 
 @app.get("/health")
-async def health_check(collection: Optional[str] = None):
+async def health_check(
+    collection: Optional[str] = None,
+    deep: bool = Query(False, description="Query Qdrant live and count points exactly"),
+):
     """
     Health check endpoint with circuit breaker status.
+
+    Served from a snapshot refreshed in the background with approximate point
+    counts; ``deep=true`` checks Qdrant live and counts exactly.
     """
     target_collection = normalize_collection_name(collection)
     payload = {
@@ -577,19 +1425,40 @@ async def health_check(collection: Optional[str] = None):
                 "message": "Qdrant client not initialized",
             })
             return payload
-        # Check Qdrant connection
-        qdrant_client.get_collections()
-        exists, current_count = _get_collection_info(target_collection)
+        if deep:
+            # Check Qdrant connection
+            qdrant_client.get_collections()
+            exists, current_count = _get_collection_info(target_collection)
+        else:
+            snapshot = await health_snapshot.get()
+            payload["snapshotAgeSeconds"] = snapshot["snapshotAgeSeconds"]
+            if snapshot.get("status") != "healthy":
+                payload.update({key: value for key, value in snapshot.items() if key in ("status", "message", "error")})
+                return payload
+            exists = target_collection in snapshot["existing"]
+            current_count = snapshot["vectors"].get(target_collection, 0)
+            if exists and target_collection not in snapshot["vectors"]:
+                current_count = await asyncio.to_thread(_approximate_count, target_collection)
         status_value = "healthy" if exists else "missing"
         payload.update({
             "status": status_value,
             "collectionExists": exists,
             "vectors": current_count,
+            "vectorsExact": deep,
             "fallbackApplied": ACTIVE_QDRANT_COLLECTION != CONFIGURED_QDRANT_COLLECTION,
         })
         if not exists:
             payload["message"] = f"Collection '{target_collection}' not found."
         
+        payload["embeddingModel"] = embed_model_name_for(target_collection)
+        payload["embeddingModels"] = EMBED_MODEL_POOL.describe()
+        # Only collections already served are tracked; probing /health must not add more.
+        if exists and target_collection in generation_tracker:
+            payload["generation"] = generation_tracker.get(target_collection)
+        payload["queryLog"] = query_log.describe()
+        if PRECOMPUTE_ENABLED:
+            payload["precompute"] = precomputer.describe()
+
         # Add circuit breaker states
         circuit_breaker_states = get_circuit_breaker_states()
         payload["circuitBreakers"] = circuit_breaker_states
@@ -40,12 +40,25 @@ CACHE_OPERATIONS = Counter(
     ['operation', 'status']
 )
 
+TIME_TO_FIRST_TOKEN = Histogram(
+    'query_time_to_first_token_seconds',
+    'Time from request start to the first streamed answer token',
+    ['endpoint'],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 60.0)
+)
+
 RATE_LIMITS = Counter(
     'rate_limits_total',
     'Total number of rate limit events',
     ['status']
 )
 
+COALESCED_REQUESTS = Counter(
+    'query_coalesced_requests_total',
+    'Requests answered by an identical request already in flight',
+    ['endpoint', 'scope']
+)
+
 def init_metrics(app, port=9091):
     """Initialize metrics server and FastAPI instrumentation."""
     start_http_server(port)
@@ -78,10 +91,18 @@ def track_cache_operation(operation: str, status: str = "success"):
         status=status
     ).inc()
 
+def record_time_to_first_token(seconds: float, endpoint: str = "query_stream"):
+    """Record time-to-first-token for a streamed answer."""
+    TIME_TO_FIRST_TOKEN.labels(endpoint=endpoint).observe(seconds)
+
 def track_rate_limit(status: str = "allowed"):
     """Record a rate limit metric."""
     RATE_LIMITS.labels(status=status).inc()
 
+def track_coalesced_request(endpoint: str, scope: str = "local"):
+    """Record a request served by another in-flight request (scope: local/remote)."""
+    COALESCED_REQUESTS.labels(endpoint=endpoint, scope=scope).inc()
+
 def trace_request(name: str):
     """Decorator to add tracing to requests."""
     def decorator(func):
@@ -0,0 +1,127 @@
+"""
+Popular-query precomputation.
+
+After an ingestion bumps a collection's generation (see
+shared/collection_generation.py) every cached answer for that collection
+misses. The precomputer re-runs the collection's most frequent recent queries
+from ``rag.query_logs`` and stores the results under the new cache keys. The
+hottest questions are then served warm, instead of the first caller after each
+ingestion paying for retrieval and generation.
+
+Runs are queued per collection and executed one query at a time in the
+background, so live traffic keeps priority. With
+``LLAMAINDEX_PRECOMPUTE_INTERVAL_SECONDS`` set, every tracked collection is
+also re-warmed on that schedule, keeping entries alive past ``CACHE_TTL``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+try:
+    from .query_log import PopularQuery
+except ImportError:  # pragma: no cover - fallback for production image layout
+    from query_log import PopularQuery  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name, ""))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+PRECOMPUTE_TOP_N = _int_env("LLAMAINDEX_PRECOMPUTE_TOP_N", 10)
+PRECOMPUTE_WINDOW_HOURS = _int_env("LLAMAINDEX_PRECOMPUTE_WINDOW_HOURS", 24) or 24
+PRECOMPUTE_INTERVAL_SECONDS = _int_env("LLAMAINDEX_PRECOMPUTE_INTERVAL_SECONDS", 0)
+
+
+class PopularQueryPrecomputer:
+    """
+    Re-run the most frequent queries of a collection and cache the results.
+
+    ``load_popular(collection)`` returns the queries to warm (blocking; it
+    runs in a worker thread). ``warm(query)`` computes and caches one of them
+    and returns False when it was already cached. ``collections()`` lists the
+    collections to re-warm on the periodic schedule.
+    """
+
+    def __init__(
+        self,
+        load_popular: Callable[[str], List[PopularQuery]],
+        warm: Callable[[PopularQuery], Awaitable[bool]],
+        collections: Callable[[], Iterable[str]] = tuple,
+        interval: float = PRECOMPUTE_INTERVAL_SECONDS,
+    ):
+        self.load_popular = load_popular
+        self.warm = warm
+        self.collections = collections
+        self.interval = interval
+        self.last_runs: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, None] = {}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, collection: str, *_: Any) -> None:
+        """Queue a run for ``collection`` (usable as a generation listener)."""
+        self._pending[collection] = None
+        self._wake.set()
+
+    def describe(self) -> Dict[str, Any]:
+        return {"pending": list(self._pending), "lastRuns": dict(self.last_runs)}
+
+    async def run(self, collection: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        summary = {"queries": 0, "computed": 0, "cached": 0, "failed": 0}
+        try:
+            popular = await asyncio.to_thread(self.load_popular, collection)
+        except Exception as exc:
+            logger.warning("Unable to load popular queries for %s: %s", collection, exc)
+            popular = []
+            summary["error"] = str(exc)
+        for query in popular:
+            summary["queries"] += 1
+            try:
+                summary["computed" if await self.warm(query) else "cached"] += 1
+            except Exception as exc:
+                summary["failed"] += 1
+                logger.warning("Precompute of %r in %s failed: %s", query.query_text, collection, exc)
+        summary["durationSeconds"] = round(time.perf_counter() - started, 3)
+        summary["finishedAt"] = time.time()
+        self.last_runs[collection] = summary
+        logger.info("Precomputed popular queries for %s: %s", collection, summary)
+        return summary
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval or None)
+            except asyncio.TimeoutError:
+                for collection in self.collections():
+                    self._pending[collection] = None
+            self._wake.clear()
+            while self._pending:
+                collection = next(iter(self._pending))
+                del self._pending[collection]
+                await self.run(collection)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
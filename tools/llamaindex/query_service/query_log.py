@@ -0,0 +1,272 @@
+"""
+Buffered query logging to the ``rag.query_logs`` hypertable.
+
+Requests only append an entry to an in-memory buffer. A background task
+writes the buffer to TimescaleDB in batches, one multi-row INSERT per flush,
+so the request path never waits on the database. When the buffer is full the
+oldest entries are dropped.
+
+Logging is enabled by ``LLAMAINDEX_QUERY_LOG_DSN`` (falling back to
+``LLAMAINDEX_JOBS_DSN``) when psycopg2 is installed. The same table feeds
+popular-query precomputation through ``QueryLog.popular_queries`` (see
+precompute.py).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import ipaddress
+import logging
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+try:  # Optional dependency: TimescaleDB query log
+    import psycopg2  # type: ignore
+    from psycopg2.extras import Json, execute_values  # type: ignore
+except ImportError:  # pragma: no cover - logging disabled without driver
+    psycopg2 = None  # type: ignore
+    Json = None  # type: ignore
+    execute_values = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name, ""))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+QUERY_LOG_DSN = os.getenv("LLAMAINDEX_QUERY_LOG_DSN") or os.getenv("LLAMAINDEX_JOBS_DSN")
+QUERY_LOG_BATCH_SIZE = _int_env("LLAMAINDEX_QUERY_LOG_BATCH_SIZE", 200)
+QUERY_LOG_FLUSH_SECONDS = float(_int_env("LLAMAINDEX_QUERY_LOG_FLUSH_SECONDS", 5))
+QUERY_LOG_MAX_BUFFER = _int_env("LLAMAINDEX_QUERY_LOG_MAX_BUFFER", 10000)
+
+_COLUMNS = (
+    "collection_id", "query_text", "query_type", "query_hash", "executed_at", "user_id",
+    "ip_address", "user_agent", "max_results", "filters", "results_count", "duration_ms",
+    "cache_hit", "top_relevance_score", "metadata",
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def query_hash(query: str) -> str:
+    """SHA-256 of the query text as it is used in cache keys (stripped, case kept)."""
+    return hashlib.sha256(query.strip().encode("utf-8")).hexdigest()
+
+
+def _inet(value: Optional[str]) -> Optional[str]:
+    try:
+        return str(ipaddress.ip_address(value)) if value else None
+    except ValueError:
+        return None
+
+
+@dataclass
+class QueryLogEntry:
+    """One successfully served request (field names follow rag.query_logs)."""
+
+    query_text: str
+    query_type: str  # "query" or "search"
+    collection: str
+    mode: str
+    duration_ms: int
+    max_results: Optional[int] = None
+    filters: Optional[dict] = None
+    results_count: int = 0
+    cache_hit: bool = False
+    top_relevance_score: Optional[float] = None
+    user_id: Optional[str] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    executed_at: datetime = field(default_factory=_utcnow)
+
+    def as_row(self, collection_id: Optional[str]) -> tuple:
+        score = self.top_relevance_score
+        return (
+            collection_id,
+            self.query_text,
+            self.query_type,
+            query_hash(self.query_text),
+            self.executed_at,
+            self.user_id,
+            _inet(self.ip_address),
+            self.user_agent,
+            self.max_results,
+            Json(self.filters or {}),
+            self.results_count,
+            max(0, int(self.duration_ms)),
+            self.cache_hit,
+            score if score is not None and 0 <= score <= 1 else None,
+            Json({"collection": self.collection, "mode": self.mode}),
+        )
+
+
+@dataclass
+class PopularQuery:
+    """A frequently asked query, with the parameters that make up its cache key."""
+
+    query_text: str
+    query_type: str
+    collection: str
+    mode: str
+    max_results: Optional[int]
+    filters: Optional[dict]
+    hits: int
+
+
+class QueryLog:
+    """Buffered writer (and reader) of rag.query_logs."""
+
+    def __init__(
+        self,
+        dsn: Optional[str] = QUERY_LOG_DSN,
+        batch_size: int = QUERY_LOG_BATCH_SIZE,
+        flush_seconds: float = QUERY_LOG_FLUSH_SECONDS,
+        max_buffer: int = QUERY_LOG_MAX_BUFFER,
+    ):
+        self.dsn = dsn
+        self.enabled = bool(dsn) and psycopg2 is not None
+        if dsn and psycopg2 is None:
+            logger.warning("Query log DSN set but psycopg2 is not installed; query logging disabled")
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._buffer: Deque[QueryLogEntry] = deque(maxlen=max_buffer)
+        self.written = 0
+        self.dropped = 0
+        self._wake = asyncio.Event()
+        self._conn = None
+        self._conn_lock = threading.Lock()
+        self._collection_ids: Dict[str, Optional[str]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, entry: QueryLogEntry) -> None:
+        """Buffer an entry; never blocks and never raises."""
+        if not self.enabled:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(entry)
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+    def _connection(self):
+        if self._conn is None or self._conn.closed:
+            self._conn = psycopg2.connect(self.dsn)
+            self._conn.autocommit = True
+        return self._conn
+
+    def _collection_id(self, cursor, collection: str) -> Optional[str]:
+        if collection not in self._collection_ids:
+            cursor.execute(
+                "SELECT id FROM rag.collections WHERE name = %s OR qdrant_collection_name = %s LIMIT 1",
+                (collection, collection),
+            )
+            row = cursor.fetchone()
+            self._collection_ids[collection] = str(row[0]) if row else None
+        return self._collection_ids[collection]
+
+    def _write(self, batch: List[QueryLogEntry]) -> None:
+        with self._conn_lock, self._connection().cursor() as cursor:
+            rows = [entry.as_row(self._collection_id(cursor, entry.collection)) for entry in batch]
+            execute_values(
+                cursor,
+                f"INSERT INTO rag.query_logs ({', '.join(_COLUMNS)}) VALUES %s",
+                rows,
+                page_size=self.batch_size,
+            )
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of entries written."""
+        batch = []
+        while self._buffer:
+            batch.append(self._buffer.popleft())
+        if not batch:
+            return 0
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except Exception as exc:  # logging must never break queries
+            logger.warning("Failed to write %s query log entries: %s", len(batch), exc)
+            self.dropped += len(batch)
+            self._conn = None
+            return 0
+        self.written += len(batch)
+        return len(batch)
+
+    def popular_queries(self, collection: str, limit: int, window_hours: int) -> List[PopularQuery]:
+        """
+        Most frequent successful queries against ``collection`` over the last
+        ``window_hours``, grouped by everything that goes into their cache key.
+        """
+        if not self.enabled:
+            return []
+        with self._conn_lock, self._connection().cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT MIN(query_text), query_type, metadata->>'mode', max_results, filters, COUNT(*) AS hits
+                FROM rag.query_logs
+                WHERE metadata->>'collection' = %s
+                  AND executed_at > NOW() - make_interval(hours => %s)
+                  AND success
+                  AND query_hash IS NOT NULL
+                GROUP BY query_hash, query_type, metadata->>'mode', max_results, filters
+                ORDER BY hits DESC
+                LIMIT %s
+                """,
+                (collection, window_hours, limit),
+            )
+            rows = cursor.fetchall()
+        return [
+            PopularQuery(
+                query_text=text,
+                query_type=kind,
+                collection=collection,
+                mode=mode,
+                max_results=max_results,
+                filters=filters or None,
+                hits=int(hits),
+            )
+            for text, kind, mode, max_results, filters, hits in rows
+        ]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.enabled:
+            await self.flush()
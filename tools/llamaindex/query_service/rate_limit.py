@@ -1,114 +1,243 @@
 """
 Rate limiting module for the query service.
-Implements token bucket algorithm for rate limiting.
+
+Implements GCRA (generic cell rate algorithm): each key stores only its
+theoretical arrival time (TAT), which allows ``RATE_LIMIT_REQUESTS`` per
+``RATE_LIMIT_PERIOD`` with bursts up to the full limit.
+
+With ``RATE_LIMIT_BACKEND=redis`` (the default when ``CACHE_TYPE=redis``) the
+check runs as one atomic Lua script against Redis, so every replica shares the
+same limit. Keys that were just denied are remembered in a bounded local LRU
+until they may retry, so hot abusive clients never reach Redis. If Redis is
+unreachable the limiter falls back to the per-process bucket. The memory
+backend keeps its state in a bounded TTL/LRU cache instead of an ever-growing
+dict.
+
+Clients are identified by the JWT subject (not the raw token), or by IP for
+anonymous requests.
 """
 
+import logging
+import math
 import os
 import time
-from typing import Dict, Tuple
-from datetime import datetime
+from dataclasses import dataclass
 from functools import wraps
+from typing import Dict, Optional, Tuple
+
+from cachetools import TTLCache
+from fastapi import HTTPException, Request, Response
+from jose import JWTError, jwt
+from redis import asyncio as aioredis
+
+try:
+    from .auth import ALGORITHM, SECRET_KEY
+    from .cache import redis_url
+    from .monitoring import track_rate_limit
+except ImportError:  # pragma: no cover - fallback for production image layout
+    from auth import ALGORITHM, SECRET_KEY  # type: ignore
+    from cache import redis_url  # type: ignore
+    from monitoring import track_rate_limit  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name, ""))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+# Atomic GCRA step. Uses the Redis clock so replicas with skewed clocks agree.
+# Returns {allowed, retry_after, reset_after} (seconds as strings: Lua numbers
+# returned to Redis are truncated to integers).
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local stored = redis.call('GET', KEYS[1])
+local tat = stored and tonumber(stored) or now
+if tat < now then
+  tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if now < allow_at then
+  return {0, tostring(allow_at - now), tostring(tat - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, '0', tostring(new_tat - now)}
+"""
+
+
+def _remaining(period: float, interval: float, reset_after: float) -> int:
+    """Requests still allowed right now, given the time until the bucket is full."""
+    return max(0, int((period - reset_after) / interval + 1e-9))
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of one rate limit check."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float = 0.0
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(int(time.time() + math.ceil(self.reset_after))),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class LocalRateLimitBackend:
+    """
+    Per-process GCRA state in a bounded LRU.
+
+    Entries expire after one period: by then the key's bucket is full again,
+    so dropping it (or evicting it early under memory pressure) only ever
+    errs on the side of allowing.
+    """
+
+    def __init__(self, limit: int, period: int, max_keys: int):
+        self.limit = limit
+        self.period = float(period)
+        self.interval = self.period / limit
+        self.tats: TTLCache = TTLCache(maxsize=max_keys, ttl=self.period)
+
+    async def check(self, key: str) -> RateLimitResult:
+        now = time.monotonic()
+        tat = max(self.tats.get(key, now), now)
+        new_tat = tat + self.interval
+        allow_at = new_tat - self.period
+        if now < allow_at:
+            return RateLimitResult(False, self.limit, 0, tat - now, allow_at - now)
+        self.tats[key] = new_tat
+        reset_after = new_tat - now
+        return RateLimitResult(True, self.limit, _remaining(self.period, self.interval, reset_after), reset_after)
+
+
+class RedisRateLimitBackend:
+    """GCRA in Redis (shared by all replicas), with the local backend as fallback."""
+
+    def __init__(self, limit: int, period: int, url: str, fallback: LocalRateLimitBackend):
+        self.limit = limit
+        self.period = float(period)
+        self.interval = self.period / limit
+        self.fallback = fallback
+        self.redis = aioredis.Redis.from_url(url, max_connections=_int_env("RATE_LIMIT_REDIS_MAX_CONNECTIONS", 20))
+        self.script = self.redis.register_script(GCRA_SCRIPT)
+
+    async def check(self, key: str) -> RateLimitResult:
+        try:
+            allowed, retry_after, reset_after = await self.script(
+                keys=[f"ratelimit:{key}"], args=[self.interval, self.period]
+            )
+        except Exception as exc:
+            logger.warning("Redis rate limit check failed, using local limiter: %s", exc)
+            track_rate_limit("fallback")
+            return await self.fallback.check(key)
+        reset = float(reset_after)
+        if int(allowed):
+            return RateLimitResult(True, self.limit, _remaining(self.period, self.interval, reset), reset)
+        return RateLimitResult(False, self.limit, 0, reset, float(retry_after))
 
-from fastapi import HTTPException, Request
-from pydantic import BaseModel
-
-class TokenBucket:
-    """Token bucket rate limiter implementation."""
-    
-    def __init__(self, tokens: int, seconds: int):
-        self.tokens = tokens
-        self.seconds = seconds
-        self.last_update = time.time()
-        self.current_tokens = tokens
-    
-    def _update_tokens(self):
-        """Update available tokens based on elapsed time."""
-        now = time.time()
-        elapsed = now - self.last_update
-        new_tokens = elapsed * (self.tokens / self.seconds)
-        self.current_tokens = min(self.tokens, self.current_tokens + new_tokens)
-        self.last_update = now
-    
-    def consume(self, tokens: int = 1) -> bool:
-        """
-        Try to consume tokens from the bucket.
-        Returns True if successful, False if not enough tokens.
-        """
-        self._update_tokens()
-        if self.current_tokens >= tokens:
-            self.current_tokens -= tokens
-            return True
-        return False
 
 class RateLimiter:
     """Rate limiter for API endpoints."""
-    
+
     def __init__(self):
-        self.buckets: Dict[str, TokenBucket] = {}
-        self.requests_per_period = int(os.getenv("RATE_LIMIT_REQUESTS", 100))
-        self.period_seconds = int(os.getenv("RATE_LIMIT_PERIOD", 60))
-    
-    def get_bucket(self, key: str) -> TokenBucket:
-        """Get or create a token bucket for the given key."""
-        if key not in self.buckets:
-            self.buckets[key] = TokenBucket(
-                self.requests_per_period,
-                self.period_seconds
-            )
-        return self.buckets[key]
-    
+        self.requests_per_period = _int_env("RATE_LIMIT_REQUESTS", 100)
+        self.period_seconds = _int_env("RATE_LIMIT_PERIOD", 60)
+        max_keys = _int_env("RATE_LIMIT_LOCAL_MAX_KEYS", 10000)
+        self.local = LocalRateLimitBackend(self.requests_per_period, self.period_seconds, max_keys)
+        # Keys denied by Redis -> monotonic time they may retry (local fast path).
+        self.denied_until: TTLCache = TTLCache(maxsize=max_keys, ttl=self.period_seconds)
+
+        default_backend = "redis" if os.getenv("CACHE_TYPE", "memory") == "redis" else "memory"
+        self.backend_name = os.getenv("RATE_LIMIT_BACKEND", default_backend).strip().lower()
+        self.backend = (
+            RedisRateLimitBackend(self.requests_per_period, self.period_seconds, redis_url(), self.local)
+            if self.backend_name == "redis"
+            else self.local
+        )
+
+    async def check(self, key: str) -> RateLimitResult:
+        blocked_until = self.denied_until.get(key)
+        now = time.monotonic()
+        if blocked_until is not None and now < blocked_until:
+            result = RateLimitResult(False, self.requests_per_period, 0, blocked_until - now, blocked_until - now)
+        else:
+            result = await self.backend.check(key)
+            if not result.allowed and self.backend is not self.local:
+                self.denied_until[key] = now + result.retry_after
+        track_rate_limit("allowed" if result.allowed else "denied")
+        return result
+
     async def check_rate_limit(self, key: str) -> Tuple[bool, Dict]:
         """
         Check if the request should be rate limited.
         Returns (allowed, headers) tuple.
         """
-        bucket = self.get_bucket(key)
-        allowed = bucket.consume()
-        
-        # Calculate rate limit headers
-        headers = {
-            "X-RateLimit-Limit": str(self.requests_per_period),
-            "X-RateLimit-Remaining": str(int(bucket.current_tokens)),
-            "X-RateLimit-Reset": str(int(bucket.last_update + self.period_seconds))
-        }
-        
-        return allowed, headers
+        result = await self.check(key)
+        return result.allowed, result.headers()
+
+
+def client_key(request: Request, current_user: Optional[dict] = None) -> str:
+    """
+    Identify the caller: the JWT subject when authenticated, else the client IP.
+
+    Endpoints resolve ``current_user`` before the limiter runs, so the token is
+    normally validated already; otherwise it is decoded here and an invalid
+    token counts against the IP.
+    """
+    if current_user and current_user.get("username"):
+        return f"user:{current_user['username']}"
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            subject = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+        except JWTError:
+            subject = None
+        if subject:
+            return f"user:{subject}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
 
 # Global rate limiter instance
 _rate_limiter = RateLimiter()
 
+
 def rate_limiter(func):
     """Decorator to apply rate limiting to endpoints."""
     @wraps(func)
     async def wrapper(*args, **kwargs):
         request: Request = kwargs.get("request") or args[0]
-        
-        # Get client identifier (IP address or user token)
-        client_id = request.client.host
-        if "authorization" in request.headers:
-            client_id = request.headers["authorization"]
-        
-        # Check rate limit
-        allowed, headers = await _rate_limiter.check_rate_limit(client_id)
-        
+
+        allowed, headers = await _rate_limiter.check_rate_limit(client_key(request, kwargs.get("current_user")))
+
         if not allowed:
             raise HTTPException(
                 status_code=429,
                 detail="Too Many Requests",
                 headers=headers
             )
-        
-        # Add rate limit headers to response
-        response = await func(*args, **kwargs)
-        
-        # If response is a Pydantic model, we need to handle it differently
-        if isinstance(response, BaseModel):
-            return response
-        
-        # Assuming response is a dict or similar
-        if isinstance(response, dict):
-            response.update({"headers": headers})
-        
-        return response
-    
-    return wrapper
\ No newline at end of file
+
+        # Add rate limit headers to the response when the endpoint takes one
+        response = kwargs.get("response")
+        if isinstance(response, Response):
+            response.headers.update(headers)
+
+        return await func(*args, **kwargs)
+
+    return wrapper
@@ -7,14 +7,27 @@ OPT-008: Response Streaming (Server-Sent Events)
 - Improved user experience with progressive rendering
 """
 
+import asyncio
 import json
 import logging
-from typing import AsyncGenerator, Dict, Any
+import time
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
 from fastapi import Response
 from fastapi.responses import StreamingResponse
 
+try:
+    from .monitoring import record_time_to_first_token
+except ImportError:  # pragma: no cover - fallback for production image layout
+    from monitoring import record_time_to_first_token  # type: ignore
+
 logger = logging.getLogger(__name__)
 
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"  # Disable nginx buffering
+}
+
 
 class SSEFormatter:
     """Server-Sent Events formatter for streaming responses"""
@@ -35,9 +48,9 @@ class SSEFormatter:
         return f"event: {event_type}\ndata: {json_data}\n\n"
 
     @staticmethod
-    def format_done() -> str:
+    def format_done(data: Optional[Dict[str, Any]] = None) -> str:
         """Format SSE done event"""
-        return "event: done\ndata: {}\n\n"
+        return f"event: done\ndata: {json.dumps(data or {}, ensure_ascii=False)}\n\n"
 
     @staticmethod
     def format_error(error_message: str) -> str:
@@ -54,23 +67,77 @@ class SSEFormatter:
         return f"event: error\ndata: {error_data}\n\n"
 
 
+def default_format_sources(source_nodes) -> List[Dict[str, Any]]:
+    """Summarize retrieved nodes for the ``sources`` event."""
+    sources = []
+    for node in source_nodes or []:
+        sources.append({
+            'text': node.get_text()[:200],
+            'score': float(node.score) if getattr(node, 'score', None) is not None else None,
+            'metadata': node.metadata if hasattr(node, 'metadata') else {}
+        })
+    return sources
+
+
+async def iterate_tokens(response) -> AsyncGenerator[str, None]:
+    """
+    Yield answer tokens from a LlamaIndex streaming response
+
+    Handles async (``async_response_gen``) and sync (``response_gen``, pulled
+    on a worker thread so the event loop is not blocked) streaming responses,
+    and falls back to the full text for non-streaming responses.
+    """
+    if hasattr(response, "async_response_gen"):
+        async for token in response.async_response_gen():
+            yield token
+        return
+
+    generator = getattr(response, "response_gen", None)
+    if generator is not None:
+        finished = object()
+        while True:
+            token = await asyncio.to_thread(next, generator, finished)
+            if token is finished:
+                return
+            yield token
+
+    text = str(response)
+    if text:
+        yield text
+
+
 async def stream_rag_response(
     query: str,
     query_engine,
-    semantic_cache=None
+    semantic_cache=None,
+    retrieve: Optional[Callable[[str], Awaitable[List[Any]]]] = None,
+    synthesize: Optional[Callable[[List[Any]], Awaitable[Any]]] = None,
+    format_sources: Callable[[Any], List[Dict[str, Any]]] = default_format_sources,
+    on_complete: Optional[Callable[[str, Any], Awaitable[None]]] = None,
 ) -> AsyncGenerator[str, None]:
     """
     Stream RAG query response as Server-Sent Events
 
+    ``query_engine`` should be built with ``streaming=True``: ``aquery`` then
+    returns as soon as retrieval is done, so sources are sent before the first
+    token, and tokens are forwarded as the LLM produces them. With ``retrieve``
+    and ``synthesize`` the two phases run separately, and sources are sent
+    before ``synthesize`` is awaited (e.g. before waiting for a GPU slot).
+
     Args:
         query: User query
-        query_engine: LlamaIndex query engine
+        query_engine: LlamaIndex query engine (streaming mode)
         semantic_cache: Optional semantic cache instance
+        retrieve: Coroutine returning the retrieved nodes for the query
+        synthesize: Coroutine turning those nodes into a streaming response
+        format_sources: Converts retrieved nodes into the ``sources`` payload
+        on_complete: Awaited with (answer, streaming response) once the answer is complete
 
     Yields:
         SSE formatted response chunks
     """
     formatter = SSEFormatter()
+    started = time.perf_counter()
 
     try:
         # Send initial event
@@ -84,7 +151,6 @@ async def stream_rag_response(
             cached_response = await semantic_cache.get(query)
 
             if cached_response:
-                # Stream cached response immediately
                 yield formatter.format_event(
                     {
                         "status": "cache_hit",
@@ -92,29 +158,8 @@ async def stream_rag_response(
                     },
                     event_type="cache"
                 )
-
-                # Stream answer in chunks for progressive rendering
-                answer_chunks = cached_response['answer'].split('. ')
-                for i, chunk in enumerate(answer_chunks):
-                    if chunk.strip():
-                        yield formatter.format_event(
-                            {
-                                "chunk": chunk + ('. ' if i < len(answer_chunks) - 1 else ''),
-                                "index": i
-                            },
-                            event_type="chunk"
-                        )
-
-                # Send sources
-                yield formatter.format_event(
-                    {
-                        "sources": cached_response['sources'],
-                        "cached": True
-                    },
-                    event_type="sources"
-                )
-
-                yield formatter.format_done()
+                async for event in stream_cached_response(cached_response['answer'], cached_response['sources']):
+                    yield event
                 return
 
         # No cache hit - query RAG system
@@ -123,53 +168,76 @@ async def stream_rag_response(
             event_type="status"
         )
 
-        # Execute RAG query (streaming mode if supported)
-        response = await query_engine.aquery(query)
-
-        # Stream answer in chunks
-        answer_text = str(response)
-        answer_chunks = answer_text.split('. ')
-
-        for i, chunk in enumerate(answer_chunks):
-            if chunk.strip():
-                yield formatter.format_event(
-                    {
-                        "chunk": chunk + ('. ' if i < len(answer_chunks) - 1 else ''),
-                        "index": i
-                    },
-                    event_type="chunk"
-                )
-
-        # Extract and send sources
-        sources = []
-        if hasattr(response, 'source_nodes'):
-            for node in response.source_nodes:
-                sources.append({
-                    'text': node.get_text()[:200],
-                    'score': float(node.score) if hasattr(node, 'score') else None,
-                    'metadata': node.metadata if hasattr(node, 'metadata') else {}
-                })
+        if retrieve is not None and synthesize is not None:
+            nodes = await retrieve(query)
+        else:
+            response = await query_engine.aquery(query)
+            nodes = getattr(response, 'source_nodes', None)
 
+        # Retrieval is done: send sources before generation starts
+        sources = format_sources(nodes)
         yield formatter.format_event(
             {"sources": sources, "cached": False},
             event_type="sources"
         )
+        if retrieve is not None and synthesize is not None:
+            response = await synthesize(nodes)
+
+        parts: List[str] = []
+        ttft: Optional[float] = None
+        async for token in iterate_tokens(response):
+            if not token:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - started
+                record_time_to_first_token(ttft)
+            parts.append(token)
+            yield formatter.format_event(
+                {"chunk": token, "index": len(parts) - 1},
+                event_type="chunk"
+            )
+
+        answer_text = "".join(parts)
 
         # Cache the response
+        if on_complete:
+            await on_complete(answer_text, response)
         if semantic_cache:
             await semantic_cache.set(query, answer_text, sources)
 
-        yield formatter.format_done()
+        yield formatter.format_done({
+            "ttft_seconds": round(ttft, 4) if ttft is not None else None,
+            "total_seconds": round(time.perf_counter() - started, 4),
+        })
 
     except Exception as e:
         logger.error(f"Stream error: {e}")
         yield formatter.format_error(str(e))
 
 
+async def stream_cached_response(answer: str, sources: List[Dict[str, Any]]) -> AsyncGenerator[str, None]:
+    """
+    Replay a cached answer using the same event sequence as a live stream
+
+    Args:
+        answer: Cached answer text
+        sources: Cached sources payload
+
+    Yields:
+        SSE formatted response chunks
+    """
+    formatter = SSEFormatter()
+    yield formatter.format_event({"sources": sources, "cached": True}, event_type="sources")
+    if answer:
+        yield formatter.format_event({"chunk": answer, "index": 0}, event_type="chunk")
+    yield formatter.format_done({"cached": True})
+
+
 def create_streaming_response(
     query: str,
     query_engine,
-    semantic_cache=None
+    semantic_cache=None,
+    **kwargs: Any
 ) -> StreamingResponse:
     """
     Create FastAPI StreamingResponse for RAG query
@@ -178,16 +246,13 @@ def create_streaming_response(
         query: User query
         query_engine: LlamaIndex query engine
         semantic_cache: Optional semantic cache instance
+        **kwargs: Passed through to ``stream_rag_response``
 
     Returns:
         StreamingResponse with SSE content
     """
     return StreamingResponse(
-        stream_rag_response(query, query_engine, semantic_cache),
+        stream_rag_response(query, query_engine, semantic_cache, **kwargs),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"  # Disable nginx buffering
-        }
+        headers=SSE_HEADERS
     )
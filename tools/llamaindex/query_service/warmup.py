@@ -0,0 +1,123 @@
+"""
+Startup warm-up and readiness tracking.
+
+The first request for a collection otherwise pays for building its
+``QdrantVectorStore``/index and for Ollama loading the embedding model, which
+takes seconds for larger models. Warm-up does both up front: it builds the
+index of every configured collection and sends one dummy embedding per model
+(with ``keep_alive`` so Ollama keeps it resident). ``/ready`` reports the
+state so load balancers only route traffic once warm-up has finished.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupState:
+    """Progress and outcome of the startup warm-up."""
+
+    enabled: bool = False
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    collections: Dict[str, str] = field(default_factory=dict)
+    models: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ready(self) -> bool:
+        return not self.enabled or self.finished_at is not None
+
+    def describe(self) -> Dict[str, Any]:
+        duration = None
+        if self.started_at is not None and self.finished_at is not None:
+            duration = round(self.finished_at - self.started_at, 3)
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "durationSeconds": duration,
+            "collections": dict(self.collections),
+            "models": dict(self.models),
+        }
+
+
+async def preload_ollama_model(
+    base_url: str,
+    model: str,
+    keep_alive: str,
+    timeout: float = 120.0,
+    generate: bool = False,
+) -> None:
+    """
+    Make Ollama load ``model`` and keep it resident for ``keep_alive``.
+
+    Embedding models get a one-word embed; LLMs (``generate=True``) an empty
+    prompt, which loads the model without generating anything.
+    """
+    if generate:
+        endpoint, body = "/api/generate", {"model": model, "prompt": "", "keep_alive": keep_alive}
+    else:
+        endpoint, body = "/api/embed", {"model": model, "input": "warmup", "keep_alive": keep_alive}
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        response = await client.post(endpoint, json=body)
+        response.raise_for_status()
+
+
+async def warm_up(
+    state: WarmupState,
+    collections: Iterable[str],
+    models: Iterable[str],
+    build_index: Callable[[str], Any],
+    preload_model: Callable[[str], Awaitable[None]],
+) -> WarmupState:
+    """
+    Build the index of every collection and preload every model.
+
+    ``build_index`` is synchronous (Qdrant metadata calls) and runs in a
+    worker thread; models load concurrently with it. Failures are recorded
+    per item and never abort the warm-up: a missing collection must not keep
+    the service unready forever.
+    """
+    state.enabled = True
+    state.started_at = time.monotonic()
+    state.collections = {name: "pending" for name in collections}
+    state.models = {name: "pending" for name in models}
+
+    async def warm_collection(name: str) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(build_index, name)
+        except Exception as exc:
+            state.collections[name] = f"error: {getattr(exc, 'detail', None) or exc}"
+            logger.warning("Warm-up of collection %s failed: %s", name, exc)
+        else:
+            state.collections[name] = f"ready ({time.perf_counter() - started:.2f}s)"
+
+    async def warm_model(name: str) -> None:
+        started = time.perf_counter()
+        try:
+            await preload_model(name)
+        except Exception as exc:
+            state.models[name] = f"error: {exc}"
+            logger.warning("Warm-up of model %s failed: %s", name, exc)
+        else:
+            state.models[name] = f"loaded ({time.perf_counter() - started:.2f}s)"
+
+    async def warm_collections() -> None:
+        # Sequential: index construction is cheap once Qdrant answers, and
+        # parallel metadata calls would only compete with each other.
+        for name in list(state.collections):
+            await warm_collection(name)
+
+    await asyncio.gather(warm_collections(), *(warm_model(name) for name in list(state.models)))
+    state.finished_at = time.monotonic()
+    logger.info("Warm-up finished in %.2fs: %s", state.finished_at - state.started_at, state.describe())
+    return state
@@ -5,18 +5,187 @@ OPT-007: Semantic Query Caching
 - Expected: ~4950ms latency reduction (5000ms -> 50ms for cached queries)
 - Similarity-based caching using sentence embeddings
 - Redis-backed with sentence-transformers for similarity matching
+
+Lookups never scan Redis: cached query embeddings are mirrored in a local,
+L2-normalized float32 matrix and the best match is found with one
+matrix-vector product (or an HNSW index once the cache is large and hnswlib is
+installed). Redis stays the source of truth; a sorted set of key -> expiry
+timestamp keeps the local index in step with TTL expiry and with entries
+written by other replicas.
 """
 
 import json
 import logging
 import hashlib
-from typing import Optional, Dict, Any, List
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import redis
 
+try:  # Optional: approximate nearest neighbour search for large caches
+    import hnswlib
+except ImportError:  # pragma: no cover - exact search is used instead
+    hnswlib = None
+
 logger = logging.getLogger(__name__)
 
+# Sorted set of cache key -> expiry (unix seconds). Deliberately outside the
+# "semantic:*" namespace so pattern invalidation never touches it.
+EXPIRY_INDEX_KEY = "semantic-index:expiry"
+
+
+class QueryVectorIndex:
+    """
+    In-memory top-1 cosine index over normalized query embeddings.
+
+    Rows live in one contiguous matrix that grows by doubling; removals swap
+    the last row into the hole so the live rows stay packed.
+    """
+
+    def __init__(self, ann_threshold: int = 20000, initial_capacity: int = 1024):
+        self.ann_threshold = ann_threshold
+        self.initial_capacity = initial_capacity
+        self.dim: Optional[int] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # Stable integer labels for the ANN index (rows move on removal)
+        self._labels: Dict[str, int] = {}
+        self._label_keys: Dict[int, str] = {}
+        self._next_label = 0
+        self._ann = None
+        self._ann_deleted = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._keys)
+
+    @property
+    def uses_ann(self) -> bool:
+        return hnswlib is not None and len(self._keys) >= self.ann_threshold
+
+    def _normalize(self, vector) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if self.dim is not None and array.shape[0] != self.dim:
+            raise ValueError(f"Expected a {self.dim}-dimensional vector, got {array.shape[0]}")
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm > 0 else array
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if self._matrix is None:
+            capacity = max(self.initial_capacity, rows)
+            self._matrix = np.empty((capacity, self.dim), dtype=np.float32)
+        elif rows > self._matrix.shape[0]:
+            grown = np.empty((max(rows, self._matrix.shape[0] * 2), self.dim), dtype=np.float32)
+            grown[:len(self._keys)] = self._matrix[:len(self._keys)]
+            self._matrix = grown
+
+    def _build_ann(self) -> None:
+        count = len(self._keys)
+        index = hnswlib.Index(space="ip", dim=self.dim)
+        index.init_index(max_elements=max(count * 2, self.initial_capacity), ef_construction=200, M=16)
+        labels = np.array([self._labels[key] for key in self._keys], dtype=np.int64)
+        index.add_items(self._matrix[:count], labels)
+        index.set_ef(64)
+        self._ann = index
+        self._ann_deleted = 0
+
+    def _ann_add(self, label: int, vector: np.ndarray) -> None:
+        if self._ann is None:
+            return
+        if self._ann.get_current_count() >= self._ann.get_max_elements():
+            self._ann.resize_index(self._ann.get_max_elements() * 2)
+        self._ann.add_items(vector[None, :], np.array([label], dtype=np.int64))
+
+    def _ann_remove(self, label: int) -> None:
+        if self._ann is None:
+            return
+        self._ann.mark_deleted(label)
+        self._ann_deleted += 1
+        if self._ann_deleted > len(self._keys):
+            # Mostly tombstones: rebuild from the matrix on the next search.
+            self._ann = None
+
+    def add(self, key: str, vector) -> None:
+        """Insert or replace the embedding stored for ``key``."""
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(np.asarray(vector).reshape(-1).shape[0])
+            normalized = self._normalize(vector)
+
+            row = self._rows.get(key)
+            if row is None:
+                row = len(self._keys)
+                self._ensure_capacity(row + 1)
+                self._keys.append(key)
+                self._rows[key] = row
+            else:
+                old_label = self._labels.pop(key)
+                self._label_keys.pop(old_label, None)
+                self._ann_remove(old_label)
+            self._matrix[row] = normalized
+
+            label = self._next_label
+            self._next_label += 1
+            self._labels[key] = label
+            self._label_keys[label] = key
+            self._ann_add(label, normalized)
+
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            row = self._rows.pop(key, None)
+            if row is None:
+                return False
+            last = len(self._keys) - 1
+            if row != last:
+                moved = self._keys[last]
+                self._matrix[row] = self._matrix[last]
+                self._keys[row] = moved
+                self._rows[moved] = row
+            self._keys.pop()
+            label = self._labels.pop(key)
+            self._label_keys.pop(label, None)
+            self._ann_remove(label)
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+            self._rows.clear()
+            self._labels.clear()
+            self._label_keys.clear()
+            self._ann = None
+            self._ann_deleted = 0
+
+    def search(self, vector) -> Optional[Tuple[str, float]]:
+        """Return ``(key, cosine similarity)`` of the closest entry, or None when empty."""
+        with self._lock:
+            count = len(self._keys)
+            if count == 0:
+                return None
+            query = self._normalize(vector)
+
+            if self.uses_ann:
+                if self._ann is None:
+                    self._build_ann()
+                labels, distances = self._ann.knn_query(query[None, :], k=1)
+                key = self._label_keys.get(int(labels[0][0]))
+                if key is not None:
+                    # hnswlib "ip" distance is 1 - inner product
+                    return key, float(1.0 - distances[0][0])
+
+            scores = self._matrix[:count] @ query
+            best = int(np.argmax(scores))
+            return self._keys[best], float(scores[best])
+
 
 class SemanticCache:
     """
@@ -30,7 +199,12 @@ class SemanticCache:
         redis_db: int = 2,
         embedding_model: str = "all-MiniLM-L6-v2",
         similarity_threshold: float = 0.95,
-        ttl: int = 3600
+        ttl: int = 3600,
+        ann_threshold: int = 20000,
+        sync_interval: float = 1.0,
+        full_sync_interval: float = 60.0,
+        client: Optional[redis.Redis] = None,
+        encoder: Optional[Any] = None,
     ):
         """
         Initialize semantic cache
@@ -42,17 +216,33 @@ class SemanticCache:
             embedding_model: Sentence transformer model name
             similarity_threshold: Minimum similarity for cache hit (0.0-1.0)
             ttl: Cache TTL in seconds (default: 1 hour)
+            ann_threshold: Entry count above which the HNSW index is used (needs hnswlib)
+            sync_interval: Seconds between incremental syncs with the Redis expiry index
+            full_sync_interval: Seconds between full reconciliations with Redis
+            client: Pre-built Redis client (overrides host/port/db)
+            encoder: Pre-built encoder with an ``encode`` method (overrides embedding_model)
         """
-        self.redis = redis.Redis(
+        self.redis = client or redis.Redis(
             host=redis_host,
             port=redis_port,
             db=redis_db,
             decode_responses=False  # Keep binary for numpy arrays
         )
 
-        self.encoder = SentenceTransformer(embedding_model)
+        if encoder is None:
+            from sentence_transformers import SentenceTransformer
+            encoder = SentenceTransformer(embedding_model)
+        self.encoder = encoder
         self.similarity_threshold = similarity_threshold
         self.ttl = ttl
+        self.sync_interval = sync_interval
+        self.full_sync_interval = full_sync_interval
+
+        self.index = QueryVectorIndex(ann_threshold=ann_threshold)
+        self._synced_until = float("-inf")
+        self._last_sync = 0.0
+        self._last_full_sync = 0.0
+        self._sync_lock = threading.Lock()
 
         logger.info(
             f"Semantic cache initialized with {embedding_model}, "
@@ -98,6 +288,66 @@ class SemanticCache:
         """
         return f"semantic:{hashlib.md5(query.encode()).hexdigest()}"
 
+    @staticmethod
+    def _decode(key) -> str:
+        return key.decode("utf-8") if isinstance(key, bytes) else key
+
+    def _load_embeddings(self, keys: List[str]) -> int:
+        """Fetch embeddings for ``keys`` from Redis into the local index."""
+        if not keys:
+            return 0
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hget(key, 'embedding')
+        loaded = 0
+        for key, raw in zip(keys, pipe.execute()):
+            if raw:
+                self.index.add(key, np.frombuffer(raw, dtype=np.float32))
+                loaded += 1
+        return loaded
+
+    def sync(self, force: bool = False) -> None:
+        """
+        Bring the local index in line with Redis.
+
+        Incremental syncs drop entries whose expiry has passed and load entries
+        added since the last sync; a periodic full sync also catches entries
+        deleted or expired behind our back.
+        """
+        now = time.time()
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return  # Another caller is already syncing
+        try:
+            self._last_sync = now
+
+            if force or now - self._last_full_sync >= self.full_sync_interval:
+                members = self.redis.zrangebyscore(EXPIRY_INDEX_KEY, now, "+inf", withscores=True)
+                live = {self._decode(key): score for key, score in members}
+                for key in self.index.keys():
+                    if key not in live:
+                        self.index.remove(key)
+                self._load_embeddings([key for key in live if key not in self.index])
+                self._synced_until = max(live.values(), default=self._synced_until)
+                self._last_full_sync = now
+            else:
+                for key in self.redis.zrangebyscore(EXPIRY_INDEX_KEY, "-inf", now):
+                    self.index.remove(self._decode(key))
+                # With a shared TTL, expiry order is insertion order: anything
+                # expiring after the newest entry we have seen is new.
+                since = f"({self._synced_until}" if self._synced_until > now else now
+                added = self.redis.zrangebyscore(EXPIRY_INDEX_KEY, since, "+inf", withscores=True)
+                if added:
+                    self._load_embeddings(
+                        [key for key in (self._decode(key) for key, _ in added) if key not in self.index]
+                    )
+                    self._synced_until = max(self._synced_until, max(score for _, score in added))
+
+            self.redis.zremrangebyscore(EXPIRY_INDEX_KEY, "-inf", now)
+        finally:
+            self._sync_lock.release()
+
     async def get(self, query: str) -> Optional[Dict[str, Any]]:
         """
         Get cached response for semantically similar query
@@ -110,41 +360,24 @@ class SemanticCache:
         """
         try:
             query_embedding = self._encode_query(query)
+            self.sync()
 
-            # Get all semantic cache keys
-            cache_keys = self.redis.keys("semantic:*")
-
-            if not cache_keys:
+            match = self.index.search(query_embedding)
+            if match is None:
                 logger.debug("No cached queries found")
                 return None
 
-            # Find most similar cached query
-            max_similarity = 0.0
-            best_match_key = None
-
-            for key in cache_keys:
-                cached_data = self.redis.hgetall(key)
-
-                if not cached_data or b'embedding' not in cached_data:
-                    continue
-
-                # Deserialize cached embedding
-                cached_embedding = np.frombuffer(
-                    cached_data[b'embedding'],
-                    dtype=np.float32
-                )
-
-                # Compute similarity
-                similarity = self._compute_similarity(query_embedding, cached_embedding)
-
-                if similarity > max_similarity:
-                    max_similarity = similarity
-                    best_match_key = key
+            best_match_key, max_similarity = match
 
             # Check if best match exceeds threshold
             if max_similarity >= self.similarity_threshold:
                 cached_data = self.redis.hgetall(best_match_key)
 
+                if not cached_data or b'answer' not in cached_data:
+                    # Expired in Redis since the last sync
+                    self.index.remove(best_match_key)
+                    return None
+
                 result = {
                     'answer': cached_data[b'answer'].decode('utf-8'),
                     'sources': json.loads(cached_data[b'sources'].decode('utf-8')),
@@ -189,11 +422,12 @@ class SemanticCache:
             True if cached successfully
         """
         try:
-            query_embedding = self._encode_query(query)
+            query_embedding = np.asarray(self._encode_query(query), dtype=np.float32)
             cache_key = self._generate_cache_key(query)
 
-            # Store as Redis hash with TTL
-            self.redis.hset(
+            # Store as Redis hash with TTL, and register its expiry in the index
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(
                 cache_key,
                 mapping={
                     'query': query,
@@ -203,8 +437,11 @@ class SemanticCache:
                     'similarity_threshold': str(self.similarity_threshold)
                 }
             )
+            pipe.expire(cache_key, self.ttl)
+            pipe.zadd(EXPIRY_INDEX_KEY, {cache_key: time.time() + self.ttl})
+            pipe.execute()
 
-            self.redis.expire(cache_key, self.ttl)
+            self.index.add(cache_key, query_embedding)
 
             logger.info(f"Cached query: {query[:50]}...")
 
@@ -225,19 +462,33 @@ class SemanticCache:
             Number of keys deleted
         """
         try:
-            keys = self.redis.keys(pattern)
-
-            if keys:
-                deleted = self.redis.delete(*keys)
+            deleted = 0
+            batch: List[bytes] = []
+            for key in self.redis.scan_iter(match=pattern, count=1000):
+                batch.append(key)
+                if len(batch) >= 1000:
+                    deleted += self._delete_keys(batch)
+                    batch = []
+            if batch:
+                deleted += self._delete_keys(batch)
+
+            if deleted:
                 logger.info(f"Invalidated {deleted} semantic cache entries")
-                return deleted
-
-            return 0
+            return deleted
 
         except Exception as e:
             logger.error(f"Semantic cache invalidation error: {e}")
             return 0
 
+    def _delete_keys(self, keys: List[bytes]) -> int:
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.delete(*keys)
+        pipe.zrem(EXPIRY_INDEX_KEY, *keys)
+        deleted = pipe.execute()[0]
+        for key in keys:
+            self.index.remove(self._decode(key))
+        return deleted
+
     def get_stats(self) -> Dict[str, Any]:
         """
         Get semantic cache statistics
@@ -246,10 +497,10 @@ class SemanticCache:
             Cache statistics dict
         """
         try:
-            keys = self.redis.keys("semantic:*")
-
             return {
-                'total_cached_queries': len(keys),
+                'total_cached_queries': self.redis.zcount(EXPIRY_INDEX_KEY, time.time(), "+inf"),
+                'indexed_queries': len(self.index),
+                'search_mode': 'ann' if self.index.uses_ann else 'exact',
                 'similarity_threshold': self.similarity_threshold,
                 'ttl_seconds': self.ttl,
                 'embedding_model': self.encoder.get_sentence_embedding_dimension()
@@ -2,17 +2,27 @@
 
 from .gpu import (
     acquire_gpu_slot,
+    acquire_slot,
     build_gpu_metadata,
+    describe_gpu_lease,
     describe_gpu_policy,
     get_ollama_gpu_options,
     GPU_FORCE_ENABLED,
     GPU_MAX_CONCURRENCY,
     GPU_COOLDOWN_SECONDS,
     GPU_WAIT_LOG_THRESHOLD,
+    EMBEDDING_POOL,
+    SEARCH_POOL,
+    GENERATION_POOL,
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_NORMAL,
 )
 
 __all__ = [
     "acquire_gpu_slot",
+    "acquire_slot",
+    "describe_gpu_lease",
     "describe_gpu_policy",
     "get_ollama_gpu_options",
     "GPU_FORCE_ENABLED",
@@ -20,4 +30,10 @@ __all__ = [
     "GPU_COOLDOWN_SECONDS",
     "GPU_WAIT_LOG_THRESHOLD",
     "build_gpu_metadata",
+    "EMBEDDING_POOL",
+    "SEARCH_POOL",
+    "GENERATION_POOL",
+    "PRIORITY_BULK",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_NORMAL",
 ]
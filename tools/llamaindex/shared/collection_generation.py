@@ -0,0 +1,180 @@
+"""Per-collection data generations shared by the ingestion and query services.
+
+The ingestion service bumps a collection's generation after every run that
+upserted or deleted its points. The query service puts the current generation
+in its response cache keys. Answers cached before a change then stop matching and
+expire on their own, so nothing needs a global flush.
+
+Generations are stored in Qdrant because both services always have it (Redis
+is optional). Every bump inserts a new point with a random id into a small
+bookkeeping collection, ``LLAMAINDEX_GENERATION_COLLECTION``, and a
+collection's generation is the number of its points. Bumps from concurrent
+ingestion workers or replicas therefore never overwrite each other, which a
+read-modify-write counter could.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from qdrant_client.http import models as qmodels
+
+logger = logging.getLogger(__name__)
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        value = float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+GENERATION_COLLECTION = (
+    os.getenv("LLAMAINDEX_GENERATION_COLLECTION", "llamaindex_generations").strip() or "llamaindex_generations"
+)
+GENERATION_REFRESH_SECONDS = _float_env("LLAMAINDEX_GENERATION_REFRESH_SECONDS", 5.0)
+
+COLLECTION_KEY = "collection"
+
+
+def _ensure_generation_collection(client: Any) -> None:
+    if client.collection_exists(GENERATION_COLLECTION):
+        return
+    try:
+        client.create_collection(
+            collection_name=GENERATION_COLLECTION,
+            vectors_config=qmodels.VectorParams(size=1, distance=qmodels.Distance.DOT),
+        )
+        client.create_payload_index(
+            collection_name=GENERATION_COLLECTION,
+            field_name=COLLECTION_KEY,
+            field_schema=qmodels.PayloadSchemaType.KEYWORD,
+        )
+    except Exception:
+        # Another replica may have created it concurrently.
+        if not client.collection_exists(GENERATION_COLLECTION):
+            raise
+
+
+def _count_bumps(client: Any, collection: str) -> int:
+    return client.count(
+        collection_name=GENERATION_COLLECTION,
+        count_filter=qmodels.Filter(
+            must=[qmodels.FieldCondition(key=COLLECTION_KEY, match=qmodels.MatchValue(value=collection))]
+        ),
+        exact=True,
+    ).count
+
+
+def read_generations(client: Any, collections: Iterable[str]) -> Dict[str, int]:
+    """
+    Return the current generation of each collection (0 when never bumped).
+    """
+    names = list(dict.fromkeys(collections))
+    if not names or not client.collection_exists(GENERATION_COLLECTION):
+        return {name: 0 for name in names}
+    return {name: _count_bumps(client, name) for name in names}
+
+
+def bump_generation(client: Any, collection: str) -> int:
+    """
+    Increment ``collection``'s generation and return the new value (which
+    includes bumps made concurrently by other writers).
+    """
+    _ensure_generation_collection(client)
+    client.upsert(
+        collection_name=GENERATION_COLLECTION,
+        points=[
+            qmodels.PointStruct(
+                id=str(uuid.uuid4()),
+                vector=[0.0],
+                payload={COLLECTION_KEY: collection, "bumped_at": time.time()},
+            )
+        ],
+        wait=True,
+    )
+    generation = _count_bumps(client, collection)
+    logger.info("Collection %s is now at generation %s", collection, generation)
+    return generation
+
+
+class GenerationTracker:
+    """
+    Query-side view of collection generations.
+
+    ``track()`` reads a collection's generation synchronously the first time
+    it is served. After that a background task re-reads every tracked
+    collection every ``LLAMAINDEX_GENERATION_REFRESH_SECONDS``, so ``get()``
+    never touches Qdrant on the request path. Cached answers can therefore
+    outlive an ingestion by at most one refresh interval. Listeners registered
+    with ``subscribe()`` are called with ``(collection, generation)`` when
+    the refresh sees a generation change.
+    """
+
+    def __init__(self, client: Any, interval: float = GENERATION_REFRESH_SECONDS):
+        self.client = client
+        self.interval = interval
+        self._generations: Dict[str, int] = {}
+        self._listeners: List[Callable[[str, int], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def track(self, collection: str) -> int:
+        if collection not in self._generations:
+            try:
+                self._generations.update(read_generations(self.client, [collection]))
+            except Exception as exc:
+                # Keep it tracked; the background refresh picks up the real value.
+                logger.warning("Unable to read generation of %s: %s", collection, exc)
+                self._generations[collection] = 0
+        return self._generations[collection]
+
+    def subscribe(self, listener: Callable[[str, int], None]) -> None:
+        self._listeners.append(listener)
+
+    def __contains__(self, collection: str) -> bool:
+        return collection in self._generations
+
+    def get(self, collection: str) -> int:
+        return self._generations.get(collection, 0)
+
+    def describe(self) -> Dict[str, int]:
+        return dict(self._generations)
+
+    def refresh(self) -> Dict[str, int]:
+        if self._generations:
+            self._generations.update(read_generations(self.client, list(self._generations)))
+        return self.describe()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            before = self.describe()
+            try:
+                current = await asyncio.to_thread(self.refresh)
+            except Exception as exc:
+                logger.warning("Generation refresh failed: %s", exc)
+                continue
+            for name, generation in current.items():
+                if name in before and before[name] != generation:
+                    for listener in self._listeners:
+                        listener(name, generation)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -7,8 +7,30 @@ import logging
 import os
 import time
 from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from typing import Any, Dict, Iterator, Mapping, Optional
 
+from prometheus_client import Histogram
+
+try:
+    from .gpu_lease import (
+        CrossProcessLease,
+        Lease,
+        PRIORITY_BULK,
+        PRIORITY_INTERACTIVE,
+        PRIORITY_NORMAL,
+        lease_supported,
+    )
+except ImportError:  # pragma: no cover - imported as a top-level module
+    from gpu_lease import (  # type: ignore
+        CrossProcessLease,
+        Lease,
+        PRIORITY_BULK,
+        PRIORITY_INTERACTIVE,
+        PRIORITY_NORMAL,
+        lease_supported,
+    )
+
 logger = logging.getLogger("llamaindex.gpu")
 
 _FALSE_VALUES = {"0", "false", "off", "no", "n", ""}
@@ -97,16 +119,98 @@ GPU_WAIT_LOG_THRESHOLD: float = max(
 )
 
 _LOCK_PATH = os.getenv("LLAMAINDEX_GPU_LOCK_PATH", "/tmp/llamaindex-gpu.lock")
+# Only waiters that are not next in line poll the queue; the next one blocks in
+# flock() and is woken by the kernel as soon as the holder releases.
 _LOCK_POLL_SECONDS = max(
-    0.05,
-    _env_float("LLAMAINDEX_GPU_LOCK_POLL_SECONDS", 0.25),
+    0.01,
+    _env_float("LLAMAINDEX_GPU_LOCK_POLL_SECONDS", 0.05),
+)
+_LOCK_STALE_SECONDS = max(
+    1.0,
+    _env_float("LLAMAINDEX_GPU_LOCK_STALE_SECONDS", 30.0),
 )
 _USE_FILE_LOCK = (
     _env_bool("LLAMAINDEX_GPU_USE_FILE_LOCK", True)
     and GPU_MAX_CONCURRENCY == 1
+    and lease_supported()
+)
+_LEASE = CrossProcessLease(
+    _LOCK_PATH,
+    poll_seconds=_LOCK_POLL_SECONDS,
+    heartbeat_seconds=min(5.0, _LOCK_STALE_SECONDS / 3),
+    stale_after_seconds=_LOCK_STALE_SECONDS,
 )
 
-_semaphore = asyncio.Semaphore(GPU_MAX_CONCURRENCY)
+
+# Concurrency pools. Generation (and bulk ingestion) keeps the original GPU
+# policy: GPU_MAX_CONCURRENCY slots, the inter-process lock and the cooldown.
+# Query embeddings get their own slots so short embedding calls do not queue
+# behind multi-second generations, and Qdrant-only work uses a pool that never
+# touches the GPU lock.
+EMBEDDING_POOL = "embedding"
+SEARCH_POOL = "search"
+GENERATION_POOL = "generation"
+
+POOL_WAIT_SECONDS = Histogram(
+    "llamaindex_pool_wait_seconds",
+    "Time spent waiting for a concurrency pool slot",
+    ["pool", "operation"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+POOL_HOLD_SECONDS = Histogram(
+    "llamaindex_pool_hold_seconds",
+    "Time a concurrency pool slot was held",
+    ["pool", "operation"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+
+@dataclass
+class ConcurrencyPool:
+    """A named semaphore with its own limit and GPU policy."""
+
+    name: str
+    max_concurrency: int
+    uses_gpu_lock: bool = False
+    cooldown_seconds: float = 0.0
+    semaphore: asyncio.Semaphore = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "uses_gpu_lock": self.uses_gpu_lock and _USE_FILE_LOCK,
+            "cooldown_seconds": self.cooldown_seconds,
+        }
+
+
+_POOLS: Dict[str, ConcurrencyPool] = {
+    EMBEDDING_POOL: ConcurrencyPool(
+        EMBEDDING_POOL,
+        max(1, _env_int("LLAMAINDEX_EMBEDDING_MAX_CONCURRENCY", max(GPU_MAX_CONCURRENCY, 4))),
+        uses_gpu_lock=_env_bool("LLAMAINDEX_EMBEDDING_USE_GPU_LOCK", False),
+    ),
+    SEARCH_POOL: ConcurrencyPool(
+        SEARCH_POOL,
+        max(1, _env_int("LLAMAINDEX_SEARCH_MAX_CONCURRENCY", 32)),
+    ),
+    GENERATION_POOL: ConcurrencyPool(
+        GENERATION_POOL,
+        max(1, _env_int("LLAMAINDEX_GENERATION_MAX_CONCURRENCY", GPU_MAX_CONCURRENCY)),
+        uses_gpu_lock=True,
+        cooldown_seconds=GPU_COOLDOWN_SECONDS,
+    ),
+}
+
+
+def get_pool(name: str) -> ConcurrencyPool:
+    """Return the named concurrency pool."""
+    try:
+        return _POOLS[name]
+    except KeyError:
+        raise ValueError(f"Unknown concurrency pool '{name}'. Known pools: {sorted(_POOLS)}") from None
 
 
 def get_ollama_gpu_options() -> Dict[str, Any]:
@@ -125,6 +229,13 @@ def describe_gpu_policy() -> Mapping[str, Any]:
         "interprocess_lock_enabled": _USE_FILE_LOCK,
         "lock_path": _LOCK_PATH if _USE_FILE_LOCK else None,
         "lock_poll_seconds": _LOCK_POLL_SECONDS if _USE_FILE_LOCK else None,
+        "lock_stale_seconds": _LOCK_STALE_SECONDS if _USE_FILE_LOCK else None,
+        "lock_priorities": {
+            "interactive": PRIORITY_INTERACTIVE,
+            "normal": PRIORITY_NORMAL,
+            "bulk": PRIORITY_BULK,
+        },
+        "pools": {name: pool.describe() for name, pool in _POOLS.items()},
     }
 
 
@@ -132,6 +243,7 @@ def build_gpu_metadata(
     wait_time: float,
     operation: str | None = None,
     lock_owner: Optional[str] = None,
+    lock_priority: Optional[int] = None,
 ) -> Dict[str, Any]:
     """Create a structured metadata payload about GPU usage for API responses."""
     metadata: Dict[str, Any] = {
@@ -148,80 +260,96 @@ def build_gpu_metadata(
         "path": _LOCK_PATH if _USE_FILE_LOCK else None,
         "pollSeconds": _LOCK_POLL_SECONDS if _USE_FILE_LOCK else None,
         "owner": lock_owner,
+        "priority": lock_priority,
     }
     return metadata
 
 
-async def _acquire_file_lock(operation: str) -> Optional[str]:
+async def _acquire_file_lock(operation: str, priority: int) -> Optional[Lease]:
     if not _USE_FILE_LOCK:
         return None
+    return await _LEASE.acquire(operation, priority)
 
-    owner_id = f"{os.getpid()}-{time.time():.6f}-{operation}"
-    attempts = 0
-    while True:
-        try:
-            os.mkdir(_LOCK_PATH)
-            owner_file = os.path.join(_LOCK_PATH, "owner")
-            with open(owner_file, "w", encoding="utf-8") as handle:
-                handle.write(owner_id)
-            if attempts:
-                logger.info("GPU lock acquired for %s after %s attempts.", operation, attempts)
-            return owner_id
-        except FileExistsError:
-            attempts += 1
-            await asyncio.sleep(_LOCK_POLL_SECONDS)
-        except Exception as exc:  # pragma: no cover - unexpected filesystem errors
-            logger.warning("Failed to acquire GPU lock (%s): %s", operation, exc)
-            await asyncio.sleep(_LOCK_POLL_SECONDS)
-
-
-def _release_file_lock(owner_id: Optional[str]) -> None:
-    if not owner_id or not _USE_FILE_LOCK:
-        return
-
-    owner_file = os.path.join(_LOCK_PATH, "owner")
-    try:
-        try:
-            os.remove(owner_file)
-        except FileNotFoundError:
-            pass
-        os.rmdir(_LOCK_PATH)
-    except FileNotFoundError:
-        pass
-    except OSError as exc:
-        logger.debug("Ignoring GPU lock release error: %s", exc)
+
+def _release_file_lock(lease: Optional[Lease]) -> None:
+    if lease is not None:
+        _LEASE.release(lease)
+
+
+def describe_gpu_lease() -> Dict[str, Any]:
+    """Report the current cross-process lease holder and queue depth."""
+    if not _USE_FILE_LOCK:
+        return {"enabled": False}
+    return {"enabled": True, "path": _LEASE.lease_path, **_LEASE.describe()}
 
 
 @asynccontextmanager
-async def acquire_gpu_slot(operation: str = "task") -> Iterator[Dict[str, Any]]:
+async def acquire_slot(
+    pool: str,
+    operation: str = "task",
+    priority: int = PRIORITY_NORMAL,
+) -> Iterator[Dict[str, Any]]:
     """
-    Serialize GPU workloads with an async semaphore.
+    Hold one slot of the named concurrency pool.
 
-    Yields a dict containing timing data that callers can log or attach to responses.
+    Pools that use the GPU lock also take the inter-process lease and apply the
+    cooldown on release. ``priority`` orders waiters for that lease across
+    processes (lower goes first, FIFO within a priority). Yields a dict containing timing data that callers can
+    log or attach to responses.
     """
+    selected = get_pool(pool)
     start = time.perf_counter()
-    await _semaphore.acquire()
+    await selected.semaphore.acquire()
+    try:
+        lease = await _acquire_file_lock(operation, priority) if selected.uses_gpu_lock else None
+    except BaseException:
+        selected.semaphore.release()
+        raise
     wait_time = time.perf_counter() - start
+    POOL_WAIT_SECONDS.labels(pool=selected.name, operation=operation).observe(wait_time)
 
     if wait_time >= GPU_WAIT_LOG_THRESHOLD:
         logger.info(
-            "GPU slot acquired for %s after %.2fs wait (max=%s).",
+            "%s slot acquired for %s after %.2fs wait (max=%s).",
+            selected.name,
             operation,
             wait_time,
-            GPU_MAX_CONCURRENCY,
+            selected.max_concurrency,
         )
 
-    lock_owner = await _acquire_file_lock(operation)
-
+    held_from = time.perf_counter()
     try:
         yield {
             "wait_time_seconds": wait_time,
             "operation": operation,
-            "max_concurrency": GPU_MAX_CONCURRENCY,
-            "lock_owner": lock_owner,
+            "pool": selected.name,
+            "max_concurrency": selected.max_concurrency,
+            "lock_owner": lease.owner if lease else None,
+            "lock_priority": priority if lease else None,
         }
     finally:
-        _release_file_lock(lock_owner)
-        if GPU_COOLDOWN_SECONDS > 0:
-            await asyncio.sleep(GPU_COOLDOWN_SECONDS)
-        _semaphore.release()
+        POOL_HOLD_SECONDS.labels(pool=selected.name, operation=operation).observe(
+            time.perf_counter() - held_from
+        )
+        _release_file_lock(lease)
+        if selected.cooldown_seconds > 0:
+            await asyncio.sleep(selected.cooldown_seconds)
+        selected.semaphore.release()
+
+
+@asynccontextmanager
+async def acquire_gpu_slot(
+    operation: str = "task",
+    pool: str = GENERATION_POOL,
+    priority: int = PRIORITY_NORMAL,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Serialize GPU workloads with an async semaphore.
+
+    Defaults to the generation pool, which also covers bulk ingestion; pass
+    ``PRIORITY_INTERACTIVE`` for user-facing work and ``PRIORITY_BULK`` for
+    ingestion. Yields a dict containing timing data that callers can log or
+    attach to responses.
+    """
+    async with acquire_slot(pool, operation, priority) as usage:
+        yield usage
@@ -0,0 +1,288 @@
+"""Cross-process GPU lease shared by the LlamaIndex services.
+
+The lease itself is an exclusive ``flock(2)`` on ``<lock_path>.lease``. The
+kernel drops it when the holder exits, so a crashed process can no longer
+wedge both services. The blocking ``flock`` call runs on a worker thread, so
+the holder hands over without any polling delay.
+
+Ordering is decided by a queue directory (``<lock_path>.queue``) with one
+ticket file per waiter, named ``priority-sequence-pid-token-host``. Only the
+first ticket (lowest priority value, then arrival order) tries to take the
+lock, which gives FIFO order within a priority and lets interactive queries
+overtake bulk ingestion. Tickets whose process is gone (same host) or whose
+heartbeat stopped are removed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = logging.getLogger("llamaindex.gpu")
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 10
+PRIORITY_BULK = 20
+
+_HOST = socket.gethostname().replace("-", "_") or "localhost"
+
+
+def lease_supported() -> bool:
+    return fcntl is not None
+
+
+def pid_alive(pid: int) -> bool:
+    """Return True when ``pid`` exists in this PID namespace."""
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _close_quietly(fd: int) -> None:
+    try:
+        os.close(fd)
+    except OSError:
+        pass
+
+
+@dataclass(frozen=True, order=True)
+class Ticket:
+    priority: int
+    sequence: int
+    pid: int
+    token: str
+    host: str = _HOST
+
+    @property
+    def name(self) -> str:
+        return f"{self.priority:03d}-{self.sequence:020d}-{self.pid}-{self.token}-{self.host}"
+
+    @classmethod
+    def parse(cls, name: str) -> Optional["Ticket"]:
+        parts = name.split("-", 4)
+        if len(parts) != 5:
+            return None
+        try:
+            return cls(int(parts[0]), int(parts[1]), int(parts[2]), parts[3], parts[4])
+        except ValueError:
+            return None
+
+
+@dataclass
+class Lease:
+    """A held lease; pass it back to ``CrossProcessLease.release``."""
+
+    fd: int
+    owner: str
+    priority: int
+    acquired_at: float
+
+
+class CrossProcessLease:
+    """Exclusive, priority-ordered lease shared between processes on one host."""
+
+    def __init__(
+        self,
+        lock_path: str,
+        poll_seconds: float = 0.05,
+        heartbeat_seconds: float = 5.0,
+        stale_after_seconds: float = 30.0,
+    ):
+        self.lock_path = lock_path
+        self.lease_path = f"{lock_path}.lease"
+        self.queue_dir = f"{lock_path}.queue"
+        self.poll_seconds = poll_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_after_seconds = max(stale_after_seconds, heartbeat_seconds * 3)
+        self._prepared = False
+
+    # ------------------------------------------------------------------
+    # Queue bookkeeping
+    # ------------------------------------------------------------------
+    def _prepare(self) -> None:
+        if self._prepared:
+            return
+        self._remove_legacy_lock_dir()
+        os.makedirs(self.queue_dir, exist_ok=True)
+        self._prepared = True
+
+    def _remove_legacy_lock_dir(self) -> None:
+        """Clean up a directory left behind by the old mkdir-based lock."""
+        if not os.path.isdir(self.lock_path):
+            return
+        owner_file = os.path.join(self.lock_path, "owner")
+        try:
+            with open(owner_file, encoding="utf-8") as handle:
+                owner_pid = int(handle.read().split("-", 1)[0])
+        except (OSError, ValueError):
+            owner_pid = -1
+        if pid_alive(owner_pid):
+            return
+        try:
+            if os.path.exists(owner_file):
+                os.remove(owner_file)
+            os.rmdir(self.lock_path)
+            logger.warning("Removed stale legacy GPU lock directory %s.", self.lock_path)
+        except OSError as exc:
+            logger.debug("Could not remove legacy GPU lock directory: %s", exc)
+
+    def _ticket_path(self, ticket: Ticket) -> str:
+        return os.path.join(self.queue_dir, ticket.name)
+
+    def _enqueue(self, priority: int) -> Ticket:
+        ticket = Ticket(priority, time.time_ns(), os.getpid(), uuid.uuid4().hex)
+        with open(self._ticket_path(ticket), "x", encoding="utf-8"):
+            pass
+        return ticket
+
+    def _dequeue(self, ticket: Ticket) -> None:
+        try:
+            os.unlink(self._ticket_path(ticket))
+        except FileNotFoundError:
+            pass
+
+    def _heartbeat(self, ticket: Ticket) -> None:
+        try:
+            os.utime(self._ticket_path(ticket))
+        except FileNotFoundError:
+            # Removed by someone else (e.g. judged stale): re-register in place.
+            with open(self._ticket_path(ticket), "a", encoding="utf-8"):
+                pass
+
+    def _is_stale(self, ticket: Ticket, now: float) -> bool:
+        if ticket.host == _HOST and not pid_alive(ticket.pid):
+            return True
+        try:
+            return now - os.stat(self._ticket_path(ticket)).st_mtime > self.stale_after_seconds
+        except FileNotFoundError:
+            return True
+
+    def waiting(self) -> List[Ticket]:
+        """Live tickets in service order; stale ones are removed on the way."""
+        now = time.time()
+        tickets = []
+        for name in os.listdir(self.queue_dir):
+            ticket = Ticket.parse(name)
+            if ticket is None:
+                continue
+            if self._is_stale(ticket, now):
+                logger.warning("Removing stale GPU queue ticket %s.", name)
+                self._dequeue(ticket)
+                continue
+            tickets.append(ticket)
+        return sorted(tickets)
+
+    def _is_next(self, ticket: Ticket) -> bool:
+        tickets = self.waiting()
+        if ticket not in tickets:
+            self._heartbeat(ticket)
+            tickets = sorted(tickets + [ticket])
+        return tickets[0] == ticket
+
+    # ------------------------------------------------------------------
+    # Lease
+    # ------------------------------------------------------------------
+    async def acquire(self, operation: str, priority: int = PRIORITY_NORMAL) -> Lease:
+        """Wait for our turn, then take the lease."""
+        self._prepare()
+        ticket = self._enqueue(priority)
+        fd = os.open(self.lease_path, os.O_RDWR | os.O_CREAT, 0o666)
+        pending: Optional[asyncio.Future] = None  # flock() still running on a worker thread
+        last_beat = time.monotonic()
+        try:
+            while True:
+                if time.monotonic() - last_beat >= self.heartbeat_seconds:
+                    self._heartbeat(ticket)
+                    last_beat = time.monotonic()
+                if not self._is_next(ticket):
+                    await asyncio.sleep(self.poll_seconds)
+                    continue
+
+                pending = asyncio.get_running_loop().run_in_executor(None, fcntl.flock, fd, fcntl.LOCK_EX)
+                while not pending.done():
+                    await asyncio.wait({pending}, timeout=self.heartbeat_seconds)
+                    self._heartbeat(ticket)
+                    last_beat = time.monotonic()
+                pending.result()
+                pending = None
+
+                if self._is_next(ticket):
+                    break
+                # A more urgent request queued while we were blocked: let it go first.
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                await asyncio.sleep(self.poll_seconds)
+        except BaseException:
+            self._dequeue(ticket)
+            if pending is not None and not pending.done():
+                # The worker thread is still inside flock(); closing the fd once
+                # it returns drops the lock it may have taken.
+                pending.add_done_callback(lambda _future: _close_quietly(fd))
+            else:
+                _close_quietly(fd)
+            raise
+
+        self._dequeue(ticket)
+        lease = Lease(
+            fd=fd,
+            owner=f"{os.getpid()}-{time.time():.6f}-{operation}",
+            priority=priority,
+            acquired_at=time.time(),
+        )
+        self._write_holder(lease, operation)
+        return lease
+
+    def release(self, lease: Lease) -> None:
+        try:
+            os.ftruncate(lease.fd, 0)
+            fcntl.flock(lease.fd, fcntl.LOCK_UN)
+        except OSError as exc:  # pragma: no cover - closing below releases anyway
+            logger.debug("Ignoring GPU lease release error: %s", exc)
+        finally:
+            _close_quietly(lease.fd)
+
+    def _write_holder(self, lease: Lease, operation: str) -> None:
+        info = {
+            "pid": os.getpid(),
+            "host": _HOST,
+            "operation": operation,
+            "priority": lease.priority,
+            "since": lease.acquired_at,
+        }
+        try:
+            os.ftruncate(lease.fd, 0)
+            os.pwrite(lease.fd, json.dumps(info).encode("utf-8"), 0)
+        except OSError as exc:  # pragma: no cover - diagnostics only
+            logger.debug("Could not record GPU lease holder: %s", exc)
+
+    def describe(self) -> Dict[str, Any]:
+        """Current holder (as last recorded) and queue depth, for diagnostics."""
+        holder: Optional[Dict[str, Any]] = None
+        try:
+            with open(self.lease_path, encoding="utf-8") as handle:
+                content = handle.read().strip()
+            holder = json.loads(content) if content else None
+        except (OSError, ValueError):
+            holder = None
+        try:
+            queued = len(self.waiting()) if os.path.isdir(self.queue_dir) else 0
+        except OSError:
+            queued = 0
+        return {"holder": holder, "queued": queued}
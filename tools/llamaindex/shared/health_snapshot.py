@@ -0,0 +1,90 @@
+"""Cached health probes shared by the ingestion and query services.
+
+Liveness/readiness probes and Prometheus hit ``/health`` several times a
+second per pod. Instead of calling Qdrant on every request, a background task
+runs the (blocking) probe every ``LLAMAINDEX_HEALTH_REFRESH_SECONDS`` and the
+endpoint serves the last result. ``?deep=true`` still runs the live checks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        value = float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+HEALTH_REFRESH_SECONDS = _float_env("LLAMAINDEX_HEALTH_REFRESH_SECONDS", 10.0)
+
+
+class HealthSnapshot:
+    """
+    Periodically refreshed result of a health probe.
+
+    ``probe`` is synchronous (Qdrant client calls) and runs in a worker
+    thread; it returns a JSON-serialisable dict. An exception raised by the
+    probe is stored as ``{"status": "degraded", "error": ...}``.
+    """
+
+    def __init__(self, probe: Callable[[], Dict[str, Any]], interval: float = HEALTH_REFRESH_SECONDS):
+        self.probe = probe
+        self.interval = interval
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> Optional[float]:
+        return None if self._snapshot is None else time.monotonic() - self._checked_at
+
+    async def refresh(self) -> Dict[str, Any]:
+        async with self._lock:
+            try:
+                snapshot = await asyncio.to_thread(self.probe)
+            except Exception as exc:
+                logger.warning("Health probe failed: %s", exc)
+                snapshot = {"status": "degraded", "error": str(exc)}
+            self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+            return snapshot
+
+    async def get(self) -> Dict[str, Any]:
+        """
+        Return the cached snapshot, probing inline only when there is none yet
+        or the refresher has fallen behind (more than two intervals old).
+        """
+        age = self.age
+        if age is None or age > 2 * self.interval:
+            await self.refresh()
+        return {**(self._snapshot or {}), "snapshotAgeSeconds": round(self.age or 0.0, 3)}
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
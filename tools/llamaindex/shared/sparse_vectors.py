@@ -0,0 +1,114 @@
+"""BM25-style sparse vectors shared by ingestion (documents) and query (queries).
+
+Documents are encoded with the BM25 term-frequency component only; the
+collection's sparse vector is created with Qdrant's ``IDF`` modifier so the
+server applies the inverse document frequency at query time and the dot
+product of query and document vectors is the BM25 score.
+
+Tokens are hashed into the 32-bit index space, so the encoder needs no
+vocabulary and both services produce identical indices. Identifiers such as
+``LLAMAINDEX_CHUNK_SIZE``, ``ensure_payload_on_search`` or ``getCollectionInfo``
+are kept as one token *and* split into their parts, so exact identifier
+queries score highest while partial matches still count.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+SPARSE_VECTOR_NAME = os.getenv("LLAMAINDEX_SPARSE_VECTOR_NAME", "text-sparse").strip() or "text-sparse"
+
+_TOKEN_RE = re.compile(r"\w+(?:[.\-/:]\w+)*")
+_PART_SPLIT_RE = re.compile(r"[._\-/:]+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+# Small English/Portuguese list: the docs mix both languages.
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be by for from has have how in is it its of on or that the this to was were what when
+    where which who why will with do does can you your i we our
+    o os as um uma uns umas e de do da dos das em no na nos nas por para com que se ao aos como mais mas ou
+    """.split()
+)
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, ""))
+    except ValueError:
+        return default
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased terms of ``text``, with compound identifiers also split into parts."""
+    tokens: List[str] = []
+    for match in _TOKEN_RE.finditer(text or ""):
+        raw = match.group(0)
+        lowered = raw.lower()
+        parts = [
+            piece.lower()
+            for chunk in _PART_SPLIT_RE.split(raw)
+            for piece in ((_CAMEL_RE.findall(chunk) if chunk.isascii() else None) or [chunk])
+            if piece
+        ]
+        if len(parts) > 1 or parts[0] != lowered:
+            tokens.append(lowered)
+        tokens.extend(part for part in parts if len(part) > 1 and part not in _STOPWORDS)
+    return tokens
+
+
+def _term_index(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8"))
+
+
+class BM25SparseEncoder:
+    """Encode documents and queries as hashed BM25 sparse vectors."""
+
+    def __init__(
+        self,
+        k1: Optional[float] = None,
+        b: Optional[float] = None,
+        avg_doc_length: Optional[float] = None,
+    ):
+        self.k1 = k1 if k1 is not None else _float_env("LLAMAINDEX_BM25_K1", 1.2)
+        self.b = b if b is not None else _float_env("LLAMAINDEX_BM25_B", 0.75)
+        # Corpus statistics are not known up front; chunks are size-bounded, so a
+        # fixed average (in tokens) is a close enough length normalizer.
+        self.avg_doc_length = max(
+            1.0,
+            avg_doc_length if avg_doc_length is not None else _float_env("LLAMAINDEX_BM25_AVG_DOC_LENGTH", 256.0),
+        )
+
+    @staticmethod
+    def _to_sparse(weights: Dict[int, float]) -> Tuple[List[int], List[float]]:
+        indices = sorted(weights)
+        return indices, [weights[idx] for idx in indices]
+
+    def encode_document(self, text: str) -> Tuple[List[int], List[float]]:
+        tokens = tokenize(text)
+        if not tokens:
+            return [], []
+        norm = self.k1 * (1.0 - self.b + self.b * len(tokens) / self.avg_doc_length)
+        weights: Dict[int, float] = {}
+        for term, tf in Counter(tokens).items():
+            idx = _term_index(term)
+            weights[idx] = weights.get(idx, 0.0) + tf * (self.k1 + 1.0) / (tf + norm)
+        return self._to_sparse(weights)
+
+    def encode_query(self, text: str) -> Tuple[List[int], List[float]]:
+        weights: Dict[int, float] = {}
+        for term in set(tokenize(text)):
+            idx = _term_index(term)
+            weights[idx] = weights.get(idx, 0.0) + 1.0
+        return self._to_sparse(weights)
+
+
+def collection_sparse_vector(collection_info: Any, name: str = SPARSE_VECTOR_NAME) -> Optional[str]:
+    """Return ``name`` when the collection (``get_collection`` result) has that sparse vector."""
+    params = getattr(getattr(collection_info, "config", None), "params", None)
+    sparse = getattr(params, "sparse_vectors", None) or {}
+    return name if name in sparse else None
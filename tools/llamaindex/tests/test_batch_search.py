@@ -0,0 +1,55 @@
+"""
+Tests for batched vector search.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from llama_index.core.schema import TextNode
+
+from query_service.batch_search import SubQuery, search_batch
+
+
+class FakeAsyncClient:
+    """Answers each request with the point ids configured for its vector."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+
+    async def query_batch_points(self, collection_name, requests):
+        self.calls.append((collection_name, requests))
+        responses = []
+        for request in requests:
+            key = request.using or "dense"
+            ids = self.answers[(collection_name, key, tuple(getattr(request.query, "indices", request.query)))]
+            responses.append(SimpleNamespace(points=[SimpleNamespace(id=point_id, score=1.0) for point_id in ids]))
+        return responses
+
+
+class FakeVectorStore:
+    def parse_to_query_result(self, points):
+        nodes = [TextNode(id_=point.id, text=point.id) for point in points]
+        return SimpleNamespace(nodes=nodes, similarities=[point.score for point in points])
+
+
+@pytest.mark.asyncio
+async def test_one_batch_request_per_collection_and_results_in_order():
+    """Sub-queries are grouped by collection but returned in request order."""
+    client = FakeAsyncClient({
+        ("docs", "dense", (1.0,)): ["d1", "d2"],
+        ("code", "dense", (2.0,)): ["c1"],
+        ("docs", "dense", (3.0,)): ["d3", "d1"],
+        ("docs", "text-sparse", (7,)): ["d9", "d1"],
+    })
+    sub_queries = [
+        SubQuery("risk limits", "docs", 1, "dense", [1.0]),
+        SubQuery("order router", "code", 5, "dense", [2.0]),
+        SubQuery("LLAMAINDEX_CHUNK_SIZE", "docs", 2, "hybrid", [3.0],
+                 sparse_vector_name="text-sparse", sparse_vector=([7], [1.0])),
+    ]
+
+    results = await search_batch(client, sub_queries, lambda collection: FakeVectorStore())
+
+    assert sorted((name, len(requests)) for name, requests in client.calls) == [("code", 1), ("docs", 3)]
+    assert [[item.node.node_id for item in nodes] for nodes in results] == [["d1"], ["c1"], ["d1", "d3"]]
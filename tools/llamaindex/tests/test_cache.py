@@ -0,0 +1,88 @@
+"""
+Tests for the query service response cache.
+"""
+
+from typing import Any, Dict, Optional
+
+import pytest
+
+from query_service import cache as cache_module
+from query_service.cache import (
+    BaseCache,
+    MemoryCache,
+    TieredCache,
+    build_cache_key,
+    get_cache_client,
+)
+
+
+class DictCache(BaseCache):
+    """Stand-in L2 that counts lookups and can simulate an outage."""
+
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.gets = 0
+        self.fail = False
+
+    async def get(self, key: str) -> Optional[Any]:
+        self.gets += 1
+        if self.fail:
+            return None
+        return self.data.get(key)
+
+    async def set(self, key: str, value: Any, expire: int = 3600) -> bool:
+        self.data[key] = value
+        return True
+
+    async def delete(self, key: str) -> bool:
+        return self.data.pop(key, None) is not None
+
+
+def test_cache_client_is_shared(monkeypatch):
+    """Every request sees the same client, so memory entries survive between calls."""
+    monkeypatch.setenv("CACHE_TYPE", "memory")
+    monkeypatch.setattr(cache_module, "_cache_client", None)
+
+    assert get_cache_client() is get_cache_client()
+
+
+def test_cache_key_covers_request_parameters():
+    """Keys differ when anything that changes the response differs."""
+    base = build_cache_key("query", "docs", "what is rag", max_results=5, embedding_model="nomic")
+
+    assert base == build_cache_key("query", "docs", " what is rag ", max_results=5, embedding_model="nomic")
+    assert base != build_cache_key("query", "docs", "what is rag", max_results=10, embedding_model="nomic")
+    assert base != build_cache_key("query", "docs", "what is rag", max_results=5, embedding_model="mxbai")
+    assert base != build_cache_key(
+        "query", "docs", "what is rag", max_results=5, embedding_model="nomic", filters={"domain": "api"}
+    )
+    assert base.startswith("query:docs:")
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_serves_from_l1():
+    """A value read from L2 is kept locally and later reads skip L2."""
+    l2 = DictCache()
+    l2.data["k"] = {"answer": 42}
+    tiered = TieredCache(MemoryCache(ttl=60, record_metrics=False), l2)
+
+    assert await tiered.get("k") == {"answer": 42}
+    assert await tiered.get("k") == {"answer": 42}
+    assert l2.gets == 1
+
+    await tiered.delete("k")
+    assert await tiered.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_write_through():
+    """Writes land in both tiers; an L2 outage still serves L1 hits."""
+    l2 = DictCache()
+    tiered = TieredCache(MemoryCache(ttl=60, record_metrics=False), l2)
+
+    await tiered.set("k", [1, 2, 3])
+    l2.fail = True
+
+    assert l2.data["k"] == [1, 2, 3]
+    assert await tiered.get("k") == [1, 2, 3]
+    assert l2.gets == 0
@@ -0,0 +1,106 @@
+"""
+Tests for single-flight coalescing of identical requests.
+"""
+
+import asyncio
+
+import pytest
+
+from query_service.cache import MemoryCache
+from query_service.coalescing import SingleFlight
+
+
+class SharedCache(MemoryCache):
+    """Memory cache that behaves like Redis: shared entries and a lock another replica may hold."""
+
+    shared = True
+
+    def __init__(self):
+        super().__init__(record_metrics=False)
+        self.locked = False
+
+    async def acquire_lock(self, key, ttl):
+        if self.locked:
+            return False
+        self.locked = True
+        return True
+
+    async def release_lock(self, key):
+        self.locked = False
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_computation():
+    flight = SingleFlight("query")
+    cache = MemoryCache(record_metrics=False)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        await cache.set("key", {"answer": 42})
+        return {"answer": 42}
+
+    results = await asyncio.gather(*(flight.run("key", compute, cache) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert [value for value, _ in results] == [{"answer": 42}] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+
+
+@pytest.mark.asyncio
+async def test_leader_disconnect_does_not_cancel_followers():
+    flight = SingleFlight("query")
+    cache = MemoryCache(record_metrics=False)
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(flight.run("key", compute, cache))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.run("key", compute, cache))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+
+    assert await follower == ("done", True)
+
+
+@pytest.mark.asyncio
+async def test_waits_for_result_of_another_replica():
+    flight = SingleFlight("query")
+    cache = SharedCache()
+    cache.locked = True  # another replica is generating
+
+    async def other_replica_finishes():
+        await asyncio.sleep(0.02)
+        await cache.set("key", "from-replica")
+        cache.locked = False
+
+    async def compute():
+        raise AssertionError("must not recompute")
+
+    finisher = asyncio.create_task(other_replica_finishes())
+    assert await flight.run("key", compute, cache) == ("from-replica", True)
+    await finisher
+
+
+@pytest.mark.asyncio
+async def test_takes_over_when_the_other_replica_gives_up():
+    flight = SingleFlight("query")
+    cache = SharedCache()
+    cache.locked = True
+
+    async def other_replica_fails():
+        await asyncio.sleep(0.02)
+        cache.locked = False
+
+    async def compute():
+        return "computed"
+
+    failer = asyncio.create_task(other_replica_fails())
+    assert await flight.run("key", compute, cache) == ("computed", False)
+    assert not cache.locked
+    await failer
@@ -0,0 +1,94 @@
+"""
+Tests for per-collection data generations.
+"""
+
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+SHARED_DIR = Path(__file__).resolve().parent.parent / "shared"
+if str(SHARED_DIR) not in sys.path:
+    sys.path.insert(0, str(SHARED_DIR))
+
+from collection_generation import GenerationTracker, bump_generation, read_generations  # type: ignore  # noqa: E402
+
+
+class FakeQdrant:
+    """Just enough of QdrantClient to store points by id and count them by payload."""
+
+    def __init__(self):
+        self.collections = {}
+
+    def collection_exists(self, name):
+        return name in self.collections
+
+    def create_collection(self, collection_name, vectors_config):
+        self.collections[collection_name] = {}
+
+    def create_payload_index(self, collection_name, field_name, field_schema):
+        pass
+
+    def upsert(self, collection_name, points, wait=True):
+        for point in points:
+            self.collections[collection_name][point.id] = point.payload
+
+    def count(self, collection_name, count_filter, exact=True):
+        condition = count_filter.must[0]
+        stored = list(self.collections[collection_name].values())
+        matches = [payload for payload in stored if payload.get(condition.key) == condition.match.value]
+        return SimpleNamespace(count=len(matches))
+
+
+def test_generations_start_at_zero_and_increase_per_collection():
+    client = FakeQdrant()
+    assert read_generations(client, ["docs", "news"]) == {"docs": 0, "news": 0}
+
+    assert bump_generation(client, "docs") == 1
+    assert bump_generation(client, "docs") == 2
+    assert bump_generation(client, "news") == 1
+    assert read_generations(client, ["docs", "news", "other"]) == {"docs": 2, "news": 1, "other": 0}
+
+
+def test_concurrent_bumps_are_all_counted():
+    """Each bump is its own point, so concurrent writers never lose an increment."""
+    client = FakeQdrant()
+    bump_generation(client, "docs")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: bump_generation(client, "docs"), range(20)))
+
+    assert read_generations(client, ["docs"]) == {"docs": 21}
+
+
+def test_tracker_serves_cached_generation_until_refresh():
+    client = FakeQdrant()
+    bump_generation(client, "docs")
+    tracker = GenerationTracker(client, interval=60)
+
+    assert tracker.get("docs") == 0  # not tracked yet
+    assert tracker.track("docs") == 1
+
+    bump_generation(client, "docs")
+    assert tracker.get("docs") == 1
+    assert tracker.refresh() == {"docs": 2}
+    assert tracker.get("docs") == 2
+
+
+@pytest.mark.asyncio
+async def test_listeners_hear_about_generation_changes():
+    client = FakeQdrant()
+    tracker = GenerationTracker(client, interval=0.01)
+    tracker.track("docs")
+    changes = []
+    tracker.subscribe(lambda name, generation: changes.append((name, generation)))
+
+    tracker.start()
+    bump_generation(client, "docs")
+    await asyncio.sleep(0.05)
+    await tracker.stop()
+
+    assert changes == [("docs", 1)]
@@ -0,0 +1,85 @@
+"""
+Tests for the ingestion chunk embedding cache.
+"""
+
+from typing import List
+
+from llama_index.core.embeddings import MockEmbedding
+
+from ingestion_service.embedding_cache import (
+    CachedEmbedding,
+    EmbeddingStore,
+    embedding_cache_key,
+)
+
+
+class CountingEmbedding(MockEmbedding):
+    """Mock embedding that records every text sent to the model."""
+
+    calls: List[str] = []
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        self.calls.extend(texts)
+        return super()._get_text_embeddings(texts)
+
+
+def test_cache_key_ignores_whitespace_and_separates_models():
+    """Keys are stable across reformatting but differ per model."""
+    assert embedding_cache_key("nomic", "a  b\n c") == embedding_cache_key("nomic", "a b c")
+    assert embedding_cache_key("nomic", "text") != embedding_cache_key("mxbai", "text")
+
+
+def test_store_round_trip_and_eviction(tmp_path):
+    """Vectors survive a round trip and the store stays within max_entries."""
+    store = EmbeddingStore(str(tmp_path / "cache.sqlite3"), max_entries=10)
+    store.put_many({f"k{i}": [float(i), 0.5] for i in range(12)})
+
+    assert len(store) <= 10
+    found = store.get_many(["k11"])
+    assert found["k11"] == [11.0, 0.5]
+    assert "k0" not in store.get_many(["k0"])
+
+
+def test_cached_embedding_only_embeds_misses(tmp_path):
+    """Repeated chunks are served from the cache instead of the model."""
+    inner = CountingEmbedding(embed_dim=4, model_name="mock")
+    inner.calls = []
+    cached = CachedEmbedding(inner, EmbeddingStore(str(tmp_path / "cache.sqlite3")))
+
+    first = cached.get_text_embedding_batch(["licence footer", "section one"])
+    second = cached.get_text_embedding_batch(["licence  footer", "section two"])
+
+    assert inner.calls == ["licence footer", "section one", "section two"]
+    assert second[0] == first[0]
+    assert cached.hit_ratio == 0.25
+
+
+def test_identical_chunks_from_different_files_share_cache_entries(tmp_path):
+    """Real nodes: file path and chunk position are not part of the embedded text."""
+    from llama_index.core.schema import MetadataMode
+
+    from ingestion_service.chunking import parse_and_chunk_file
+
+    text = "# Licence\n\n" + "Redistribution is permitted under these terms. " * 60
+    paths = []
+    for directory in ("service-a", "service-b"):
+        (tmp_path / directory).mkdir()
+        path = tmp_path / directory / "LICENSE.md"
+        path.write_text(text)
+        paths.append(str(path))
+    nodes_a = parse_and_chunk_file(paths[0], None, 64, 0)[1]
+    nodes_b = parse_and_chunk_file(paths[1], None, 64, 0)[1]
+    assert len(nodes_a) > 1
+
+    texts_a = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes_a]
+    texts_b = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes_b]
+    assert all("chunk_index" not in text and paths[0] not in text for text in texts_a)
+    assert nodes_a[1].metadata["chunk_index"] == 1  # still stored in the payload
+
+    inner = CountingEmbedding(embed_dim=4, model_name="mock")
+    inner.calls = []
+    cached = CachedEmbedding(inner, EmbeddingStore(str(tmp_path / "cache.sqlite3")))
+    cached.get_text_embedding_batch(texts_a)
+    cached.get_text_embedding_batch(texts_b)
+
+    assert len(inner.calls) == len(set(texts_a))
@@ -0,0 +1,86 @@
+"""
+Tests for the per-model embedding pool and its swap-aware scheduler.
+"""
+
+import asyncio
+
+import pytest
+from llama_index.core.embeddings import MockEmbedding
+
+from query_service.embedding_cache import EmbeddingCache
+from query_service.embedding_pool import EmbeddingModelPool, ModelScheduler
+
+
+async def _hold(scheduler, model, order, release):
+    async with scheduler.turn(model):
+        order.append(model)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_resident_model_keeps_serving_until_switch_window():
+    """A call for another model waits; calls for the resident model run meanwhile."""
+    scheduler = ModelScheduler(max_resident=1, switch_after=60)
+    order, release = [], asyncio.Event()
+
+    first = asyncio.create_task(_hold(scheduler, "nomic", order, release))
+    await asyncio.sleep(0)
+    other = asyncio.create_task(_hold(scheduler, "gemma", order, release))
+    await asyncio.sleep(0)
+    same = asyncio.create_task(_hold(scheduler, "nomic", order, release))
+    await asyncio.sleep(0)
+
+    assert order == ["nomic", "nomic"]
+    assert scheduler.describe()["waiting"] == 1
+
+    release.set()
+    await asyncio.gather(first, other, same)
+    assert order == ["nomic", "nomic", "gemma"]
+    assert scheduler.resident() == ["gemma"]
+    assert scheduler.swaps == 1
+
+
+@pytest.mark.asyncio
+async def test_starving_waiter_blocks_new_calls_for_resident_model():
+    """Past the switch window, new calls queue behind the waiting model."""
+    scheduler = ModelScheduler(max_resident=1, switch_after=0)
+    order, release = [], asyncio.Event()
+
+    first = asyncio.create_task(_hold(scheduler, "nomic", order, release))
+    await asyncio.sleep(0)
+    other = asyncio.create_task(_hold(scheduler, "gemma", order, release))
+    await asyncio.sleep(0)
+    same = asyncio.create_task(_hold(scheduler, "nomic", order, release))
+    await asyncio.sleep(0)
+
+    assert order == ["nomic"]
+    release.set()
+    await asyncio.gather(first, other, same)
+    assert order == ["nomic", "gemma", "nomic"]
+
+
+def test_sync_drops_models_ollama_unloaded():
+    scheduler = ModelScheduler(max_resident=2)
+    scheduler.sync(["nomic-embed-text:latest", "mxbai-embed-large:latest"])
+    assert set(scheduler.resident()) == {"nomic-embed-text", "mxbai-embed-large"}
+
+    scheduler.sync(["mxbai-embed-large:latest"])
+    assert scheduler.resident() == ["mxbai-embed-large"]
+
+
+@pytest.mark.asyncio
+async def test_pool_shares_one_gated_client_per_model():
+    built = []
+
+    def factory(name):
+        built.append(name)
+        return MockEmbedding(embed_dim=4, model_name=name)
+
+    pool = EmbeddingModelPool(factory, EmbeddingCache(max_size=10), ModelScheduler(max_resident=1))
+
+    assert pool.get("nomic") is pool.get("nomic")
+    assert pool.get("gemma").model_name == "gemma"
+    assert built == ["nomic", "gemma"]
+
+    await pool.get("gemma").aget_query_embedding("PETR4")
+    assert pool.scheduler.resident() == ["gemma"]
@@ -0,0 +1,97 @@
+"""
+Tests for the flock-based cross-process GPU lease.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+SHARED_DIR = Path(__file__).resolve().parent.parent / "shared"
+if str(SHARED_DIR) not in sys.path:
+    sys.path.insert(0, str(SHARED_DIR))
+
+from gpu_lease import (  # type: ignore  # noqa: E402
+    CrossProcessLease,
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    Ticket,
+)
+
+
+@pytest.fixture
+def lease(tmp_path):
+    return CrossProcessLease(str(tmp_path / "gpu.lock"), poll_seconds=0.01)
+
+
+async def _queue_waiters(lease, requests, order):
+    """Start one waiter per (name, priority) while the lease is busy."""
+
+    async def waiter(name, priority):
+        held = await lease.acquire(name, priority)
+        order.append(name)
+        await asyncio.sleep(0.01)
+        lease.release(held)
+
+    tasks = []
+    for name, priority in requests:
+        tasks.append(asyncio.create_task(waiter(name, priority)))
+        # Let each waiter register its ticket before the next one arrives.
+        while len(lease.waiting()) < len(tasks):
+            await asyncio.sleep(0.005)
+    return tasks
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_jump_ahead_of_bulk_in_fifo_order(lease):
+    """Lower priority values go first; arrival order breaks ties."""
+    holder = await lease.acquire("ingest_directory", PRIORITY_BULK)
+    order = []
+    tasks = await _queue_waiters(
+        lease,
+        [
+            ("bulk-1", PRIORITY_BULK),
+            ("bulk-2", PRIORITY_BULK),
+            ("query-1", PRIORITY_INTERACTIVE),
+            ("query-2", PRIORITY_INTERACTIVE),
+        ],
+        order,
+    )
+
+    lease.release(holder)
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=5)
+
+    assert order == ["query-1", "query-2", "bulk-1", "bulk-2"]
+    assert lease.waiting() == []
+
+
+@pytest.mark.asyncio
+async def test_tickets_of_dead_processes_are_dropped(lease):
+    """A ticket left by a crashed waiter does not block the queue."""
+    lease._prepare()
+    ghost = Ticket(PRIORITY_INTERACTIVE, 1, 0, "ghost")
+    Path(lease.queue_dir, ghost.name).touch()
+
+    held = await asyncio.wait_for(lease.acquire("query", PRIORITY_BULK), timeout=1)
+    lease.release(held)
+
+    assert not os.path.exists(os.path.join(lease.queue_dir, ghost.name))
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue(lease):
+    """Cancelling a waiter removes its ticket and never leaks the lock."""
+    holder = await lease.acquire("query", PRIORITY_INTERACTIVE)
+    waiter = asyncio.create_task(lease.acquire("ingest_document", PRIORITY_BULK))
+    await asyncio.sleep(0.05)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    lease.release(holder)
+
+    held = await asyncio.wait_for(lease.acquire("query", PRIORITY_INTERACTIVE), timeout=1)
+    lease.release(held)
+    assert lease.waiting() == []
@@ -0,0 +1,56 @@
+"""
+Tests for the separate embedding / search / generation concurrency pools.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+SHARED_DIR = Path(__file__).resolve().parent.parent / "shared"
+if str(SHARED_DIR) not in sys.path:
+    sys.path.insert(0, str(SHARED_DIR))
+
+import gpu  # type: ignore  # noqa: E402
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    """Fresh single-slot pools without the inter-process lock."""
+    fresh = {
+        name: gpu.ConcurrencyPool(name, 1)
+        for name in (gpu.EMBEDDING_POOL, gpu.SEARCH_POOL, gpu.GENERATION_POOL)
+    }
+    monkeypatch.setattr(gpu, "_POOLS", fresh)
+    return fresh
+
+
+async def _acquired_within(pool: str, timeout: float = 0.05) -> bool:
+    async def enter():
+        async with gpu.acquire_slot(pool, "test"):
+            return True
+
+    try:
+        return await asyncio.wait_for(enter(), timeout)
+    except asyncio.TimeoutError:
+        return False
+
+
+@pytest.mark.asyncio
+async def test_search_and_embedding_do_not_queue_behind_generation(pools):
+    """A busy generation slot blocks only generation."""
+    async with gpu.acquire_gpu_slot("long_generation") as usage:
+        assert usage["pool"] == gpu.GENERATION_POOL
+        assert await _acquired_within(gpu.SEARCH_POOL)
+        assert await _acquired_within(gpu.EMBEDDING_POOL)
+        assert not await _acquired_within(gpu.GENERATION_POOL)
+
+    assert await _acquired_within(gpu.GENERATION_POOL)
+
+
+@pytest.mark.asyncio
+async def test_unknown_pool_is_rejected(pools):
+    with pytest.raises(ValueError):
+        async with gpu.acquire_slot("rendering"):
+            pass
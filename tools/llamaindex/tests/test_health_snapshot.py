@@ -0,0 +1,56 @@
+"""
+Tests for the cached health snapshot.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+SHARED_DIR = Path(__file__).resolve().parent.parent / "shared"
+if str(SHARED_DIR) not in sys.path:
+    sys.path.insert(0, str(SHARED_DIR))
+
+from health_snapshot import HealthSnapshot  # type: ignore  # noqa: E402
+
+
+@pytest.mark.asyncio
+async def test_snapshot_probes_once_per_interval():
+    calls = []
+
+    def probe():
+        calls.append(1)
+        return {"status": "healthy", "vectors": len(calls)}
+
+    snapshot = HealthSnapshot(probe, interval=60)
+    first = await snapshot.get()
+    second = await snapshot.get()
+
+    assert len(calls) == 1
+    assert first["vectors"] == second["vectors"] == 1
+    assert second["snapshotAgeSeconds"] >= 0
+
+    await snapshot.refresh()
+    assert (await snapshot.get())["vectors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_probe_errors_become_degraded_snapshots():
+    def probe():
+        raise ConnectionError("qdrant unreachable")
+
+    snapshot = HealthSnapshot(probe, interval=60)
+    result = await snapshot.get()
+
+    assert result["status"] == "degraded"
+    assert "qdrant unreachable" in result["error"]
+
+
+@pytest.mark.asyncio
+async def test_background_refresher_starts_and_stops():
+    snapshot = HealthSnapshot(lambda: {"status": "healthy"}, interval=0.01)
+    snapshot.start()
+    await asyncio.sleep(0.05)
+    await snapshot.stop()
+    assert snapshot.age is not None
@@ -0,0 +1,99 @@
+"""
+Tests for hybrid (dense + BM25 sparse) retrieval.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+
+from query_service.hybrid import HybridRetriever, reciprocal_rank_fusion
+
+SHARED_DIR = Path(__file__).resolve().parent.parent / "shared"
+if str(SHARED_DIR) not in sys.path:
+    sys.path.insert(0, str(SHARED_DIR))
+
+from sparse_vectors import BM25SparseEncoder, tokenize  # type: ignore  # noqa: E402
+
+
+def _dot(query, document):
+    weights = dict(zip(*document))
+    return sum(weights.get(idx, 0.0) * value for idx, value in zip(*query))
+
+
+def test_identifiers_are_kept_whole_and_split():
+    assert tokenize("Set LLAMAINDEX_CHUNK_SIZE") == ["set", "llamaindex_chunk_size", "llamaindex", "chunk", "size"]
+    assert tokenize("getCollectionInfo()") == ["getcollectioninfo", "get", "collection", "info"]
+
+
+def test_exact_identifier_outscores_loose_word_matches():
+    encoder = BM25SparseEncoder()
+    query = encoder.encode_query("LLAMAINDEX_CHUNK_SIZE")
+    exact = encoder.encode_document("Tune LLAMAINDEX_CHUNK_SIZE for long documents.")
+    loose = encoder.encode_document("The chunk size of llamaindex documents matters.")
+
+    assert _dot(query, exact) > _dot(query, loose) > 0
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "a"]], key=lambda item: item, k=60)
+
+    assert [item for item, _ in fused] == ["b", "a", "d", "c"]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+
+class FakeDenseRetriever:
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    async def aretrieve(self, query_bundle):
+        return [NodeWithScore(node=node, score=0.9 - idx / 10) for idx, node in enumerate(self.nodes)]
+
+
+class FakeAsyncClient:
+    def __init__(self, ids):
+        self.ids = ids
+        self.calls = []
+
+    async def query_points(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(points=[SimpleNamespace(id=point_id, score=7.0) for point_id in self.ids])
+
+
+class FakeVectorStore:
+    collection_name = "docs"
+
+    def __init__(self, nodes, sparse_ids):
+        self.by_id = {node.node_id: node for node in nodes}
+        self._client = None
+        self._aclient = FakeAsyncClient(sparse_ids)
+
+    def parse_to_query_result(self, points):
+        return SimpleNamespace(
+            nodes=[self.by_id[point.id] for point in points],
+            similarities=[point.score for point in points],
+        )
+
+
+@pytest.mark.asyncio
+async def test_hybrid_retriever_fuses_dense_and_sparse_results():
+    """A keyword-only hit surfaces next to dense hits; shared hits rank first."""
+    nodes = {name: TextNode(id_=name, text=name) for name in ("paraphrase", "shared", "identifier")}
+    vector_store = FakeVectorStore(nodes.values(), sparse_ids=["identifier", "shared"])
+    retriever = HybridRetriever(
+        FakeDenseRetriever([nodes["paraphrase"], nodes["shared"]]),
+        vector_store,
+        BM25SparseEncoder(),
+        "text-sparse",
+        similarity_top_k=2,
+        filters={"file_path": "/docs/a.md"},
+    )
+
+    results = await retriever.aretrieve(QueryBundle(query_str="LLAMAINDEX_CHUNK_SIZE", embedding=[0.1]))
+
+    assert [result.node.node_id for result in results] == ["shared", "paraphrase"]
+    call = vector_store._aclient.calls[0]
+    assert call["using"] == "text-sparse"
+    assert call["query_filter"].must[0].key == "file_path"
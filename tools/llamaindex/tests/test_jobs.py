@@ -0,0 +1,86 @@
+"""
+Tests for the background ingestion job manager.
+"""
+
+import asyncio
+
+import pytest
+
+from ingestion_service.jobs import JobManager, SqliteJobStore
+
+
+async def _fake_directory_runner(payload, progress):
+    progress.set_totals(files=2, chunks=4)
+    progress.advance(files=2, chunks=4, size_bytes=128)
+    return {"success": True, "directory": payload["directory_path"]}
+
+
+async def _failing_runner(payload, progress):
+    raise ValueError("boom")
+
+
+@pytest.mark.asyncio
+async def test_job_runs_and_persists(tmp_path):
+    """A tracked job completes, records progress and is readable from the store."""
+    store = SqliteJobStore(str(tmp_path / "jobs.sqlite3"))
+    manager = JobManager(store, workers=1)
+    manager.register("incremental", _fake_directory_runner)
+    await manager.start()
+    try:
+        job = manager.submit("incremental", "documentation", {"directory_path": "/docs"}, track_result=True)
+        result = await manager.wait(job.id)
+    finally:
+        await manager.stop()
+
+    assert result["directory"] == "/docs"
+    stored = store.get(job.id)
+    assert stored.status == "completed"
+    assert stored.documents_processed == 2
+    assert stored.chunks_generated == 4
+    assert stored.duration_ms is not None
+
+
+@pytest.mark.asyncio
+async def test_failed_job_records_error(tmp_path):
+    """Runner exceptions mark the job failed and propagate to waiters."""
+    store = SqliteJobStore(str(tmp_path / "jobs.sqlite3"))
+    manager = JobManager(store, workers=1)
+    manager.register("full_index", _failing_runner)
+    await manager.start()
+    try:
+        job = manager.submit("full_index", "documentation", {}, track_result=True)
+        with pytest.raises(ValueError):
+            await manager.wait(job.id)
+    finally:
+        await manager.stop()
+
+    stored = store.get(job.id)
+    assert stored.status == "failed"
+    assert stored.error_message == "boom"
+
+
+@pytest.mark.asyncio
+async def test_interrupted_jobs_are_requeued_on_start(tmp_path):
+    """Jobs left queued by a previous process run after a restart."""
+    path = str(tmp_path / "jobs.sqlite3")
+    first = JobManager(SqliteJobStore(path), workers=1)
+    first.register("incremental", _fake_directory_runner)
+    await first.start()
+    await first.stop()
+    # Workers are gone: the job is persisted as queued, simulating a crash before execution.
+    job = first.submit("incremental", "documentation", {"directory_path": "/docs"})
+    await first.stop()
+
+    second = JobManager(SqliteJobStore(path), workers=1)
+    second.register("incremental", _fake_directory_runner)
+    await second.start()
+    try:
+        for _ in range(50):
+            stored = second.store.get(job.id)
+            if stored.status == "completed":
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await second.stop()
+
+    assert second.store.get(job.id).status == "completed"
@@ -0,0 +1,93 @@
+"""
+Tests for the incremental ingestion manifest.
+"""
+
+import os
+
+from ingestion_service.manifest import (
+    CONTENT_HASH_KEY,
+    FileFingerprint,
+    fingerprint_file,
+    plan_full,
+    plan_incremental,
+)
+
+
+def _write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_plan_incremental_classifies_files(tmp_path):
+    """Added, changed, unchanged and removed files are reported separately."""
+    unchanged = _write(tmp_path / "unchanged.md", "# Same")
+    changed = _write(tmp_path / "changed.md", "# Before")
+    added = _write(tmp_path / "added.md", "# New")
+    removed = str(tmp_path / "removed.md")
+
+    manifest = {
+        unchanged: fingerprint_file(unchanged),
+        changed: fingerprint_file(changed),
+        removed: FileFingerprint(path=removed, size=1, mtime_ns=1, sha256="deadbeef"),
+    }
+    (tmp_path / "changed.md").write_text("# After, with more text")
+
+    plan = plan_incremental([unchanged, changed, added], manifest, str(tmp_path))
+
+    assert plan.unchanged == [unchanged]
+    assert plan.changed == [changed]
+    assert plan.added == [added]
+    assert plan.removed == [removed]
+    assert plan.to_ingest == [added, changed]
+    assert plan.to_purge == [changed, removed]
+
+
+def test_plan_incremental_touch_only_keeps_file_unchanged(tmp_path):
+    """A new mtime with identical content does not trigger re-embedding."""
+    path = _write(tmp_path / "doc.md", "# Stable")
+    manifest = {path: fingerprint_file(path)}
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+    plan = plan_incremental([path], manifest, str(tmp_path))
+
+    assert plan.unchanged == [path]
+    assert plan.touched == [path]
+    assert not plan.to_ingest
+
+
+def test_plan_incremental_ignores_entries_outside_scope(tmp_path):
+    """Only manifest entries under the scanned directory can be removed."""
+    scope = tmp_path / "docs"
+    scope.mkdir()
+    outside = str(tmp_path / "other" / "gone.md")
+    manifest = {outside: FileFingerprint(path=outside, size=1, mtime_ns=1, sha256="x")}
+
+    plan = plan_incremental([], manifest, str(scope))
+
+    assert plan.removed == []
+
+
+def test_plan_incremental_rehashes_legacy_points(tmp_path):
+    """Points ingested before fingerprints existed are treated as changed."""
+    path = _write(tmp_path / "legacy.md", "# Legacy")
+    stat = os.stat(path)
+    manifest = {path: FileFingerprint(path=path, size=stat.st_size, mtime_ns=stat.st_mtime_ns)}
+
+    plan = plan_incremental([path], manifest, str(tmp_path))
+
+    assert plan.changed == [path]
+    assert plan.fingerprints[path].as_metadata()[CONTENT_HASH_KEY]
+
+
+def test_plan_full_purges_known_files(tmp_path):
+    """Full runs re-embed everything but still drop previous points of known files."""
+    known = _write(tmp_path / "known.md", "# Known")
+    fresh = _write(tmp_path / "fresh.md", "# Fresh")
+    manifest = {known: fingerprint_file(known)}
+
+    plan = plan_full([known, fresh], manifest)
+
+    assert plan.changed == [known]
+    assert plan.added == [fresh]
+    assert plan.to_purge == [known]
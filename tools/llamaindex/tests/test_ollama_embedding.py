@@ -0,0 +1,106 @@
+"""
+Tests for the batched Ollama embedding backend.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from ingestion_service import ollama_embedding
+from ingestion_service.ollama_embedding import BatchedOllamaEmbedding, EmbeddingBatchError
+
+
+def _model(**kwargs):
+    return BatchedOllamaEmbedding(model_name="nomic-embed-text", **kwargs)
+
+
+def _serve(model, handler):
+    """Route the model's async client to ``handler`` and record every request's inputs."""
+    requests = []
+
+    def record(request):
+        inputs = json.loads(request.content)["input"]
+        requests.append(inputs)
+        return handler(inputs)
+
+    model._aclient = httpx.AsyncClient(base_url=model.base_url, transport=httpx.MockTransport(record))
+    model._aclient_loop = asyncio.get_running_loop()
+    model._semaphore = asyncio.Semaphore(model.max_in_flight)
+    return requests
+
+
+def test_batches_respect_size_and_token_budget():
+    """Batches are capped by item count and by the estimated token budget."""
+    model = _model(initial_batch_size=4, max_batch_tokens=100, context_length=50)
+    texts = ["x" * 40] * 6 + ["y" * 4000] * 3  # 10 tokens each, then 50 (clamped to context)
+
+    batches = model._plan_batches(texts)
+
+    assert batches[0] == [0, 1, 2, 3]
+    assert [len(batch) for batch in batches] == [4, 3, 2]
+    assert sorted(idx for batch in batches for idx in batch) == list(range(len(texts)))
+
+
+def test_batch_size_adapts_to_latency():
+    """Slow or failed requests halve the batch size; fast full batches grow it."""
+    model = _model(initial_batch_size=16, max_batch_size=32, target_latency_seconds=1.0)
+
+    model._observe(16, 0.1)
+    assert model.batch_size == 20
+
+    model._observe(20, 5.0)
+    assert model.batch_size == 10
+
+    model._observe(10, 0.1, failed=True)
+    assert model.batch_size == 5
+
+
+@pytest.mark.asyncio
+async def test_input_errors_split_the_batch_and_report_failed_inputs():
+    """A rejected input is isolated by splitting; the rest of the batch is embedded."""
+    model = _model(initial_batch_size=4)
+
+    def handler(inputs):
+        if "bad" in inputs:
+            return httpx.Response(400, json={"error": "input length exceeds the context length"})
+        return httpx.Response(200, json={"embeddings": [[1.0]] * len(inputs)})
+
+    requests = _serve(model, handler)
+    with pytest.raises(EmbeddingBatchError) as excinfo:
+        await model.aget_text_embedding_batch(["a", "b", "bad", "c"])
+
+    assert list(excinfo.value.failed) == [2]
+    assert excinfo.value.embeddings == [[1.0], [1.0], None, [1.0]]
+    assert requests[0] == ["a", "b", "bad", "c"]
+    assert ["a", "b"] in requests and ["bad"] in requests and ["c"] in requests
+
+
+@pytest.mark.asyncio
+async def test_transport_errors_retry_whole_batch_without_splitting(monkeypatch):
+    """Connection failures retry the same batch and then raise; they never split it."""
+    monkeypatch.setattr(ollama_embedding, "_RETRY_BACKOFF_SECONDS", 0)
+    model = _model(initial_batch_size=4, max_retries=2)
+
+    def handler(inputs):
+        raise httpx.ConnectError("connection refused")
+
+    requests = _serve(model, handler)
+    with pytest.raises(httpx.ConnectError):
+        await model.aget_text_embedding_batch(["a", "b", "c", "d"])
+
+    assert requests == [["a", "b", "c", "d"]] * 3
+
+
+@pytest.mark.asyncio
+async def test_client_is_reused_across_calls():
+    model = _model()
+    requests = _serve(model, lambda inputs: httpx.Response(200, json={"embeddings": [[0.5]] * len(inputs)}))
+    client = model._aclient
+
+    await model.aget_text_embedding_batch(["a"])
+    await model.aget_text_embedding_batch(["b"])
+
+    assert model._aclient is client
+    assert requests == [["a"], ["b"]]
@@ -0,0 +1,336 @@
+"""
+Tests for the streaming ingestion pipeline.
+"""
+
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+from llama_index.core.embeddings import MockEmbedding
+
+from ingestion_service.chunking import parse_and_chunk_file
+from ingestion_service.jobs import NullProgress
+from ingestion_service.manifest import CONTENT_HASH_KEY, fingerprint_file
+from ingestion_service.ollama_embedding import EmbeddingBatchError
+from ingestion_service.pipeline import (
+    FanoutTarget,
+    PipelineConfig,
+    order_targets,
+    run_fanout_pipeline,
+    run_ingestion_pipeline,
+)
+
+SHARED_DIR = Path(__file__).resolve().parent.parent / "shared"
+if str(SHARED_DIR) not in sys.path:
+    sys.path.insert(0, str(SHARED_DIR))
+
+from gpu_lease import PRIORITY_BULK, PRIORITY_INTERACTIVE, CrossProcessLease  # type: ignore  # noqa: E402
+
+
+class RecordingVectorStore:
+    """Collects upserted nodes and the size of every batch."""
+
+    def __init__(self):
+        self.nodes = []
+        self.batches = []
+
+    def add(self, nodes):
+        self.batches.append(len(nodes))
+        self.nodes.extend(nodes)
+        return [node.node_id for node in nodes]
+
+
+class RecordingProgress(NullProgress):
+    def __init__(self):
+        self.files = 0
+        self.chunks = 0
+        self.failed = []
+
+    def advance(self, files=0, chunks=0, skipped=0, size_bytes=0):
+        self.files += files
+        self.chunks += chunks
+
+    def fail_file(self, path):
+        self.failed.append(path)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_streams_files_in_batches(tmp_path):
+    """Every chunk is embedded and upserted in bounded batches with fingerprints attached."""
+    files = []
+    for idx in range(5):
+        path = tmp_path / f"doc{idx}.md"
+        path.write_text("\n\n".join(f"Paragraph {idx}-{n} " + "word " * 40 for n in range(6)))
+        files.append(str(path))
+    fingerprints = {path: fingerprint_file(path) for path in files}
+    store = RecordingVectorStore()
+    progress = RecordingProgress()
+    config = PipelineConfig(
+        chunk_size=64,
+        chunk_overlap=8,
+        embed_batch_size=4,
+        upsert_batch_size=8,
+        max_in_flight=1,
+    )
+
+    stats = await run_ingestion_pipeline(
+        files, fingerprints, store, MockEmbedding(embed_dim=8), config, progress
+    )
+
+    assert stats.files_read == 5
+    assert stats.vectors_upserted == stats.chunks_generated == len(store.nodes)
+    assert max(store.batches) <= config.upsert_batch_size + config.embed_batch_size
+    assert all(node.embedding and node.metadata[CONTENT_HASH_KEY] for node in store.nodes)
+    assert progress.files == 5
+    assert progress.chunks == stats.chunks_generated
+
+
+@pytest.mark.asyncio
+async def test_pipeline_skips_unreadable_files(tmp_path):
+    """A file that fails to load is reported and the rest of the run continues."""
+    good = tmp_path / "good.md"
+    good.write_text("# Good\n\nSome content.")
+    missing = str(tmp_path / "missing.md")
+    store = RecordingVectorStore()
+    progress = RecordingProgress()
+
+    stats = await run_ingestion_pipeline(
+        [missing, str(good)],
+        {str(good): fingerprint_file(str(good))},
+        store,
+        MockEmbedding(embed_dim=8),
+        PipelineConfig(chunk_size=256, chunk_overlap=0),
+        progress,
+    )
+
+    assert stats.files_read == 1
+    assert progress.failed == [missing]
+    assert len(stats.errors) == 1
+    assert store.nodes
+
+
+@pytest.mark.asyncio
+async def test_pipeline_keeps_file_order_on_threads(tmp_path, monkeypatch):
+    """With the pool disabled, files still reach the vector store in listing order."""
+    monkeypatch.setenv("LLAMAINDEX_PARSE_WORKERS", "0")
+    files = []
+    for idx in range(4):
+        path = tmp_path / f"doc{idx}.md"
+        path.write_text(f"# Doc {idx}")
+        files.append(str(path))
+    store = RecordingVectorStore()
+
+    await run_ingestion_pipeline(
+        files,
+        {},
+        store,
+        MockEmbedding(embed_dim=8),
+        PipelineConfig(chunk_size=256, chunk_overlap=0, max_in_flight=3),
+        RecordingProgress(),
+    )
+
+    assert [node.metadata["file_path"] for node in store.nodes] == files
+
+
+def test_parse_and_chunk_file_attaches_fingerprint(tmp_path):
+    """The worker entry point returns nodes that carry the manifest fingerprint."""
+    path = tmp_path / "doc.md"
+    path.write_text("# Title\n\n" + "sentence. " * 200)
+    fingerprint = fingerprint_file(str(path))
+
+    document_count, nodes = parse_and_chunk_file(str(path), fingerprint, 64, 0)
+
+    assert document_count == 1
+    assert len(nodes) > 1
+    assert {node.metadata[CONTENT_HASH_KEY] for node in nodes} == {fingerprint.sha256}
+
+
+class FlakyEmbedding(MockEmbedding):
+    """Mock embedding that rejects poisoned chunks the way BatchedOllamaEmbedding reports them."""
+
+    async def _aget_text_embeddings(self, texts):
+        embeddings = await super()._aget_text_embeddings(texts)
+        failed = {idx: ValueError("model rejected input") for idx, text in enumerate(texts) if "POISON" in text}
+        if failed:
+            raise EmbeddingBatchError(failed, [None if idx in failed else vec for idx, vec in enumerate(embeddings)])
+        return embeddings
+
+
+class UnreachableEmbedding(MockEmbedding):
+    """Mock embedding whose backend is down; counts the requests it receives."""
+
+    calls: int = 0
+
+    async def _aget_text_embeddings(self, texts):
+        self.calls += 1
+        raise ConnectionError("ollama unreachable")
+
+
+@pytest.mark.asyncio
+async def test_pipeline_isolates_embedding_failures(tmp_path, monkeypatch):
+    """A chunk that cannot be embedded fails its file only; other files are stored."""
+    monkeypatch.setenv("LLAMAINDEX_PARSE_WORKERS", "0")
+    good = tmp_path / "good.md"
+    good.write_text("# Good\n\nFine content.")
+    bad = tmp_path / "bad.md"
+    bad.write_text("# Bad\n\nPOISON content.")
+    store = RecordingVectorStore()
+    progress = RecordingProgress()
+
+    stats = await run_ingestion_pipeline(
+        [str(good), str(bad)],
+        {},
+        store,
+        FlakyEmbedding(embed_dim=8),
+        PipelineConfig(chunk_size=256, chunk_overlap=0, embed_batch_size=8),
+        progress,
+    )
+
+    assert stats.failed_files == [str(bad)]
+    assert progress.failed == [str(bad)]
+    assert {node.metadata["file_path"] for node in store.nodes} == {str(good)}
+
+
+@pytest.mark.asyncio
+async def test_pipeline_does_not_resend_chunks_after_transport_errors(tmp_path, monkeypatch):
+    """A batch that fails as a whole fails its files once, without per-chunk retries."""
+    monkeypatch.setenv("LLAMAINDEX_PARSE_WORKERS", "0")
+    paths = []
+    for name in ("a.md", "b.md"):
+        path = tmp_path / name
+        path.write_text(f"# {name}\n\nSome content.")
+        paths.append(str(path))
+    store = RecordingVectorStore()
+    embed_model = UnreachableEmbedding(embed_dim=8)
+
+    stats = await run_ingestion_pipeline(
+        paths,
+        {},
+        store,
+        embed_model,
+        PipelineConfig(chunk_size=256, chunk_overlap=0, embed_batch_size=8, embed_concurrency=1),
+        RecordingProgress(),
+    )
+
+    assert embed_model.calls == 1
+    assert sorted(stats.failed_files) == sorted(paths)
+    assert store.nodes == []
+
+
+class SlowEmbedding(MockEmbedding):
+    """Mock embedding that takes a moment per batch and records when each batch runs."""
+
+    events: list = []
+
+    async def _aget_text_embeddings(self, texts):
+        self.events.append("batch")
+        await asyncio.sleep(0.05)
+        return await super()._aget_text_embeddings(texts)
+
+
+@pytest.mark.asyncio
+async def test_interactive_waiter_gets_the_lease_between_embed_batches(tmp_path, monkeypatch):
+    """The bulk run takes the lease per embed batch, so a queued query does not wait for the whole run."""
+    monkeypatch.setenv("LLAMAINDEX_PARSE_WORKERS", "0")
+    paths = []
+    for idx in range(4):
+        path = tmp_path / f"doc{idx}.md"
+        path.write_text(f"# Doc {idx}\n\nShort content {idx}.")
+        paths.append(str(path))
+    lease = CrossProcessLease(str(tmp_path / "gpu.lock"), poll_seconds=0.01)
+    embed_model = SlowEmbedding(embed_dim=8)
+    embed_model.events = []
+
+    @asynccontextmanager
+    async def bulk_gate():
+        held = await lease.acquire("ingest_directory", PRIORITY_BULK)
+        try:
+            yield
+        finally:
+            lease.release(held)
+
+    async def interactive_query():
+        while "batch" not in embed_model.events:
+            await asyncio.sleep(0.005)
+        held = await lease.acquire("query", PRIORITY_INTERACTIVE)
+        embed_model.events.append("query")
+        lease.release(held)
+
+    query = asyncio.create_task(interactive_query())
+    stats = await run_ingestion_pipeline(
+        paths,
+        {},
+        RecordingVectorStore(),
+        embed_model,
+        PipelineConfig(chunk_size=256, chunk_overlap=0, embed_batch_size=1, embed_concurrency=1),
+        RecordingProgress(),
+        embed_gate=bulk_gate,
+    )
+    await query
+
+    assert stats.failed_files == []
+    assert embed_model.events.count("batch") == 4
+    # The query got the lease while bulk batches were still pending.
+    assert embed_model.events.index("query") < len(embed_model.events) - 1
+
+
+def _target(collection, model, files=(), chunk_size=256, store=None):
+    return FanoutTarget(
+        collection=collection,
+        model_name=model,
+        chunk_size=chunk_size,
+        chunk_overlap=0,
+        files=set(files),
+        vector_store=store,
+        embed_model=MockEmbedding(embed_dim=8),
+    )
+
+
+def test_order_targets_groups_models_and_prefers_resident():
+    """Passes are grouped per model, starting with the model already loaded."""
+    targets = [
+        _target("documentation", "nomic-embed-text"),
+        _target("documentation_mxbai", "mxbai-embed-large"),
+        _target("repository__nomic", "nomic-embed-text"),
+    ]
+
+    ordered = order_targets(targets, loaded_models=["mxbai-embed-large:latest"])
+
+    assert [target.collection for target in ordered] == [
+        "documentation_mxbai",
+        "documentation",
+        "repository__nomic",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fanout_reads_once_and_feeds_every_collection(tmp_path, monkeypatch):
+    """Each target gets the chunks of its own files, chunked with its own size."""
+    monkeypatch.setenv("LLAMAINDEX_PARSE_WORKERS", "0")
+    files = []
+    for idx in range(3):
+        path = tmp_path / f"doc{idx}.md"
+        path.write_text("\n\n".join("word " * 60 for _ in range(4)))
+        files.append(str(path))
+    big, small = RecordingVectorStore(), RecordingVectorStore()
+    progress = RecordingProgress()
+
+    stats = await run_fanout_pipeline(
+        files,
+        {},
+        [
+            _target("documentation", "nomic-embed-text", files, chunk_size=512, store=big),
+            _target("documentation_mxbai", "mxbai-embed-large", files[:2], chunk_size=64, store=small),
+        ],
+        PipelineConfig(chunk_size=512, chunk_overlap=0),
+        progress,
+    )
+
+    assert progress.files == 3
+    assert stats["documentation"].files_read == 3
+    assert stats["documentation_mxbai"].files_read == 2
+    assert {node.metadata["file_path"] for node in small.nodes} == set(files[:2])
+    assert len(small.nodes) > len(big.nodes)
+    assert stats["documentation"].vectors_upserted == len(big.nodes)
@@ -0,0 +1,90 @@
+"""
+Tests for buffered query logging and popular-query precomputation.
+"""
+
+import asyncio
+
+import pytest
+
+from query_service.precompute import PopularQueryPrecomputer
+from query_service.query_log import PopularQuery, QueryLog, QueryLogEntry, query_hash
+
+
+def _entry(text="What is PETR4?"):
+    return QueryLogEntry(query_text=text, query_type="query", collection="docs", mode="dense", duration_ms=12)
+
+
+def _enabled_log(**kwargs):
+    log = QueryLog(dsn="postgresql://test", **kwargs)
+    log.enabled = True  # psycopg2 is optional; writes are captured below
+    log.batches = []
+    log._write = log.batches.append
+    return log
+
+
+def test_query_hash_matches_cache_key_normalisation():
+    assert query_hash("  What is PETR4? ") == query_hash("What is PETR4?")
+    assert query_hash("what is petr4?") != query_hash("What is PETR4?")
+
+
+@pytest.mark.asyncio
+async def test_entries_are_buffered_and_written_in_one_batch():
+    log = _enabled_log(batch_size=100)
+    for _ in range(3):
+        log.record(_entry())
+
+    assert log.batches == []  # nothing written on the request path
+    assert await log.flush() == 3
+    assert [len(batch) for batch in log.batches] == [3]
+    assert log.describe()["written"] == 3
+
+
+@pytest.mark.asyncio
+async def test_full_batch_wakes_the_writer_and_full_buffer_drops_oldest():
+    log = _enabled_log(batch_size=2, flush_seconds=60, max_buffer=3)
+    log.start()
+    log.record(_entry("a"))
+    log.record(_entry("b"))
+    await asyncio.sleep(0.05)
+    await log.stop()
+    assert [entry.query_text for entry in log.batches[0]] == ["a", "b"]
+
+    for text in "cdef":
+        log.record(_entry(text))
+    assert [entry.query_text for entry in log._buffer] == ["d", "e", "f"]
+    assert log.dropped == 1
+
+
+def test_disabled_log_ignores_entries():
+    log = QueryLog(dsn=None)
+    log.record(_entry())
+    assert log.describe() == {"enabled": False, "buffered": 0, "written": 0, "dropped": 0}
+
+
+@pytest.mark.asyncio
+async def test_scheduled_collection_warms_its_popular_queries():
+    popular = [
+        PopularQuery("What is PETR4?", "query", "docs", "dense", 5, None, hits=9),
+        PopularQuery("dividend policy", "search", "docs", "hybrid", 10, None, hits=4),
+        PopularQuery("broken", "query", "docs", "dense", 5, None, hits=2),
+    ]
+    warmed = []
+
+    async def warm(query):
+        if query.query_text == "broken":
+            raise RuntimeError("ollama down")
+        warmed.append(query.query_text)
+        return query.query_type == "query"  # the search was already cached
+
+    precomputer = PopularQueryPrecomputer(lambda collection: popular, warm)
+    precomputer.start()
+    precomputer.schedule("docs", 7)
+    for _ in range(50):
+        if "docs" in precomputer.last_runs:
+            break
+        await asyncio.sleep(0.01)
+    await precomputer.stop()
+
+    assert warmed == ["What is PETR4?", "dividend policy"]
+    summary = precomputer.last_runs["docs"]
+    assert (summary["queries"], summary["computed"], summary["cached"], summary["failed"]) == (3, 1, 1, 1)
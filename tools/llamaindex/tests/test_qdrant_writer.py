@@ -0,0 +1,67 @@
+"""
+Tests for the bulk Qdrant writer (no Qdrant server required).
+"""
+
+from llama_index.core.schema import TextNode
+
+from ingestion_service.qdrant_writer import QdrantBulkWriter
+
+
+class FakeClient:
+    """Minimal stand-in recording upsert calls."""
+
+    def __init__(self):
+        self.upserts = []
+
+    def collection_exists(self, name):
+        return False
+
+    def create_collection(self, collection_name, vectors_config):
+        self.created = (collection_name, vectors_config.size)
+
+    def upsert(self, collection_name, points, wait):
+        self.upserts.append((len(points), wait))
+
+
+def test_bulk_writer_batches_and_waits_once():
+    """Batches go out with wait=False and flush adds one wait=True barrier."""
+    client = FakeClient()
+    writer = QdrantBulkWriter(client, "docs", batch_size=4, workers=2)
+    nodes = [TextNode(text=f"chunk {idx}", embedding=[0.1, 0.2, 0.3]) for idx in range(10)]
+
+    ids = writer.add(nodes)
+    writer.flush()
+    writer.close()
+
+    assert ids == [node.node_id for node in nodes]
+    assert client.created == ("docs", 3)
+    assert sorted(client.upserts[:-1]) == [(2, False), (4, False), (4, False)]
+    assert client.upserts[-1] == (2, True)
+
+
+class SparseEncoder:
+    def encode_document(self, text):
+        return [len(text)], [1.0]
+
+
+class RecordingClient(FakeClient):
+    def create_collection(self, collection_name, vectors_config, sparse_vectors_config=None):
+        self.sparse_config = sparse_vectors_config
+
+    def upsert(self, collection_name, points, wait):
+        self.points = points
+
+
+def test_bulk_writer_stores_sparse_vectors_for_hybrid_search():
+    """New collections get the sparse vector and points carry both vectors."""
+    client = RecordingClient()
+    writer = QdrantBulkWriter(client, "docs", sparse_encoder=SparseEncoder(), sparse_vector_name="text-sparse")
+
+    writer.add([TextNode(text="LLAMAINDEX_CHUNK_SIZE", embedding=[0.1, 0.2])])
+    writer.flush()
+    writer.close()
+
+    assert list(client.sparse_config) == ["text-sparse"]
+    vector = client.points[0].vector
+    assert vector[""] == [0.1, 0.2]
+    assert vector["text-sparse"].values == [1.0]
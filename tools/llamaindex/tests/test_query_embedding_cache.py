@@ -0,0 +1,128 @@
+"""
+Tests for the query service embedding cache and its embedding-model wrapper.
+"""
+
+from array import array
+from contextlib import asynccontextmanager
+from typing import List
+
+import pytest
+from llama_index.core.embeddings import MockEmbedding
+
+from query_service.embedding_cache import CachedQueryEmbedding, EmbeddingCache
+
+
+class CountingEmbedding(MockEmbedding):
+    """Mock embedding that records every query sent to the model."""
+
+    calls: List[str] = []
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        self.calls.append(query)
+        return super()._get_query_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        self.calls.append(query)
+        return super()._get_query_embedding(query)
+
+
+def test_cache_is_keyed_per_model_and_stores_float32():
+    """The same text cached for one model is a miss for another; case is part of the key."""
+    cache = EmbeddingCache(max_size=10)
+    cache.set("What is RAG?", [0.25, 0.5], model_name="nomic")
+
+    assert cache.get("  What is RAG? ", model_name="nomic") == [0.25, 0.5]
+    assert cache.get("what is rag?", model_name="nomic") is None
+    assert cache.get("What is RAG?", model_name="mxbai") is None
+    stored = next(iter(cache.cache.values()))[1]
+    assert isinstance(stored, array) and stored.typecode == "f"
+
+
+def test_size_estimate_tracks_stored_entries():
+    """Reported memory follows inserts, overwrites and evictions."""
+    cache = EmbeddingCache(max_size=2)
+    cache.set("a", [0.0] * 768)
+    one_entry = cache.get_size_estimate()["bytes"]
+    assert one_entry > 768 * 4
+
+    cache.set("a", [1.0] * 768)
+    assert cache.get_size_estimate()["bytes"] == one_entry
+
+    cache.set("b", [0.0] * 768)
+    cache.set("c", [0.0] * 768)
+    assert cache.evictions == 1
+    assert cache.get_size_estimate()["bytes"] == 2 * one_entry
+
+    cache.clear()
+    assert cache.get_size_estimate()["bytes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_wrapper_only_embeds_new_queries():
+    """Repeated queries are answered from the cache, not the inner model."""
+    inner = CountingEmbedding(embed_dim=8)
+    inner.calls = []
+    model = CachedQueryEmbedding(inner, EmbeddingCache(max_size=10))
+
+    first = await model.aget_query_embedding("order book depth")
+    second = await model.aget_query_embedding("order book depth")
+    model.get_query_embedding("order book depth")
+
+    assert first == second
+    assert inner.calls == ["order book depth"]
+    assert model.model_name == inner.model_name
+
+
+class QueryAwareEmbedding(MockEmbedding):
+    """Mock embedding whose query vectors differ from its text vectors, like instruction-prefixed models."""
+
+    calls: List[str] = []
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        self.calls.append(query)
+        return [float(len(query))] * self.embed_dim
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return [[0.0] * self.embed_dim for _ in texts]
+
+
+@pytest.mark.asyncio
+async def test_query_batch_embeds_all_misses_under_one_gate():
+    """Cached queries are skipped and duplicate misses are embedded once, in one gated call."""
+    inner = QueryAwareEmbedding(embed_dim=8)
+    inner.calls = []
+    gated = []
+
+    @asynccontextmanager
+    async def gate():
+        gated.append(True)
+        yield
+
+    model = CachedQueryEmbedding(inner, EmbeddingCache(max_size=10), gate=gate)
+    await model.aget_query_embedding_batch(["PETR4"])
+
+    vectors = await model.aget_query_embedding_batch(["VALE3", "PETR4", "VALE3", "ITUB4"])
+
+    assert len(vectors) == 4
+    assert sorted(inner.calls) == ["ITUB4", "PETR4", "VALE3"]
+    assert len(gated) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_and_single_paths_cache_the_same_query_vector():
+    """/search/batch and /search store identical vectors under the same key."""
+    batch_cache, single_cache = EmbeddingCache(max_size=10), EmbeddingCache(max_size=10)
+    inner = QueryAwareEmbedding(embed_dim=4)
+    inner.calls = []
+
+    [batched] = await CachedQueryEmbedding(inner, batch_cache).aget_query_embedding_batch(["  PETR4 "])
+    single = await CachedQueryEmbedding(inner, single_cache).aget_query_embedding("  PETR4 ")
+
+    assert batched == single == [5.0] * 4
+    assert batch_cache.get("PETR4", f"{inner.model_name}:query") == single_cache.get(
+        "PETR4", f"{inner.model_name}:query"
+    )
+    assert inner.calls == ["PETR4", "PETR4"]
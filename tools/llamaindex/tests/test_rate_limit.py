@@ -0,0 +1,62 @@
+"""
+Tests for the GCRA rate limiter and its client keys.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from query_service.rate_limit import LocalRateLimitBackend, RateLimiter, RateLimitResult, client_key
+
+
+@pytest.mark.asyncio
+async def test_local_backend_allows_a_full_burst_then_denies():
+    backend = LocalRateLimitBackend(limit=3, period=60, max_keys=100)
+
+    results = [await backend.check("user:alice") for _ in range(4)]
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results[:3]] == [2, 1, 0]
+    assert results[3].retry_after == pytest.approx(20, abs=0.5)
+    assert "Retry-After" in results[3].headers()
+    assert (await backend.check("user:bob")).allowed
+
+
+@pytest.mark.asyncio
+async def test_local_state_is_bounded():
+    backend = LocalRateLimitBackend(limit=1, period=60, max_keys=2)
+    for key in ("a", "b", "c"):
+        await backend.check(key)
+
+    assert len(backend.tats) == 2
+    # The evicted key starts again with a full bucket.
+    assert (await backend.check("a")).allowed
+
+
+class DenyingBackend:
+    def __init__(self):
+        self.calls = 0
+
+    async def check(self, key):
+        self.calls += 1
+        return RateLimitResult(False, 1, 0, reset_after=30, retry_after=30)
+
+
+@pytest.mark.asyncio
+async def test_denied_keys_are_answered_locally(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_BACKEND", "memory")
+    limiter = RateLimiter()
+    limiter.backend = DenyingBackend()
+
+    first = await limiter.check("user:alice")
+    second = await limiter.check("user:alice")
+
+    assert not first.allowed and not second.allowed
+    assert limiter.backend.calls == 1
+
+
+def test_client_key_uses_jwt_subject_not_token():
+    request = SimpleNamespace(headers={"authorization": "Bearer opaque-token"}, client=SimpleNamespace(host="10.0.0.7"))
+
+    assert client_key(request, {"username": "alice"}) == "user:alice"
+    assert client_key(request) == "ip:10.0.0.7"
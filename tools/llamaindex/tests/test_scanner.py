@@ -0,0 +1,74 @@
+"""
+Tests for the ingestion directory scanner.
+"""
+
+import os
+
+from ingestion_service.scanner import ListingCache, ScanFilters, scan_directory
+
+
+def _filters(**overrides):
+    values = dict(
+        allowed_extensions={".md", ".txt"},
+        excluded_dirs={"node_modules"},
+        excluded_names={"_category_.json"},
+        max_size_bytes=100,
+        largest_limit=2,
+    )
+    values.update(overrides)
+    return ScanFilters(**values)
+
+
+def _tree(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "one.md").write_text("# One")
+    (tmp_path / "a" / "big.md").write_text("x" * 500)
+    (tmp_path / "a" / "_category_.json").write_text("{}")
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "two.txt").write_text("two")
+    (tmp_path / "b" / "image.png").write_bytes(b"png")
+    (tmp_path / ".hidden").mkdir()
+    (tmp_path / ".hidden" / "secret.md").write_text("no")
+    (tmp_path / "Node_Modules").mkdir()
+    (tmp_path / "Node_Modules" / "dep.md").write_text("no")
+    (tmp_path / ".env.md").write_text("no")
+    (tmp_path / "root.md").write_text("root")
+
+
+def test_scan_applies_filters_like_os_walk(tmp_path):
+    """Hidden/excluded dirs are pruned and files are counted per skip reason."""
+    _tree(tmp_path)
+
+    scan = scan_directory(str(tmp_path), _filters(), workers=4, cache=None)
+
+    assert sorted(os.path.relpath(path, tmp_path) for path in scan.files) == [
+        os.path.join("a", "one.md"),
+        os.path.join("b", "two.txt"),
+        "root.md",
+    ]
+    assert scan.files_considered == 7
+    assert scan.skipped_hidden == 2
+    assert scan.skipped_extension == 1
+    assert scan.skipped_size == 1
+    assert scan.oversized_files == [(500, str(tmp_path / "a" / "big.md"))]
+    assert [size for size, _ in scan.largest_files] == [500, 5]
+    assert set(scan.file_stats) == set(scan.files)
+
+
+def test_scan_reuses_listings_but_restats_files(tmp_path):
+    """Unchanged directories come from the cache; edited files still get fresh stats."""
+    _tree(tmp_path)
+    old = 1_000_000_000
+    for dirpath, _, _ in os.walk(tmp_path):
+        os.utime(dirpath, ns=(old, old))
+    cache = ListingCache()
+
+    first = scan_directory(str(tmp_path), _filters(), cache=cache)
+    (tmp_path / "root.md").write_text("root, edited")
+    os.utime(tmp_path, ns=(old, old))
+    second = scan_directory(str(tmp_path), _filters(), cache=cache)
+
+    assert first.listings_cached == 0
+    assert second.listings_cached == second.directories_scanned
+    assert second.files == first.files
+    assert second.file_stats[str(tmp_path / "root.md")].st_size == len("root, edited")
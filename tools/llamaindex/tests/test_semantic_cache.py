@@ -0,0 +1,46 @@
+"""
+Tests for the vectorized semantic cache index.
+"""
+
+import numpy as np
+
+from semantic_cache import QueryVectorIndex
+
+
+def test_search_returns_closest_entry_by_cosine():
+    """Top-1 is found by cosine similarity, independent of vector length."""
+    index = QueryVectorIndex()
+    index.add("semantic:a", [1.0, 0.0, 0.0])
+    index.add("semantic:b", [0.0, 10.0, 0.0])
+
+    key, score = index.search([0.1, 2.0, 0.0])
+
+    assert key == "semantic:b"
+    assert 0.99 < score <= 1.0 + 1e-6
+
+
+def test_remove_keeps_rows_packed_and_consistent():
+    """Removing an entry moves the last row into its slot without losing entries."""
+    index = QueryVectorIndex(initial_capacity=2)
+    vectors = np.eye(4, dtype=np.float32)
+    for idx in range(4):
+        index.add(f"semantic:{idx}", vectors[idx])
+
+    assert index.remove("semantic:1")
+    assert not index.remove("semantic:1")
+
+    assert len(index) == 3
+    assert index.search(vectors[1])[1] < 0.5
+    for idx in (0, 2, 3):
+        assert index.search(vectors[idx])[0] == f"semantic:{idx}"
+
+
+def test_add_replaces_existing_key():
+    """Re-adding a key overwrites its vector instead of adding a row."""
+    index = QueryVectorIndex()
+    index.add("semantic:a", [1.0, 0.0])
+    index.add("semantic:a", [0.0, 1.0])
+
+    assert len(index) == 1
+    assert index.search([0.0, 1.0]) == ("semantic:a", 1.0)
+    assert index.search([1.0, 0.0])[1] < 0.5
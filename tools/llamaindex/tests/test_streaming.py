@@ -0,0 +1,110 @@
+"""
+Tests for the SSE answer streaming helpers.
+"""
+
+import json
+from typing import List
+
+import pytest
+
+from query_service.streaming import stream_rag_response
+
+
+class FakeNode:
+    def __init__(self, text: str, score: float):
+        self.text = text
+        self.score = score
+        self.metadata = {"file_path": f"/docs/{text}.md"}
+
+    def get_text(self) -> str:
+        return self.text
+
+
+class FakeStreamingResponse:
+    """Mimics LlamaIndex's AsyncStreamingResponse."""
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.source_nodes = [FakeNode("intro", 0.9)]
+
+    async def async_response_gen(self):
+        for token in self.tokens:
+            yield token
+
+
+class FakeQueryEngine:
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+
+    async def aquery(self, query: str):
+        return FakeStreamingResponse(self.tokens)
+
+
+def _parse(events: List[str]):
+    parsed = []
+    for raw in events:
+        event_line, data_line = raw.strip().split("\n")
+        parsed.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return parsed
+
+
+@pytest.mark.asyncio
+async def test_sources_precede_tokens_and_answer_is_reported():
+    """Sources are sent once retrieval finishes; tokens are forwarded one by one."""
+    completed = []
+
+    async def on_complete(answer, response):
+        completed.append(answer)
+
+    events = [
+        event
+        async for event in stream_rag_response(
+            "what is rag", FakeQueryEngine(["RAG ", "combines ", "retrieval."]), on_complete=on_complete
+        )
+    ]
+    parsed = _parse(events)
+    kinds = [kind for kind, _ in parsed]
+
+    assert kinds == ["start", "status", "sources", "chunk", "chunk", "chunk", "done"]
+    assert parsed[2][1]["sources"][0]["text"] == "intro"
+    assert [data["chunk"] for kind, data in parsed if kind == "chunk"] == ["RAG ", "combines ", "retrieval."]
+    assert parsed[-1][1]["ttft_seconds"] is not None
+    assert completed == ["RAG combines retrieval."]
+
+
+@pytest.mark.asyncio
+async def test_sources_are_sent_before_synthesis_starts():
+    """With separate phases, sources go out before the (GPU-bound) synthesis is awaited."""
+    calls = []
+
+    async def retrieve(query):
+        calls.append("retrieve")
+        return [FakeNode("intro", 0.9)]
+
+    async def synthesize(nodes):
+        calls.append("synthesize")
+        return FakeStreamingResponse(["answer"])
+
+    stream = stream_rag_response("q", FakeQueryEngine([]), retrieve=retrieve, synthesize=synthesize)
+    kinds = []
+    async for event in stream:
+        kind = _parse([event])[0][0]
+        kinds.append(kind)
+        if kind == "sources":
+            assert calls == ["retrieve"]
+
+    assert kinds == ["start", "status", "sources", "chunk", "done"]
+    assert calls == ["retrieve", "synthesize"]
+
+
+@pytest.mark.asyncio
+async def test_errors_become_error_events():
+    """A failing query ends the stream with an error event instead of raising."""
+
+    class BrokenEngine:
+        async def aquery(self, query):
+            raise RuntimeError("qdrant down")
+
+    events = [event async for event in stream_rag_response("q", BrokenEngine())]
+
+    assert _parse(events)[-1] == ("error", {"error": "qdrant down"})
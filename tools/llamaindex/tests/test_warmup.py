@@ -0,0 +1,37 @@
+"""
+Tests for the startup warm-up and readiness state.
+"""
+
+import pytest
+
+from query_service.warmup import WarmupState, warm_up
+
+
+def test_state_is_ready_when_warmup_is_disabled():
+    assert WarmupState(enabled=False).ready
+    assert not WarmupState(enabled=True).ready
+
+
+@pytest.mark.asyncio
+async def test_warmup_builds_indexes_and_loads_models():
+    """Every collection and model is warmed; failures are recorded, not raised."""
+    built, loaded = [], []
+
+    def build_index(name):
+        if name == "missing":
+            raise RuntimeError("Collection 'missing' not found")
+        built.append(name)
+
+    async def preload_model(name):
+        loaded.append(name)
+
+    state = WarmupState(enabled=True)
+    await warm_up(state, ["documentation", "missing"], ["nomic-embed-text"], build_index, preload_model)
+
+    assert state.ready
+    assert built == ["documentation"]
+    assert loaded == ["nomic-embed-text"]
+    report = state.describe()
+    assert report["collections"]["documentation"].startswith("ready")
+    assert report["collections"]["missing"].startswith("error")
+    assert report["models"]["nomic-embed-text"].startswith("loaded")